@@ -3,7 +3,7 @@ API Router v1 - Combine all endpoints
 """
 
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, pos, products, orders, customers
+from app.api.v1.endpoints import auth, pos, products, orders, customers, reservations, baskets, campaigns, tax, currencies, i18n, gift_cards, loyalty, exports, jobs, audit, events, search, analytics
 
 api_router = APIRouter()
 
@@ -13,6 +13,20 @@ api_router.include_router(pos.router)
 api_router.include_router(products.router)
 api_router.include_router(orders.router)
 api_router.include_router(customers.router)
+api_router.include_router(reservations.router)
+api_router.include_router(baskets.router)
+api_router.include_router(campaigns.router)
+api_router.include_router(tax.router)
+api_router.include_router(currencies.router)
+api_router.include_router(i18n.router)
+api_router.include_router(gift_cards.router)
+api_router.include_router(loyalty.router)
+api_router.include_router(exports.router)
+api_router.include_router(jobs.router)
+api_router.include_router(audit.router)
+api_router.include_router(events.router)
+api_router.include_router(search.router)
+api_router.include_router(analytics.router)
 
 # Health check
 @api_router.get("/ping")
@@ -0,0 +1,120 @@
+"""
+📊 Analytics API - Sales series, category margins, basket sizes, cohorts
+Computed by app/services/analytics.py and cached until the next sales rollup
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_db
+from app.schemas.schemas import (
+    BasketSizeReport, CategoryMargin, CohortRetention, SalesSeriesPoint, SuccessResponse
+)
+from app.services.analytics import analytics, hour_start
+from app.services.jobs import jobs
+from app.core.security import verify_token
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+security = HTTPBearer()
+
+# Longest range one request may cover
+_MAX_RANGE = timedelta(days=3 * 366)
+
+
+def _range(start_date: Optional[datetime], end_date: Optional[datetime], default: timedelta) -> Tuple[datetime, datetime]:
+    """Requested range; defaults end at the next full hour so repeated calls share a cache entry"""
+    end = end_date or hour_start(datetime.utcnow()) + timedelta(hours=1)
+    start = start_date or end - default
+    if start >= end:
+        raise HTTPException(400, "start_date must be before end_date")
+    if end - start > _MAX_RANGE:
+        raise HTTPException(400, "Date range too long")
+    return start, end
+
+
+@router.get("/sales/series", response_model=List[SalesSeriesPoint])
+async def sales_series(
+    interval: str = Query("day", pattern="^(hour|day)$"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    📈 SALES OVER TIME - Orders, units, revenue and cost per hour or day
+
+    Default: last 30 days. Empty hours / days are included with zeros.
+    """
+    payload = verify_token(token.credentials)
+    start, end = _range(start_date, end_date, timedelta(days=30))
+    if interval == "hour" and end - start > timedelta(days=93):
+        raise HTTPException(400, "Hourly series cover at most 93 days")
+    return await analytics.series(db, payload.get("organization_id"), start, end, interval)
+
+
+@router.get("/margins/categories", response_model=List[CategoryMargin])
+async def category_margins(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """💹 MARGIN BY CATEGORY - Revenue minus cost_price × units (default: last 30 days)"""
+    payload = verify_token(token.credentials)
+    start, end = _range(start_date, end_date, timedelta(days=30))
+    return await analytics.margins(db, payload.get("organization_id"), start, end)
+
+
+@router.get("/baskets", response_model=BasketSizeReport)
+async def basket_sizes(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🧺 BASKET SIZES - Lines per order distribution and order value percentiles"""
+    payload = verify_token(token.credentials)
+    start, end = _range(start_date, end_date, timedelta(days=30))
+    return await analytics.baskets(db, payload.get("organization_id"), start, end)
+
+
+@router.get("/cohorts", response_model=List[CohortRetention])
+async def cohort_retention(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    👥 COHORT RETENTION - Customers by month of first purchase
+
+    retention[n] is the share of the cohort that bought again n months
+    later (up to ANALYTICS_COHORT_MONTHS). Default: cohorts of the last 12 months.
+    """
+    payload = verify_token(token.credentials)
+    start, end = _range(start_date, end_date, timedelta(days=365))
+    return await analytics.cohorts(db, payload.get("organization_id"), start, end)
+
+
+@router.post("/rollup", response_model=SuccessResponse)
+async def queue_rollup(
+    start_date: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🔄 REBUILD SALES ROLLUP - From start_date (default: the lookback window), all organizations"""
+    payload = verify_token(token.credentials)
+    if payload.get("role") != "super_admin":
+        raise HTTPException(403, "Not allowed")
+
+    job = await jobs.enqueue(
+        db, "analytics.rollup",
+        {"start": start_date.isoformat() if start_date else None},
+        user_id=payload.get("sub")
+    )
+    await db.commit()
+    return SuccessResponse(message="Sales rollup queued", data={"job_id": job.id})
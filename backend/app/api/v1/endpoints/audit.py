@@ -0,0 +1,109 @@
+"""
+🕵️ Audit API - Who changed what, and when
+Rows are written by app/services/audit.py from session events; every query
+is bounded by a created_at range so it stays on one index range (and, with
+partitioned audit_logs, on the partitions of that range)
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_, desc
+
+from app.core.config import settings
+from app.db.session import get_db
+from app.models.database import AuditLog
+from app.schemas.schemas import AuditLogResponse
+from app.core.security import verify_token
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+router = APIRouter(prefix="/audit", tags=["Audit"])
+security = HTTPBearer()
+
+
+def _require_admin(payload: dict):
+    if payload.get("role") not in ("super_admin", "org_admin"):
+        raise HTTPException(403, "Not allowed")
+
+
+async def _query(
+    db: AsyncSession,
+    conditions: list,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    before: Optional[datetime],
+    limit: int,
+):
+    end = min(end_date or datetime.utcnow(), before) if before else (end_date or datetime.utcnow())
+    start = start_date or end - timedelta(days=settings.AUDIT_QUERY_DEFAULT_DAYS)
+    if start >= end:
+        return []
+
+    result = await db.execute(
+        select(AuditLog)
+        .where(and_(*conditions, AuditLog.created_at >= start, AuditLog.created_at < end))
+        .order_by(desc(AuditLog.created_at))
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+@router.get("", response_model=List[AuditLogResponse])
+async def list_audit_logs(
+    entity_type: Optional[str] = None,
+    entity_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    action: Optional[str] = Query(None, pattern="^(create|update|delete)$"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    before: Optional[datetime] = Query(None, description="Next page: created_at of the last row seen"),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    🕵️ AUDIT TRAIL - Newest first
+
+    Defaults to the last AUDIT_QUERY_DEFAULT_DAYS days
+    """
+    payload = verify_token(token.credentials)
+    _require_admin(payload)
+
+    conditions = [AuditLog.organization_id == payload.get("organization_id")]
+    if entity_id and not entity_type:
+        raise HTTPException(400, "entity_id needs entity_type")
+    if entity_type:
+        conditions.append(AuditLog.entity_type == entity_type)
+    if entity_id:
+        conditions.append(AuditLog.entity_id == entity_id)
+    if user_id:
+        conditions.append(AuditLog.user_id == user_id)
+    if action:
+        conditions.append(AuditLog.action == action)
+
+    return await _query(db, conditions, start_date, end_date, before, limit)
+
+
+@router.get("/{entity_type}/{entity_id}", response_model=List[AuditLogResponse])
+async def entity_history(
+    entity_type: str,
+    entity_id: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    before: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """📜 HISTORY OF ONE RECORD - e.g. /audit/product/{id}"""
+    payload = verify_token(token.credentials)
+    _require_admin(payload)
+
+    conditions = [
+        AuditLog.entity_type == entity_type,
+        AuditLog.entity_id == entity_id,
+        AuditLog.organization_id == payload.get("organization_id"),
+    ]
+    return await _query(db, conditions, start_date, end_date, before, limit)
@@ -0,0 +1,357 @@
+"""
+🛒 Basket API - Server-side baskets per register
+Scan, change quantity, live totals for the customer display, checkout
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_
+
+from app.db.session import get_db
+from app.models.database import Product, CashRegister, Customer
+from app.schemas.schemas import (
+    BasketLineAdd, BasketLineUpdate, BasketResponse, BasketTotalsResponse,
+    BasketCheckout, BasketCustomer, BasketDiscountCode, OrderResponse, SuccessResponse
+)
+from app.services.basket import Basket, BasketLine, baskets
+from app.services.checkout import Tender, persist_sale, CheckoutError
+from app.services.currency import currencies as rates, CurrencyError
+from app.services.promotions import promotions, customer_segment
+from app.services.reservations import reservations, ReservationError
+from app.services.tax import taxes
+from app.core.config import settings
+from app.core.security import verify_token
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+router = APIRouter(prefix="/pos/baskets", tags=["POS Basket"])
+security = HTTPBearer()
+
+
+async def _open_basket(db: AsyncSession, register_id: str, org_id: str) -> Basket:
+    """Return the register's basket, validating the register on first use"""
+    basket = baskets.get(register_id)
+    if basket:
+        if basket.organization_id != org_id:
+            raise HTTPException(404, "No open register found")
+        return basket
+
+    register = (await db.execute(
+        select(CashRegister).where(
+            and_(
+                CashRegister.id == register_id,
+                CashRegister.organization_id == org_id,
+                CashRegister.status == "open"
+            )
+        )
+    )).scalar_one_or_none()
+
+    if not register:
+        raise HTTPException(404, "No open register found")
+
+    return baskets.open(register_id, org_id, register.branch_id)
+
+
+async def _change_quantity(db: AsyncSession, basket: Basket, product_id: str, delta: int):
+    """Move the reservation by delta, mirror the held line into the basket and reprice"""
+    try:
+        held = await reservations.hold(db, basket.organization_id, basket.register_id, product_id, delta)
+    except ReservationError as e:
+        raise HTTPException(409, str(e))
+
+    existing = basket.lines.get(product_id)
+    basket.set_line(BasketLine(
+        product_id=product_id,
+        product_name=held.product_name,
+        sku=held.sku,
+        unit_price=held.unit_price,
+        vat_rate=await taxes.rate(db, basket.organization_id, basket.branch_id, held.category_id, held.vat_rate),
+        quantity=held.quantity,
+        discount=existing.discount if existing else 0,
+        track_inventory=held.track_inventory,
+        category_id=held.category_id,
+        brand_id=held.brand_id
+    ))
+    await _reprice(db, basket)
+
+
+async def _check_customer(db: AsyncSession, customer_id: str, org_id: str) -> None:
+    customer = (await db.execute(
+        select(Customer.id).where(
+            and_(Customer.id == customer_id, Customer.organization_id == org_id)
+        )
+    )).scalar()
+    if not customer:
+        raise HTTPException(404, "Customer not found")
+
+
+async def _reprice(db: AsyncSession, basket: Basket):
+    """Re-run the compiled promotions over the changed basket"""
+    segment = await customer_segment(db, basket.customer_id)
+    return await promotions.apply(db, basket, segment)
+
+
+def _basket_response(basket: Basket) -> BasketResponse:
+    return BasketResponse(
+        register_id=basket.register_id,
+        customer_id=basket.customer_id,
+        lines=list(basket.lines.values()),
+        totals=basket.totals()
+    )
+
+
+@router.get("/{register_id}", response_model=BasketResponse)
+async def get_basket(
+    register_id: str,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🛒 GET BASKET - Lines and totals"""
+    payload = verify_token(token.credentials)
+    basket = await _open_basket(db, register_id, payload.get("organization_id"))
+    return _basket_response(basket)
+
+
+@router.get("/{register_id}/totals", response_model=BasketTotalsResponse)
+async def get_basket_totals(
+    register_id: str,
+    currencies: Optional[str] = None,  # e.g. "EUR,USD"
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    📺 CUSTOMER DISPLAY - Live totals
+
+    Served from the basket's cached snapshot. Pass `currencies` to also show
+    the total in other currencies from the in-memory rate table (the DB is
+    only read when the table is due for a refresh).
+    Poll and compare `version` to detect changes.
+    """
+    payload = verify_token(token.credentials)
+    basket = baskets.get(register_id)
+
+    if not basket or basket.organization_id != payload.get("organization_id"):
+        raise HTTPException(404, "Basket not found")
+
+    totals = basket.totals()
+    if not currencies:
+        return totals
+
+    table = await rates.table(db)
+    converted = {}
+    try:
+        for code in {c.strip().upper() for c in currencies.split(",") if c.strip()}:
+            converted[code] = table.convert(totals["total_amount"], settings.BASE_CURRENCY, code)
+    except CurrencyError as e:
+        raise HTTPException(400, str(e))
+
+    return {**totals, "converted": converted}
+
+
+@router.post("/{register_id}/lines", response_model=BasketResponse)
+async def add_line(
+    register_id: str,
+    line: BasketLineAdd,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    ➕ ADD LINE - Scan or pick a product
+
+    Holds stock for the basket; scanning an existing product adds to its quantity.
+    """
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+    basket = await _open_basket(db, register_id, org_id)
+
+    product_id = line.product_id
+    if not product_id:
+        if not line.barcode:
+            raise HTTPException(400, "product_id or barcode is required")
+        product_id = (await db.execute(
+            select(Product.id).where(
+                and_(
+                    Product.organization_id == org_id,
+                    Product.barcode == line.barcode,
+                    Product.is_active == True
+                )
+            )
+        )).scalar()
+        if not product_id:
+            raise HTTPException(404, f"Product with barcode '{line.barcode}' not found")
+
+    async with basket.lock:
+        await _change_quantity(db, basket, product_id, line.quantity)
+
+    return _basket_response(basket)
+
+
+@router.put("/{register_id}/lines/{product_id}", response_model=BasketResponse)
+async def update_line(
+    register_id: str,
+    product_id: str,
+    line: BasketLineUpdate,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """✏️ CHANGE QUANTITY (0 removes the line)"""
+    payload = verify_token(token.credentials)
+    basket = await _open_basket(db, register_id, payload.get("organization_id"))
+
+    async with basket.lock:
+        existing = basket.lines.get(product_id)
+        delta = line.quantity - (existing.quantity if existing else 0)
+        if delta:
+            await _change_quantity(db, basket, product_id, delta)
+
+    return _basket_response(basket)
+
+
+@router.delete("/{register_id}/lines/{product_id}", response_model=BasketResponse)
+async def remove_line(
+    register_id: str,
+    product_id: str,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """➖ REMOVE LINE"""
+    payload = verify_token(token.credentials)
+    basket = await _open_basket(db, register_id, payload.get("organization_id"))
+
+    async with basket.lock:
+        existing = basket.lines.get(product_id)
+        if not existing:
+            raise HTTPException(404, "Product not in basket")
+        await _change_quantity(db, basket, product_id, -existing.quantity)
+
+    return _basket_response(basket)
+
+
+@router.put("/{register_id}/discount-code", response_model=BasketResponse)
+async def set_discount_code(
+    register_id: str,
+    discount: BasketDiscountCode,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🎟️ APPLY / REMOVE DISCOUNT CODE"""
+    payload = verify_token(token.credentials)
+    basket = await _open_basket(db, register_id, payload.get("organization_id"))
+
+    async with basket.lock:
+        previous = basket.discount_code
+        basket.discount_code = discount.code
+        result = await _reprice(db, basket)
+        if result.code_error:
+            basket.discount_code = previous
+            await _reprice(db, basket)
+            raise HTTPException(400, result.code_error)
+
+    return _basket_response(basket)
+
+
+@router.put("/{register_id}/customer", response_model=BasketResponse)
+async def set_customer(
+    register_id: str,
+    customer: BasketCustomer,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """👤 SET / CLEAR CUSTOMER - Segment-restricted campaigns and codes follow the customer"""
+    payload = verify_token(token.credentials)
+    basket = await _open_basket(db, register_id, payload.get("organization_id"))
+
+    if customer.customer_id:
+        await _check_customer(db, customer.customer_id, basket.organization_id)
+
+    async with basket.lock:
+        previous = basket.customer_id
+        basket.customer_id = customer.customer_id
+        result = await _reprice(db, basket)
+        if result.code_error:
+            basket.customer_id = previous
+            await _reprice(db, basket)
+            raise HTTPException(400, result.code_error)
+
+    return _basket_response(basket)
+
+
+@router.delete("/{register_id}", response_model=SuccessResponse)
+async def void_basket(
+    register_id: str,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🗑️ VOID BASKET - Release all held stock"""
+    payload = verify_token(token.credentials)
+    basket = await _open_basket(db, register_id, payload.get("organization_id"))
+
+    async with basket.lock:
+        await reservations.release(db, basket.organization_id, register_id)
+        baskets.drop(register_id)
+
+    return SuccessResponse(message="Basket voided", data={"register_id": register_id})
+
+
+@router.post("/{register_id}/checkout", response_model=OrderResponse)
+async def checkout_basket(
+    register_id: str,
+    checkout: BasketCheckout,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    💳 CHECKOUT BASKET
+
+    Totals are already final - converts the reservation and persists the order.
+    """
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+    basket = await _open_basket(db, register_id, org_id)
+    if checkout.customer_id:
+        await _check_customer(db, checkout.customer_id, org_id)
+
+    async with basket.lock:
+        if not basket.lines:
+            raise HTTPException(400, "Basket is empty")
+
+        held = await reservations.consume(db, register_id, org_id)
+        held_quantities = {line.product_id: line.quantity for line in held}
+        basket_quantities = {pid: line.quantity for pid, line in basket.lines.items()}
+        if held_quantities != basket_quantities:
+            await db.rollback()
+            raise HTTPException(409, "Basket reservation expired - rescan the items")
+
+        # A customer given only at checkout still decides segment-restricted promotions
+        if checkout.customer_id:
+            basket.customer_id = checkout.customer_id
+
+        # Campaigns may have ended since the last scan
+        promo = await _reprice(db, basket)
+        if promo.code_error:
+            await db.rollback()
+            raise HTTPException(400, promo.code_error)
+
+        try:
+            order = await persist_sale(
+                db,
+                basket,
+                user_id=payload.get("sub"),
+                customer_id=basket.customer_id,
+                channel=checkout.channel,
+                payment_method=checkout.payment_method,
+                customer_notes=checkout.customer_notes,
+                reserved=True,
+                currency=checkout.currency,
+                tenders=[Tender(**t.model_dump()) for t in checkout.tenders]
+            )
+        except CheckoutError as e:
+            await db.rollback()
+            raise HTTPException(400, str(e))
+
+        await db.commit()
+        await db.refresh(order)
+        baskets.drop(register_id)
+
+    return order
@@ -0,0 +1,307 @@
+"""
+🏷️ Campaigns API - Promotions & Discount Codes
+Campaign CRUD, discount codes, basket evaluation
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_, desc
+from typing import List, Optional
+
+from app.db.session import get_db
+from app.models.database import Campaign, CampaignType, DiscountCode, Product
+from app.schemas.schemas import (
+    CampaignCreate, CampaignUpdate, CampaignResponse,
+    DiscountCodeCreate, DiscountCodeResponse,
+    PromotionEvaluateRequest, PromotionEvaluateResponse
+)
+from app.services.basket import BasketLine, build_basket, money, rate
+from app.services.promotions import promotions
+from app.services.redemptions import redemptions
+from app.core.security import verify_token
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+router = APIRouter(prefix="/campaigns", tags=["Campaigns"])
+security = HTTPBearer()
+
+
+def _campaign_type(value: str) -> CampaignType:
+    try:
+        return CampaignType(value)
+    except ValueError:
+        raise HTTPException(400, f"Unknown campaign type '{value}'")
+
+
+# ═══════════════════════════════════════════════════════════════
+# DISCOUNT CODES (declared before /{campaign_id})
+# ═══════════════════════════════════════════════════════════════
+
+@router.get("/codes", response_model=List[DiscountCodeResponse])
+async def list_discount_codes(
+    campaign_id: Optional[str] = None,
+    active_only: bool = False,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🎟️ LIST DISCOUNT CODES"""
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    conditions = [DiscountCode.organization_id == org_id]
+    if campaign_id:
+        conditions.append(DiscountCode.campaign_id == campaign_id)
+    if active_only:
+        conditions.append(DiscountCode.is_active == True)
+
+    result = await db.execute(
+        select(DiscountCode).where(and_(*conditions)).order_by(desc(DiscountCode.created_at))
+    )
+    return result.scalars().all()
+
+
+@router.post("/codes", response_model=DiscountCodeResponse, status_code=201)
+async def create_discount_code(
+    code_data: DiscountCodeCreate,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """✨ CREATE DISCOUNT CODE"""
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    if code_data.discount_type not in ("percentage", "fixed"):
+        raise HTTPException(400, "discount_type must be 'percentage' or 'fixed'")
+
+    existing = await db.execute(select(DiscountCode.id).where(DiscountCode.code == code_data.code))
+    if existing.scalar():
+        raise HTTPException(400, "Discount code already exists")
+
+    code = DiscountCode(organization_id=org_id, **code_data.model_dump())
+    db.add(code)
+    await db.commit()
+    await db.refresh(code)
+
+    promotions.invalidate(org_id)
+    return code
+
+
+@router.delete("/codes/{code_id}")
+async def deactivate_discount_code(
+    code_id: str,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🗑️ DEACTIVATE DISCOUNT CODE"""
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    code = (await db.execute(
+        select(DiscountCode).where(
+            and_(DiscountCode.id == code_id, DiscountCode.organization_id == org_id)
+        )
+    )).scalar_one_or_none()
+
+    if not code:
+        raise HTTPException(404, "Discount code not found")
+
+    code.is_active = False
+    await db.commit()
+
+    promotions.invalidate(org_id)
+    redemptions.forget(code_id)
+    return {"message": "Discount code deactivated", "id": code_id}
+
+
+# ═══════════════════════════════════════════════════════════════
+# EVALUATE
+# ═══════════════════════════════════════════════════════════════
+
+@router.post("/evaluate", response_model=PromotionEvaluateResponse)
+async def evaluate_promotions(
+    request: PromotionEvaluateRequest,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    🧮 EVALUATE PROMOTIONS
+
+    Preview the discounts a basket would get, priced from the catalog.
+    """
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    product_ids = {item.product_id for item in request.items}
+    products = {
+        p.id: p for p in (await db.execute(
+            select(Product).where(
+                and_(Product.id.in_(product_ids), Product.organization_id == org_id)
+            )
+        )).scalars().all()
+    }
+
+    lines = []
+    for item in request.items:
+        product = products.get(item.product_id)
+        if not product:
+            raise HTTPException(404, f"Product {item.product_id} not found")
+        lines.append(BasketLine(
+            product_id=product.id,
+            product_name=product.name,
+            sku=product.sku,
+            unit_price=product.sale_price or product.base_price,
+            vat_rate=rate(product.vat_rate),
+            quantity=item.quantity,
+            category_id=product.category_id,
+            brand_id=product.brand_id
+        ))
+
+    basket = build_basket(lines, org_id)
+    basket.discount_code = request.discount_code
+    result = await promotions.apply(db, basket, request.customer_segment)
+
+    return PromotionEvaluateResponse(
+        subtotal=money(basket.subtotal),
+        discount_amount=money(result.total_discount),
+        free_shipping=result.free_shipping,
+        line_discounts={pid: money(d) for pid, d in result.line_discounts.items()},
+        promotions=result.applied,
+        code_error=result.code_error
+    )
+
+
+# ═══════════════════════════════════════════════════════════════
+# CAMPAIGNS
+# ═══════════════════════════════════════════════════════════════
+
+@router.get("", response_model=List[CampaignResponse])
+async def list_campaigns(
+    active_only: bool = False,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """📋 LIST CAMPAIGNS"""
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    conditions = [Campaign.organization_id == org_id]
+    if active_only:
+        conditions.append(Campaign.is_active == True)
+
+    result = await db.execute(
+        select(Campaign)
+        .where(and_(*conditions))
+        .order_by(desc(Campaign.priority), desc(Campaign.starts_at))
+        .offset(skip)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+@router.post("", response_model=CampaignResponse, status_code=201)
+async def create_campaign(
+    campaign_data: CampaignCreate,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """✨ CREATE CAMPAIGN"""
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    data = campaign_data.model_dump()
+    data["type"] = _campaign_type(data["type"])
+
+    if data["ends_at"] <= data["starts_at"]:
+        raise HTTPException(400, "ends_at must be after starts_at")
+    if data["type"] == CampaignType.BUY_X_GET_Y and not (data["buy_quantity"] and data["get_quantity"]):
+        raise HTTPException(400, "buy_quantity and get_quantity are required for buy_x_get_y")
+    if data["type"] == CampaignType.BUNDLE and not data["applicable_products"]:
+        raise HTTPException(400, "applicable_products is required for bundle")
+
+    campaign = Campaign(organization_id=org_id, **data)
+    db.add(campaign)
+    await db.commit()
+    await db.refresh(campaign)
+
+    promotions.invalidate(org_id)
+    return campaign
+
+
+@router.get("/{campaign_id}", response_model=CampaignResponse)
+async def get_campaign(
+    campaign_id: str,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🔍 GET CAMPAIGN"""
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    campaign = (await db.execute(
+        select(Campaign).where(
+            and_(Campaign.id == campaign_id, Campaign.organization_id == org_id)
+        )
+    )).scalar_one_or_none()
+
+    if not campaign:
+        raise HTTPException(404, "Campaign not found")
+
+    return campaign
+
+
+@router.put("/{campaign_id}", response_model=CampaignResponse)
+async def update_campaign(
+    campaign_id: str,
+    campaign_data: CampaignUpdate,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """✏️ UPDATE CAMPAIGN"""
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    campaign = (await db.execute(
+        select(Campaign).where(
+            and_(Campaign.id == campaign_id, Campaign.organization_id == org_id)
+        )
+    )).scalar_one_or_none()
+
+    if not campaign:
+        raise HTTPException(404, "Campaign not found")
+
+    for field, value in campaign_data.model_dump(exclude_unset=True).items():
+        setattr(campaign, field, value)
+
+    await db.commit()
+    await db.refresh(campaign)
+
+    promotions.invalidate(org_id)
+    redemptions.forget(campaign_id)
+    return campaign
+
+
+@router.delete("/{campaign_id}")
+async def deactivate_campaign(
+    campaign_id: str,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🗑️ DEACTIVATE CAMPAIGN"""
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    campaign = (await db.execute(
+        select(Campaign).where(
+            and_(Campaign.id == campaign_id, Campaign.organization_id == org_id)
+        )
+    )).scalar_one_or_none()
+
+    if not campaign:
+        raise HTTPException(404, "Campaign not found")
+
+    campaign.is_active = False
+    await db.commit()
+
+    promotions.invalidate(org_id)
+    return {"message": "Campaign deactivated", "id": campaign_id}
@@ -0,0 +1,185 @@
+"""
+💱 Currencies API - Exchange Rates & Conversion
+Active currencies, rates (direct or cross), batch conversion
+"""
+
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_
+
+from app.db.session import get_db
+from app.models.database import Order, OrderItem
+from app.models.global_features import Currency, ExchangeRate
+from app.schemas.schemas import (
+    CurrencyResponse, ExchangeRateCreate, CurrencyConvertRequest, CurrencyConvertResponse
+)
+from app.services.currency import currencies, CurrencyError
+from app.core.config import settings
+from app.core.security import verify_token
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+router = APIRouter(prefix="/currencies", tags=["Currencies"])
+security = HTTPBearer()
+
+
+@router.get("", response_model=List[CurrencyResponse])
+async def list_currencies(
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """💱 LIST ACTIVE CURRENCIES"""
+    verify_token(token.credentials)
+    result = await db.execute(select(Currency).where(Currency.is_active == True).order_by(Currency.code))
+    return result.scalars().all()
+
+
+@router.get("/rate")
+async def get_rate(
+    from_currency: str,
+    to_currency: str,
+    on_date: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """📈 RATE ON DATE - Direct pair or derived through the base currency"""
+    verify_token(token.credentials)
+    table = await currencies.table(db)
+    on_date = on_date or date.today()
+
+    try:
+        rate = table.rate(from_currency.upper(), to_currency.upper(), on_date)
+    except CurrencyError as e:
+        raise HTTPException(404, str(e))
+
+    return {
+        "from_currency": from_currency.upper(),
+        "to_currency": to_currency.upper(),
+        "on_date": on_date,
+        "rate": rate
+    }
+
+
+@router.post("/rates", status_code=201)
+async def add_rate(
+    rate_data: ExchangeRateCreate,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """✨ ADD EXCHANGE RATE (rates are shared by all organizations)"""
+    payload = verify_token(token.credentials)
+    if payload.get("role") != "super_admin":
+        raise HTTPException(403, "Not allowed")
+
+    data = rate_data.model_dump()
+    data["from_currency"] = data["from_currency"].upper()
+    data["to_currency"] = data["to_currency"].upper()
+
+    known = (await db.execute(
+        select(Currency.code).where(Currency.code.in_([data["from_currency"], data["to_currency"]]))
+    )).scalars().all()
+    if len(set(known)) != 2:
+        raise HTTPException(404, "Unknown currency")
+
+    rate = ExchangeRate(**data)
+    db.add(rate)
+    await db.flush()
+    rate_id = rate.id
+    await db.commit()
+
+    currencies.invalidate()
+    return {"message": "Exchange rate added", "id": rate_id}
+
+
+@router.post("/convert", response_model=CurrencyConvertResponse)
+async def convert_amounts(
+    request: CurrencyConvertRequest,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    🔄 BATCH CONVERT
+
+    Converts a whole column of amounts with one rate lookup, rounded to
+    the target currency's decimal places.
+    """
+    verify_token(token.credentials)
+    table = await currencies.table(db)
+    source, target = request.from_currency.upper(), request.to_currency.upper()
+    on_date = request.on_date or date.today()
+
+    try:
+        rate = table.rate(source, target, on_date)
+        amounts = table.convert_many(request.amounts, source, target, on_date)
+    except CurrencyError as e:
+        raise HTTPException(400, str(e))
+
+    return CurrencyConvertResponse(
+        from_currency=source,
+        to_currency=target,
+        rate=rate,
+        on_date=on_date,
+        amounts=amounts
+    )
+
+
+@router.get("/orders/{order_id}")
+async def convert_order(
+    order_id: str,
+    to_currency: str,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🧾 ORDER IN ANOTHER CURRENCY - Totals and lines at the order date's rate"""
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    order = (await db.execute(
+        select(Order).where(and_(Order.id == order_id, Order.organization_id == org_id))
+    )).scalar_one_or_none()
+    if not order:
+        raise HTTPException(404, "Order not found")
+
+    items = (await db.execute(
+        select(OrderItem).where(and_(OrderItem.order_id == order_id, OrderItem.created_at >= order.created_at))
+    )).scalars().all()
+
+    table = await currencies.table(db)
+    target = to_currency.upper()
+    on_date = order.created_at.date()
+    fields = ["subtotal", "discount_amount", "tax_amount", "shipping_cost", "total_amount"]
+
+    try:
+        totals = table.convert_many(
+            [getattr(order, f) for f in fields], settings.BASE_CURRENCY, target, on_date
+        )
+        unit_prices = table.convert_many(
+            [item.unit_price for item in items], settings.BASE_CURRENCY, target, on_date
+        )
+        line_totals = table.convert_many(
+            [item.total_price for item in items], settings.BASE_CURRENCY, target, on_date
+        )
+        rate = table.rate(settings.BASE_CURRENCY, target, on_date)
+    except CurrencyError as e:
+        raise HTTPException(400, str(e))
+
+    return {
+        "order_id": order.id,
+        "order_number": order.order_number,
+        "currency": target,
+        "rate": rate,
+        "on_date": on_date,
+        **dict(zip(fields, totals)),
+        "items": [
+            {
+                "product_id": item.product_id,
+                "product_name": item.product_name,
+                "quantity": item.quantity,
+                "unit_price": unit_price,
+                "total_price": line_total
+            }
+            for item, unit_price, line_total in zip(items, unit_prices, line_totals)
+        ]
+    }
@@ -3,18 +3,27 @@
 CRUD Operations, Loyalty, Credit, Analytics
 """
 
+import csv
+import io
+
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func, desc, or_
+from sqlalchemy import select, and_, func, desc
 from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 
-from app.db.session import get_db
+from app.db.session import get_db, AsyncSessionLocal
 from app.models.database import Customer, Order
 from app.schemas.schemas import (
-    CustomerCreate, CustomerUpdate, CustomerResponse, CustomerListResponse
+    CustomerCreate, CustomerUpdate, CustomerResponse, CustomerListResponse, CustomerLookupResult,
+    CreditPaymentCreate, LoyaltyAdjust, SuccessResponse
 )
+from app.services.customer_lookup import customer_lookup, normalize_phone
+from app.services.exports import CustomerFilters
+from app.services.customer_credit import customer_credit, CreditError
+from app.services.loyalty import loyalty, LoyaltyError
 from app.core.security import verify_token
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
@@ -46,22 +55,8 @@ async def list_customers(
     payload = verify_token(token.credentials)
     org_id = payload.get("organization_id")
     
-    # Build query conditions
-    conditions = [Customer.organization_id == org_id]
-    
-    if search:
-        search_pattern = f"%{search}%"
-        conditions.append(
-            or_(
-                Customer.first_name.ilike(search_pattern),
-                Customer.last_name.ilike(search_pattern),
-                Customer.email.ilike(search_pattern),
-                Customer.phone.ilike(search_pattern)
-            )
-        )
-    
-    if segment:
-        conditions.append(Customer.segment == segment)
+    # Build query conditions (same filters as the export)
+    conditions = CustomerFilters(search, segment).conditions(org_id)
     
     # Count total
     count_query = select(func.count(Customer.id)).where(and_(*conditions))
@@ -87,6 +82,29 @@ async def list_customers(
     )
 
 
+# ═══════════════════════════════════════════════════════════════
+# LOOKUP (type-ahead at the till - declared before /{customer_id})
+# ═══════════════════════════════════════════════════════════════
+
+@router.get("/lookup", response_model=List[CustomerLookupResult])
+async def lookup_customers(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    🔎 CUSTOMER LOOKUP
+
+    Partial phone (any format, or the last digits), email or name.
+    Best customers first; served from the in-memory index.
+    """
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    return await customer_lookup.suggest(db, org_id, q, limit)
+
+
 # ═══════════════════════════════════════════════════════════════
 # GET CUSTOMER
 # ═══════════════════════════════════════════════════════════════
@@ -147,12 +165,14 @@ async def create_customer(
     # Create customer
     new_customer = Customer(
         organization_id=org_id,
+        phone_e164=normalize_phone(customer_data.phone),
         **customer_data.model_dump()
     )
     
     db.add(new_customer)
     await db.commit()
     await db.refresh(new_customer)
+    customer_lookup.upsert(new_customer)
     
     return new_customer
 
@@ -186,9 +206,12 @@ async def update_customer(
     update_data = customer_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(customer, field, value)
+    if "phone" in update_data:
+        customer.phone_e164 = normalize_phone(customer.phone)
     
     await db.commit()
     await db.refresh(customer)
+    customer_lookup.upsert(customer)
     
     return customer
 
@@ -221,6 +244,7 @@ async def delete_customer(
     customer.is_active = False
     
     await db.commit()
+    customer_lookup.upsert(customer)
     
     return {"message": "Customer deleted successfully", "id": customer_id}
 
@@ -248,20 +272,9 @@ async def customer_analytics(
     if not customer:
         raise HTTPException(404, "Customer not found")
     
-    # Get order stats
-    stats_query = select(
-        func.count(Order.id).label("total_orders"),
-        func.coalesce(func.sum(Order.total_amount), 0).label("total_spent"),
-        func.avg(Order.total_amount).label("avg_order_value"),
-        func.max(Order.created_at).label("last_order_date")
-    ).where(
-        and_(
-            Order.customer_id == customer_id,
-            Order.status.in_(["completed", "partial_refunded"])
-        )
-    )
-    
-    stats = (await db.execute(stats_query)).first()
+    # Lifetime stats are maintained by checkout/refund - no scan over orders
+    total_orders = customer.total_orders or 0
+    total_spent = customer.total_spent or Decimal(0)
     
     return {
         "customer_id": customer.id,
@@ -271,11 +284,140 @@ async def customer_analytics(
         "segment": customer.segment,
         "loyalty_tier": customer.loyalty_tier,
         "loyalty_points": customer.loyalty_points,
-        "total_orders": stats.total_orders,
-        "total_spent": float(stats.total_spent),
-        "average_order_value": float(stats.avg_order_value or 0),
-        "last_order_date": stats.last_order_date.isoformat() if stats.last_order_date else None,
+        "total_orders": total_orders,
+        "total_spent": float(total_spent),
+        "lifetime_value": float(customer.lifetime_value or 0),
+        "average_order_value": float(total_spent / total_orders) if total_orders else 0.0,
+        "last_order_date": customer.last_purchase_at.isoformat() if customer.last_purchase_at else None,
         "credit_limit": float(customer.credit_limit),
         "current_balance": float(customer.current_balance),
         "available_credit": float(customer.credit_limit - customer.current_balance)
     }
+
+
+# ═══════════════════════════════════════════════════════════════
+# LOYALTY POINTS
+# ═══════════════════════════════════════════════════════════════
+
+@router.post("/{customer_id}/loyalty", response_model=SuccessResponse)
+async def adjust_loyalty_points(
+    customer_id: str,
+    adjustment: LoyaltyAdjust,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """⭐ ADJUST LOYALTY POINTS - Manual add / remove, recorded in the points ledger"""
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    if adjustment.points == 0:
+        raise HTTPException(400, "points must not be zero")
+
+    try:
+        balance = await loyalty.adjust(
+            db, org_id, customer_id, adjustment.points,
+            notes=adjustment.notes, user_id=payload.get("sub")
+        )
+    except LoyaltyError as e:
+        await db.rollback()
+        raise HTTPException(400, str(e))
+    await db.commit()
+
+    return SuccessResponse(
+        message="Loyalty points updated",
+        data={"customer_id": customer_id, "loyalty_points": balance}
+    )
+
+
+# ═══════════════════════════════════════════════════════════════
+# ACCOUNT (ON-CREDIT) CUSTOMERS
+# ═══════════════════════════════════════════════════════════════
+
+@router.post("/{customer_id}/credit/payments", response_model=SuccessResponse)
+async def record_credit_payment(
+    customer_id: str,
+    credit_payment: CreditPaymentCreate,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """💵 RECORD ACCOUNT PAYMENT - Customer pays down their balance"""
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    try:
+        balance = await customer_credit.settle(
+            db, org_id, customer_id, credit_payment.amount,
+            reference=credit_payment.reference,
+            notes=credit_payment.notes,
+            user_id=payload.get("sub")
+        )
+    except CreditError as e:
+        await db.rollback()
+        raise HTTPException(404, str(e))
+    await db.commit()
+
+    return SuccessResponse(
+        message="Payment recorded",
+        data={"customer_id": customer_id, "current_balance": float(balance)}
+    )
+
+
+@router.get("/{customer_id}/statement")
+async def statement_of_account(
+    customer_id: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    🧾 STATEMENT OF ACCOUNT (CSV)
+
+    Opening balance, every ledger entry of the period and the closing
+    balance. Rows are streamed as they are read - nothing is buffered.
+    """
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    customer = (await db.execute(
+        select(Customer.id).where(and_(Customer.id == customer_id, Customer.organization_id == org_id))
+    )).first()
+    if not customer:
+        raise HTTPException(404, "Customer not found")
+
+    opening = await customer_credit.opening_balance(db, customer_id, start_date)
+
+    async def rows():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def flush() -> str:
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+
+        writer.writerow(["date", "type", "order_id", "reference", "amount", "balance", "notes"])
+        writer.writerow([start_date.isoformat() if start_date else "", "opening", "", "", "", opening, ""])
+        yield flush()
+
+        balance = opening
+        # Own session - the request's one is closed before the body is sent
+        async with AsyncSessionLocal() as session:
+            async for entry in customer_credit.statement(session, customer_id, start_date, end_date):
+                balance = entry.balance_after
+                writer.writerow([
+                    entry.created_at.isoformat(), entry.entry_type, entry.order_id or "",
+                    entry.reference or "", entry.amount, entry.balance_after, entry.notes or ""
+                ])
+                if buffer.tell() >= 64 * 1024:
+                    yield flush()
+
+        writer.writerow([end_date.isoformat() if end_date else "", "closing", "", "", "", balance, ""])
+        yield flush()
+
+    return StreamingResponse(
+        rows(),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="statement-{customer_id}.csv"'}
+    )
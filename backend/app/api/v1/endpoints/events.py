@@ -0,0 +1,122 @@
+"""
+📈 Events API - Storefront product views and searches, in batches
+Accepted into memory and written in bulk by app/services/events.py; view
+analytics read the per-minute rollups
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_, func
+
+from app.core.config import settings
+from app.db.session import get_db
+from app.models.global_features import ProductViewMinute
+from app.schemas.schemas import EventBatch, EventBatchResult, ProductViewPoint
+from app.services.events import SearchEvent, ViewEvent, event_time, ingestor, normalize_query
+from app.core.security import verify_token
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+router = APIRouter(prefix="/events", tags=["Events"])
+security = HTTPBearer()
+
+
+@router.post("", response_model=EventBatchResult, status_code=202)
+async def ingest_events(
+    batch: EventBatch,
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    📥 INGEST EVENTS - Up to INGEST_MAX_BATCH views + searches per call
+
+    202 with the number accepted; 503 when everything was shed (retry later)
+    """
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    total = len(batch.views) + len(batch.searches)
+    if total > settings.INGEST_MAX_BATCH:
+        raise HTTPException(413, f"At most {settings.INGEST_MAX_BATCH} events per batch")
+    if not total:
+        return EventBatchResult(accepted=0, dropped=0)
+
+    now = datetime.utcnow()
+    events = [
+        ViewEvent(
+            organization_id=org_id,
+            viewed_at=event_time(v.viewed_at, now),
+            **v.model_dump(exclude={"viewed_at"})
+        )
+        for v in batch.views
+    ] + [
+        SearchEvent(
+            organization_id=org_id,
+            query=normalize_query(s.query),
+            created_at=event_time(s.created_at, now),
+            **s.model_dump(exclude={"query", "created_at"})
+        )
+        for s in batch.searches
+    ]
+
+    accepted = ingestor.offer(events)
+    if not accepted:
+        return JSONResponse(
+            {"accepted": 0, "dropped": total}, status_code=503, headers={"Retry-After": "1"}
+        )
+    return EventBatchResult(accepted=accepted, dropped=total - accepted)
+
+
+@router.get("/stats")
+async def ingestion_stats(token: HTTPAuthorizationCredentials = Depends(security)):
+    """📊 INGESTION STATS - Buffer fill, shed and written counts of this process"""
+    verify_token(token.credentials)
+    return ingestor.stats()
+
+
+@router.get("/products/{product_id}/views", response_model=List[ProductViewPoint])
+async def product_view_series(
+    product_id: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    bucket: str = Query("hour", pattern="^(minute|hour|day)$"),
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """👀 PRODUCT VIEWS OVER TIME - From the per-minute rollups (default: last 24 hours)"""
+    payload = verify_token(token.credentials)
+
+    end = end_date or datetime.utcnow()
+    start = start_date or end - timedelta(days=1)
+    period = func.date_trunc(bucket, ProductViewMinute.minute).label("bucket")
+
+    rows = (await db.execute(
+        select(
+            period,
+            func.sum(ProductViewMinute.views).label("views"),
+            func.sum(ProductViewMinute.customer_views).label("customer_views"),
+            func.sum(ProductViewMinute.duration_seconds).label("duration"),
+        )
+        .where(
+            and_(
+                ProductViewMinute.product_id == product_id,
+                ProductViewMinute.organization_id == payload.get("organization_id"),
+                ProductViewMinute.minute >= start,
+                ProductViewMinute.minute < end,
+            )
+        )
+        .group_by(period)
+        .order_by(period)
+    )).all()
+
+    return [
+        ProductViewPoint(
+            bucket=r.bucket,
+            views=r.views,
+            customer_views=r.customer_views,
+            avg_duration_seconds=round(r.duration / r.views, 1) if r.views else 0.0,
+        )
+        for r in rows
+    ]
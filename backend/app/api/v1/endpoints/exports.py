@@ -0,0 +1,174 @@
+"""
+📤 Export API - Orders, Products, Customers as CSV / XLSX / Parquet
+Same filters as the listings; GET streams the file, POST runs it as a background job
+"""
+
+from dataclasses import asdict
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_
+
+from app.db.session import get_db
+from app.models.database import BackgroundJob, JobStatus
+from app.schemas.schemas import SuccessResponse
+from app.services.exports import (
+    DATASETS, FORMATS, CustomerFilters, ExportError, OrderFilters, ProductFilters, exporter, writer_for
+)
+from app.services.jobs import jobs
+from app.core.security import verify_token
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+security = HTTPBearer()
+
+FORMAT_QUERY = Query("csv", pattern="^(csv|xlsx|parquet)$")
+
+
+def _stream(name: str, conditions: list, fmt: str) -> StreamingResponse:
+    try:
+        body = exporter.stream(DATASETS[name], conditions, fmt)
+    except ExportError as e:
+        raise HTTPException(400, str(e))
+
+    media_type, extension = FORMATS[fmt]
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{extension}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+async def _start(db: AsyncSession, payload: dict, name: str, filters, fmt: str) -> SuccessResponse:
+    try:
+        writer_for(DATASETS[name], fmt)
+    except ExportError as e:
+        raise HTTPException(400, str(e))
+
+    job = await jobs.enqueue(
+        db, "exports.write",
+        {"dataset": name, "format": fmt, "filters": jsonable_encoder(asdict(filters))},
+        org_id=payload.get("organization_id"), user_id=payload.get("sub")
+    )
+    await db.commit()
+    return SuccessResponse(
+        message="Export queued",
+        data={"export_id": job.id, "url": f"/api/v1/exports/files/{job.id}"}
+    )
+
+
+# ═══════════════════════════════════════════════════════════════
+# STREAMED EXPORTS
+# ═══════════════════════════════════════════════════════════════
+
+@router.get("/orders")
+async def export_orders(
+    filters: OrderFilters = Depends(),
+    format: str = FORMAT_QUERY,
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """📤 EXPORT ORDERS - Streamed, any number of rows"""
+    payload = verify_token(token.credentials)
+    return _stream("orders", filters.conditions(payload.get("organization_id")), format)
+
+
+@router.get("/products")
+async def export_products(
+    filters: ProductFilters = Depends(),
+    format: str = FORMAT_QUERY,
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """📤 EXPORT PRODUCTS - Streamed, any number of rows"""
+    payload = verify_token(token.credentials)
+    return _stream("products", filters.conditions(payload.get("organization_id")), format)
+
+
+@router.get("/customers")
+async def export_customers(
+    filters: CustomerFilters = Depends(),
+    format: str = FORMAT_QUERY,
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """📤 EXPORT CUSTOMERS - Streamed, any number of rows"""
+    payload = verify_token(token.credentials)
+    return _stream("customers", filters.conditions(payload.get("organization_id")), format)
+
+
+# ═══════════════════════════════════════════════════════════════
+# BACKGROUND EXPORTS (download when ready)
+# ═══════════════════════════════════════════════════════════════
+
+@router.post("/orders", response_model=SuccessResponse, status_code=202)
+async def start_order_export(
+    filters: OrderFilters = Depends(),
+    format: str = FORMAT_QUERY,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """⏳ EXPORT ORDERS IN THE BACKGROUND"""
+    payload = verify_token(token.credentials)
+    return await _start(db, payload, "orders", filters, format)
+
+
+@router.post("/products", response_model=SuccessResponse, status_code=202)
+async def start_product_export(
+    filters: ProductFilters = Depends(),
+    format: str = FORMAT_QUERY,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """⏳ EXPORT PRODUCTS IN THE BACKGROUND"""
+    payload = verify_token(token.credentials)
+    return await _start(db, payload, "products", filters, format)
+
+
+@router.post("/customers", response_model=SuccessResponse, status_code=202)
+async def start_customer_export(
+    filters: CustomerFilters = Depends(),
+    format: str = FORMAT_QUERY,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """⏳ EXPORT CUSTOMERS IN THE BACKGROUND"""
+    payload = verify_token(token.credentials)
+    return await _start(db, payload, "customers", filters, format)
+
+
+@router.get("/files/{export_id}")
+async def download_export(
+    export_id: str,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """📥 DOWNLOAD EXPORT - 202 while the job is queued or running"""
+    payload = verify_token(token.credentials)
+
+    job = (await db.execute(
+        select(BackgroundJob).where(
+            and_(
+                BackgroundJob.id == export_id,
+                BackgroundJob.organization_id == payload.get("organization_id"),
+                BackgroundJob.job_type == "exports.write"
+            )
+        )
+    )).scalar_one_or_none()
+    if not job:
+        raise HTTPException(404, "Export not found")
+
+    if job.status in (JobStatus.QUEUED, JobStatus.RUNNING):
+        return JSONResponse(
+            {"status": job.status.value, "progress_message": job.progress_message, "export_id": job.id},
+            status_code=202
+        )
+    if job.status != JobStatus.SUCCEEDED:
+        raise HTTPException(409, f"Export {job.status.value}: {job.error or ''}".strip())
+
+    fmt = job.result["format"]
+    media_type, extension = FORMATS[fmt]
+    return FileResponse(
+        job.result["path"], media_type=media_type, filename=f"{job.payload['dataset']}-{job.id}.{extension}"
+    )
@@ -0,0 +1,130 @@
+"""
+🎁 Gift Cards API - Issue, Balance, Ledger
+Redemption happens in checkout (split tender)
+"""
+
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_, desc
+
+from app.db.session import get_db
+from app.models.global_features import GiftCard, GiftCardTransaction
+from app.schemas.schemas import (
+    GiftCardIssue, GiftCardTopUp, GiftCardResponse, GiftCardBalance,
+    GiftCardTransactionResponse, SuccessResponse
+)
+from app.services.gift_cards import gift_cards, GiftCardError
+from app.core.security import verify_token
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+router = APIRouter(prefix="/gift-cards", tags=["Gift Cards"])
+security = HTTPBearer()
+
+
+async def _get_card(db: AsyncSession, card_id: str, org_id: str) -> GiftCard:
+    card = (await db.execute(
+        select(GiftCard).where(and_(GiftCard.id == card_id, GiftCard.organization_id == org_id))
+    )).scalar_one_or_none()
+    if not card:
+        raise HTTPException(404, "Gift card not found")
+    return card
+
+
+@router.post("", response_model=GiftCardResponse, status_code=201)
+async def issue_gift_card(
+    card_data: GiftCardIssue,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🎁 ISSUE GIFT CARD - Generates the code and the opening ledger entry"""
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    data = card_data.model_dump()
+    card = await gift_cards.issue(db, org_id, data.pop("value"), data.pop("currency"), **data)
+    await db.commit()
+    await db.refresh(card)
+
+    return card
+
+
+@router.get("/lookup", response_model=GiftCardBalance)
+async def lookup_gift_card(
+    code: str,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🔍 BALANCE CHECK - Scan or type the card code"""
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    try:
+        card_id, _ = await gift_cards.resolve(db, org_id, code)
+    except GiftCardError as e:
+        raise HTTPException(404, str(e))
+
+    card = await _get_card(db, card_id, org_id)
+    return GiftCardBalance(
+        id=card.id,
+        current_balance=card.current_balance,
+        currency=card.currency,
+        expires_at=card.expires_at
+    )
+
+
+@router.get("/{card_id}/transactions", response_model=List[GiftCardTransactionResponse])
+async def gift_card_transactions(
+    card_id: str,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """📜 LEDGER - Every purchase, usage and refund"""
+    payload = verify_token(token.credentials)
+    await _get_card(db, card_id, payload.get("organization_id"))
+
+    result = await db.execute(
+        select(GiftCardTransaction)
+        .where(GiftCardTransaction.gift_card_id == card_id)
+        .order_by(desc(GiftCardTransaction.created_at))
+    )
+    return result.scalars().all()
+
+
+@router.post("/{card_id}/top-up", response_model=GiftCardBalance)
+async def top_up_gift_card(
+    card_id: str,
+    top_up: GiftCardTopUp,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """➕ TOP UP - Add value to an active card"""
+    payload = verify_token(token.credentials)
+    card = await _get_card(db, card_id, payload.get("organization_id"))
+    if not card.is_active:
+        raise HTTPException(400, "Gift card is not active")
+    currency, expires_at = card.currency, card.expires_at
+
+    balance = await gift_cards.credit(db, card_id, top_up.amount, transaction_type="top_up", notes=top_up.notes)
+    await db.commit()
+
+    return GiftCardBalance(id=card_id, current_balance=balance, currency=currency, expires_at=expires_at)
+
+
+@router.delete("/{card_id}", response_model=SuccessResponse)
+async def deactivate_gift_card(
+    card_id: str,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🗑️ DEACTIVATE GIFT CARD"""
+    payload = verify_token(token.credentials)
+    card = await _get_card(db, card_id, payload.get("organization_id"))
+
+    card.is_active = False
+    code = card.code
+    await db.commit()
+
+    gift_cards.forget(code)
+    return SuccessResponse(message="Gift card deactivated", data={"id": card_id})
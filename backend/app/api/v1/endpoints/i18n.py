@@ -0,0 +1,117 @@
+"""
+🌐 i18n API - Translation Bundles
+Cacheable per-language bundles, batch translation upserts
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.db.session import get_db
+from app.models.database import Product, Category, Brand
+from app.models.global_features import Language, Translation
+from app.schemas.schemas import TranslationBatch, SuccessResponse
+from app.services.i18n import translations, not_modified
+from app.core.security import verify_token
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+router = APIRouter(prefix="/i18n", tags=["Translations"])
+security = HTTPBearer()
+
+ENTITY_MODELS = {"product": Product, "category": Category, "brand": Brand}
+
+
+@router.get("/bundles/{language_code}")
+async def get_bundle(
+    language_code: str,
+    request: Request,
+    response: Response,
+    entity_type: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    📦 TRANSLATION BUNDLE
+
+    Whole-language bundle for client-side caching. The ETag changes only
+    when the language's translations change - send If-None-Match to get a 304.
+    """
+    verify_token(token.credentials)
+    language_code = language_code.lower()
+
+    if language_code not in await translations.languages(db):
+        raise HTTPException(404, f"Language '{language_code}' not supported")
+
+    bundle = await translations.bundle(db, language_code)
+    cached = not_modified(request, response, bundle.etag, bundle)
+    if cached:
+        return cached
+
+    return {
+        "language": bundle.language,
+        "version": bundle.version,
+        "translations": bundle.to_dict(entity_type)
+    }
+
+
+@router.put("/translations", response_model=SuccessResponse)
+async def upsert_translations(
+    batch: TranslationBatch,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """✏️ UPSERT TRANSLATIONS - One statement for the whole batch"""
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+    language_code = batch.language_code.lower()
+
+    if not await db.get(Language, language_code):
+        raise HTTPException(404, f"Language '{language_code}' not found")
+
+    # Only the organization's own entities may be translated
+    by_type = {}
+    for item in batch.translations:
+        if item.entity_type not in ENTITY_MODELS:
+            raise HTTPException(400, f"Unknown entity_type '{item.entity_type}'")
+        by_type.setdefault(item.entity_type, set()).add(item.entity_id)
+
+    for entity_type, ids in by_type.items():
+        model = ENTITY_MODELS[entity_type]
+        owned = (await db.execute(
+            select(model.id).where(and_(model.id.in_(ids), model.organization_id == org_id))
+        )).scalars().all()
+        missing = ids - set(owned)
+        if missing:
+            raise HTTPException(404, f"{entity_type} {sorted(missing)[0]} not found")
+
+    now = datetime.utcnow()
+    stmt = pg_insert(Translation).values([
+        {
+            "language_code": language_code,
+            "entity_type": item.entity_type,
+            "entity_id": item.entity_id,
+            "field_name": item.field_name,
+            "translated_text": item.translated_text,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for item in batch.translations
+    ])
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[
+            Translation.entity_type, Translation.entity_id,
+            Translation.language_code, Translation.field_name
+        ],
+        set_={"translated_text": stmt.excluded.translated_text, "updated_at": now}
+    ))
+    await db.commit()
+
+    translations.invalidate(language_code)
+    return SuccessResponse(
+        message="Translations saved",
+        data={"language_code": language_code, "count": len(batch.translations)}
+    )
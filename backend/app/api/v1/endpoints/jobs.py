@@ -0,0 +1,98 @@
+"""
+⚙️ Jobs API - Status, Progress, Results of Background Jobs
+Jobs are queued by the endpoints that need them and run by scripts/run_worker.py
+"""
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_, desc
+
+from app.db.session import get_db
+from app.models.database import BackgroundJob, JobStatus
+from app.schemas.schemas import JobResponse, SuccessResponse
+from app.services.jobs import jobs, JobError
+from app.core.security import verify_token
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+security = HTTPBearer()
+
+
+@router.get("", response_model=List[JobResponse])
+async def list_jobs(
+    status: Optional[str] = None,
+    job_type: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """📋 LIST JOBS - Newest first"""
+    payload = verify_token(token.credentials)
+
+    conditions = [BackgroundJob.organization_id == payload.get("organization_id")]
+    if status:
+        try:
+            conditions.append(BackgroundJob.status == JobStatus(status))
+        except ValueError:
+            raise HTTPException(400, "Unknown job status")
+    if job_type:
+        conditions.append(BackgroundJob.job_type == job_type)
+
+    result = await db.execute(
+        select(BackgroundJob)
+        .where(and_(*conditions))
+        .order_by(desc(BackgroundJob.created_at))
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🔍 JOB STATUS - Progress while running, result or error once finished"""
+    payload = verify_token(token.credentials)
+
+    job = (await db.execute(
+        select(BackgroundJob).where(
+            and_(BackgroundJob.id == job_id, BackgroundJob.organization_id == payload.get("organization_id"))
+        )
+    )).scalar_one_or_none()
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return job
+
+
+@router.post("/{job_id}/cancel", response_model=SuccessResponse)
+async def cancel_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🛑 CANCEL JOB - Running jobs stop at their next progress report"""
+    payload = verify_token(token.credentials)
+    try:
+        status = await jobs.cancel(db, payload.get("organization_id"), job_id)
+    except JobError as e:
+        raise HTTPException(409, str(e))
+    return SuccessResponse(message="Cancellation requested", data={"status": status.value})
+
+
+@router.post("/{job_id}/retry", response_model=SuccessResponse)
+async def retry_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🔁 RETRY JOB - Failed or cancelled jobs only"""
+    payload = verify_token(token.credentials)
+    try:
+        await jobs.retry(db, payload.get("organization_id"), job_id)
+    except JobError as e:
+        raise HTTPException(409, str(e))
+    return SuccessResponse(message="Job queued again")
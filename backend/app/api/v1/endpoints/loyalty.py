@@ -0,0 +1,140 @@
+"""
+⭐ Loyalty API - Program, Tiers, Points Ledger
+Earning and spending happens in checkout (loyalty_points tender)
+"""
+
+from datetime import datetime
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_, delete, insert, desc
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.db.session import get_db
+from app.models.database import Customer, LoyaltyProgram, LoyaltyTierRule, LoyaltyTransaction
+from app.schemas.schemas import (
+    LoyaltyProgramUpdate, LoyaltyProgramResponse, LoyaltyTierRuleIn,
+    LoyaltyTransactionResponse, SuccessResponse
+)
+from app.services.loyalty import loyalty
+from app.core.security import verify_token
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+router = APIRouter(prefix="/loyalty", tags=["Loyalty"])
+security = HTTPBearer()
+
+
+def _require_admin(payload: dict):
+    if payload.get("role") not in ("super_admin", "org_admin"):
+        raise HTTPException(403, "Not allowed")
+
+
+@router.get("/program", response_model=LoyaltyProgramResponse)
+async def get_program(
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """⭐ LOYALTY PROGRAM - Earn rate, point value and tiers"""
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    program = (await db.execute(
+        select(LoyaltyProgram).where(LoyaltyProgram.organization_id == org_id)
+    )).scalar_one_or_none()
+    if not program:
+        raise HTTPException(404, "No loyalty program")
+
+    rules = (await db.execute(
+        select(LoyaltyTierRule)
+        .where(LoyaltyTierRule.organization_id == org_id)
+        .order_by(LoyaltyTierRule.min_spend)
+    )).scalars().all()
+
+    return LoyaltyProgramResponse(
+        organization_id=org_id,
+        is_active=program.is_active,
+        earn_rate=program.earn_rate,
+        point_value=program.point_value,
+        min_redeem_points=program.min_redeem_points,
+        max_redeem_ratio=program.max_redeem_ratio,
+        tiers=[
+            LoyaltyTierRuleIn(tier=r.tier, min_spend=r.min_spend, earn_multiplier=r.earn_multiplier)
+            for r in rules
+        ],
+        updated_at=program.updated_at
+    )
+
+
+@router.put("/program", response_model=SuccessResponse)
+async def save_program(
+    program_data: LoyaltyProgramUpdate,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """✏️ SAVE LOYALTY PROGRAM - Settings and the full tier list"""
+    payload = verify_token(token.credentials)
+    _require_admin(payload)
+    org_id = payload.get("organization_id")
+
+    tiers = {t.tier for t in program_data.tiers}
+    if len(tiers) != len(program_data.tiers):
+        raise HTTPException(400, "Duplicate tier")
+
+    now = datetime.utcnow()
+    values = program_data.model_dump(exclude={"tiers"})
+    stmt = pg_insert(LoyaltyProgram).values(organization_id=org_id, created_at=now, updated_at=now, **values)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[LoyaltyProgram.organization_id],
+        set_={**values, "updated_at": now}
+    ))
+
+    await db.execute(delete(LoyaltyTierRule).where(LoyaltyTierRule.organization_id == org_id))
+    if program_data.tiers:
+        await db.execute(insert(LoyaltyTierRule), [
+            {"organization_id": org_id, "created_at": now, "updated_at": now, **t.model_dump()}
+            for t in program_data.tiers
+        ])
+    await db.commit()
+
+    loyalty.invalidate(org_id)
+    return SuccessResponse(message="Loyalty program saved", data={"tiers": len(program_data.tiers)})
+
+
+@router.post("/tiers/recompute", response_model=SuccessResponse)
+async def recompute_tiers(
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🔁 RE-TIER NOW - Same set-based pass as the nightly job, for this organization"""
+    payload = verify_token(token.credentials)
+    _require_admin(payload)
+
+    changed = await loyalty.recompute_tiers(db, payload.get("organization_id"))
+    return SuccessResponse(message="Tiers recomputed", data={"changed": changed})
+
+
+@router.get("/customers/{customer_id}/transactions", response_model=List[LoyaltyTransactionResponse])
+async def customer_points_history(
+    customer_id: str,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """📜 POINTS HISTORY - Newest first"""
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    customer = (await db.execute(
+        select(Customer.id).where(and_(Customer.id == customer_id, Customer.organization_id == org_id))
+    )).first()
+    if not customer:
+        raise HTTPException(404, "Customer not found")
+
+    result = await db.execute(
+        select(LoyaltyTransaction)
+        .where(LoyaltyTransaction.customer_id == customer_id)
+        .order_by(desc(LoyaltyTransaction.created_at))
+        .limit(limit)
+    )
+    return result.scalars().all()
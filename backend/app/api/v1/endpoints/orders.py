@@ -5,17 +5,25 @@ Sales, Refunds, and Order Processing
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func, update, desc
+from sqlalchemy import select, and_, or_, func, update, desc, case
 from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 
 from app.db.session import get_db
-from app.models.database import Order, OrderItem, Product, Customer, Payment, OrderStatusHistory
+from app.models.database import Order, OrderItem, Product, Customer, Payment, PaymentMethod, OrderStatusHistory
 from app.schemas.schemas import (
     OrderCreate, OrderUpdate, OrderResponse, OrderListResponse,
     OrderItemCreate
 )
+from app.services.checkout import Tender, record_payments, tender_label, CheckoutError
+from app.services.exports import OrderFilters
+from app.services.customer_credit import customer_credit, CreditError
+from app.services.gift_cards import GiftCardError, gift_cards as gift_card_service
+from app.services import customer_stats
+from app.services.loyalty import loyalty
+from app.services.notifications import outbox
+from app.core.config import settings
 from app.core.security import verify_token
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
@@ -50,19 +58,8 @@ async def list_orders(
     payload = verify_token(token.credentials)
     org_id = payload.get("organization_id")
     
-    # Build query
-    conditions = [Order.organization_id == org_id]
-    
-    if status:
-        conditions.append(Order.status == status)
-    if customer_id:
-        conditions.append(Order.customer_id == customer_id)
-    if start_date:
-        conditions.append(Order.created_at >= start_date)
-    if end_date:
-        conditions.append(Order.created_at <= end_date)
-    if search:
-        conditions.append(Order.id.ilike(f"%{search}%"))
+    # Build query (same filters as the export)
+    conditions = OrderFilters(status, customer_id, start_date, end_date, search).conditions(org_id)
 
     # Count total
     count_query = select(func.count(Order.id)).where(and_(*conditions))
@@ -169,14 +166,15 @@ async def create_order(
         })
 
     # 2. Create Order
+    paid = bool(order_data.tenders or order_data.payment_method)
     new_order = Order(
         organization_id=org_id,
         branch_id=order_data.branch_id,
         customer_id=order_data.customer_id,
         cashier_id=user_id,
         total_amount=total_amount,
-        status="completed" if order_data.payment_method else "pending",
-        payment_status="paid" if order_data.payment_method else "pending",
+        status="completed" if paid else "pending",
+        payment_status="paid" if paid else "pending",
         payment_method=order_data.payment_method,
         notes=order_data.notes
     )
@@ -190,6 +188,7 @@ async def create_order(
         # Create OrderItem
         order_item = OrderItem(
             order_id=new_order.id,
+            created_at=new_order.created_at,
             product_id=product.id,
             quantity=item_data["quantity"],
             unit_price=item_data["unit_price"],
@@ -204,18 +203,20 @@ async def create_order(
             product.stock_quantity -= item_data["quantity"]
             # Trigger low stock alert logic here if needed
             
-    # 4. Record Payment (if applicable)
-    if order_data.payment_method:
-        from app.models.database import PaymentMethod
-        payment = Payment(
-            organization_id=org_id,
-            order_id=new_order.id,
-            amount=total_amount,
-            method=PaymentMethod.CASH if order_data.payment_method == "cash" else PaymentMethod.CREDIT_CARD,
-            status="completed",
-            provider_transaction_id=f"TXN-{new_order.id[:8]}"
+    # 4. Record Payments (if applicable)
+    tenders = [Tender(**t.model_dump()) for t in order_data.tenders]
+    if not tenders and order_data.payment_method:
+        tenders = [Tender(order_data.payment_method, total_amount, order_data.currency)]
+    if tenders:
+        new_order.payment_method = tender_label(tenders)
+        try:
+            await record_payments(db, new_order, tenders, user_id)
+        except CheckoutError as e:
+            await db.rollback()
+            raise HTTPException(400, str(e))
+        await customer_stats.record_sale(
+            db, order_data.customer_id, total_amount, tiers=await loyalty.tiers(db, org_id)
         )
-        db.add(payment)
         
     await db.commit()
     await db.refresh(new_order)
@@ -240,6 +241,8 @@ async def refund_order(
     
     - Marks order as refunded
     - Restores stock
+    - Credits back the on-account part
+    - Puts gift card tenders back on their cards
     - Records refund transaction
     """
     payload = verify_token(token.credentials)
@@ -257,7 +260,9 @@ async def refund_order(
         raise HTTPException(400, "Order already refunded")
     
     # Get order items separately
-    items_query = select(OrderItem).where(OrderItem.order_id == order.id)
+    items_query = select(OrderItem).where(
+        and_(OrderItem.order_id == order.id, OrderItem.created_at >= order.created_at)
+    )
     items_result = await db.execute(items_query)
     order_items = items_result.scalars().all()
         
@@ -268,6 +273,60 @@ async def refund_order(
         if product and product.track_inventory:
             product.stock_quantity += item.quantity
             
+    # Reverse the on-account part of the sale - in the base currency, also for
+    # older foreign-currency rows (amount is in the paid currency there)
+    base_amount = case(
+        (Payment.exchange_rate != None, func.round(Payment.amount / Payment.exchange_rate, 2)),
+        else_=Payment.amount
+    )
+    on_account = (await db.execute(
+        select(func.coalesce(func.sum(base_amount), 0)).where(
+            and_(
+                Payment.order_id == order.id,
+                Payment.created_at >= order.created_at,
+                Payment.method == PaymentMethod.CREDIT
+            )
+        )
+    )).scalar()
+    if on_account and order.customer_id:
+        try:
+            await customer_credit.refund(
+                db, org_id, order.customer_id, on_account,
+                order_id=order.id, notes=reason, user_id=payload.get("sub")
+            )
+        except CreditError as e:
+            await db.rollback()
+            raise HTTPException(400, str(e))
+
+    # Gift card tenders go back on their cards - in card id order, like the debits
+    card_amounts = (await db.execute(
+        select(Payment.provider_transaction_id, func.sum(Payment.amount))
+        .where(
+            and_(
+                Payment.order_id == order.id,
+                Payment.created_at >= order.created_at,
+                Payment.method == PaymentMethod.GIFT_CARD,
+                Payment.provider_transaction_id != None
+            )
+        )
+        .group_by(Payment.provider_transaction_id)
+        .order_by(Payment.provider_transaction_id)
+    )).all()
+    for card_id, amount in card_amounts:
+        try:
+            await gift_card_service.credit(db, card_id, amount, order_id=order.id, notes=reason)
+        except GiftCardError as e:
+            await db.rollback()
+            raise HTTPException(400, str(e))
+
+    # Take the order back out of the customer's lifetime stats and points
+    if order.status in customer_stats.COUNTED_STATUSES:
+        await customer_stats.record_refund(
+            db, order.customer_id, order.total_amount or 0, tiers=await loyalty.tiers(db, org_id)
+        )
+    if order.customer_id:
+        await loyalty.reverse(db, org_id, order.customer_id, order.id, user_id=payload.get("sub"), notes=reason)
+            
     # Update Order Status
     order.status = "refunded"
     order.payment_status = "refunded"
@@ -278,10 +337,21 @@ async def refund_order(
         order_id=order.id,
         to_status="refunded",
         notes=reason,
-        created_by=payload.get("sub")
+        user_id=payload.get("sub")
     )
     db.add(history)
     
+    if order.customer_id:
+        await outbox.add(
+            db, org_id, "order_refunded", customer_id=order.customer_id, order_id=order.id,
+            context={
+                "order_number": order.order_number,
+                "total_amount": str(order.total_amount or 0),
+                "currency": settings.BASE_CURRENCY,
+                "reason": reason,
+            }
+        )
+    
     await db.commit()
     await db.refresh(order)
     
@@ -12,11 +12,11 @@ Core POS Features:
 - Customer credit
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func, update
+from sqlalchemy import select, and_, case, func, update
 from typing import List, Optional
-from datetime import datetime, date
+from datetime import datetime, date, time, timedelta
 from decimal import Decimal
 
 from app.db.session import get_db
@@ -28,6 +28,15 @@ from app.schemas.schemas import (
     ProductResponse, OrderCreate, OrderResponse,
     SuccessResponse
 )
+from app.services.basket import BasketLine, build_basket
+from app.services.checkout import Tender, persist_sale, CheckoutError
+from app.services.forecasting import reorder_level
+from app.services.promotions import promotions, customer_segment
+from app.services.reservations import reservations
+from app.services.tax import taxes
+from app.services.partitions import child_range
+from app.services.search_analytics import search_analytics
+from app.services.i18n import translations, page_etag, not_modified
 from app.core.security import verify_token
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
@@ -78,6 +87,8 @@ async def scan_product(
 @router.get("/products/search", response_model=List[ProductResponse])
 async def search_products(
     q: str,
+    request: Request,
+    response: Response,
     limit: int = 20,
     db: AsyncSession = Depends(get_db),
     token: HTTPAuthorizationCredentials = Depends(security)
@@ -86,6 +97,8 @@ async def search_products(
     🔎 QUICK SEARCH - Search products by name/SKU
     
     Usage: Cashier types product name when searching
+    Names are localized by Accept-Language; most clicked results for the
+    query rank first. Every search is logged for search analytics.
     """
     payload = verify_token(token.credentials)
     org_id = payload.get("organization_id")
@@ -98,10 +111,27 @@ async def search_products(
         )
     ).limit(limit)
     
+    # Products shoppers clicked most for this query come first
+    boosted = search_analytics.boosted(org_id, q)
+    if boosted:
+        query = query.order_by(
+            case({pid: rank for rank, pid in enumerate(boosted)}, value=Product.id, else_=len(boosted))
+        )
+    
     result = await db.execute(query)
     products = result.scalars().all()
-    
-    return products
+    search_analytics.log(org_id, q, len(products))
+    
+    bundle = await translations.for_request(db, request)
+    etag = page_etag(bundle, [(p.id, p.updated_at) for p in products])
+    cached = not_modified(request, response, etag, bundle)
+    if cached:
+        return cached
+    
+    items = [ProductResponse.model_validate(p) for p in products]
+    if bundle:
+        items = bundle.apply(items, "product", ("name",))
+    return items
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -118,8 +148,8 @@ async def quick_checkout(
     💳 QUICK CHECKOUT - Process sale instantly
     
     Steps:
-    1. Validate stock
-    2. Calculate totals
+    1. Validate stock (or convert the basket's reservation)
+    2. Calculate totals (campaigns + discount code)
     3. Create order
     4. Update stock
     5. Process payment
@@ -129,102 +159,87 @@ async def quick_checkout(
     org_id = payload.get("organization_id")
     user_id = payload.get("sub")
     
-    # 1. Validate stock & calculate
-    subtotal = Decimal(0)
-    tax_amount = Decimal(0)
-    order_items_data = []
-    
-    for item in order_data.items:
-        # Get product
-        product_query = select(Product).where(Product.id == item.product_id)
-        product = (await db.execute(product_query)).scalar_one_or_none()
-        
-        if not product:
-            raise HTTPException(404, f"Product {item.product_id} not found")
+    # 1. Validate stock (or take the basket's reservation)
+    if order_data.reservation_id:
+        # Stock was taken when the basket held it - use the hold snapshot
+        held_lines = await reservations.consume(db, order_data.reservation_id, org_id)
+        if not held_lines:
+            raise HTTPException(409, "Reservation expired or not found")
         
-        # Check stock
-        if product.track_inventory and product.stock_quantity < item.quantity:
-            raise HTTPException(
-                400,
-                f"Insufficient stock for {product.name}. Available: {product.stock_quantity}"
-            )
-        
-        # Calculate
-        item_total = item.unit_price * item.quantity
-        item_tax = item_total * (product.vat_rate / 100)
-        
-        subtotal += item_total
-        tax_amount += item_tax
-        
-        order_items_data.append({
-            "product": product,
-            "quantity": item.quantity,
-            "unit_price": item.unit_price,
-            "tax": item_tax,
-            "total": item_total + item_tax
-        })
-    
-    # 2. Calculate final totals
-    total = subtotal + tax_amount - order_data.discount_amount + order_data.shipping_cost
-    
-    # 3. Create order
-    order_number = f"ORD-{datetime.now().strftime('%Y%m%d')}-{datetime.now().microsecond}"
-    
-    new_order = Order(
-        organization_id=org_id,
-        branch_id=order_data.branch_id,
-        customer_id=order_data.customer_id,
-        cashier_id=user_id,
-        order_number=order_number,
-        channel=order_data.channel,
-        subtotal=subtotal,
-        tax_amount=tax_amount,
-        discount_amount=order_data.discount_amount,
-        shipping_cost=order_data.shipping_cost,
-        total_amount=total,
-        status="completed",
-        payment_status="paid",
-        customer_notes=order_data.customer_notes
-    )
-    
-    db.add(new_order)
-    await db.flush()
-    
-    # 4. Add order items & update stock
-    for item_data in order_items_data:
-        order_item = OrderItem(
-            order_id=new_order.id,
-            product_id=item_data["product"].id,
-            product_name=item_data["product"].name,
-            sku=item_data["product"].sku,
-            quantity=item_data["quantity"],
-            unit_price=item_data["unit_price"],
-            tax_rate=item_data["product"].vat_rate,
-            total_price=item_data["total"]
-        )
-        db.add(order_item)
+        lines = [
+            BasketLine(
+                product_id=line.product_id,
+                product_name=line.product_name,
+                sku=line.sku,
+                unit_price=line.unit_price,
+                vat_rate=await taxes.rate(db, org_id, order_data.branch_id, line.category_id, line.vat_rate),
+                quantity=line.quantity,
+                track_inventory=line.track_inventory,
+                category_id=line.category_id,
+                brand_id=line.brand_id
+            ) for line in held_lines
+        ]
+    else:
+        if not order_data.items:
+            raise HTTPException(400, "Order has no items")
         
-        # Update stock
-        if item_data["product"].track_inventory:
-            await db.execute(
-                update(Product)
-                .where(Product.id == item_data["product"].id)
-                .values(
-                    stock_quantity=Product.stock_quantity - item_data["quantity"],
-                    sales_count=Product.sales_count + item_data["quantity"]
+        lines = []
+        for item in order_data.items:
+            # Get product
+            product_query = select(Product).where(Product.id == item.product_id)
+            product = (await db.execute(product_query)).scalar_one_or_none()
+            
+            if not product:
+                raise HTTPException(404, f"Product {item.product_id} not found")
+            
+            # Check stock
+            if product.track_inventory and product.stock_quantity < item.quantity:
+                raise HTTPException(
+                    400,
+                    f"Insufficient stock for {product.name}. Available: {product.stock_quantity}"
                 )
-            )
-    
-    # 5. Create payment record
-    payment = Payment(
-        order_id=new_order.id,
-        customer_id=order_data.customer_id,
-        method="cash",  # Default, can be from order_data
-        amount=total,
-        status="completed",
-        completed_at=datetime.utcnow()
-    )
-    db.add(payment)
+            
+            lines.append(BasketLine(
+                product_id=product.id,
+                product_name=product.name,
+                sku=product.sku,
+                unit_price=item.unit_price,
+                vat_rate=await taxes.rate(db, org_id, order_data.branch_id, product.category_id, product.vat_rate),
+                quantity=item.quantity,
+                track_inventory=product.track_inventory,
+                category_id=product.category_id,
+                brand_id=product.brand_id
+            ))
+    
+    # 2. Calculate totals - discounts come from active campaigns and the code only
+    basket = build_basket(lines, org_id, order_data.branch_id)
+    basket.shipping_cost = order_data.shipping_cost
+    basket.discount_code = order_data.discount_code
+    basket.customer_id = order_data.customer_id
+    
+    segment = await customer_segment(db, order_data.customer_id)
+    promo = await promotions.apply(db, basket, segment)
+    if promo.code_error:
+        await db.rollback()
+        raise HTTPException(400, promo.code_error)
+    
+    # 3-5. Create order, items, stock & payment
+    try:
+        new_order = await persist_sale(
+            db,
+            basket,
+            user_id=user_id,
+            customer_id=order_data.customer_id,
+            channel=order_data.channel,
+            customer_notes=order_data.customer_notes,
+            reserved=bool(order_data.reservation_id),
+            payment_method=order_data.payment_method or "cash",
+            currency=order_data.currency,
+            tenders=[Tender(**t.model_dump()) for t in order_data.tenders]
+        )
+    except CheckoutError as e:
+        await db.rollback()
+        raise HTTPException(400, str(e))
     
     await db.commit()
     await db.refresh(new_order)
@@ -308,53 +323,38 @@ async def close_register(
     if not register:
         raise HTTPException(404, "No open register found")
     
-    # Calculate sales during shift
-    sales_query = select(
-        func.count(Order.id).label("total_orders"),
-        func.coalesce(func.sum(Order.total_amount), 0).label("total_sales"),
-        func.coalesce(func.sum(
-            case((Payment.method == "cash", Payment.amount), else_=0)
-        ), 0).label("cash_sales"),
-        func.coalesce(func.sum(
-            case((Payment.method == "card", Payment.amount), else_=0)
-        ), 0).label("card_sales")
-    ).select_from(Order).join(Payment).where(
-        and_(
-            Order.cashier_id == user_id,
-            Order.created_at >= register.opened_at
-        )
-    )
-    
-    sales = (await db.execute(sales_query)).first()
+    # Shift totals are kept up to date by every checkout - no scan over orders
+    cash_sales = register.cash_sales or Decimal(0)
+    expected_cash = (register.opening_amount or Decimal(0)) + cash_sales
+    difference = closing_amount - expected_cash
     
-    # Update register
     register.closing_amount = closing_amount
-    register.cash_sales = sales.cash_sales
-    register.card_sales = sales.card_sales
+    register.expected_amount = expected_cash
+    register.variance = difference
     register.status = "closed"
     register.closed_at = datetime.utcnow()
     
-    await db.commit()
+    report = {
+        "register_id": register.id,
+        "shift_duration_hours": (register.closed_at - register.opened_at).total_seconds() / 3600,
+        "total_orders": register.order_count or 0,
+        "total_sales": float(register.total_sales or 0),
+        "cash_sales": float(cash_sales),
+        "card_sales": float(register.card_sales or 0),
+        "gift_card_sales": float(register.gift_card_sales or 0),
+        "other_sales": float(register.other_sales or 0),
+        "opening_amount": float(register.opening_amount or 0),
+        "expected_cash": float(expected_cash),
+        "actual_cash": float(closing_amount),
+        "difference": float(difference),
+        "status": "balanced" if abs(difference) < Decimal("0.01") else "variance"
+    }
     
-    # Z-report data
-    expected_cash = register.opening_amount + sales.cash_sales
-    difference = closing_amount - expected_cash
+    await db.commit()
     
     return SuccessResponse(
         message="Register closed successfully",
-        data={
-            "register_id": register.id,
-            "shift_duration_hours": (register.closed_at - register.opened_at).seconds / 3600,
-            "total_orders": sales.total_orders,
-            "total_sales": float(sales.total_sales),
-            "cash_sales": float(sales.cash_sales),
-            "card_sales": float(sales.card_sales),
-            "opening_amount": float(register.opening_amount),
-            "expected_cash": float(expected_cash),
-            "actual_cash": float(closing_amount),
-            "difference": float(difference),
-            "status": "balanced" if abs(difference) < 0.01 else "variance"
-        }
+        data=report
     )
 
 
@@ -380,10 +380,15 @@ async def daily_sales_report(
     if not report_date:
         report_date = date.today()
     
+    # Half-open range on the raw column - uses the index and prunes partitions
+    day_start = datetime.combine(report_date, time.min)
+    day_end = day_start + timedelta(days=1)
+    
     # Build query
     conditions = [
         Order.organization_id == org_id,
-        func.date(Order.created_at) == report_date,
+        Order.created_at >= day_start,
+        Order.created_at < day_end,
         Order.status.in_(["completed", "partial_refunded"])
     ]
     
@@ -406,7 +411,9 @@ async def daily_sales_report(
         Payment.method,
         func.count(Payment.id).label("count"),
         func.sum(Payment.amount).label("total")
-    ).join(Order).where(and_(*conditions)).group_by(Payment.method)
+    ).join(Order).where(
+        and_(*conditions, *child_range(Payment.created_at, day_start, day_end))
+    ).group_by(Payment.method)
     
     payments = (await db.execute(payment_query)).all()
     
@@ -416,7 +423,7 @@ async def daily_sales_report(
         func.sum(OrderItem.quantity).label("quantity_sold"),
         func.sum(OrderItem.total_price).label("revenue")
     ).select_from(OrderItem).join(Order).join(Product).where(
-        and_(*conditions)
+        and_(*conditions, *child_range(OrderItem.created_at, day_start, day_end))
     ).group_by(Product.id, Product.name).order_by(
         func.sum(OrderItem.total_price).desc()
     ).limit(10)
@@ -505,7 +512,9 @@ async def low_stock_alert(
     """
     ⚠️ LOW STOCK ALERT
     
-    Returns: Products below critical level
+    Returns: Products at or below their reorder point - forecast from sales
+    history where there is one (services/forecasting.py), the static
+    low_stock_threshold otherwise - with a suggested order quantity
     """
     payload = verify_token(token.credentials)
     org_id = payload.get("organization_id")
@@ -514,22 +523,34 @@ async def low_stock_alert(
         and_(
             Product.organization_id == org_id,
             Product.is_active == True,
-            Product.stock_quantity <= Product.low_stock_threshold
+            Product.stock_quantity <= reorder_level()
         )
     ).order_by(Product.stock_quantity.asc()).limit(limit)
     
     products = (await db.execute(query)).scalars().all()
     
+    items = []
+    for p in products:
+        forecast = p.reorder_point is not None
+        threshold = p.reorder_point if forecast else p.low_stock_threshold
+        target = p.order_up_to if forecast else threshold
+        items.append({
+            "id": p.id,
+            "name": p.name,
+            "sku": p.sku,
+            "current_stock": p.stock_quantity,
+            "threshold": threshold,
+            "threshold_source": "forecast" if forecast else "static",
+            "shortage": threshold - p.stock_quantity,
+            "daily_demand": p.forecast_daily_units,
+            "days_of_stock": (
+                round(max(p.stock_quantity, 0) / p.forecast_daily_units, 1)
+                if forecast and p.forecast_daily_units else None
+            ),
+            "suggested_order_quantity": max(target - p.stock_quantity, 0),
+        })
+    
     return {
-        "total_low_stock": len(products),
-        "products": [
-            {
-                "id": p.id,
-                "name": p.name,
-                "sku": p.sku,
-                "current_stock": p.stock_quantity,
-                "threshold": p.low_stock_threshold,
-                "shortage": p.low_stock_threshold - p.stock_quantity
-            } for p in products
-        ]
+        "total_low_stock": len(items),
+        "products": items
     }
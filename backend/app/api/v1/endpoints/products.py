@@ -3,23 +3,31 @@
 Ultra-fast product management for POS
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func, update, delete
+from sqlalchemy import select, and_, func, update, delete
 from typing import List, Optional
 from datetime import datetime
 
+from app.core.config import settings
 from app.db.session import get_db
 from app.models.database import Product, ProductVariant, ProductImage, Category, Brand
 from app.schemas.schemas import (
-    ProductCreate, ProductUpdate, ProductResponse, ProductListResponse
+    ProductCreate, ProductUpdate, ProductResponse, ProductListResponse, RecommendedProduct
 )
+from app.services.i18n import translations, page_etag, not_modified
+from app.services.exports import ProductFilters
+from app.services import product_bulk
+from app.services.jobs import jobs
+from app.services.recommendations import recommender
 from app.core.security import verify_token
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 router = APIRouter(prefix="/products", tags=["Products"])
 security = HTTPBearer()
 
+TRANSLATED_FIELDS = ("name",)
+
 
 # ═══════════════════════════════════════════════════════════════
 # LIST PRODUCTS (with pagination, search, filters)
@@ -27,6 +35,8 @@ security = HTTPBearer()
 
 @router.get("", response_model=ProductListResponse)
 async def list_products(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     search: Optional[str] = None,
@@ -45,33 +55,15 @@ async def list_products(
     - Search (name, SKU, barcode)
     - Filter by category, brand, status
     - Low stock alert filter
+    - Localized by Accept-Language (ETag / 304 support)
     
     Returns paginated product list
     """
     payload = verify_token(token.credentials)
     org_id = payload.get("organization_id")
     
-    # Build query
-    conditions = [Product.organization_id == org_id]
-    
-    # Search
-    if search:
-        search_condition = or_(
-            Product.name.ilike(f"%{search}%"),
-            Product.sku.ilike(f"%{search}%"),
-            Product.barcode.ilike(f"%{search}%")
-        )
-        conditions.append(search_condition)
-    
-    # Filters
-    if category_id:
-        conditions.append(Product.category_id == category_id)
-    if brand_id:
-        conditions.append(Product.brand_id == brand_id)
-    if is_active is not None:
-        conditions.append(Product.is_active == is_active)
-    if low_stock:
-        conditions.append(Product.stock_quantity <= Product.low_stock_threshold)
+    # Build query (same filters as the export)
+    conditions = ProductFilters(search, category_id, brand_id, is_active, low_stock).conditions(org_id)
     
     # Count total
     count_query = select(func.count(Product.id)).where(and_(*conditions))
@@ -82,11 +74,22 @@ async def list_products(
     result = await db.execute(query)
     products = result.scalars().all()
     
+    # Localize the whole page in one pass
+    bundle = await translations.for_request(db, request)
+    etag = page_etag(bundle, [total] + [(p.id, p.updated_at) for p in products])
+    cached = not_modified(request, response, etag, bundle)
+    if cached:
+        return cached
+    
+    items = [ProductResponse.model_validate(p) for p in products]
+    if bundle:
+        items = bundle.apply(items, "product", TRANSLATED_FIELDS)
+    
     return ProductListResponse(
         total=total,
         skip=skip,
         limit=limit,
-        items=products
+        items=items
     )
 
 
@@ -286,6 +289,7 @@ async def delete_product(
 @router.post("/bulk-import")
 async def bulk_import_products(
     products: List[ProductCreate],
+    background: bool = Query(False),
     db: AsyncSession = Depends(get_db),
     token: HTTPAuthorizationCredentials = Depends(security)
 ):
@@ -294,54 +298,26 @@ async def bulk_import_products(
     
     Import multiple products at once (CSV/Excel)
     Returns: { success: count, failed: count, errors: [] }
+    background=true queues a job instead: { job_id } - see /jobs/{id}
     """
     payload = verify_token(token.credentials)
     org_id = payload.get("organization_id")
     
-    success_count = 0
-    failed_count = 0
-    errors = []
-    
-    for idx, product_data in enumerate(products):
-        try:
-            # Check SKU
-            existing = await db.execute(
-                select(Product).where(
-                    and_(
-                        Product.organization_id == org_id,
-                        Product.sku == product_data.sku
-                    )
-                )
-            )
-            if existing.scalar_one_or_none():
-                errors.append(f"Row {idx + 1}: SKU '{product_data.sku}' already exists")
-                failed_count += 1
-                continue
-            
-            # Create product
-            new_product = Product(
-                organization_id=org_id,
-                **product_data.dict()
-            )
-            db.add(new_product)
-            success_count += 1
-            
-        except Exception as e:
-            errors.append(f"Row {idx + 1}: {str(e)}")
-            failed_count += 1
-    
-    await db.commit()
+    if background:
+        job = await jobs.enqueue(
+            db, "products.bulk_import", {"products": [p.model_dump(mode="json") for p in products]},
+            org_id=org_id, user_id=payload.get("sub")
+        )
+        await db.commit()
+        return {"job_id": job.id, "status": job.status}
     
-    return {
-        "success": success_count,
-        "failed": failed_count,
-        "errors": errors
-    }
+    return await product_bulk.import_products(db, org_id, [p.model_dump() for p in products])
 
 
 @router.patch("/bulk-update-prices")
 async def bulk_update_prices(
     updates: List[dict],  # [{"product_id": "...", "new_price": 100}]
+    background: bool = Query(False),
     db: AsyncSession = Depends(get_db),
     token: HTTPAuthorizationCredentials = Depends(security)
 ):
@@ -349,31 +325,20 @@ async def bulk_update_prices(
     💰 BULK UPDATE PRICES
     
     Update prices for multiple products
+    background=true queues a job instead: { job_id } - see /jobs/{id}
     """
     payload = verify_token(token.credentials)
     org_id = payload.get("organization_id")
     
-    updated_count = 0
-    
-    for update_item in updates:
-        product_id = update_item.get("product_id")
-        new_price = update_item.get("new_price")
-        
-        await db.execute(
-            update(Product)
-            .where(
-                and_(
-                    Product.id == product_id,
-                    Product.organization_id == org_id
-                )
-            )
-            .values(base_price=new_price, updated_at=datetime.utcnow())
+    if background:
+        job = await jobs.enqueue(
+            db, "products.bulk_update_prices", {"updates": updates},
+            org_id=org_id, user_id=payload.get("sub")
         )
-        updated_count += 1
+        await db.commit()
+        return {"job_id": job.id, "status": job.status}
     
-    await db.commit()
-    
-    return {"updated": updated_count}
+    return {"updated": await product_bulk.update_prices(db, org_id, updates)}
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -454,3 +419,42 @@ async def get_stock_history(
             for m in movements
         ]
     }
+
+
+@router.get("/{product_id}/recommendations", response_model=List[RecommendedProduct])
+async def get_recommendations(
+    product_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    🧭 FREQUENTLY BOUGHT TOGETHER
+    
+    Products most often in the same orders, best first - from the last
+    recommendations build (empty until the first one)
+    """
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+    
+    # All stored neighbors - inactive ones are filtered out below
+    similar = recommender.similar(product_id, settings.RECOMMEND_TOP_K)
+    if not similar:
+        return []
+    
+    result = await db.execute(
+        select(Product).where(
+            and_(
+                Product.id.in_([pid for pid, _ in similar]),
+                Product.organization_id == org_id,
+                Product.is_active == True
+            )
+        )
+    )
+    products = {p.id: p for p in result.scalars().all()}
+    
+    return [
+        RecommendedProduct(**ProductResponse.model_validate(products[pid]).model_dump(), score=round(score, 4))
+        for pid, score in similar
+        if pid in products
+    ][:limit]
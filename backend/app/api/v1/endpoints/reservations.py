@@ -0,0 +1,79 @@
+"""
+🔒 Stock Reservations API
+Hold stock for in-progress baskets until checkout or expiry
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_db
+from app.schemas.schemas import ReservationHold, ReservationResponse, SuccessResponse
+from app.services.reservations import reservations, ReservationError
+from app.core.security import verify_token
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+router = APIRouter(prefix="/pos/reservations", tags=["POS Reservations"])
+security = HTTPBearer()
+
+
+@router.get("/{basket_id}", response_model=ReservationResponse)
+async def get_reservation(
+    basket_id: str,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🔍 GET BASKET HOLDS"""
+    payload = verify_token(token.credentials)
+
+    lines = await reservations.lines(db, payload.get("organization_id"), basket_id)
+
+    return ReservationResponse(
+        basket_id=basket_id,
+        expires_at=lines[0].expires_at if lines else None,
+        lines=lines
+    )
+
+
+@router.post("/{basket_id}/hold", response_model=ReservationResponse)
+async def hold_stock(
+    basket_id: str,
+    hold: ReservationHold,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    ✋ HOLD STOCK
+
+    Positive quantity reserves more units, negative gives units back.
+    Every call extends the whole basket by RESERVATION_TTL_MINUTES.
+    """
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    try:
+        line = await reservations.hold(db, org_id, basket_id, hold.product_id, hold.quantity)
+    except ReservationError as e:
+        raise HTTPException(409, str(e))
+
+    return ReservationResponse(
+        basket_id=basket_id,
+        expires_at=line.expires_at,
+        lines=await reservations.lines(db, org_id, basket_id)
+    )
+
+
+@router.delete("/{basket_id}", response_model=SuccessResponse)
+async def release_reservation(
+    basket_id: str,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🔓 RELEASE BASKET - Return all held stock (basket voided)"""
+    payload = verify_token(token.credentials)
+
+    released = await reservations.release(db, payload.get("organization_id"), basket_id)
+
+    return SuccessResponse(
+        message="Reservation released",
+        data={"basket_id": basket_id, "released_lines": released}
+    )
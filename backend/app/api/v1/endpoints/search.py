@@ -0,0 +1,88 @@
+"""
+🔎 Search Analytics API - Top queries, zero-result queries, CTR by position
+Read from the hourly rollups built by app/services/search_analytics.py
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_db
+from app.schemas.schemas import SearchPositionStat, SearchQueryStat, SuccessResponse
+from app.services.jobs import jobs
+from app.services.search_analytics import search_analytics
+from app.core.security import verify_token
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+router = APIRouter(prefix="/search", tags=["Search Analytics"])
+security = HTTPBearer()
+
+
+def _range(start_date: Optional[datetime], end_date: Optional[datetime]) -> Tuple[datetime, datetime]:
+    end = end_date or datetime.utcnow()
+    return start_date or end - timedelta(days=30), end
+
+
+@router.get("/top-queries", response_model=List[SearchQueryStat])
+async def top_queries(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🔝 TOP QUERIES - Most searched, with clicks and CTR (default: last 30 days)"""
+    payload = verify_token(token.credentials)
+    start, end = _range(start_date, end_date)
+    return await search_analytics.top_queries(db, payload.get("organization_id"), start, end, limit)
+
+
+@router.get("/zero-results", response_model=List[SearchQueryStat])
+async def zero_result_queries(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🕳️ ZERO-RESULT QUERIES - What shoppers look for and don't find"""
+    payload = verify_token(token.credentials)
+    start, end = _range(start_date, end_date)
+    return await search_analytics.top_queries(
+        db, payload.get("organization_id"), start, end, limit, zero_results_only=True
+    )
+
+
+@router.get("/ctr", response_model=List[SearchPositionStat])
+async def ctr_by_position(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🎯 CTR BY POSITION - Clicks per impression of each result slot"""
+    payload = verify_token(token.credentials)
+    start, end = _range(start_date, end_date)
+    return await search_analytics.ctr_by_position(db, payload.get("organization_id"), start, end)
+
+
+@router.post("/rollup", response_model=SuccessResponse)
+async def queue_rollup(
+    start_date: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🔄 REBUILD ROLLUPS - From start_date (default: the lookback window), all organizations"""
+    payload = verify_token(token.credentials)
+    if payload.get("role") != "super_admin":
+        raise HTTPException(403, "Not allowed")
+
+    job = await jobs.enqueue(
+        db, "search.rollup",
+        {"start": start_date.isoformat() if start_date else None},
+        user_id=payload.get("sub")
+    )
+    await db.commit()
+    return SuccessResponse(message="Search rollup queued", data={"job_id": job.id})
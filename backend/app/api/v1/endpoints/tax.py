@@ -0,0 +1,152 @@
+"""
+🧾 Tax API - Tax Rules & Re-invoicing
+Country/state/category rules, rate preview, bulk recalculation
+"""
+
+from datetime import datetime, time
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.db.session import get_db
+from app.models.global_features import Country, TaxRule
+from app.schemas.schemas import (
+    TaxRuleCreate, TaxRuleUpdate, TaxRuleResponse,
+    TaxRecalculate, TaxRecalculateResponse
+)
+from app.services.tax import taxes
+from app.core.security import verify_token
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+router = APIRouter(prefix="/tax", tags=["Tax"])
+security = HTTPBearer()
+
+
+def _require_role(payload: dict, *roles: str):
+    """Tax rules are shared by all organizations - only admins may change them"""
+    if payload.get("role") not in roles:
+        raise HTTPException(403, "Not allowed")
+
+
+@router.get("/rules", response_model=List[TaxRuleResponse])
+async def list_tax_rules(
+    country_code: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """📋 LIST TAX RULES"""
+    verify_token(token.credentials)
+
+    query = select(TaxRule).order_by(TaxRule.country_code, TaxRule.state, TaxRule.category_id)
+    if country_code:
+        query = query.where(TaxRule.country_code == country_code.upper())
+
+    return (await db.execute(query)).scalars().all()
+
+
+@router.post("/rules", response_model=TaxRuleResponse, status_code=201)
+async def create_tax_rule(
+    rule_data: TaxRuleCreate,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """✨ CREATE TAX RULE"""
+    payload = verify_token(token.credentials)
+    _require_role(payload, "super_admin")
+
+    country = await db.get(Country, rule_data.country_code.upper())
+    if not country:
+        raise HTTPException(404, f"Country {rule_data.country_code} not found")
+
+    data = rule_data.model_dump()
+    data["country_code"] = country.code
+    rule = TaxRule(**data)
+    db.add(rule)
+    await db.commit()
+    await db.refresh(rule)
+
+    taxes.invalidate()
+    return rule
+
+
+@router.put("/rules/{rule_id}", response_model=TaxRuleResponse)
+async def update_tax_rule(
+    rule_id: str,
+    rule_data: TaxRuleUpdate,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """✏️ UPDATE TAX RULE"""
+    payload = verify_token(token.credentials)
+    _require_role(payload, "super_admin")
+
+    rule = await db.get(TaxRule, rule_id)
+    if not rule:
+        raise HTTPException(404, "Tax rule not found")
+
+    for field, value in rule_data.model_dump(exclude_unset=True).items():
+        setattr(rule, field, value)
+
+    await db.commit()
+    await db.refresh(rule)
+
+    taxes.invalidate()
+    return rule
+
+
+@router.get("/resolve")
+async def resolve_tax_rate(
+    category_id: Optional[str] = None,
+    branch_id: Optional[str] = None,
+    fallback_rate: float = 0,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """🔍 PREVIEW RATE - Which rate a product of this category gets at a branch"""
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+
+    location = await taxes.location(db, org_id, branch_id)
+    rate = await taxes.rate(db, org_id, branch_id, category_id, fallback_rate)
+
+    return {
+        "country": location.country,
+        "state": location.state,
+        "category_id": category_id,
+        "tax_rate": rate
+    }
+
+
+@router.post("/recalculate", response_model=TaxRecalculateResponse)
+async def recalculate_tax(
+    request: TaxRecalculate,
+    db: AsyncSession = Depends(get_db),
+    token: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    🔁 BULK RE-INVOICE
+
+    Recomputes tax for all orders in the date range against the current
+    rules. Dry run by default; apply=true writes the changed orders.
+    """
+    payload = verify_token(token.credentials)
+    org_id = payload.get("organization_id")
+    if request.apply:
+        _require_role(payload, "super_admin", "org_admin")
+
+    if request.end_date < request.start_date:
+        raise HTTPException(400, "end_date must not be before start_date")
+
+    summary = await taxes.recalculate_orders(
+        db,
+        org_id,
+        datetime.combine(request.start_date, time.min),
+        datetime.combine(request.end_date, time.max),
+        apply=request.apply
+    )
+    if request.apply:
+        await db.commit()
+
+    return TaxRecalculateResponse(**summary, applied=request.apply)
@@ -3,7 +3,7 @@ Core Configuration using Pydantic Settings
 """
 
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 class Settings(BaseSettings):
     # App
@@ -49,6 +49,125 @@ class Settings(BaseSettings):
     DEFAULT_PAGE_SIZE: int = 50
     MAX_PAGE_SIZE: int = 100
     
+    # Stock Reservations
+    RESERVATION_TTL_MINUTES: int = 15
+    RESERVATION_TICK_SECONDS: float = 1.0
+    
+    # Promotions
+    PROMOTION_REFRESH_SECONDS: float = 30.0
+    DISCOUNT_NEGATIVE_CACHE_SECONDS: float = 60.0
+    
+    # Tax
+    TAX_REFRESH_SECONDS: float = 60.0
+    
+    # Currency
+    BASE_CURRENCY: str = "TRY"
+    CURRENCY_REFRESH_SECONDS: float = 300.0
+    
+    # Translations
+    DEFAULT_LANGUAGE: str = "tr"  # Language product data is entered in
+    I18N_REFRESH_SECONDS: float = 60.0
+    
+    # Customer Credit
+    STATEMENT_BATCH_SIZE: int = 1000  # Ledger rows fetched per round trip when streaming
+    
+    # Customer Stats (lifetime spend thresholds)
+    LOYALTY_TIER_THRESHOLDS: Dict[str, float] = {"silver": 5000.0, "gold": 20000.0, "platinum": 50000.0}
+    VIP_SPEND_THRESHOLD: float = 50000.0
+    
+    # Loyalty
+    LOYALTY_REFRESH_SECONDS: float = 60.0
+    
+    # RFM Segmentation
+    RFM_CHUNK_SIZE: int = 50_000  # Grouped order rows fetched per round trip
+    RFM_WRITE_BATCH: int = 5_000  # Customers per UPDATE ... FROM VALUES
+    RFM_INACTIVE_DAYS: int = 180
+    
+    # Demand forecasting (scripts/forecast_demand.py, nightly)
+    FORECAST_HISTORY_DAYS: int = 112  # Daily sales read per run
+    FORECAST_ALPHA: float = 0.2  # Exponential smoothing - weight of the newest day
+    FORECAST_LEAD_TIME_DAYS: int = 7  # Order to shelf
+    FORECAST_REVIEW_DAYS: int = 14  # Demand an order should cover beyond the lead time
+    FORECAST_SERVICE_LEVEL: float = 0.95  # Chance of no stock-out during the lead time
+    FORECAST_CHUNK_PRODUCTS: int = 5_000  # Products (x branches) per query and UPDATE
+    
+    # Sales analytics (scripts/rollup_sales.py)
+    ANALYTICS_ROLLUP_LOOKBACK_HOURS: int = 48  # Hours rebuilt per run - late status changes and refunds
+    ANALYTICS_CHUNK_SIZE: int = 100_000  # Rows streamed per round trip into the NumPy arrays
+    ANALYTICS_CACHE_SIZE: int = 512  # Cached results (organization, query, date range)
+    ANALYTICS_VERSION_CHECK_SECONDS: float = 10.0  # How often a process looks for a newer rollup
+    ANALYTICS_COHORT_MONTHS: int = 12  # Months of retention tracked per cohort
+    
+    # Customer Lookup
+    DEFAULT_PHONE_COUNTRY_CODE: str = "90"  # Prefixed to national numbers (0532... → 90532...)
+    CUSTOMER_LOOKUP_REFRESH_SECONDS: float = 5.0
+    
+    # Exports
+    EXPORT_BATCH_SIZE: int = 5_000  # Rows fetched per round trip (server-side cursor)
+    EXPORT_DIR: str = "exports"  # Background exports, one folder per organization
+    
+    # Background Jobs (Postgres queue - scripts/run_worker.py)
+    JOB_CONCURRENCY: int = 4  # Jobs one worker process runs at a time
+    JOB_POLL_SECONDS: float = 1.0
+    JOB_LEASE_SECONDS: float = 60.0  # Running jobs without a heartbeat for this long are requeued
+    JOB_RETRY_BASE_SECONDS: float = 10.0  # Backoff 10s, 20s, 40s, ...
+    JOB_EMBEDDED_WORKERS: int = 0  # >0 runs a worker inside the API process (local setups)
+    
+    # Notifications (outbox - scripts/run_dispatcher.py)
+    EMAIL_TRANSPORT: str = "file"  # file | smtp | sendgrid
+    SMS_TRANSPORT: str = "file"  # file | twilio
+    NOTIFICATION_FILE_DIR: str = "notifications"  # file transport: one JSON line per message
+    EMAIL_FROM: str = "no-reply@pospro.local"
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 25
+    SMTP_USERNAME: str = ""
+    SMTP_PASSWORD: str = ""
+    SMTP_STARTTLS: bool = False
+    TWILIO_FROM_NUMBER: str = ""
+    NOTIFY_BATCH_SIZE: int = 200  # Outbox rows claimed per round
+    NOTIFY_MAX_ATTEMPTS: int = 5
+    NOTIFY_RETRY_BASE_SECONDS: float = 30.0  # Backoff 30s, 60s, 120s, ...
+    NOTIFY_LEASE_SECONDS: float = 120.0  # Claimed rows of a dead dispatcher are picked up after this
+    NOTIFY_POLL_SECONDS: float = 1.0
+    NOTIFY_CONCURRENCY: Dict[str, int] = {"file": 1, "smtp": 2, "sendgrid": 8, "twilio": 4}
+    NOTIFY_RATE_PER_SECOND: Dict[str, float] = {"file": 1000.0, "smtp": 10.0, "sendgrid": 50.0, "twilio": 10.0}
+    NOTIFY_EMBEDDED_DISPATCHER: bool = False  # Run the dispatcher inside the API process
+    TEMPLATE_CACHE_SIZE: int = 1000  # Compiled template versions kept
+    
+    # Audit trail (buffered, written in batches)
+    AUDIT_BATCH_SIZE: int = 500  # Entries per multi-row insert; a full batch flushes early
+    AUDIT_FLUSH_SECONDS: float = 2.0
+    AUDIT_MAX_BUFFER: int = 50_000  # Oldest entries are dropped past this while the database is down
+    AUDIT_QUERY_DEFAULT_DAYS: int = 30  # Queries without a date range look back this far
+    
+    # Monthly table partitions (scripts/maintain_partitions.py)
+    PARTITION_MONTHS_AHEAD: int = 3  # Months created in advance
+    # Months kept online per table - older ones go to Parquet; unlisted tables are never archived
+    PARTITION_RETENTION_MONTHS: Dict[str, int] = {"product_views": 6, "search_queries": 12, "audit_logs": 24}
+    PARTITION_ARCHIVE_DIR: str = "archive"
+    
+    # Storefront event ingestion (product views, searches)
+    INGEST_RING_SIZE: int = 200_000  # Events buffered in memory; more are shed
+    INGEST_FLUSH_MS: int = 500
+    INGEST_FLUSH_EVENTS: int = 5_000  # Events per write; a full batch flushes early
+    INGEST_MAX_BATCH: int = 1_000  # Events per request
+    INGEST_USE_COPY: bool = True  # COPY through asyncpg; False = multi-row INSERT
+    
+    # Search analytics (rollups + ranking boost)
+    SEARCH_ROLLUP_LOOKBACK_HOURS: int = 25  # Hours rebuilt per run - events may be stamped up to 24h back
+    SEARCH_ROLLUP_POSITIONS: int = 10  # Result positions tracked for CTR
+    SEARCH_BOOST_DAYS: int = 30  # Clicks counted towards the ranking boost
+    SEARCH_BOOST_PER_QUERY: int = 5  # Products boosted per query
+    SEARCH_BOOST_MIN_CLICKS: int = 3
+    SEARCH_BOOST_REFRESH_SECONDS: int = 300
+    
+    # Item-to-item recommendations (scripts/build_recommendations.py)
+    RECOMMEND_DIR: str = "recommendations"
+    RECOMMEND_TOP_K: int = 20  # Similar products stored per product
+    RECOMMEND_MIN_SUPPORT: int = 2  # Orders two products must share to be related
+    RECOMMEND_MAX_BASKET: int = 100  # Larger orders are left out
+    RECOMMEND_RELOAD_SECONDS: int = 60  # How often API processes look for a new build
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
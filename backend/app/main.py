@@ -4,7 +4,7 @@ PosPro FastAPI Backend - Main Application
 Enterprise-grade POS System REST API
 """
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import time
@@ -13,6 +13,17 @@ import logging
 # Import routers
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.services.basket import baskets
+from app.services.reservations import reservations
+from app.services.jobs import JobWorker, jobs
+from app.services import job_handlers  # noqa: F401 - registers the job types
+from app.services.notifications import dispatcher
+from app.services.audit import audit, bind_actor
+from app.services.partitions import partitions
+from app.services.events import ingestor
+from app.services.search_analytics import search_analytics
+from app.db.session import AsyncSessionLocal
+from app.core.security import verify_token
 
 # Configure logging
 logging.basicConfig(
@@ -56,9 +67,60 @@ async def log_requests(request: Request, call_next):
     response.headers["X-Process-Time"] = str(process_time)
     return response
 
+# Audit context middleware - who is behind the changes this request flushes
+@app.middleware("http")
+async def audit_context(request: Request, call_next):
+    user_id = org_id = None
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        try:
+            payload = verify_token(authorization[7:])
+            user_id, org_id = payload.get("sub"), payload.get("organization_id")
+        except HTTPException:
+            pass
+    bind_actor(
+        user_id, org_id,
+        request.client.host if request.client else None,
+        request.headers.get("user-agent")
+    )
+    return await call_next(request)
+
 # Include routers
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# Background services
+job_worker = (
+    JobWorker(jobs, settings.JOB_EMBEDDED_WORKERS, settings.JOB_POLL_SECONDS)
+    if settings.JOB_EMBEDDED_WORKERS else None
+)
+
+@app.on_event("startup")
+async def start_services():
+    reservations.on_expire(baskets.on_reservation_expired)
+    await reservations.start()
+    await audit.start()
+    await ingestor.start()
+    await search_analytics.start()
+    try:
+        async with AsyncSessionLocal() as db:
+            await partitions.ensure(db)
+    except Exception:
+        logger.exception("Could not create upcoming table partitions")
+    if job_worker:
+        await job_worker.start()
+    if settings.NOTIFY_EMBEDDED_DISPATCHER:
+        await dispatcher.start()
+
+@app.on_event("shutdown")
+async def stop_services():
+    await reservations.stop()
+    if job_worker:
+        await job_worker.shutdown()
+    await dispatcher.shutdown()
+    await search_analytics.shutdown()
+    await ingestor.shutdown()
+    await audit.shutdown()
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -6,9 +6,11 @@ Multi-tenant, Marketplace, Vendor Management, Complete E-commerce
 """
 
 from datetime import datetime
+from decimal import Decimal
 from sqlalchemy import (
     Column, String, Float, Integer, Boolean, DateTime, 
-    ForeignKey, Text, Enum, JSON, Numeric, Date, Time, Index
+    ForeignKey, Text, Enum, JSON, Numeric, Date, Time, Index,
+    DDL, Table, event, text
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
@@ -17,10 +19,33 @@ import uuid
 
 Base = declarative_base()
 
+# Trigram indexes (customer lookup) need the extension before the tables
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+
 def generate_uuid():
     return str(uuid.uuid4())
 
 
+def monthly_partitions(column: str = "created_at") -> dict:
+    """
+    Table options for monthly RANGE partitioning on `column`
+
+    Monthly partitions are created ahead and archived by
+    app/services/partitions.py. Postgres wants the partition key in every
+    unique constraint, so these tables use (id, column) as primary key -
+    and nothing can hold a foreign key to them.
+    """
+    return {"postgresql_partition_by": f"RANGE ({column})", "info": {"partition_by": column}}
+
+
+@event.listens_for(Table, "after_create")
+def _create_default_partition(table, connection, **kw):
+    # Catches rows outside the created months (should stay empty)
+    if table.info.get("partition_by") and connection.dialect.name == "postgresql":
+        connection.execute(text(f'CREATE TABLE IF NOT EXISTS "{table.name}_default" PARTITION OF "{table.name}" DEFAULT'))
+
+
 # ═══════════════════════════════════════════════════════════════
 # SECTION 1: MULTI-TENANCY & ORGANIZATION
 # ═══════════════════════════════════════════════════════════════
@@ -192,6 +217,12 @@ class CashRegister(Base):
     closing_amount = Column(Numeric(15, 2))
     cash_sales = Column(Numeric(15, 2), default=0)
     card_sales = Column(Numeric(15, 2), default=0)
+    gift_card_sales = Column(Numeric(15, 2), default=0)
+    other_sales = Column(Numeric(15, 2), default=0)
+    
+    # Running shift totals - bumped by every checkout, read by the Z-report
+    order_count = Column(Integer, default=0)
+    total_sales = Column(Numeric(15, 2), default=0)
     
     # Variance Tracking
     expected_amount = Column(Numeric(15, 2))
@@ -353,6 +384,12 @@ class Product(Base):
     low_stock_threshold = Column(Integer, default=10)
     allow_backorder = Column(Boolean, default=False)
     
+    # Demand forecast (services/forecasting.py) - NULL until the product has sales history
+    forecast_daily_units = Column(Float)
+    reorder_point = Column(Integer)  # Replaces low_stock_threshold once set
+    order_up_to = Column(Integer)  # Suggested order = order_up_to - stock
+    forecasted_at = Column(DateTime)
+    
     # Physical
     weight = Column(Float)  # kg
     length = Column(Float)  # cm
@@ -478,10 +515,40 @@ class StockMovement(Base):
     reference_number = Column(String(100))  # Order ID, PO number, etc.
     notes = Column(Text)
     
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, primary_key=True)  # Partition key
     
     __table_args__ = (
         Index('idx_stock_movement_product_date', 'product_id', 'created_at'),
+        monthly_partitions(),
+    )
+
+
+class StockReservation(Base):
+    """Short-lived stock holds for in-progress baskets"""
+    __tablename__ = "stock_reservations"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    organization_id = Column(String, ForeignKey("organizations.id"), nullable=False, index=True)
+    basket_id = Column(String(100), nullable=False)  # Register / basket key, unique per organization
+    product_id = Column(String, ForeignKey("products.id"), nullable=False, index=True)
+
+    quantity = Column(Integer, nullable=False)
+
+    # Product snapshot (checkout converts the hold without re-reading the product)
+    product_name = Column(String(500))
+    sku = Column(String(100))
+    category_id = Column(String)
+    brand_id = Column(String)
+    unit_price = Column(Numeric(15, 2), nullable=False)
+    vat_rate = Column(Float, default=18.0)
+    track_inventory = Column(Boolean, default=True)
+
+    # TTL index - crash recovery releases rows past their deadline
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_reservation_basket_product', 'organization_id', 'basket_id', 'product_id', unique=True),
     )
 
 
@@ -510,6 +577,7 @@ class Customer(Base):
     last_name = Column(String(100))
     email = Column(String(255), index=True)
     phone = Column(String(20), index=True)
+    phone_e164 = Column(String(20))  # Digits only, country code first (905321234567)
     date_of_birth = Column(Date)
     gender = Column(String(20))
     
@@ -534,11 +602,28 @@ class Customer(Base):
     allow_marketing_sms = Column(Boolean, default=True)
     
     is_active = Column(Boolean, default=True)
+    
+    # RFM scores (1-5), written by the segmentation job
+    rfm_recency = Column(Integer)
+    rfm_frequency = Column(Integer)
+    rfm_monetary = Column(Integer)
+    rfm_scored_at = Column(DateTime)
+    
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_purchase_at = Column(DateTime)
     
     __table_args__ = (
         Index('idx_customer_segment_active', 'segment', 'is_active'),
+        Index('idx_customer_org_updated', 'organization_id', 'updated_at'),
+        # Till lookup: phone suffix match + trigram search on names / email (needs pg_trgm)
+        Index('idx_customer_phone_suffix', 'organization_id', text("reverse(phone_e164) varchar_pattern_ops")),
+        Index('idx_customer_first_name_trgm', 'first_name', postgresql_using='gin',
+              postgresql_ops={'first_name': 'gin_trgm_ops'}),
+        Index('idx_customer_last_name_trgm', 'last_name', postgresql_using='gin',
+              postgresql_ops={'last_name': 'gin_trgm_ops'}),
+        Index('idx_customer_email_trgm', 'email', postgresql_using='gin',
+              postgresql_ops={'email': 'gin_trgm_ops'}),
     )
 
 
@@ -569,6 +654,110 @@ class CustomerAddress(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class LoyaltyProgram(Base):
+    """Per-organization earn/burn settings"""
+    __tablename__ = "loyalty_programs"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    organization_id = Column(String, ForeignKey("organizations.id"), unique=True, nullable=False)
+    
+    is_active = Column(Boolean, default=True)
+    earn_rate = Column(Numeric(10, 4), default=1)  # Points per currency unit paid
+    point_value = Column(Numeric(10, 4), default=Decimal("0.01"))  # Currency value of one point
+    min_redeem_points = Column(Integer, default=0)
+    max_redeem_ratio = Column(Numeric(5, 4), default=1)  # Max share of an order payable with points
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class LoyaltyTierRule(Base):
+    """Tier thresholds on lifetime spend, with an earn multiplier"""
+    __tablename__ = "loyalty_tier_rules"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    organization_id = Column(String, ForeignKey("organizations.id"), nullable=False, index=True)
+    
+    tier = Column(String(20), nullable=False)  # bronze, silver, gold, platinum
+    min_spend = Column(Numeric(15, 2), default=0)
+    earn_multiplier = Column(Numeric(5, 2), default=1)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('uq_loyalty_tier_org', 'organization_id', 'tier', unique=True),
+    )
+
+
+class LoyaltyTransaction(Base):
+    """Append-only points ledger - earn, burn, reverse, adjust"""
+    __tablename__ = "loyalty_transactions"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    organization_id = Column(String, ForeignKey("organizations.id"), index=True)
+    customer_id = Column(String, ForeignKey("customers.id"), nullable=False)
+    order_id = Column(String, ForeignKey("orders.id"), index=True)
+    
+    transaction_type = Column(String(20), nullable=False)
+    points = Column(Integer, nullable=False)  # + earned, - spent
+    balance_after = Column(Integer, nullable=False)
+    
+    notes = Column(Text)
+    user_id = Column(String, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_loyalty_tx_customer_created', 'customer_id', 'created_at'),
+    )
+
+
+class CustomerSegmentationRun(Base):
+    """RFM segmentation runs - cut points and the order watermark for incremental runs"""
+    __tablename__ = "customer_segmentation_runs"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    organization_id = Column(String, ForeignKey("organizations.id"), nullable=False)
+    
+    is_full = Column(Boolean, default=True)
+    watermark = Column(DateTime, nullable=False)  # Orders up to here are scored
+    recency_cuts = Column(JSON)  # Quintile boundaries of the last full run
+    frequency_cuts = Column(JSON)
+    monetary_cuts = Column(JSON)
+    customers_scored = Column(Integer, default=0)
+    
+    started_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+    
+    __table_args__ = (
+        Index('idx_segmentation_run_org_finished', 'organization_id', 'finished_at'),
+    )
+
+
+class CustomerLedgerEntry(Base):
+    """On-account ledger - every change to Customer.current_balance"""
+    __tablename__ = "customer_ledger"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    organization_id = Column(String, ForeignKey("organizations.id"), index=True)
+    customer_id = Column(String, ForeignKey("customers.id"), nullable=False)
+    order_id = Column(String, ForeignKey("orders.id"), index=True)
+    
+    entry_type = Column(String(20), nullable=False)  # charge, payment, refund, adjustment
+    amount = Column(Numeric(15, 2), nullable=False)  # + increases what the customer owes
+    balance_after = Column(Numeric(15, 2), nullable=False)
+    
+    reference = Column(String(255))  # Receipt / bank transfer number
+    notes = Column(Text)
+    user_id = Column(String, ForeignKey("users.id"))
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_customer_ledger_customer_created', 'customer_id', 'created_at'),
+    )
+
+
 # ═══════════════════════════════════════════════════════════════
 # SECTION 7: ORDERS (Complete E-commerce)
 # ═══════════════════════════════════════════════════════════════
@@ -643,6 +832,7 @@ class Order(Base):
     __table_args__ = (
         Index('idx_order_customer_status', 'customer_id', 'status'),
         Index('idx_order_date_status', 'created_at', 'status'),
+        Index('idx_order_org_created', 'organization_id', 'created_at'),
     )
 
 
@@ -676,7 +866,12 @@ class OrderItem(Base):
     # Status
     status = Column(String(50))  # pending, shipped, delivered, returned
     
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Partition key - written with the order's created_at, so order date ranges prune items too
+    created_at = Column(DateTime, default=datetime.utcnow, primary_key=True)
+    
+    __table_args__ = (
+        monthly_partitions(),
+    )
 
 
 class OrderStatusHistory(Base):
@@ -707,6 +902,8 @@ class PaymentMethod(str, enum.Enum):
     CREDIT = "credit"
     INSTALLMENT = "installment"
     CRYPTO = "crypto"
+    GIFT_CARD = "gift_card"
+    LOYALTY_POINTS = "loyalty_points"
 
 
 class PaymentStatus(str, enum.Enum):
@@ -731,6 +928,7 @@ class Payment(Base):
     method = Column(Enum(PaymentMethod), nullable=False)
     amount = Column(Numeric(15, 2), nullable=False)
     currency = Column(String(10), default="TRY")
+    exchange_rate = Column(Numeric(20, 10))  # Base currency → currency at payment time
     
     # Provider (Stripe, PayPal, Iyzico, etc.)
     provider = Column(String(50))
@@ -750,13 +948,18 @@ class Payment(Base):
     status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING, index=True)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, primary_key=True)  # Partition key - the order's created_at
     completed_at = Column(DateTime)
     failed_at = Column(DateTime)
     
     # Details
     error_message = Column(Text)
     notes = Column(Text)
+    
+    __table_args__ = (
+        Index('idx_payment_created', 'created_at'),
+        monthly_partitions(),
+    )
 
 
 class Refund(Base):
@@ -765,7 +968,7 @@ class Refund(Base):
     
     id = Column(String, primary_key=True, default=generate_uuid)
     order_id = Column(String, ForeignKey("orders.id"), nullable=False, index=True)
-    payment_id = Column(String, ForeignKey("payments.id"), index=True)
+    payment_id = Column(String, index=True)  # payments is partitioned - no foreign key
     processed_by = Column(String, ForeignKey("users.id"))
     
     amount = Column(Numeric(15, 2), nullable=False)
@@ -960,6 +1163,10 @@ class Campaign(Base):
     discount_amount = Column(Numeric(10, 2))
     max_discount = Column(Numeric(10, 2))
     
+    # Buy X get Y (get units discounted by discount_percentage, default free)
+    buy_quantity = Column(Integer)
+    get_quantity = Column(Integer)
+    
     # Conditions
     min_purchase_amount = Column(Numeric(10, 2))
     applicable_products = Column(JSON)  # Product IDs
@@ -980,6 +1187,7 @@ class Campaign(Base):
     priority = Column(Integer, default=0)  # Higher = applies first
     
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
 class DiscountCode(Base):
@@ -1014,6 +1222,7 @@ class DiscountCode(Base):
     
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
 class CodeUsage(Base):
@@ -1030,6 +1239,20 @@ class CodeUsage(Base):
     used_at = Column(DateTime, default=datetime.utcnow)
 
 
+class CampaignUsage(Base):
+    """Track campaign usage (total and per-customer limits)"""
+    __tablename__ = "campaign_usage"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    campaign_id = Column(String, ForeignKey("campaigns.id"), index=True)
+    order_id = Column(String, ForeignKey("orders.id"), index=True)
+    customer_id = Column(String, ForeignKey("customers.id"), index=True)
+
+    discount_amount = Column(Numeric(10, 2))
+
+    used_at = Column(DateTime, default=datetime.utcnow)
+
+
 # ═══════════════════════════════════════════════════════════════
 # SECTION 12: COMMUNICATIONS (Email/SMS)
 # ═══════════════════════════════════════════════════════════════
@@ -1049,7 +1272,7 @@ class NotificationTemplate(Base):
     organization_id = Column(String, ForeignKey("organizations.id"), index=True)
     
     name = Column(String(255), nullable=False)
-    code = Column(String(100), unique=True, index=True)  # order_confirmed, shipping_update
+    code = Column(String(100), index=True)  # order_confirmed, shipping_update
     type = Column(Enum(NotificationType), nullable=False)
     
     # Email
@@ -1065,6 +1288,12 @@ class NotificationTemplate(Base):
     
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Render cache version
+    
+    __table_args__ = (
+        # One template per code and channel; organization_id NULL = default for everyone
+        Index('uq_template_org_code_type', 'organization_id', 'code', 'type', unique=True),
+    )
 
 
 class NotificationLog(Base):
@@ -1095,6 +1324,41 @@ class NotificationLog(Base):
     clicked_at = Column(DateTime)
 
 
+class OutboxStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"  # Out of attempts or undeliverable
+
+
+class NotificationOutbox(Base):
+    """Notifications written with the sale/refund transaction, sent later by the dispatcher"""
+    __tablename__ = "notification_outbox"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    organization_id = Column(String, ForeignKey("organizations.id"), nullable=False)
+    
+    template_code = Column(String(100), nullable=False)  # order_confirmed, order_refunded
+    type = Column(Enum(NotificationType))  # None = email if the customer has one, else SMS
+    customer_id = Column(String, ForeignKey("customers.id"))
+    order_id = Column(String, ForeignKey("orders.id"))
+    recipient = Column(String(255))  # None = the customer's email / phone at send time
+    context = Column(JSON)  # Template variables
+    
+    status = Column(Enum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_until = Column(DateTime)  # Claimed by a dispatcher until then
+    last_error = Column(Text)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime)
+    
+    __table_args__ = (
+        Index('idx_outbox_due', 'status', 'next_attempt_at'),
+    )
+
+
 # ═══════════════════════════════════════════════════════════════
 # SECTION 13: REVIEWS & RATINGS
 # ═══════════════════════════════════════════════════════════════
@@ -1220,10 +1484,13 @@ class AuditLog(Base):
     ip_address = Column(String(50))
     user_agent = Column(String(500))
     
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, primary_key=True)  # Partition key
     
     __table_args__ = (
-        Index('idx_audit_entity', 'entity_type', 'entity_id'),
+        # History of one record, newest first, within a date range
+        Index('idx_audit_entity', 'entity_type', 'entity_id', 'created_at'),
+        Index('idx_audit_org_created', 'organization_id', 'created_at'),
+        monthly_partitions(),
     )
 
 
@@ -1245,6 +1512,51 @@ class SystemSetting(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class BackgroundJob(Base):
+    """Postgres-backed job queue - claimed by workers with FOR UPDATE SKIP LOCKED"""
+    __tablename__ = "background_jobs"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    organization_id = Column(String, ForeignKey("organizations.id"), index=True)
+    user_id = Column(String, ForeignKey("users.id"))
+    
+    job_type = Column(String(100), nullable=False)  # products.bulk_import, exports.write
+    payload = Column(JSON)
+    priority = Column(Integer, default=0)  # Higher runs first
+    
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)  # Retry backoff
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    cancel_requested = Column(Boolean, default=False)
+    
+    # Lease - a running job whose heartbeat stops is queued again
+    locked_by = Column(String(255))
+    heartbeat_at = Column(DateTime)
+    
+    progress = Column(Float, default=0)  # 0-100
+    progress_message = Column(String(500))
+    result = Column(JSON)
+    error = Column(Text)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    
+    __table_args__ = (
+        Index('idx_job_claim', 'status', 'priority', 'run_after'),
+        Index('idx_job_org_created', 'organization_id', 'created_at'),
+    )
+
+
 # ═══════════════════════════════════════════════════════════════
 # CREATE ALL TABLES FUNCTION
 # ═══════════════════════════════════════════════════════════════
@@ -22,9 +22,9 @@ Additional Features:
 """
 
 from datetime import datetime
-from sqlalchemy import Column, String, Float, Integer, Boolean, DateTime, ForeignKey, Text, JSON, Numeric, Date, Index
+from sqlalchemy import Column, String, Float, Integer, Boolean, DateTime, ForeignKey, Text, JSON, Numeric, Date, Index, Enum
 from sqlalchemy.orm import relationship
-from .database import Base, generate_uuid
+from .database import Base, generate_uuid, monthly_partitions
 import enum
 
 
@@ -43,6 +43,7 @@ class Currency(Base):
     is_active = Column(Boolean, default=True)
     
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
 class ExchangeRate(Base):
@@ -93,9 +94,12 @@ class Translation(Base):
     translated_text = Column(Text)
     
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     __table_args__ = (
         Index('idx_translation_entity', 'entity_type', 'entity_id', 'language_code'),
+        Index('uq_translation_field', 'entity_type', 'entity_id', 'language_code', 'field_name', unique=True),
+        Index('idx_translation_language_updated', 'language_code', 'updated_at'),
     )
 
 
@@ -116,6 +120,7 @@ class Country(Base):
     is_active = Column(Boolean, default=True)
     
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
 class TaxRule(Base):
@@ -134,6 +139,11 @@ class TaxRule(Base):
     
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_tax_rule_lookup', 'country_code', 'state', 'category_id'),
+    )
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -721,11 +731,31 @@ class ProductView(Base):
     # Duration
     duration_seconds = Column(Integer)
     
-    viewed_at = Column(DateTime, default=datetime.utcnow, index=True)
+    viewed_at = Column(DateTime, default=datetime.utcnow, primary_key=True)  # Partition key
     
     __table_args__ = (
         Index('idx_product_view_product_date', 'product_id', 'viewed_at'),
         Index('idx_product_view_customer_date', 'customer_id', 'viewed_at'),
+        monthly_partitions("viewed_at"),
+    )
+
+
+class ProductViewMinute(Base):
+    """Product views pre-aggregated per product per minute (written by the event ingestor)"""
+    __tablename__ = "product_view_minutes"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    organization_id = Column(String, ForeignKey("organizations.id"), nullable=False)
+    product_id = Column(String, ForeignKey("products.id"), nullable=False)
+    minute = Column(DateTime, nullable=False)  # Truncated to the minute (UTC)
+    
+    views = Column(Integer, nullable=False, default=0)
+    customer_views = Column(Integer, nullable=False, default=0)  # Views by identified customers
+    duration_seconds = Column(Integer, nullable=False, default=0)  # Sum - divide by views for the average
+    
+    __table_args__ = (
+        Index('uq_product_view_minute', 'product_id', 'minute', unique=True),
+        Index('idx_product_view_minute_org', 'organization_id', 'minute'),
     )
 
 
@@ -748,7 +778,88 @@ class SearchQuery(Base):
     resulted_in_purchase = Column(Boolean, default=False)
     order_id = Column(String, ForeignKey("orders.id"))
     
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, primary_key=True)  # Partition key
+    
+    __table_args__ = (
+        Index('idx_search_query_created', 'created_at'),
+        monthly_partitions(),
+    )
+
+
+class SearchQueryRollup(Base):
+    """Searches per normalized query per hour (rebuilt by the search rollup job)"""
+    __tablename__ = "search_query_rollups"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    organization_id = Column(String, ForeignKey("organizations.id"), nullable=False)
+    bucket = Column(DateTime, nullable=False)  # Truncated to the hour (UTC)
+    query = Column(String(500), nullable=False)
+    
+    searches = Column(Integer, nullable=False, default=0)
+    zero_results = Column(Integer, nullable=False, default=0)
+    clicks = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index('uq_search_query_rollup', 'organization_id', 'bucket', 'query', unique=True),
+    )
+
+
+class SearchPositionRollup(Base):
+    """Impressions and clicks per result position per hour - CTR by position"""
+    __tablename__ = "search_position_rollups"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    organization_id = Column(String, ForeignKey("organizations.id"), nullable=False)
+    bucket = Column(DateTime, nullable=False)
+    position = Column(Integer, nullable=False)  # 1-based
+    
+    impressions = Column(Integer, nullable=False, default=0)  # Searches with at least this many results
+    clicks = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index('uq_search_position_rollup', 'organization_id', 'bucket', 'position', unique=True),
+    )
+
+
+class SearchClickRollup(Base):
+    """Clicks per query per product per hour - feeds the search ranking boost"""
+    __tablename__ = "search_click_rollups"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    organization_id = Column(String, ForeignKey("organizations.id"), nullable=False)
+    bucket = Column(DateTime, nullable=False)
+    query = Column(String(500), nullable=False)
+    product_id = Column(String, ForeignKey("products.id"), nullable=False)
+    
+    clicks = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index('uq_search_click_rollup', 'organization_id', 'bucket', 'query', 'product_id', unique=True),
+        Index('idx_search_click_rollup_bucket', 'bucket'),  # Boost table loads read recent buckets of every org
+    )
+
+
+class SalesHourlyRollup(Base):
+    """Sales per organization per hour (rebuilt by the analytics rollup job)"""
+    __tablename__ = "sales_hourly_rollups"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    organization_id = Column(String, ForeignKey("organizations.id"), nullable=False)
+    bucket = Column(DateTime, nullable=False)  # Truncated to the hour (UTC)
+    
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(15, 2), nullable=False, default=0)  # Order totals
+    discounts = Column(Numeric(15, 2), nullable=False, default=0)
+    tax = Column(Numeric(15, 2), nullable=False, default=0)
+    cost = Column(Numeric(15, 2), nullable=False, default=0)  # Units × the products' cost_price
+    
+    rolled_at = Column(DateTime, nullable=False)  # Cached analytics of the organization are invalidated by this
+    
+    __table_args__ = (
+        Index('uq_sales_hourly_rollup', 'organization_id', 'bucket', unique=True),
+        Index('idx_sales_hourly_rollup_rolled', 'organization_id', 'rolled_at'),
+    )
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -3,8 +3,8 @@
 """
 
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional, List
-from datetime import datetime
+from typing import Any, Optional, List, Dict
+from datetime import datetime, date
 from decimal import Decimal
 
 
@@ -103,6 +103,10 @@ class ProductResponse(BaseModel):
         from_attributes = True
 
 
+class RecommendedProduct(ProductResponse):
+    score: float  # Cosine similarity of the two products' orders, 0-1
+
+
 class ProductListResponse(BaseModel):
     total: int
     skip: int
@@ -121,14 +125,23 @@ class OrderItemCreate(BaseModel):
     unit_price: Decimal = Field(..., gt=0)
 
 
+class PaymentTender(BaseModel):
+    method: str  # cash, credit_card, debit_card, bank_transfer, wallet, gift_card, ...
+    amount: Decimal = Field(..., gt=0)  # In the base currency
+    currency: Optional[str] = None  # Currency the customer paid in (EUR, USD)
+    gift_card_code: Optional[str] = None  # Required for gift_card
+    reference: Optional[str] = None  # Terminal / provider transaction id
+
+
 class OrderCreate(BaseModel):
     customer_id: Optional[str] = None
     branch_id: str
     channel: str = "pos"
     
-    items: List[OrderItemCreate]
+    items: List[OrderItemCreate] = []
+    reservation_id: Optional[str] = None  # Basket holding the stock (replaces items)
     
-    discount_amount: Decimal = 0
+    discount_amount: Decimal = 0  # Ignored - discounts come from the promotion engine
     discount_code: Optional[str] = None
     shipping_cost: Decimal = 0
     
@@ -137,7 +150,9 @@ class OrderCreate(BaseModel):
     
     customer_notes: Optional[str] = None
     notes: Optional[str] = None
-    payment_method: Optional[str] = None
+    payment_method: Optional[str] = None  # Single tender for the whole total
+    currency: Optional[str] = None  # Payment currency (EUR, USD); totals stay in the base currency
+    tenders: List[PaymentTender] = []  # Split tender - must sum to the order total
 
 
 class OrderUpdate(BaseModel):
@@ -177,6 +192,437 @@ class OrderListResponse(BaseModel):
     items: List[OrderResponse]
 
 
+# ═══════════════════════════════════════════════════════════════
+# STOCK RESERVATION SCHEMAS
+# ═══════════════════════════════════════════════════════════════
+
+class ReservationHold(BaseModel):
+    product_id: str
+    quantity: int  # Positive holds more, negative gives back
+
+
+class ReservationLineResponse(BaseModel):
+    product_id: str
+    product_name: Optional[str]
+    sku: Optional[str]
+    quantity: int
+    unit_price: Decimal
+    vat_rate: float
+    
+    class Config:
+        from_attributes = True
+
+
+class ReservationResponse(BaseModel):
+    basket_id: str
+    expires_at: Optional[datetime]
+    lines: List[ReservationLineResponse]
+
+
+# ═══════════════════════════════════════════════════════════════
+# BASKET SCHEMAS
+# ═══════════════════════════════════════════════════════════════
+
+class BasketLineAdd(BaseModel):
+    product_id: Optional[str] = None
+    barcode: Optional[str] = None  # Scanned instead of product_id
+    quantity: int = Field(1, gt=0)
+
+
+class BasketLineUpdate(BaseModel):
+    quantity: int = Field(..., ge=0)  # 0 removes the line
+
+
+class BasketLineResponse(BaseModel):
+    product_id: str
+    product_name: Optional[str]
+    sku: Optional[str]
+    quantity: int
+    unit_price: Decimal
+    vat_rate: Decimal
+    discount: Decimal
+    
+    class Config:
+        from_attributes = True
+
+
+class AppliedPromotion(BaseModel):
+    id: str
+    name: str
+    type: str
+    code: Optional[str] = None
+    discount: Decimal
+
+
+class VatBucketResponse(BaseModel):
+    vat_rate: Decimal
+    net: Decimal
+    tax: Decimal
+
+
+class BasketTotalsResponse(BaseModel):
+    version: int
+    item_count: int
+    line_count: int
+    subtotal: Decimal
+    discount_amount: Decimal
+    tax_amount: Decimal
+    shipping_cost: Decimal
+    total_amount: Decimal
+    vat_buckets: List[VatBucketResponse]
+    promotions: List[AppliedPromotion] = []
+    converted: Dict[str, Decimal] = {}  # total_amount in the requested currencies
+
+
+class BasketResponse(BaseModel):
+    register_id: str
+    customer_id: Optional[str]
+    lines: List[BasketLineResponse]
+    totals: BasketTotalsResponse
+
+
+class BasketCheckout(BaseModel):
+    customer_id: Optional[str] = None
+    channel: str = "pos"
+    payment_method: str = "cash"  # Single tender for the whole total
+    currency: Optional[str] = None  # Payment currency (EUR, USD); totals stay in the base currency
+    tenders: List[PaymentTender] = []  # Split tender - must sum to the order total
+    customer_notes: Optional[str] = None
+
+
+class BasketDiscountCode(BaseModel):
+    code: Optional[str] = None  # None removes the code
+
+
+class BasketCustomer(BaseModel):
+    customer_id: Optional[str] = None  # None makes it an anonymous sale
+
+
+# ═══════════════════════════════════════════════════════════════
+# CAMPAIGN SCHEMAS
+# ═══════════════════════════════════════════════════════════════
+
+class CampaignCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255)
+    description: Optional[str] = None
+    type: str  # percentage_discount, fixed_discount, buy_x_get_y, free_shipping, flash_sale, bundle
+    
+    discount_percentage: Optional[float] = Field(None, ge=0, le=100)
+    discount_amount: Optional[Decimal] = Field(None, ge=0)
+    max_discount: Optional[Decimal] = None
+    buy_quantity: Optional[int] = Field(None, gt=0)
+    get_quantity: Optional[int] = Field(None, gt=0)
+    
+    min_purchase_amount: Optional[Decimal] = None
+    applicable_products: Optional[List[str]] = None
+    applicable_categories: Optional[List[str]] = None
+    applicable_brands: Optional[List[str]] = None
+    
+    usage_limit_per_customer: Optional[int] = None
+    total_usage_limit: Optional[int] = None
+    
+    starts_at: datetime
+    ends_at: datetime
+    is_active: bool = True
+    priority: int = 0
+
+
+class CampaignUpdate(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    discount_percentage: Optional[float] = Field(None, ge=0, le=100)
+    discount_amount: Optional[Decimal] = Field(None, ge=0)
+    max_discount: Optional[Decimal] = None
+    buy_quantity: Optional[int] = Field(None, gt=0)
+    get_quantity: Optional[int] = Field(None, gt=0)
+    min_purchase_amount: Optional[Decimal] = None
+    applicable_products: Optional[List[str]] = None
+    applicable_categories: Optional[List[str]] = None
+    applicable_brands: Optional[List[str]] = None
+    total_usage_limit: Optional[int] = None
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+    is_active: Optional[bool] = None
+    priority: Optional[int] = None
+
+
+class CampaignResponse(BaseModel):
+    id: str
+    name: str
+    description: Optional[str]
+    type: str
+    discount_percentage: Optional[float]
+    discount_amount: Optional[Decimal]
+    max_discount: Optional[Decimal]
+    buy_quantity: Optional[int]
+    get_quantity: Optional[int]
+    min_purchase_amount: Optional[Decimal]
+    applicable_products: Optional[List[str]]
+    applicable_categories: Optional[List[str]]
+    applicable_brands: Optional[List[str]]
+    total_usage_limit: Optional[int]
+    current_usage_count: Optional[int]
+    starts_at: datetime
+    ends_at: datetime
+    is_active: bool
+    priority: int
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class DiscountCodeCreate(BaseModel):
+    code: str = Field(..., min_length=1, max_length=100)
+    description: Optional[str] = None
+    campaign_id: Optional[str] = None
+    discount_type: str = "percentage"  # percentage, fixed
+    discount_value: Decimal = Field(..., gt=0)
+    max_discount: Optional[Decimal] = None
+    min_purchase_amount: Optional[Decimal] = None
+    applicable_products: Optional[List[str]] = None
+    applicable_customer_segments: Optional[List[str]] = None
+    usage_limit_per_customer: int = 1
+    total_usage_limit: Optional[int] = None
+    starts_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+
+class DiscountCodeResponse(BaseModel):
+    id: str
+    code: str
+    description: Optional[str]
+    campaign_id: Optional[str]
+    discount_type: Optional[str]
+    discount_value: Decimal
+    max_discount: Optional[Decimal]
+    min_purchase_amount: Optional[Decimal]
+    usage_limit_per_customer: Optional[int]
+    total_usage_limit: Optional[int]
+    current_usage_count: Optional[int]
+    starts_at: Optional[datetime]
+    expires_at: Optional[datetime]
+    is_active: bool
+    
+    class Config:
+        from_attributes = True
+
+
+class PromotionItem(BaseModel):
+    product_id: str
+    quantity: int = Field(..., gt=0)
+
+
+class PromotionEvaluateRequest(BaseModel):
+    items: List[PromotionItem]
+    discount_code: Optional[str] = None
+    customer_segment: Optional[str] = None
+
+
+class PromotionEvaluateResponse(BaseModel):
+    subtotal: Decimal
+    discount_amount: Decimal
+    free_shipping: bool
+    line_discounts: dict
+    promotions: List[AppliedPromotion]
+    code_error: Optional[str] = None
+
+
+# ═══════════════════════════════════════════════════════════════
+# TAX SCHEMAS
+# ═══════════════════════════════════════════════════════════════
+
+class TaxRuleCreate(BaseModel):
+    country_code: str = Field(..., min_length=2, max_length=2)
+    state: Optional[str] = None
+    category_id: Optional[str] = None
+    tax_rate: float = Field(..., ge=0, le=100)
+    tax_name: Optional[str] = None
+
+
+class TaxRuleUpdate(BaseModel):
+    tax_rate: Optional[float] = Field(None, ge=0, le=100)
+    tax_name: Optional[str] = None
+    is_active: Optional[bool] = None
+
+
+class TaxRuleResponse(BaseModel):
+    id: str
+    country_code: str
+    state: Optional[str]
+    category_id: Optional[str]
+    tax_rate: float
+    tax_name: Optional[str]
+    is_active: bool
+    
+    class Config:
+        from_attributes = True
+
+
+class TaxRecalculate(BaseModel):
+    start_date: date
+    end_date: date
+    apply: bool = False  # False = dry run, only report the difference
+
+
+class TaxRecalculateResponse(BaseModel):
+    orders: int
+    items: int
+    orders_changed: int
+    tax_before: Decimal
+    tax_after: Decimal
+    applied: bool
+
+
+# ═══════════════════════════════════════════════════════════════
+# CURRENCY SCHEMAS
+# ═══════════════════════════════════════════════════════════════
+
+class CurrencyResponse(BaseModel):
+    code: str
+    name: Optional[str]
+    symbol: Optional[str]
+    decimal_places: int
+    
+    class Config:
+        from_attributes = True
+
+
+class ExchangeRateCreate(BaseModel):
+    from_currency: str = Field(..., min_length=3, max_length=3)
+    to_currency: str = Field(..., min_length=3, max_length=3)
+    rate: Decimal = Field(..., gt=0)
+    effective_date: date
+    source: Optional[str] = None
+
+
+class CurrencyConvertRequest(BaseModel):
+    from_currency: str = Field(..., min_length=3, max_length=3)
+    to_currency: str = Field(..., min_length=3, max_length=3)
+    amounts: List[Decimal]
+    on_date: Optional[date] = None  # Defaults to today
+
+
+class CurrencyConvertResponse(BaseModel):
+    from_currency: str
+    to_currency: str
+    rate: Decimal
+    on_date: date
+    amounts: List[Decimal]
+
+
+# ═══════════════════════════════════════════════════════════════
+# TRANSLATION SCHEMAS
+# ═══════════════════════════════════════════════════════════════
+
+class TranslationUpsert(BaseModel):
+    entity_type: str  # product, category, brand
+    entity_id: str
+    field_name: str  # name, description
+    translated_text: str
+
+
+class TranslationBatch(BaseModel):
+    language_code: str = Field(..., min_length=2, max_length=10)
+    translations: List[TranslationUpsert] = Field(..., min_length=1)
+
+
+# ═══════════════════════════════════════════════════════════════
+# GIFT CARD SCHEMAS
+# ═══════════════════════════════════════════════════════════════
+
+class GiftCardIssue(BaseModel):
+    value: Decimal = Field(..., gt=0)
+    currency: Optional[str] = None
+    recipient_email: Optional[EmailStr] = None
+    recipient_name: Optional[str] = None
+    message: Optional[str] = None
+    purchaser_id: Optional[str] = None
+    expires_at: Optional[datetime] = None
+
+
+class GiftCardTopUp(BaseModel):
+    amount: Decimal = Field(..., gt=0)
+    notes: Optional[str] = None
+
+
+class GiftCardResponse(BaseModel):
+    id: str
+    code: str
+    initial_value: Decimal
+    current_balance: Decimal
+    currency: Optional[str]
+    recipient_name: Optional[str]
+    expires_at: Optional[datetime]
+    is_active: bool
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class GiftCardBalance(BaseModel):
+    id: str
+    current_balance: Decimal
+    currency: Optional[str]
+    expires_at: Optional[datetime]
+
+
+class GiftCardTransactionResponse(BaseModel):
+    id: str
+    order_id: Optional[str]
+    transaction_type: str
+    amount: Decimal
+    balance_after: Optional[Decimal]
+    notes: Optional[str]
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+# ═══════════════════════════════════════════════════════════════
+# LOYALTY SCHEMAS
+# ═══════════════════════════════════════════════════════════════
+
+class LoyaltyTierRuleIn(BaseModel):
+    tier: str = Field(..., min_length=1, max_length=20)
+    min_spend: Decimal = Field(0, ge=0)  # Lifetime spend to reach the tier
+    earn_multiplier: Decimal = Field(1, gt=0)
+
+
+class LoyaltyProgramUpdate(BaseModel):
+    is_active: bool = True
+    earn_rate: Decimal = Field(1, ge=0)  # Points per currency unit paid
+    point_value: Decimal = Field(Decimal("0.01"), gt=0)  # Currency value of one point
+    min_redeem_points: int = Field(0, ge=0)
+    max_redeem_ratio: Decimal = Field(1, ge=0, le=1)
+    tiers: List[LoyaltyTierRuleIn] = []  # Replaces the current tiers
+
+
+class LoyaltyProgramResponse(LoyaltyProgramUpdate):
+    organization_id: str
+    updated_at: Optional[datetime] = None
+
+
+class LoyaltyAdjust(BaseModel):
+    points: int  # + add, - remove
+    notes: Optional[str] = None
+
+
+class LoyaltyTransactionResponse(BaseModel):
+    id: str
+    order_id: Optional[str]
+    transaction_type: str
+    points: int
+    balance_after: int
+    notes: Optional[str]
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
 # ═══════════════════════════════════════════════════════════════
 # CUSTOMER SCHEMAS
 # ═══════════════════════════════════════════════════════════════
@@ -223,6 +669,19 @@ class CustomerListResponse(BaseModel):
     items: List[CustomerResponse]
 
 
+class CustomerLookupResult(BaseModel):
+    id: str
+    name: str
+    phone: Optional[str] = None
+    email: Optional[str] = None
+
+
+class CreditPaymentCreate(BaseModel):
+    amount: Decimal = Field(..., gt=0)
+    reference: Optional[str] = None  # Receipt / bank transfer number
+    notes: Optional[str] = None
+
+
 # ═══════════════════════════════════════════════════════════════
 # ANALYTICS SCHEMAS
 # ═══════════════════════════════════════════════════════════════
@@ -244,6 +703,157 @@ class WeeklySalesReport(BaseModel):
     growth_rate: float
 
 
+class SalesSeriesPoint(BaseModel):
+    bucket: datetime
+    orders: int
+    units: int
+    revenue: float
+    cost: float
+    average_order_value: float
+
+
+class CategoryMargin(BaseModel):
+    category_id: Optional[str]
+    category_name: Optional[str]
+    units: int
+    revenue: float
+    cost: float
+    margin: float
+    margin_rate: Optional[float]  # Of the revenue with a known cost
+    uncosted_revenue: float  # Products without cost_price
+
+
+class BasketSizeBucket(BaseModel):
+    size: int  # Order lines
+    orders: int
+    plus: bool  # This size and larger
+
+
+class BasketSizeReport(BaseModel):
+    orders: int
+    average_lines: float
+    average_units: float
+    average_value: float
+    median_value: float
+    p90_value: float
+    lines: List[BasketSizeBucket]
+
+
+class CohortRetention(BaseModel):
+    cohort: str  # YYYY-MM of the first purchase
+    customers: int
+    retention: List[float]  # Share buying in month 0, 1, 2... after the first purchase
+
+
+# ═══════════════════════════════════════════════════════════════
+# BACKGROUND JOB SCHEMAS
+# ═══════════════════════════════════════════════════════════════
+
+class JobResponse(BaseModel):
+    id: str
+    job_type: str
+    status: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    progress: float
+    progress_message: Optional[str]
+    result: Optional[Any]
+    error: Optional[str]
+    run_after: datetime
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
+
+
+# ═══════════════════════════════════════════════════════════════
+# AUDIT SCHEMAS
+# ═══════════════════════════════════════════════════════════════
+
+class AuditLogResponse(BaseModel):
+    id: str
+    user_id: Optional[str]
+    action: str
+    entity_type: Optional[str]
+    entity_id: Optional[str]
+    old_values: Optional[Dict[str, Any]]
+    new_values: Optional[Dict[str, Any]]
+    ip_address: Optional[str]
+    user_agent: Optional[str]
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+# ═══════════════════════════════════════════════════════════════
+# STOREFRONT EVENT SCHEMAS
+# ═══════════════════════════════════════════════════════════════
+
+class ProductViewEventIn(BaseModel):
+    product_id: str
+    session_id: Optional[str] = Field(None, max_length=255)
+    customer_id: Optional[str] = None
+    source: Optional[str] = Field(None, max_length=100)
+    referrer: Optional[str] = Field(None, max_length=500)
+    device_type: Optional[str] = Field(None, max_length=50)
+    browser: Optional[str] = Field(None, max_length=100)
+    os: Optional[str] = Field(None, max_length=100)
+    country: Optional[str] = Field(None, max_length=2)
+    city: Optional[str] = Field(None, max_length=100)
+    duration_seconds: Optional[int] = Field(None, ge=0, le=86400)
+    viewed_at: Optional[datetime] = None  # Client time; arrival time if missing or implausible
+
+
+class SearchEventIn(BaseModel):
+    """A search, or - with clicked_product_id - a click on a result of an earlier search"""
+    query: str = Field(..., min_length=1, max_length=500)
+    results_count: Optional[int] = Field(None, ge=0)
+    customer_id: Optional[str] = None
+    clicked_product_id: Optional[str] = None
+    click_position: Optional[int] = Field(None, ge=1)
+    created_at: Optional[datetime] = None
+
+
+class EventBatch(BaseModel):
+    views: List[ProductViewEventIn] = []
+    searches: List[SearchEventIn] = []
+
+
+class EventBatchResult(BaseModel):
+    accepted: int
+    dropped: int
+
+
+class ProductViewPoint(BaseModel):
+    bucket: datetime
+    views: int
+    customer_views: int
+    avg_duration_seconds: float
+
+
+# ═══════════════════════════════════════════════════════════════
+# SEARCH ANALYTICS SCHEMAS
+# ═══════════════════════════════════════════════════════════════
+
+class SearchQueryStat(BaseModel):
+    query: str
+    searches: int
+    zero_results: int
+    clicks: int
+    ctr: float  # Clicks per search
+
+
+class SearchPositionStat(BaseModel):
+    position: int
+    impressions: int  # Searches with at least this many results
+    clicks: int
+    ctr: float
+
+
 # ═══════════════════════════════════════════════════════════════
 # COMMON SCHEMAS
 # ═══════════════════════════════════════════════════════════════
@@ -0,0 +1 @@
+# This file intentionally left empty for Python package structure
@@ -0,0 +1,410 @@
+"""
+📊 Sales Analytics
+Time series, category margins, basket sizes and cohort retention
+
+- Rollup: sales_hourly_rollups holds orders, units, revenue, discounts,
+  tax and cost per organization per hour. rollup() rebuilds whole hours
+  with one INSERT ... SELECT ... GROUP BY ... ON CONFLICT DO UPDATE (and
+  zeroes hours that lost their orders), re-reading the last
+  ANALYTICS_ROLLUP_LOOKBACK_HOURS so status changes and refunds are picked
+  up. Runs as the analytics.rollup job and from scripts/rollup_sales.py
+- Series: hourly and daily points come from the rollup; missing hours are
+  filled and days summed in NumPy
+- Columnar reads: margins, basket sizes and cohorts stream order_items ⨝
+  orders ⨝ products in ANALYTICS_CHUNK_SIZE batches into one NumPy array
+  per column, then aggregate with bincount / minimum.at / percentile -
+  no Python loop per row. Money is cast to float in SQL so no Decimal is
+  ever built
+- Cache: results are kept per (organization, query, date range, params)
+  together with the organization's rollup version (max rolled_at). A newer
+  rollup invalidates them; the version is re-checked at most every
+  ANALYTICS_VERSION_CHECK_SECONDS
+- Margins use the products' current cost_price - order lines carry no cost
+  snapshot. Revenue of products without a cost price is reported apart
+"""
+
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Float, String, and_, cast, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.database import Category, Order, OrderItem, Product
+from app.models.global_features import SalesHourlyRollup
+from app.services.customer_stats import COUNTED_STATUSES
+from app.services.jobs import JobContext, jobs
+from app.services.partitions import child_range
+
+# Basket histogram: sizes from 1 up to this, larger ones counted in the last bucket
+_BASKET_SIZES = 20
+
+
+def hour_start(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _month_label(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+class AnalyticsCache:
+    """LRU of computed results, each stamped with the rollup version it was computed at"""
+
+    def __init__(self, size: int, version_seconds: float):
+        self.size = size
+        self.version_seconds = version_seconds
+        self._entries: "OrderedDict[tuple, Tuple[Optional[datetime], object]]" = OrderedDict()
+        self._versions: Dict[str, Tuple[float, Optional[datetime]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def version(self, db: AsyncSession, org_id: str) -> Optional[datetime]:
+        checked = self._versions.get(org_id)
+        now = time.monotonic()
+        if checked and now - checked[0] < self.version_seconds:
+            return checked[1]
+        version = (await db.execute(
+            select(func.max(SalesHourlyRollup.rolled_at)).where(SalesHourlyRollup.organization_id == org_id)
+        )).scalar()
+        self._versions[org_id] = (now, version)
+        return version
+
+    async def get(self, db: AsyncSession, org_id: str, key: tuple, compute: Callable[[], Awaitable]):
+        key = (org_id, *key)
+        version = await self.version(db, org_id)
+        cached = self._entries.get(key)
+        if cached and cached[0] == version:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        value = await compute()
+        self._entries[key] = (version, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self) -> None:
+        """Forget the known versions - the next request of every organization re-checks"""
+        self._versions.clear()
+
+
+class SalesAnalytics:
+
+    def __init__(self, lookback_hours: int, chunk_size: int, cohort_months: int, cache: AnalyticsCache):
+        self.lookback_hours = lookback_hours
+        self.chunk_size = chunk_size
+        self.cohort_months = cohort_months
+        self.cache = cache
+
+    # ─── Rollup ────────────────────────────────────────────────
+
+    async def rollup(self, db: AsyncSession, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None) -> dict:
+        """Rebuild the hours in [start, end) for every organization - defaults to the lookback window"""
+        end = hour_start(end) if end else hour_start(datetime.utcnow()) + timedelta(hours=1)
+        start = hour_start(start or end - timedelta(hours=self.lookback_hours))
+        now = datetime.utcnow()
+
+        window = [
+            Order.created_at >= start,
+            Order.created_at < end,
+            Order.organization_id != None,
+            Order.status.in_(COUNTED_STATUSES),
+        ]
+        bucket = func.date_trunc("hour", Order.created_at)
+        orders = (
+            select(
+                Order.organization_id.label("organization_id"),
+                bucket.label("bucket"),
+                func.count(Order.id).label("orders"),
+                func.coalesce(func.sum(Order.total_amount), 0).label("revenue"),
+                func.coalesce(func.sum(Order.discount_amount), 0).label("discounts"),
+                func.coalesce(func.sum(Order.tax_amount), 0).label("tax"),
+            )
+            .where(and_(*window))
+            .group_by(Order.organization_id, bucket)
+            .subquery()
+        )
+        items = (
+            select(
+                Order.organization_id.label("organization_id"),
+                bucket.label("bucket"),
+                func.sum(OrderItem.quantity).label("units"),
+                func.sum(OrderItem.quantity * func.coalesce(Product.cost_price, 0)).label("cost"),
+            )
+            .select_from(OrderItem)
+            .join(Order, Order.id == OrderItem.order_id)
+            .outerjoin(Product, Product.id == OrderItem.product_id)
+            .where(and_(*window, *child_range(OrderItem.created_at, start, end)))
+            .group_by(Order.organization_id, bucket)
+            .subquery()
+        )
+        rows = select(
+            func.gen_random_uuid().cast(String),
+            orders.c.organization_id, orders.c.bucket, orders.c.orders,
+            func.coalesce(items.c.units, 0), orders.c.revenue, orders.c.discounts, orders.c.tax,
+            func.coalesce(items.c.cost, 0), literal(now),
+        ).select_from(orders).outerjoin(
+            items,
+            and_(items.c.organization_id == orders.c.organization_id, items.c.bucket == orders.c.bucket)
+        )
+
+        columns = ["orders", "units", "revenue", "discounts", "tax", "cost", "rolled_at"]
+        stmt = pg_insert(SalesHourlyRollup).from_select(["id", "organization_id", "bucket", *columns], rows)
+        written = (await db.execute(stmt.on_conflict_do_update(
+            index_elements=["organization_id", "bucket"],
+            set_={c: stmt.excluded[c] for c in columns}
+        ))).rowcount
+
+        # Hours of the window that no longer have counted orders (cancelled, refunded)
+        emptied = (await db.execute(
+            update(SalesHourlyRollup)
+            .where(and_(
+                SalesHourlyRollup.bucket >= start,
+                SalesHourlyRollup.bucket < end,
+                SalesHourlyRollup.rolled_at < now,
+                SalesHourlyRollup.orders > 0,
+            ))
+            .values(orders=0, units=0, revenue=0, discounts=0, tax=0, cost=0, rolled_at=now)
+            .execution_options(synchronize_session=False)
+        )).rowcount
+
+        await db.commit()
+        self.cache.invalidate()
+        return {"start": start.isoformat(), "end": end.isoformat(), "hours": written, "emptied": emptied}
+
+    # ─── Columnar reads ────────────────────────────────────────
+
+    async def _columns(self, db: AsyncSession, stmt, dtypes: Sequence) -> List[np.ndarray]:
+        """Stream a query chunk by chunk into one NumPy array per column (NULL floats → nan)"""
+        result = await db.stream(stmt.execution_options(yield_per=self.chunk_size))
+        parts: List[list] = [[] for _ in dtypes]
+        async for rows in result.partitions():
+            for part, values, dtype in zip(parts, zip(*rows), dtypes):
+                part.append(np.array(values, dtype=dtype))
+        return [
+            np.concatenate(part) if part else np.empty(0, dtype=dtype)
+            for part, dtype in zip(parts, dtypes)
+        ]
+
+    def _sales_window(self, org_id: str, start: datetime, end: datetime) -> list:
+        return [
+            Order.organization_id == org_id,
+            Order.status.in_(COUNTED_STATUSES),
+            Order.created_at >= start,
+            Order.created_at < end,
+        ]
+
+    # ─── Series ────────────────────────────────────────────────
+
+    async def _series(self, db: AsyncSession, org_id: str, start: datetime, end: datetime,
+                      interval: str) -> List[dict]:
+        start, end = hour_start(start), hour_start(end)
+        r = SalesHourlyRollup
+        buckets, orders, units, revenue, cost = await self._columns(
+            db,
+            select(r.bucket, r.orders, r.units, cast(r.revenue, Float), cast(r.cost, Float))
+            .where(and_(r.organization_id == org_id, r.bucket >= start, r.bucket < end)),
+            ("datetime64[h]", np.int64, np.int64, np.float64, np.float64),
+        )
+
+        step = "h" if interval == "hour" else "D"
+        first = np.datetime64(start, step)
+        slots = (np.datetime64(end, step) - first).astype(np.int64) + (1 if step == "D" and end.hour else 0)
+        index = (buckets.astype(f"datetime64[{step}]") - first).astype(np.int64)
+
+        def total(values: np.ndarray) -> np.ndarray:
+            return np.bincount(index, weights=values, minlength=slots)
+
+        orders_t, units_t, revenue_t, cost_t = total(orders), total(units), total(revenue), total(cost)
+        labels = first + np.arange(slots)
+        return [
+            {
+                "bucket": label.astype("datetime64[s]").astype(datetime),
+                "orders": int(o), "units": int(u),
+                "revenue": round(float(rv), 2), "cost": round(float(c), 2),
+                "average_order_value": round(float(rv / o), 2) if o else 0.0,
+            }
+            for label, o, u, rv, c in zip(labels, orders_t, units_t, revenue_t, cost_t)
+        ]
+
+    # ─── Margins by category ───────────────────────────────────
+
+    async def _margins(self, db: AsyncSession, org_id: str, start: datetime, end: datetime) -> List[dict]:
+        categories, units, revenue, unit_cost = await self._columns(
+            db,
+            select(
+                func.coalesce(Product.category_id, ""),
+                OrderItem.quantity,
+                cast(OrderItem.total_price, Float),
+                cast(Product.cost_price, Float),
+            )
+            .select_from(OrderItem)
+            .join(Order, Order.id == OrderItem.order_id)
+            .join(Product, Product.id == OrderItem.product_id)
+            .where(and_(*self._sales_window(org_id, start, end), *child_range(OrderItem.created_at, start, end))),
+            (object, np.int64, np.float64, np.float64),
+        )
+        if not len(categories):
+            return []
+
+        ids, slot = np.unique(categories.astype(str), return_inverse=True)
+        costed = ~np.isnan(unit_cost)
+        count = len(ids)
+
+        def total(values: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
+            if mask is None:
+                return np.bincount(slot, weights=values, minlength=count)
+            return np.bincount(slot[mask], weights=values[mask], minlength=count)
+
+        units_t = total(units)
+        revenue_t = total(revenue)
+        costed_revenue = total(revenue, costed)
+        cost_t = total(units * np.nan_to_num(unit_cost), costed)
+        margin = costed_revenue - cost_t
+
+        names = dict((await db.execute(
+            select(Category.id, Category.name).where(Category.id.in_([i for i in ids.tolist() if i]))
+        )).all())
+
+        result = [
+            {
+                "category_id": category or None,
+                "category_name": names.get(category) if category else None,
+                "units": int(u),
+                "revenue": round(float(rv), 2),
+                "cost": round(float(c), 2),
+                "margin": round(float(m), 2),
+                "margin_rate": round(float(m / cr), 4) if cr else None,
+                "uncosted_revenue": round(float(rv - cr), 2),
+            }
+            for category, u, rv, cr, c, m in zip(ids.tolist(), units_t, revenue_t, costed_revenue, cost_t, margin)
+        ]
+        return sorted(result, key=lambda c: -c["revenue"])
+
+    # ─── Basket sizes ──────────────────────────────────────────
+
+    async def _baskets(self, db: AsyncSession, org_id: str, start: datetime, end: datetime) -> dict:
+        lines, units, value = await self._columns(
+            db,
+            select(func.count(OrderItem.id), func.sum(OrderItem.quantity), cast(Order.total_amount, Float))
+            .select_from(OrderItem)
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(and_(*self._sales_window(org_id, start, end), *child_range(OrderItem.created_at, start, end)))
+            .group_by(Order.id, Order.total_amount),
+            (np.int64, np.int64, np.float64),
+        )
+        if not len(lines):
+            return {"orders": 0, "average_lines": 0.0, "average_units": 0.0, "average_value": 0.0,
+                    "median_value": 0.0, "p90_value": 0.0, "lines": []}
+
+        histogram = np.bincount(np.clip(lines, 1, _BASKET_SIZES), minlength=_BASKET_SIZES + 1)[1:]
+        median, p90 = np.nanpercentile(value, [50, 90])
+        return {
+            "orders": int(len(lines)),
+            "average_lines": round(float(lines.mean()), 2),
+            "average_units": round(float(units.mean()), 2),
+            "average_value": round(float(np.nanmean(value)), 2),
+            "median_value": round(float(median), 2),
+            "p90_value": round(float(p90), 2),
+            "lines": [
+                {"size": size, "orders": int(n), "plus": size == _BASKET_SIZES}
+                for size, n in enumerate(histogram, start=1) if n
+            ],
+        }
+
+    # ─── Cohort retention ──────────────────────────────────────
+
+    async def _cohorts(self, db: AsyncSession, org_id: str, start: datetime, end: datetime) -> List[dict]:
+        """Customers by month of first purchase, share buying again 0..ANALYTICS_COHORT_MONTHS-1 months later"""
+        month = func.date_trunc("month", Order.created_at)
+        customers, months = await self._columns(
+            db,
+            # Orders before start only decide who is not new - they never form a cohort
+            select(Order.customer_id, month)
+            .where(and_(
+                Order.organization_id == org_id,
+                Order.customer_id != None,
+                Order.status.in_(COUNTED_STATUSES),
+                Order.created_at < end,
+            ))
+            .group_by(Order.customer_id, month),
+            (object, "datetime64[M]"),
+        )
+        if not len(customers):
+            return []
+
+        _, customer = np.unique(customers.astype(str), return_inverse=True)
+        months = months.astype(np.int64)  # Months since 1970-01
+        first = np.full(customer.max() + 1, np.iinfo(np.int64).max)
+        np.minimum.at(first, customer, months)
+
+        cohort = first[customer]
+        age = months - cohort
+        first_cohort = np.datetime64(start, "M").astype(np.int64)
+        span = int(np.datetime64(end - timedelta(microseconds=1), "M").astype(np.int64) - first_cohort + 1)
+        keep = (cohort >= first_cohort) & (age < self.cohort_months)
+        active = np.bincount(
+            (cohort[keep] - first_cohort) * self.cohort_months + age[keep],
+            minlength=span * self.cohort_months
+        ).reshape(span, self.cohort_months)
+
+        size = active[:, 0]
+        retention = np.divide(active, size[:, None], out=np.zeros(active.shape), where=size[:, None] > 0)
+        epoch = 1970 * 12  # datetime64[M] counts months from 1970-01
+        return [
+            {
+                "cohort": _month_label(epoch + first_cohort + i),
+                "customers": int(size[i]),
+                # Months after the range end have not happened yet
+                "retention": [round(float(r), 4) for r in retention[i, :max(span - i, 1)]],
+            }
+            for i in range(span)
+            if size[i]
+        ]
+
+    # ─── Cached entry points ───────────────────────────────────
+
+    async def series(self, db: AsyncSession, org_id: str, start: datetime, end: datetime, interval: str):
+        return await self.cache.get(
+            db, org_id, ("series", start, end, interval), lambda: self._series(db, org_id, start, end, interval)
+        )
+
+    async def margins(self, db: AsyncSession, org_id: str, start: datetime, end: datetime):
+        return await self.cache.get(
+            db, org_id, ("margins", start, end), lambda: self._margins(db, org_id, start, end)
+        )
+
+    async def baskets(self, db: AsyncSession, org_id: str, start: datetime, end: datetime):
+        return await self.cache.get(
+            db, org_id, ("baskets", start, end), lambda: self._baskets(db, org_id, start, end)
+        )
+
+    async def cohorts(self, db: AsyncSession, org_id: str, start: datetime, end: datetime):
+        return await self.cache.get(
+            db, org_id, ("cohorts", start, end, self.cohort_months), lambda: self._cohorts(db, org_id, start, end)
+        )
+
+
+analytics = SalesAnalytics(
+    settings.ANALYTICS_ROLLUP_LOOKBACK_HOURS,
+    settings.ANALYTICS_CHUNK_SIZE,
+    settings.ANALYTICS_COHORT_MONTHS,
+    AnalyticsCache(settings.ANALYTICS_CACHE_SIZE, settings.ANALYTICS_VERSION_CHECK_SECONDS),
+)
+
+
+@jobs.handler("analytics.rollup", concurrency=1)
+async def _rollup_job(ctx: JobContext, payload: dict) -> dict:
+    start = payload.get("start")
+    async with AsyncSessionLocal() as db:
+        return await analytics.rollup(db, datetime.fromisoformat(start) if start else None)
@@ -0,0 +1,258 @@
+"""
+🕵️ Audit Trail
+Diffs of audited models captured from SQLAlchemy session events, written in batches
+
+- Capture: after_flush reads attribute history of new / changed / deleted
+  audited objects - endpoints don't write audit rows themselves
+- Commit only: entries wait in session.info until the transaction commits;
+  a rollback discards them
+- Buffer: committed entries go to an in-memory buffer, flushed with one
+  multi-row insert every AUDIT_FLUSH_SECONDS or AUDIT_BATCH_SIZE entries,
+  and drained at shutdown. Bounded by AUDIT_MAX_BUFFER (oldest dropped)
+- Soft deletes (is_active True → False) are recorded as "delete"
+- Who / from where: the request middleware binds user, organization, IP
+  and user agent to a context variable; flushes pick them up
+- Core UPDATE / INSERT statements (checkout, stats, bulk jobs) bypass the
+  session's identity map and are not captured
+"""
+
+import asyncio
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.database import AuditLog, Campaign, Category, Customer, DiscountCode, Order, Product
+from app.models.global_features import GiftCard, TaxRule
+
+logger = logging.getLogger(__name__)
+
+_PENDING = "audit_pending"
+
+
+@dataclass
+class AuditActor:
+    user_id: Optional[str] = None
+    organization_id: Optional[str] = None
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+
+
+_actor: ContextVar[AuditActor] = ContextVar("audit_actor", default=AuditActor())
+
+
+def bind_actor(
+    user_id: Optional[str] = None,
+    organization_id: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
+) -> None:
+    """Who is changing things in the current request / task"""
+    _actor.set(AuditActor(user_id, organization_id, ip_address, (user_agent or "")[:500] or None))
+
+
+@dataclass
+class AuditedEntity:
+    name: str
+    actions: Sequence[str] = ("create", "update", "delete")
+    ignore: Sequence[str] = field(default_factory=tuple)
+
+
+# Columns changed by every write are never interesting on their own
+_ALWAYS_IGNORED = ("created_at", "updated_at")
+
+AUDITED: Dict[type, AuditedEntity] = {
+    Product: AuditedEntity("product"),
+    Category: AuditedEntity("category"),
+    Customer: AuditedEntity("customer"),
+    # A sale is its own record - only later changes (refunds, edits, deletes) are audited
+    Order: AuditedEntity("order", actions=("update", "delete")),
+    Campaign: AuditedEntity("campaign"),
+    DiscountCode: AuditedEntity("discount_code"),
+    # The card code is a bearer credential - keep it out of the trail
+    GiftCard: AuditedEntity("gift_card", ignore=("code",)),
+    TaxRule: AuditedEntity("tax_rule"),
+}
+
+
+def _columns(obj, entity: AuditedEntity) -> List[str]:
+    skip = set(_ALWAYS_IGNORED) | set(entity.ignore)
+    return [attr.key for attr in inspect(type(obj)).column_attrs if attr.key not in skip]
+
+
+def _snapshot(obj, entity: AuditedEntity) -> dict:
+    values = inspect(obj).dict
+    return {key: values[key] for key in _columns(obj, entity) if values.get(key) is not None}
+
+
+def _diff(obj, entity: AuditedEntity):
+    state = inspect(obj)
+    old, new = {}, {}
+    for key in _columns(obj, entity):
+        history = state.attrs[key].history
+        if not history.has_changes():
+            continue
+        before = history.deleted[0] if history.deleted else None
+        after = history.added[0] if history.added else None
+        if before == after:
+            continue
+        old[key], new[key] = before, after
+    return old, new
+
+
+def _entry(obj, entity: AuditedEntity, action: str, old: Optional[dict], new: Optional[dict],
+           actor: AuditActor, now: datetime) -> dict:
+    return {
+        "organization_id": getattr(obj, "organization_id", None) or actor.organization_id,
+        "user_id": actor.user_id,
+        "action": action,
+        "entity_type": entity.name,
+        "entity_id": obj.id,
+        "old_values": jsonable_encoder(old) if old else None,
+        "new_values": jsonable_encoder(new) if new else None,
+        "ip_address": actor.ip_address,
+        "user_agent": actor.user_agent,
+        "created_at": now,
+    }
+
+
+def capture(session: Session) -> List[dict]:
+    """Audit entries for what the session is flushing - call from after_flush"""
+    actor = _actor.get()
+    now = datetime.utcnow()
+    entries = []
+
+    for obj in session.new:
+        entity = AUDITED.get(type(obj))
+        if entity and "create" in entity.actions:
+            entries.append(_entry(obj, entity, "create", None, _snapshot(obj, entity), actor, now))
+
+    for obj in session.dirty:
+        entity = AUDITED.get(type(obj))
+        if not entity or "update" not in entity.actions or not session.is_modified(obj):
+            continue
+        old, new = _diff(obj, entity)
+        if not new and not old:
+            continue
+        action = "delete" if old.get("is_active") is True and new.get("is_active") is False else "update"
+        if action in entity.actions:
+            entries.append(_entry(obj, entity, action, old, new, actor, now))
+
+    for obj in session.deleted:
+        entity = AUDITED.get(type(obj))
+        if entity and "delete" in entity.actions:
+            entries.append(_entry(obj, entity, "delete", _snapshot(obj, entity), None, actor, now))
+
+    return entries
+
+
+class AuditTrail:
+
+    def __init__(self, batch_size: int, flush_seconds: float, max_buffer: int):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self._buffer: List[dict] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    # ─── Session events ────────────────────────────────────────
+
+    def _after_flush(self, session: Session, flush_context) -> None:
+        try:
+            entries = capture(session)
+        except Exception:
+            logger.exception("Audit capture failed")
+            return
+        if entries:
+            session.info.setdefault(_PENDING, []).extend(entries)
+
+    def _after_commit(self, session: Session) -> None:
+        entries = session.info.pop(_PENDING, None)
+        if entries:
+            self.record(entries)
+
+    def _after_rollback(self, session: Session) -> None:
+        session.info.pop(_PENDING, None)
+
+    def install(self) -> None:
+        if not event.contains(Session, "after_flush", self._after_flush):
+            event.listen(Session, "after_flush", self._after_flush)
+            event.listen(Session, "after_commit", self._after_commit)
+            event.listen(Session, "after_rollback", self._after_rollback)
+
+    def uninstall(self) -> None:
+        if event.contains(Session, "after_flush", self._after_flush):
+            event.remove(Session, "after_flush", self._after_flush)
+            event.remove(Session, "after_commit", self._after_commit)
+            event.remove(Session, "after_rollback", self._after_rollback)
+
+    # ─── Buffer ────────────────────────────────────────────────
+
+    def record(self, entries: List[dict]) -> None:
+        self._buffer.extend(entries)
+        overflow = len(self._buffer) - self.max_buffer
+        if overflow > 0:
+            del self._buffer[:overflow]
+            self.dropped += overflow
+            logger.warning(f"Audit buffer full - dropped {overflow} oldest entries")
+        if len(self._buffer) >= self.batch_size and self._wake:
+            self._wake.set()
+
+    async def flush(self) -> int:
+        """Write everything buffered - returns the rows written"""
+        if not self._buffer:
+            return 0
+        rows, self._buffer = self._buffer, []
+        written = 0
+        try:
+            async with AsyncSessionLocal() as db:
+                for i in range(0, len(rows), self.batch_size):
+                    await db.execute(insert(AuditLog), rows[i:i + self.batch_size])
+                    written += len(rows[i:i + self.batch_size])
+                await db.commit()
+        except Exception:
+            logger.exception(f"Audit flush of {len(rows)} entries failed - keeping them for the next round")
+            self.record(rows)
+            return 0
+        return written
+
+    # ─── Loop ──────────────────────────────────────────────────
+
+    async def run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+        await self.flush()
+
+    async def start(self) -> None:
+        if not self._task:
+            self._stopping = False
+            self._wake = asyncio.Event()
+            self.install()
+            self._task = asyncio.create_task(self.run())
+
+    async def shutdown(self) -> None:
+        """Stop capturing and drain the buffer"""
+        if self._task:
+            self.uninstall()
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+
+
+audit = AuditTrail(settings.AUDIT_BATCH_SIZE, settings.AUDIT_FLUSH_SECONDS, settings.AUDIT_MAX_BUFFER)
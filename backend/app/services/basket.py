@@ -0,0 +1,231 @@
+"""
+🛒 Basket Engine
+Server-side baskets with incremental totals
+
+Each register owns one open basket in an in-process store. A line change
+subtracts the old line's contribution and adds the new one, so subtotal,
+discounts and per-rate VAT buckets stay current without walking the
+basket - the customer display reads a cached snapshot per version.
+
+Baskets live in the worker's memory: route a register to the same worker
+(sticky sessions) when running more than one.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Optional
+
+CENT = Decimal("0.01")
+ZERO = Decimal(0)
+
+
+def money(value: Decimal) -> Decimal:
+    """Round to cents - applied once, when totals are read"""
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def rate(value) -> Decimal:
+    """Exact Decimal for a float column such as Product.vat_rate"""
+    return Decimal(str(value if value is not None else 0))
+
+
+@dataclass
+class BasketLine:
+    """One product in the basket, priced net of VAT"""
+    product_id: str
+    product_name: str
+    sku: Optional[str]
+    unit_price: Decimal
+    vat_rate: Decimal
+    quantity: int
+    discount: Decimal = ZERO
+    track_inventory: bool = True
+    category_id: Optional[str] = None
+    brand_id: Optional[str] = None
+
+    @property
+    def gross(self) -> Decimal:
+        return self.unit_price * self.quantity
+
+    @property
+    def net(self) -> Decimal:
+        return self.gross - self.discount
+
+    @property
+    def tax(self) -> Decimal:
+        return self.net * self.vat_rate / 100
+
+    @property
+    def total(self) -> Decimal:
+        return self.net + self.tax
+
+
+@dataclass
+class VatBucket:
+    net: Decimal = ZERO
+    tax: Decimal = ZERO
+    lines: int = 0
+
+
+@dataclass
+class Basket:
+    """An open basket and its running totals"""
+    register_id: str
+    organization_id: str
+    branch_id: Optional[str] = None
+    customer_id: Optional[str] = None
+
+    lines: Dict[str, BasketLine] = field(default_factory=dict)
+    subtotal: Decimal = ZERO
+    line_discounts: Decimal = ZERO
+    tax_total: Decimal = ZERO
+    item_count: int = 0
+    vat_buckets: Dict[Decimal, VatBucket] = field(default_factory=dict)
+
+    order_discount: Decimal = ZERO
+    shipping_cost: Decimal = ZERO
+    free_shipping: bool = False
+
+    # Promotions (set by the promotion engine)
+    discount_code: Optional[str] = None
+    promotions: List[dict] = field(default_factory=list)
+
+    version: int = 0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+    _snapshot: Optional[dict] = field(default=None, repr=False)
+
+    # ─── Incremental updates ───────────────────────────────────
+
+    def _apply(self, line: BasketLine, sign: int) -> None:
+        self.subtotal += sign * line.gross
+        self.line_discounts += sign * line.discount
+        self.tax_total += sign * line.tax
+        self.item_count += sign * line.quantity
+
+        bucket = self.vat_buckets.setdefault(line.vat_rate, VatBucket())
+        bucket.net += sign * line.net
+        bucket.tax += sign * line.tax
+        bucket.lines += sign
+        if bucket.lines == 0:
+            del self.vat_buckets[line.vat_rate]
+
+    def _changed(self) -> None:
+        self.version += 1
+        self._snapshot = None
+
+    def set_line(self, line: BasketLine) -> None:
+        """
+        Insert or replace a line (quantity 0 removes it)
+
+        Pass a new BasketLine (dataclasses.replace) rather than mutating the
+        stored one - the old line's contribution is subtracted as stored.
+        """
+        old = self.lines.pop(line.product_id, None)
+        if old:
+            self._apply(old, -1)
+        if line.quantity > 0:
+            self.lines[line.product_id] = line
+            self._apply(line, 1)
+        self._changed()
+
+    def remove_line(self, product_id: str) -> Optional[BasketLine]:
+        line = self.lines.pop(product_id, None)
+        if line:
+            self._apply(line, -1)
+            self._changed()
+        return line
+
+    def set_line_discount(self, product_id: str, discount: Decimal) -> None:
+        line = self.lines.get(product_id)
+        if line is None or line.discount == discount:
+            return
+        self._apply(line, -1)
+        line.discount = discount
+        self._apply(line, 1)
+        self._changed()
+
+    # ─── Totals ────────────────────────────────────────────────
+
+    def set_promotions(self, promotions: List[dict], free_shipping: bool) -> None:
+        if promotions != self.promotions or free_shipping != self.free_shipping:
+            self.promotions = promotions
+            self.free_shipping = free_shipping
+            self._changed()
+
+    @property
+    def effective_shipping(self) -> Decimal:
+        return ZERO if self.free_shipping else self.shipping_cost
+
+    @property
+    def total(self) -> Decimal:
+        return (
+            self.subtotal - self.line_discounts + self.tax_total
+            - self.order_discount + self.effective_shipping
+        )
+
+    def totals(self) -> dict:
+        """Rounded totals for displays and receipts, cached per version"""
+        if self._snapshot is None:
+            self._snapshot = {
+                "version": self.version,
+                "item_count": self.item_count,
+                "line_count": len(self.lines),
+                "subtotal": money(self.subtotal),
+                "discount_amount": money(self.line_discounts + self.order_discount),
+                "tax_amount": money(self.tax_total),
+                "shipping_cost": money(self.effective_shipping),
+                "total_amount": money(self.total),
+                "vat_buckets": [
+                    {"vat_rate": rate, "net": money(b.net), "tax": money(b.tax)}
+                    for rate, b in sorted(self.vat_buckets.items())
+                ],
+                "promotions": self.promotions,
+            }
+        return self._snapshot
+
+
+class BasketStore:
+    """Open baskets keyed by register"""
+
+    def __init__(self):
+        self._baskets: Dict[str, Basket] = {}
+
+    def get(self, register_id: str) -> Optional[Basket]:
+        return self._baskets.get(register_id)
+
+    def open(self, register_id: str, organization_id: str, branch_id: Optional[str]) -> Basket:
+        basket = self._baskets.get(register_id)
+        if basket is None:
+            basket = Basket(
+                register_id=register_id,
+                organization_id=organization_id,
+                branch_id=branch_id,
+            )
+            self._baskets[register_id] = basket
+        return basket
+
+    def drop(self, register_id: str) -> Optional[Basket]:
+        return self._baskets.pop(register_id, None)
+
+    async def on_reservation_expired(self, organization_id: str, register_id: str) -> None:
+        basket = self._baskets.get(register_id)
+        if basket and basket.organization_id == organization_id:
+            self.drop(register_id)
+
+    def __len__(self) -> int:
+        return len(self._baskets)
+
+
+def build_basket(lines: List[BasketLine], organization_id: str, branch_id: Optional[str] = None) -> Basket:
+    """Ad-hoc basket for single-shot checkouts"""
+    basket = Basket(register_id="", organization_id=organization_id, branch_id=branch_id)
+    for line in lines:
+        existing = basket.lines.get(line.product_id)
+        if existing:
+            line.quantity += existing.quantity
+        basket.set_line(line)
+    return basket
+
+
+baskets = BasketStore()
@@ -0,0 +1,330 @@
+"""
+💳 Checkout Service
+Persists a finalized basket as an order
+
+Totals come from the basket engine; this module only writes the order,
+its items, stock changes, the payments, account charges, loyalty points,
+gift card debits and the campaign / discount code redemptions inside the
+caller's transaction.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import and_, bindparam, func, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.database import (
+    CashRegister, Order, OrderItem, Payment, PaymentMethod, PaymentStatus, Product, generate_uuid
+)
+from app.services.basket import Basket, money
+from app.services.currency import currencies, CurrencyError
+from app.services.customer_credit import customer_credit, CreditError
+from app.services import customer_stats
+from app.services.loyalty import loyalty, LoyaltyError
+from app.services.gift_cards import GiftCardDebit, GiftCardError, gift_cards as gift_card_service
+from app.services.redemptions import redemptions, RedemptionError
+from app.services.notifications import outbox
+
+
+class CheckoutError(Exception):
+    """Raised when a basket cannot be turned into a sale"""
+
+
+@dataclass
+class Tender:
+    """One way the customer pays part of the total (amount in the base currency)"""
+    method: str
+    amount: Decimal
+    currency: Optional[str] = None
+    gift_card_code: Optional[str] = None
+    reference: Optional[str] = None
+
+
+# Payment method → CashRegister running-total column
+_REGISTER_BUCKETS = {
+    PaymentMethod.CASH: "cash_sales",
+    PaymentMethod.CREDIT_CARD: "card_sales",
+    PaymentMethod.DEBIT_CARD: "card_sales",
+    PaymentMethod.GIFT_CARD: "gift_card_sales",
+}
+
+
+_count_sales = (
+    update(Product.__table__)
+    .where(Product.__table__.c.id == bindparam("pid"))
+    .values(sales_count=Product.__table__.c.sales_count + bindparam("qty"))
+)
+
+
+def new_order_number() -> str:
+    now = datetime.now()
+    return f"ORD-{now.strftime('%Y%m%d')}-{now.microsecond}"
+
+
+def tender_label(tenders: Sequence[Tender]) -> str:
+    """Order.payment_method value - the single method used, or split"""
+    methods = {t.method for t in tenders}
+    return methods.pop() if len(methods) == 1 else "split"
+
+
+async def record_payments(
+    db: AsyncSession,
+    order: Order,
+    tenders: Sequence[Tender],
+    cashier_id: Optional[str] = None,
+) -> List[dict]:
+    """
+    Write every tender of an order - does not commit
+
+    Tenders must sum to the order total. All Payment rows go out as one
+    multi-row INSERT, sent as a CTE of the UPDATE that bumps the cashier's
+    open register, so payments and shift totals cost a single round trip.
+    Customer (account, points) and gift card balances are charged last -
+    their row locks are held until commit.
+    """
+    total = money(order.total_amount or 0)
+    paid = money(sum((Decimal(t.amount) for t in tenders), Decimal(0)))
+    if paid != total:
+        raise CheckoutError(f"Tenders sum to {paid}, order total is {total}")
+
+    now = datetime.utcnow()
+    rows, debits = [], []
+    account_charge = points_amount = Decimal(0)
+    buckets: Dict[str, Decimal] = {}
+    table = None
+
+    for tender in tenders:
+        try:
+            method = PaymentMethod(tender.method)
+        except ValueError:
+            raise CheckoutError(f"Unknown payment method '{tender.method}'")
+        amount = money(Decimal(tender.amount))
+        foreign = bool(tender.currency) and tender.currency.upper() != settings.BASE_CURRENCY
+        if foreign and method in (PaymentMethod.CREDIT, PaymentMethod.LOYALTY_POINTS, PaymentMethod.GIFT_CARD):
+            # Balances are kept (and refunded) in the base currency
+            raise CheckoutError(f"{method.value} tenders are paid in {settings.BASE_CURRENCY} only")
+        if method == PaymentMethod.CREDIT:
+            if not order.customer_id:
+                raise CheckoutError("On-account payment needs a customer")
+            account_charge += amount
+        elif method == PaymentMethod.LOYALTY_POINTS:
+            if not order.customer_id:
+                raise CheckoutError("Paying with points needs a customer")
+            points_amount += amount
+        row = {
+            "id": generate_uuid(),
+            "organization_id": order.organization_id,
+            "order_id": order.id,
+            "customer_id": order.customer_id,
+            "method": method,
+            "amount": amount,
+            "currency": settings.BASE_CURRENCY,
+            "exchange_rate": None,
+            "provider": None,
+            "provider_transaction_id": tender.reference,
+            "status": PaymentStatus.COMPLETED,
+            "created_at": order.created_at or now,  # Same partition as the order's items
+            "completed_at": now,
+        }
+
+        if method == PaymentMethod.GIFT_CARD:
+            if not tender.gift_card_code:
+                raise CheckoutError("Gift card tender needs a gift_card_code")
+            try:
+                card_id, card_currency = await gift_card_service.resolve(
+                    db, order.organization_id, tender.gift_card_code
+                )
+            except GiftCardError as e:
+                raise CheckoutError(str(e))
+            if card_currency != settings.BASE_CURRENCY:
+                raise CheckoutError(f"Gift card is in {card_currency}, checkout is in {settings.BASE_CURRENCY}")
+            debits.append(GiftCardDebit(card_id, amount))
+            row.update(provider="gift_card", provider_transaction_id=card_id)
+
+        elif foreign:
+            paid_currency = tender.currency.upper()
+            try:
+                table = table or await currencies.table(db)
+                row["exchange_rate"] = table.rate(settings.BASE_CURRENCY, paid_currency)
+                row["amount"] = table.convert(amount, settings.BASE_CURRENCY, paid_currency)
+            except CurrencyError as e:
+                raise CheckoutError(str(e))
+            row["currency"] = paid_currency
+
+        column = _REGISTER_BUCKETS.get(method, "other_sales")
+        buckets[column] = buckets.get(column, Decimal(0)) + amount
+        rows.append(row)
+
+    payments = insert(Payment).values(rows).cte("payments")
+    register = CashRegister.__table__.c
+    await db.execute(
+        update(CashRegister)
+        .add_cte(payments)
+        .where(
+            and_(
+                CashRegister.user_id == cashier_id,
+                CashRegister.organization_id == order.organization_id,
+                CashRegister.status == "open"
+            )
+        )
+        .values(
+            order_count=func.coalesce(register.order_count, 0) + 1,
+            total_sales=func.coalesce(register.total_sales, 0) + total,
+            **{
+                column: func.coalesce(register[column], 0) + amount
+                for column, amount in buckets.items()
+            }
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    # Balance-holding rows last, always customer before gift cards
+    if account_charge:
+        try:
+            await customer_credit.charge(
+                db, order.organization_id, order.customer_id, account_charge,
+                order_id=order.id, reference=order.order_number, user_id=cashier_id
+            )
+        except CreditError as e:
+            raise CheckoutError(str(e))
+
+    # Points burned by this sale and earned on the rest - one statement
+    if order.customer_id:
+        try:
+            await loyalty.settle(
+                db, order.organization_id, order.customer_id, total, points_amount,
+                order_id=order.id, user_id=cashier_id
+            )
+        except LoyaltyError as e:
+            raise CheckoutError(str(e))
+
+    if debits:
+        try:
+            await gift_card_service.debit_many(db, debits, order_id=order.id)
+        except GiftCardError as e:
+            raise CheckoutError(str(e))
+
+    return rows
+
+
+async def persist_sale(
+    db: AsyncSession,
+    basket: Basket,
+    user_id: str,
+    customer_id: Optional[str] = None,
+    channel: str = "pos",
+    payment_method: str = "cash",
+    customer_notes: Optional[str] = None,
+    reserved: bool = False,
+    currency: Optional[str] = None,
+    tenders: Sequence[Tender] = (),
+) -> Order:
+    """
+    Write order, items, stock and payments - does not commit
+
+    reserved=True means the stock was already taken by a reservation hold,
+    so only sales counters move. Without tenders the whole total is paid
+    with payment_method (in currency, at today's rate); order totals always
+    stay in the base currency.
+    """
+    if not basket.lines:
+        raise CheckoutError("Order has no items")
+
+    totals = basket.totals()
+    code = next((p for p in basket.promotions if p.get("code")), None)
+    coupon = money(code["discount"]) if code else Decimal(0)
+
+    order = Order(
+        organization_id=basket.organization_id,
+        branch_id=basket.branch_id,
+        customer_id=customer_id,
+        cashier_id=user_id,
+        order_number=new_order_number(),
+        channel=channel,
+        subtotal=totals["subtotal"],
+        tax_amount=totals["tax_amount"],
+        discount_amount=totals["discount_amount"],
+        coupon_discount=coupon,
+        discount_code=code["code"] if code else None,
+        shipping_cost=totals["shipping_cost"],
+        total_amount=totals["total_amount"],
+        payment_method=tender_label(tenders) if tenders else payment_method,
+        status="completed",
+        payment_status="paid",
+        customer_notes=customer_notes
+    )
+    db.add(order)
+    await db.flush()
+
+    counted = []
+    for line in basket.lines.values():
+        db.add(OrderItem(
+            order_id=order.id,
+            created_at=order.created_at,
+            product_id=line.product_id,
+            product_name=line.product_name,
+            sku=line.sku,
+            quantity=line.quantity,
+            unit_price=line.unit_price,
+            discount_amount=money(line.discount),
+            tax_rate=float(line.vat_rate),
+            total_price=money(line.total)
+        ))
+
+        if reserved or not line.track_inventory:
+            counted.append({"pid": line.product_id, "qty": line.quantity})
+            continue
+
+        # Conditional decrement - a concurrent lane can't oversell the last unit
+        result = await db.execute(
+            update(Product)
+            .where(
+                and_(
+                    Product.id == line.product_id,
+                    (Product.allow_backorder == True) | (Product.stock_quantity >= line.quantity)
+                )
+            )
+            .values(
+                stock_quantity=Product.stock_quantity - line.quantity,
+                sales_count=Product.sales_count + line.quantity
+            )
+        )
+        if result.rowcount == 0:
+            raise CheckoutError(f"Insufficient stock for {line.product_name}")
+
+    if counted:
+        await db.execute(_count_sales, counted)
+
+    await record_payments(
+        db, order, tenders or [Tender(payment_method, totals["total_amount"], currency)], user_id
+    )
+    await customer_stats.record_sale(
+        db, customer_id, totals["total_amount"], tiers=await loyalty.tiers(db, basket.organization_id)
+    )
+
+    # Campaign and code rows stay locked until commit as well
+    try:
+        for promo in basket.promotions:
+            if not promo.get("code"):
+                await redemptions.redeem_campaign(db, promo["id"], customer_id, order.id, money(promo["discount"]))
+        if code:
+            await redemptions.redeem(db, code["id"], customer_id, order.id, coupon)
+    except RedemptionError as e:
+        raise CheckoutError(str(e))
+
+    # Receipt goes out after commit, via the outbox
+    if customer_id:
+        await outbox.add(
+            db, basket.organization_id, "order_confirmed", customer_id=customer_id, order_id=order.id,
+            context={
+                "order_number": order.order_number,
+                "total_amount": str(totals["total_amount"]),
+                "currency": settings.BASE_CURRENCY,
+            }
+        )
+
+    return order
@@ -0,0 +1,180 @@
+"""
+💱 Currency Service
+In-memory exchange rates with cross-rate derivation
+
+ExchangeRate rows are loaded once into per-pair histories sorted by
+effective_date; "rate on date D" is a bisect over that history. Pairs
+without a stored row are derived through the base currency:
+
+    EUR→USD on D = (EUR→base on D) / (USD→base on D)
+
+The table is rebuilt when the rate/currency fingerprint changes, so
+checkout and reports convert without a query per line. Converted
+amounts are rounded to the target Currency.decimal_places.
+"""
+
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.global_features import Currency, ExchangeRate
+
+ONE = Decimal(1)
+
+
+class CurrencyError(Exception):
+    """Raised for unknown currencies or dates before the first known rate"""
+
+
+class RateHistory:
+    """Rates of one pair sorted by effective date"""
+
+    __slots__ = ("dates", "rates")
+
+    def __init__(self, points: Iterable[Tuple[date, Decimal]]):
+        points = sorted(points)
+        self.dates = [d for d, _ in points]
+        self.rates = [r for _, r in points]
+
+    def at(self, on: date) -> Optional[Decimal]:
+        """Latest rate effective on or before `on`"""
+        i = bisect_right(self.dates, on)
+        return self.rates[i - 1] if i else None
+
+
+class RateTable:
+    """Compiled, read-only rate lookup"""
+
+    def __init__(self, fingerprint: Tuple, base: str, rows: List[ExchangeRate], currencies: List[Currency]):
+        self.fingerprint = fingerprint
+        self.base = base
+        self.decimal_places: Dict[str, int] = {
+            c.code: c.decimal_places if c.decimal_places is not None else 2 for c in currencies
+        }
+
+        direct: Dict[Tuple[str, str], Dict[date, Decimal]] = defaultdict(dict)
+        for row in rows:
+            if row.rate:
+                # Later rows for the same day win (rows arrive ordered by created_at)
+                direct[(row.from_currency, row.to_currency)][row.effective_date] = row.rate
+
+        # Inverses come from the winning row, and only for days without a stored row of their own
+        pairs: Dict[Tuple[str, str], Dict[date, Decimal]] = defaultdict(dict)
+        for (from_currency, to_currency), points in direct.items():
+            pairs[(from_currency, to_currency)].update(points)
+            inverse = direct.get((to_currency, from_currency), {})
+            pairs[(to_currency, from_currency)].update(
+                (day, ONE / rate) for day, rate in points.items() if day not in inverse
+            )
+
+        self._pairs: Dict[Tuple[str, str], RateHistory] = {
+            pair: RateHistory(points.items()) for pair, points in pairs.items()
+        }
+
+    def rate(self, from_currency: str, to_currency: str, on: Optional[date] = None) -> Decimal:
+        """Units of to_currency for one from_currency on the given day"""
+        if from_currency == to_currency:
+            return ONE
+        on = on or date.today()
+
+        direct = self._pairs.get((from_currency, to_currency))
+        if direct:
+            found = direct.at(on)
+            if found is not None:
+                return found
+
+        # Cross rate through the base currency
+        from_base = self._to_base(from_currency, on)
+        to_base = self._to_base(to_currency, on)
+        return from_base / to_base
+
+    def _to_base(self, currency: str, on: date) -> Decimal:
+        if currency == self.base:
+            return ONE
+        history = self._pairs.get((currency, self.base))
+        found = history.at(on) if history else None
+        if found is None:
+            raise CurrencyError(f"No {currency}/{self.base} rate on or before {on}")
+        return found
+
+    def quantum(self, currency: str) -> Decimal:
+        if currency not in self.decimal_places:
+            raise CurrencyError(f"Unknown currency {currency}")
+        return Decimal(1).scaleb(-self.decimal_places[currency])
+
+    def convert(self, amount: Decimal, from_currency: str, to_currency: str, on: Optional[date] = None) -> Decimal:
+        return self.convert_many([amount], from_currency, to_currency, on)[0]
+
+    def convert_many(
+        self,
+        amounts: Iterable[Decimal],
+        from_currency: str,
+        to_currency: str,
+        on: Optional[date] = None,
+    ) -> List[Decimal]:
+        """Convert a whole column with one rate lookup and one rounding rule"""
+        factor = self.rate(from_currency, to_currency, on)
+        quantum = self.quantum(to_currency)
+        return [
+            (Decimal(amount) * factor).quantize(quantum, rounding=ROUND_HALF_UP) if amount is not None else None
+            for amount in amounts
+        ]
+
+
+class CurrencyService:
+    """Keeps the compiled rate table warm"""
+
+    def __init__(self, base: str, refresh_seconds: float):
+        self.base = base
+        self.refresh_seconds = refresh_seconds
+        self._table: Optional[RateTable] = None
+        self._checked_at = 0.0
+
+    def invalidate(self) -> None:
+        self._table = None
+        self._checked_at = 0.0
+
+    async def _fingerprint(self, db: AsyncSession) -> Tuple:
+        rates = select(func.count(ExchangeRate.id), func.max(ExchangeRate.created_at))
+        currencies = select(func.count(Currency.code), func.max(Currency.updated_at))
+        return tuple((await db.execute(rates)).one()) + tuple((await db.execute(currencies)).one())
+
+    async def table(self, db: AsyncSession) -> RateTable:
+        now = time.monotonic()
+        if self._table and now - self._checked_at < self.refresh_seconds:
+            return self._table
+
+        fingerprint = await self._fingerprint(db)
+        self._checked_at = now
+        if self._table and self._table.fingerprint == fingerprint:
+            return self._table
+
+        rows = (await db.execute(
+            select(ExchangeRate).order_by(ExchangeRate.created_at)
+        )).scalars().all()
+        currencies = (await db.execute(
+            select(Currency).where(Currency.is_active == True)
+        )).scalars().all()
+        self._table = RateTable(fingerprint, self.base, rows, currencies)
+        return self._table
+
+    async def convert_many(
+        self,
+        db: AsyncSession,
+        amounts: Iterable[Decimal],
+        from_currency: str,
+        to_currency: str,
+        on: Optional[date] = None,
+    ) -> List[Decimal]:
+        table = await self.table(db)
+        return table.convert_many(amounts, from_currency.upper(), to_currency.upper(), on)
+
+
+currencies = CurrencyService(settings.BASE_CURRENCY, settings.CURRENCY_REFRESH_SECONDS)
@@ -0,0 +1,155 @@
+"""
+💳 Customer Credit (Account Sales)
+Concurrent-safe balance enforcement for on-account tenders
+
+- Charge: conditional UPDATE ... WHERE current_balance + :amount <= credit_limit
+  RETURNING, so two lanes charging the same wholesale customer can never
+  push the balance past the limit - the second one re-checks the row after
+  the first commits
+- Ledger: every balance change is a CustomerLedgerEntry with balance_after,
+  so a statement never has to re-add the history
+- Statement: streamed from a server-side cursor in STATEMENT_BATCH_SIZE
+  batches, memory stays flat for customers with years of entries
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import and_, desc, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.database import Customer, CustomerLedgerEntry
+
+
+class CreditError(Exception):
+    """Raised when an account movement is not allowed"""
+
+
+class CustomerCreditService:
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+
+    async def _move(
+        self,
+        db: AsyncSession,
+        org_id: str,
+        customer_id: str,
+        amount: Decimal,
+        entry_type: str,
+        enforce_limit: bool,
+        order_id: Optional[str] = None,
+        reference: Optional[str] = None,
+        notes: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> Decimal:
+        balance = func.coalesce(Customer.current_balance, 0)
+        conditions = [
+            Customer.id == customer_id,
+            Customer.organization_id == org_id,
+            Customer.is_active == True,
+        ]
+        if enforce_limit:
+            conditions.append(balance + amount <= func.coalesce(Customer.credit_limit, 0))
+
+        balance_after = (await db.execute(
+            update(Customer)
+            .where(and_(*conditions))
+            .values(current_balance=balance + amount)
+            .returning(Customer.current_balance)
+            .execution_options(synchronize_session=False)
+        )).scalar()
+
+        if balance_after is None:
+            if enforce_limit and await self._exists(db, org_id, customer_id):
+                raise CreditError("Credit limit exceeded")
+            raise CreditError("Customer not found")
+
+        await db.execute(insert(CustomerLedgerEntry).values(
+            organization_id=org_id,
+            customer_id=customer_id,
+            order_id=order_id,
+            entry_type=entry_type,
+            amount=amount,
+            balance_after=balance_after,
+            reference=reference,
+            notes=notes,
+            user_id=user_id,
+            created_at=datetime.utcnow()
+        ))
+        return balance_after
+
+    async def _exists(self, db: AsyncSession, org_id: str, customer_id: str) -> bool:
+        return (await db.execute(
+            select(Customer.id).where(
+                and_(Customer.id == customer_id, Customer.organization_id == org_id, Customer.is_active == True)
+            )
+        )).first() is not None
+
+    # ─── Movements (inside the caller's transaction) ───────────
+
+    async def charge(self, db: AsyncSession, org_id: str, customer_id: str, amount: Decimal, **details) -> Decimal:
+        """Sell on account - fails instead of going over credit_limit"""
+        if amount <= 0:
+            raise CreditError("Charge amount must be positive")
+        return await self._move(db, org_id, customer_id, amount, "charge", True, **details)
+
+    async def settle(self, db: AsyncSession, org_id: str, customer_id: str, amount: Decimal, **details) -> Decimal:
+        """Customer paid (part of) their balance"""
+        if amount <= 0:
+            raise CreditError("Payment amount must be positive")
+        return await self._move(db, org_id, customer_id, -amount, "payment", False, **details)
+
+    async def refund(self, db: AsyncSession, org_id: str, customer_id: str, amount: Decimal, **details) -> Decimal:
+        """Reverse an account sale"""
+        return await self._move(db, org_id, customer_id, -amount, "refund", False, **details)
+
+    # ─── Statement of account ──────────────────────────────────
+
+    async def opening_balance(self, db: AsyncSession, customer_id: str, start: Optional[datetime]) -> Decimal:
+        """Balance carried into the statement period"""
+        if start is None:
+            return Decimal(0)
+        balance = (await db.execute(
+            select(CustomerLedgerEntry.balance_after)
+            .where(and_(CustomerLedgerEntry.customer_id == customer_id, CustomerLedgerEntry.created_at < start))
+            .order_by(desc(CustomerLedgerEntry.created_at))
+            .limit(1)
+        )).scalar()
+        return balance or Decimal(0)
+
+    async def statement(
+        self,
+        db: AsyncSession,
+        customer_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> AsyncIterator:
+        """Ledger rows of a period, oldest first, fetched batch by batch"""
+        conditions = [CustomerLedgerEntry.customer_id == customer_id]
+        if start:
+            conditions.append(CustomerLedgerEntry.created_at >= start)
+        if end:
+            conditions.append(CustomerLedgerEntry.created_at < end)
+
+        result = await db.stream(
+            select(
+                CustomerLedgerEntry.created_at,
+                CustomerLedgerEntry.entry_type,
+                CustomerLedgerEntry.order_id,
+                CustomerLedgerEntry.reference,
+                CustomerLedgerEntry.amount,
+                CustomerLedgerEntry.balance_after,
+                CustomerLedgerEntry.notes,
+            )
+            .where(and_(*conditions))
+            .order_by(CustomerLedgerEntry.created_at, CustomerLedgerEntry.id)
+            .execution_options(yield_per=self.batch_size)
+        )
+        async for row in result:
+            yield row
+
+
+customer_credit = CustomerCreditService(settings.STATEMENT_BATCH_SIZE)
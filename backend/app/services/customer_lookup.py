@@ -0,0 +1,296 @@
+"""
+🔎 Customer Lookup
+Type-ahead customer search at the till - partial phone, email or name
+
+- Phones are stored normalized (Customer.phone_e164: digits, country code
+  first), so "0532 123 45 67", "+90 532 1234567" and "5321234567" are the
+  same number and "4567" is a suffix match
+- In memory: per organization, one sorted key list (name, surname, email,
+  phone, reversed phone) with bisect for the prefix range and NumPy
+  argpartition for the top-N by lifetime spend - no query per keystroke
+- Freshness: customers changed since the last check (idx_customer_org_updated)
+  are applied as a small delta; the whole index is rebuilt once the delta
+  outgrows a fraction of it, and on every refresh while it has no
+  watermark (no customers yet, or rows without updated_at - see
+  scripts/normalize_customer_phones.py)
+- Database fallback: infix matches the index can't answer go to the
+  trigram indexes (names, email) and the reversed-phone index
+"""
+
+import re
+import time
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.database import Customer
+
+_NON_DIGITS = re.compile(r"\D")
+_PHONE_QUERY = re.compile(r"^[\d\s+()\-.]+$")
+_NATIONAL_LENGTH = 10
+_SUFFIX = "#"  # Reversed-phone keys, kept apart from phone prefixes
+_END = "\U0010ffff"
+_LOAD_BATCH = 10_000
+# Rows committed just before a refresh may carry an older updated_at
+_REFRESH_OVERLAP = timedelta(seconds=5)
+
+
+def normalize_phone(raw: Optional[str], country_code: str = settings.DEFAULT_PHONE_COUNTRY_CODE) -> Optional[str]:
+    """E.164 digits without the plus: 0532 123 45 67 → 905321234567"""
+    if not raw:
+        return None
+    digits = _NON_DIGITS.sub("", raw)
+    if not digits:
+        return None
+    if raw.strip().startswith("+"):
+        return digits
+    if digits.startswith("00"):
+        return digits[2:]
+    if digits.startswith("0"):
+        return country_code + digits[1:]
+    if len(digits) <= _NATIONAL_LENGTH:
+        return country_code + digits
+    return digits
+
+
+def _keys(first_name, last_name, email, phone_e164) -> List[str]:
+    first = (first_name or "").strip().casefold()
+    last = (last_name or "").strip().casefold()
+    keys = []
+    if first or last:
+        keys.append(f"{first} {last}".strip())
+    if last:
+        keys.append(last)
+    if email:
+        keys.append(email.strip().casefold())
+    if phone_e164:
+        keys.append(phone_e164)
+        keys.append(_SUFFIX + phone_e164[::-1])
+    return keys
+
+
+@dataclass
+class PrefixIndex:
+    """Sorted keys → customer slots; rows changed after the build live in the delta"""
+    keys: List[str] = field(default_factory=list)
+    slots: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    rows: List[Tuple] = field(default_factory=list)  # slot → (id, name, phone, email)
+    rank: np.ndarray = field(default_factory=lambda: np.empty(0))  # slot → total_spent
+    active: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=bool))
+    delta_keys: List[Tuple[str, int]] = field(default_factory=list)
+    delta_rows: List[Tuple] = field(default_factory=list)
+    delta_rank: List[float] = field(default_factory=list)
+    delta_active: List[bool] = field(default_factory=list)
+    location: Dict[str, Tuple] = field(default_factory=dict)  # id → (in delta, slot, updated_at)
+    watermark: Optional[datetime] = None
+
+    @classmethod
+    def build(cls, rows: List[Tuple]) -> "PrefixIndex":
+        """rows: (id, first, last, email, phone, phone_e164, total_spent, is_active, updated_at)"""
+        index = cls()
+        pairs = []
+        ranks, active = [], []
+        for slot, (cid, first, last, email, phone, e164, spent, is_active, updated_at) in enumerate(rows):
+            index.rows.append((cid, f"{first or ''} {last or ''}".strip(), phone, email))
+            index.location[cid] = (False, slot, updated_at)
+            ranks.append(float(spent or 0))
+            active.append(bool(is_active))
+            pairs.extend((key, slot) for key in _keys(first, last, email, e164))
+            if updated_at and (index.watermark is None or updated_at > index.watermark):
+                index.watermark = updated_at
+
+        pairs.sort()
+        index.keys = [k for k, _ in pairs]
+        index.slots = np.fromiter((s for _, s in pairs), dtype=np.int32, count=len(pairs))
+        index.rank = np.asarray(ranks, dtype=np.float64)
+        index.active = np.asarray(active, dtype=bool)
+        return index
+
+    @property
+    def needs_rebuild(self) -> bool:
+        return len(self.delta_rows) > max(1000, len(self.rows) // 20)
+
+    def upsert(self, row: Tuple) -> None:
+        cid, first, last, email, phone, e164, spent, is_active, updated_at = row
+        previous = self.location.get(cid)
+        if previous:
+            in_delta, slot, seen_at = previous
+            if updated_at is not None and seen_at == updated_at:
+                return  # Picked up again by the refresh overlap
+            if in_delta:
+                self.delta_active[slot] = False
+            else:
+                self.active[slot] = False
+
+        slot = len(self.delta_rows)
+        self.delta_rows.append((cid, f"{first or ''} {last or ''}".strip(), phone, email))
+        self.delta_rank.append(float(spent or 0))
+        self.delta_active.append(bool(is_active))
+        self.location[cid] = (True, slot, updated_at)
+        for key in _keys(first, last, email, e164):
+            insort(self.delta_keys, (key, slot))
+        if updated_at and (self.watermark is None or updated_at > self.watermark):
+            self.watermark = updated_at
+
+    def _prefixes(self, query: str) -> List[str]:
+        query = query.strip()
+        if _PHONE_QUERY.match(query):
+            digits = _NON_DIGITS.sub("", query)
+            if not digits:
+                return []
+            prefixes = [_SUFFIX + digits[::-1]]
+            if len(digits) >= 7:
+                prefixes.append(normalize_phone(query))
+            return prefixes
+        return [query.casefold()]
+
+    def suggest(self, query: str, limit: int = 10) -> List[dict]:
+        """Top customers by lifetime spend whose name, email or phone starts with query"""
+        main_slots, delta_slots = [], set()
+        for prefix in self._prefixes(query):
+            lo = bisect_left(self.keys, prefix)
+            hi = bisect_left(self.keys, prefix + _END, lo)
+            if hi > lo:
+                main_slots.append(self.slots[lo:hi])
+            lo = bisect_left(self.delta_keys, (prefix,))
+            hi = bisect_left(self.delta_keys, (prefix + _END,), lo)
+            delta_slots.update(slot for _, slot in self.delta_keys[lo:hi])
+
+        hits: List[Tuple[float, Tuple]] = []
+        if main_slots:
+            slots = np.concatenate(main_slots)
+            slots = slots[self.active[slots]]
+            # A customer can match through several keys - take spare candidates
+            take = min(len(slots), limit * 4)
+            if take:
+                top = slots[np.argpartition(-self.rank[slots], take - 1)[:take]] if take < len(slots) else slots
+                hits.extend((self.rank[s], self.rows[s]) for s in np.unique(top))
+        hits.extend(
+            (self.delta_rank[s], self.delta_rows[s]) for s in delta_slots if self.delta_active[s]
+        )
+
+        hits.sort(key=lambda h: -h[0])
+        seen, results = set(), []
+        for spent, (cid, name, phone, email) in hits:
+            if cid not in seen:
+                seen.add(cid)
+                results.append({"id": cid, "name": name, "phone": phone, "email": email})
+                if len(results) == limit:
+                    break
+        return results
+
+
+def search_conditions(query: str) -> list:
+    """
+    SQL conditions for a free-text customer search (infix)
+
+    Digits go to the normalized phone (suffix, or prefix for full numbers),
+    text to the trigram-indexed name / email columns.
+    """
+    query = query.strip()
+    digits = _NON_DIGITS.sub("", query)
+    if digits and _PHONE_QUERY.match(query):
+        conditions = [func.reverse(Customer.phone_e164).like(digits[::-1] + "%")]
+        if len(digits) >= 7:
+            conditions.append(Customer.phone_e164.like(normalize_phone(query) + "%"))
+        return [or_(*conditions)]
+
+    pattern = f"%{query}%"
+    return [or_(
+        Customer.first_name.ilike(pattern),
+        Customer.last_name.ilike(pattern),
+        Customer.email.ilike(pattern),
+    )]
+
+
+class CustomerLookup:
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._indexes: Dict[str, PrefixIndex] = {}
+        self._checked_at: Dict[str, float] = {}
+
+    def invalidate(self, org_id: Optional[str] = None) -> None:
+        if org_id is None:
+            self._indexes.clear()
+            self._checked_at.clear()
+        else:
+            self._indexes.pop(org_id, None)
+            self._checked_at.pop(org_id, None)
+
+    def upsert(self, customer: Customer) -> None:
+        """Apply a customer written by this process right away - others wait for the refresh"""
+        index = self._indexes.get(customer.organization_id)
+        if index is not None:
+            index.upsert((
+                customer.id, customer.first_name, customer.last_name, customer.email, customer.phone,
+                customer.phone_e164, customer.total_spent, customer.is_active, customer.updated_at,
+            ))
+
+    def _columns(self):
+        return select(
+            Customer.id, Customer.first_name, Customer.last_name, Customer.email,
+            Customer.phone, Customer.phone_e164, Customer.total_spent,
+            Customer.is_active, Customer.updated_at,
+        )
+
+    async def index_for(self, db: AsyncSession, org_id: str) -> PrefixIndex:
+        index = self._indexes.get(org_id)
+        now = time.monotonic()
+        if index and now - self._checked_at.get(org_id, 0) < self.refresh_seconds:
+            return index
+
+        if index is None or index.needs_rebuild or index.watermark is None:
+            result = await db.stream(
+                self._columns()
+                .where(Customer.organization_id == org_id)
+                .execution_options(yield_per=_LOAD_BATCH)
+            )
+            rows = [tuple(row) async for row in result]
+            index = PrefixIndex.build(rows)
+        else:
+            changed = await db.execute(
+                self._columns().where(
+                    and_(
+                        Customer.organization_id == org_id,
+                        Customer.updated_at >= index.watermark - _REFRESH_OVERLAP
+                    )
+                )
+            )
+            for row in changed:
+                index.upsert(tuple(row))
+
+        self._indexes[org_id] = index
+        self._checked_at[org_id] = now
+        return index
+
+    async def suggest(self, db: AsyncSession, org_id: str, query: str, limit: int = 10) -> List[dict]:
+        """In-memory prefix suggestions, topped up from the database for infix matches"""
+        index = await self.index_for(db, org_id)
+        results = index.suggest(query, limit)
+        if len(results) >= limit or len(query.strip()) < 3:
+            return results
+
+        seen = {r["id"] for r in results}
+        rows = await db.execute(
+            select(Customer.id, Customer.first_name, Customer.last_name, Customer.phone, Customer.email)
+            .where(and_(Customer.organization_id == org_id, Customer.is_active == True, *search_conditions(query)))
+            .order_by(Customer.total_spent.desc().nullslast())
+            .limit(limit + len(seen))
+        )
+        for cid, first, last, phone, email in rows:
+            if cid not in seen and len(results) < limit:
+                seen.add(cid)
+                results.append({
+                    "id": cid, "name": f"{first or ''} {last or ''}".strip(), "phone": phone, "email": email
+                })
+        return results
+
+
+customer_lookup = CustomerLookup(settings.CUSTOMER_LOOKUP_REFRESH_SECONDS)
@@ -0,0 +1,180 @@
+"""
+📈 Customer Lifetime Stats
+Denormalized totals kept current by the sale and refund transactions
+
+Customer.total_orders / total_spent / lifetime_value / last_purchase_at are
+bumped by one UPDATE in the same transaction that writes the order, so the
+analytics endpoint reads a single row instead of aggregating orders.
+
+- Tier & segment: recomputed inside that same UPDATE from the new totals,
+  so they never lag behind the stats they are derived from
+- Backfill: recompute() rebuilds everything set-based from orders, one
+  grouped UPDATE ... FROM per batch of customers
+- BLACKLIST is never touched - it is a manual decision; customers scored
+  by the RFM job (services/segmentation.py) keep its segment
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Optional
+
+from sqlalchemy import and_, case, func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.database import Customer, CustomerSegment, Order
+
+# Orders that count towards lifetime stats
+COUNTED_STATUSES = ("completed", "partial_refunded")
+
+
+def tier_expr(total_spent, tiers: Optional[Dict[str, float]] = None, default: str = "bronze"):
+    """
+    loyalty_tier for a lifetime spend (SQL expression)
+
+    tiers maps tier → minimum spend; the organization's loyalty program
+    passes its own, settings.LOYALTY_TIER_THRESHOLDS otherwise.
+    """
+    thresholds = sorted((tiers or settings.LOYALTY_TIER_THRESHOLDS).items(), key=lambda t: -t[1])
+    if not thresholds:
+        return literal(default)
+    return case(
+        *[(total_spent >= threshold, literal(tier)) for tier, threshold in thresholds],
+        else_=literal(default)
+    )
+
+
+def segment_expr(total_orders, total_spent):
+    """
+    segment for the new totals (SQL expression) - BLACKLIST stays
+
+    Once the RFM job has scored a customer its segment wins; a purchase
+    only brings an INACTIVE customer back to REGULAR until the next run.
+    """
+    segment = Customer.__table__.c.segment
+
+    def value(s: CustomerSegment):
+        return literal(s, segment.type)
+
+    return case(
+        (segment == CustomerSegment.BLACKLIST, segment),
+        (
+            Customer.__table__.c.rfm_scored_at != None,
+            case((segment == CustomerSegment.INACTIVE, value(CustomerSegment.REGULAR)), else_=segment)
+        ),
+        (total_spent >= settings.VIP_SPEND_THRESHOLD, value(CustomerSegment.VIP)),
+        (total_orders >= 2, value(CustomerSegment.REGULAR)),
+        else_=value(CustomerSegment.NEW)
+    )
+
+
+def _update_totals(customer_id: str, orders_delta: int, amount: Decimal, purchased_at: Optional[datetime],
+                   tiers: Optional[Dict[str, float]]):
+    orders = func.coalesce(Customer.total_orders, 0) + orders_delta
+    spent = func.coalesce(Customer.total_spent, 0) + amount
+    values = {
+        "total_orders": orders,
+        "total_spent": spent,
+        "lifetime_value": func.coalesce(Customer.lifetime_value, 0) + amount,
+        "loyalty_tier": tier_expr(spent, tiers),
+        "segment": segment_expr(orders, spent),
+    }
+    if purchased_at is not None:
+        values["last_purchase_at"] = func.greatest(
+            func.coalesce(Customer.last_purchase_at, purchased_at), purchased_at
+        )
+    return (
+        update(Customer)
+        .where(Customer.id == customer_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def record_sale(db: AsyncSession, customer_id: Optional[str], amount: Decimal,
+                      purchased_at: Optional[datetime] = None,
+                      tiers: Optional[Dict[str, float]] = None) -> None:
+    """Count a completed order - does not commit"""
+    if customer_id:
+        await db.execute(_update_totals(customer_id, 1, amount, purchased_at or datetime.utcnow(), tiers))
+
+
+async def record_refund(db: AsyncSession, customer_id: Optional[str], amount: Decimal,
+                        whole_order: bool = True,
+                        tiers: Optional[Dict[str, float]] = None) -> None:
+    """Take a refunded order (or part of one) back out - does not commit"""
+    if customer_id:
+        await db.execute(_update_totals(customer_id, -1 if whole_order else 0, -amount, None, tiers))
+
+
+async def recompute(db: AsyncSession, org_id: str, batch_size: int = 10_000,
+                    tiers: Optional[Dict[str, float]] = None) -> int:
+    """
+    Rebuild one organization's stats from orders - backfill / repair, commits per batch
+
+    Customers are walked in id order; each batch is one UPDATE joined to a
+    grouped subquery over idx_order_customer_status. Customers without
+    counted orders are reset to zero. Pass the organization's loyalty
+    tiers, as for record_sale().
+    """
+    updated = 0
+    after = ""
+    while True:
+        ids = (await db.execute(
+            select(Customer.id)
+            .where(and_(Customer.organization_id == org_id, Customer.id > after))
+            .order_by(Customer.id)
+            .limit(batch_size)
+        )).scalars().all()
+        if not ids:
+            return updated
+
+        totals = (
+            select(
+                Order.customer_id.label("customer_id"),
+                func.count(Order.id).label("orders"),
+                func.sum(Order.total_amount).label("spent"),
+                func.max(Order.created_at).label("last_at"),
+            )
+            .where(and_(Order.customer_id.in_(ids), Order.status.in_(COUNTED_STATUSES)))
+            .group_by(Order.customer_id)
+            .subquery()
+        )
+        orders = func.coalesce(totals.c.orders, 0)
+        spent = func.coalesce(totals.c.spent, 0)
+
+        # Customers with orders, from the grouped totals
+        result = await db.execute(
+            update(Customer)
+            .where(Customer.id == totals.c.customer_id)
+            .values(
+                total_orders=orders,
+                total_spent=spent,
+                lifetime_value=spent,
+                last_purchase_at=totals.c.last_at,
+                loyalty_tier=tier_expr(spent, tiers),
+                segment=segment_expr(orders, spent),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        updated += result.rowcount
+
+        # The rest of the batch has no counted orders
+        has_orders = select(Order.customer_id).where(
+            and_(Order.customer_id == Customer.id, Order.status.in_(COUNTED_STATUSES))
+        ).exists()
+        await db.execute(
+            update(Customer)
+            .where(and_(Customer.id.in_(ids), ~has_orders))
+            .values(
+                total_orders=0,
+                total_spent=0,
+                lifetime_value=0,
+                last_purchase_at=None,
+                loyalty_tier=tier_expr(literal(0), tiers),
+                segment=segment_expr(literal(0), literal(0)),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        after = ids[-1]
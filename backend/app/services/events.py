@@ -0,0 +1,270 @@
+"""
+📈 Storefront Event Ingestion
+Product views and search queries in batches, never one ORM insert per event
+
+- Ring: accepted events wait in a bounded in-memory ring (INGEST_RING_SIZE).
+  When it is full, new events are shed and counted - the storefront gets
+  told how many were dropped, checkout never waits on analytics
+- Flush: every INGEST_FLUSH_MS or INGEST_FLUSH_EVENTS events, whichever
+  comes first; drained at shutdown
+- Write: raw rows go in with COPY (asyncpg) or one multi-row INSERT; views
+  are also summed per product per minute and upserted into
+  product_view_minutes, which is what view analytics read
+- Unknown products / customers (or other organizations') are dropped with
+  one lookup per flush instead of failing the batch on a foreign key
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Deque, List, Optional, Set, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.database import Customer, Product, generate_uuid
+from app.models.global_features import ProductView, ProductViewMinute, SearchQuery
+
+logger = logging.getLogger(__name__)
+
+# Client clocks: events older than this or in the future are stamped with the arrival time
+_MAX_EVENT_AGE = timedelta(hours=24)
+
+_VIEW_COLUMNS = [c.name for c in ProductView.__table__.c]
+_SEARCH_COLUMNS = [c.name for c in SearchQuery.__table__.c]
+
+
+@dataclass
+class ViewEvent:
+    organization_id: str
+    product_id: str
+    viewed_at: datetime
+    session_id: Optional[str] = None
+    customer_id: Optional[str] = None
+    source: Optional[str] = None
+    referrer: Optional[str] = None
+    device_type: Optional[str] = None
+    browser: Optional[str] = None
+    os: Optional[str] = None
+    country: Optional[str] = None
+    city: Optional[str] = None
+    duration_seconds: Optional[int] = None
+
+
+@dataclass
+class SearchEvent:
+    organization_id: str
+    query: str
+    created_at: datetime
+    results_count: Optional[int] = None
+    customer_id: Optional[str] = None
+    clicked_product_id: Optional[str] = None
+    click_position: Optional[int] = None
+    resulted_in_purchase: bool = False
+
+
+def normalize_query(query: str) -> str:
+    """Search text as logged and rolled up - trimmed, lower case, single spaces"""
+    return " ".join(query.lower().split())
+
+
+def event_time(value: Optional[datetime], now: datetime) -> datetime:
+    """Client timestamp if plausible, else arrival time (naive UTC)"""
+    if value is None:
+        return now
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    if value > now or now - value > _MAX_EVENT_AGE:
+        return now
+    return value
+
+
+class EventIngestor:
+
+    def __init__(self, ring_size: int, flush_ms: int, flush_events: int, use_copy: bool):
+        self.ring_size = ring_size
+        self.flush_seconds = flush_ms / 1000
+        self.flush_events = flush_events
+        self.use_copy = use_copy
+        self._ring: Deque = deque()
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+        self.accepted = 0
+        self.shed = 0
+        self.written = 0
+        self.rejected = 0
+        self.last_flush_ms = 0.0
+
+    # ─── Producer side ─────────────────────────────────────────
+
+    def offer(self, events: list) -> int:
+        """Queue events - returns how many were accepted (the rest are shed)"""
+        room = self.ring_size - len(self._ring)
+        taken = events[:max(room, 0)]
+        self._ring.extend(taken)
+        self.accepted += len(taken)
+        self.shed += len(events) - len(taken)
+        if len(self._ring) >= self.flush_events and self._wake:
+            self._wake.set()
+        return len(taken)
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._ring),
+            "capacity": self.ring_size,
+            "accepted": self.accepted,
+            "shed": self.shed,
+            "written": self.written,
+            "rejected": self.rejected,
+            "last_flush_ms": round(self.last_flush_ms, 1),
+        }
+
+    # ─── Flush ─────────────────────────────────────────────────
+
+    async def _known(self, db: AsyncSession, model, pairs: Set[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """(organization, id) pairs that exist"""
+        if not pairs:
+            return set()
+        rows = (await db.execute(
+            select(model.organization_id, model.id).where(model.id.in_({pid for _, pid in pairs}))
+        )).all()
+        return {(org, pid) for org, pid in rows} & pairs
+
+    async def _copy(self, db: AsyncSession, table: str, columns: List[str], records: List[tuple]) -> None:
+        conn = await db.connection()
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(table, records=records, columns=columns)
+
+    async def _write(self, db: AsyncSession, model, columns: List[str], rows: List[dict]) -> None:
+        if not rows:
+            return
+        if self.use_copy:
+            await self._copy(db, model.__tablename__, columns, [tuple(r.get(c) for c in columns) for r in rows])
+        else:
+            await db.execute(insert(model), rows)
+
+    async def _flush_batch(self, db: AsyncSession, events: list) -> int:
+        views = [e for e in events if isinstance(e, ViewEvent)]
+        searches = [e for e in events if isinstance(e, SearchEvent)]
+
+        products = await self._known(db, Product, (
+            {(v.organization_id, v.product_id) for v in views}
+            | {(s.organization_id, s.clicked_product_id) for s in searches if s.clicked_product_id}
+        ))
+        customers = await self._known(db, Customer, {
+            (e.organization_id, e.customer_id) for e in events if e.customer_id
+        })
+
+        view_rows, minutes = [], {}
+        for v in views:
+            if (v.organization_id, v.product_id) not in products:
+                continue
+            customer_id = v.customer_id if (v.organization_id, v.customer_id) in customers else None
+            view_rows.append({
+                "id": generate_uuid(), "product_id": v.product_id, "customer_id": customer_id,
+                "session_id": v.session_id, "source": v.source, "referrer": v.referrer,
+                "device_type": v.device_type, "browser": v.browser, "os": v.os,
+                "country": v.country, "city": v.city, "duration_seconds": v.duration_seconds,
+                "viewed_at": v.viewed_at,
+            })
+            key = (v.organization_id, v.product_id, v.viewed_at.replace(second=0, microsecond=0))
+            bucket = minutes.setdefault(key, [0, 0, 0])
+            bucket[0] += 1
+            bucket[1] += 1 if customer_id else 0
+            bucket[2] += v.duration_seconds or 0
+
+        search_rows = [
+            {
+                "id": generate_uuid(), "organization_id": s.organization_id,
+                "customer_id": s.customer_id if (s.organization_id, s.customer_id) in customers else None,
+                "query": s.query, "results_count": s.results_count,
+                "clicked_product_id": s.clicked_product_id,
+                "click_position": s.click_position, "resulted_in_purchase": s.resulted_in_purchase,
+                "order_id": None, "created_at": s.created_at,
+            }
+            for s in searches
+            # A click on an unknown product is dropped - without the product it would count as a search
+            if not s.clicked_product_id or (s.organization_id, s.clicked_product_id) in products
+        ]
+
+        await self._write(db, ProductView, _VIEW_COLUMNS, view_rows)
+        await self._write(db, SearchQuery, _SEARCH_COLUMNS, search_rows)
+
+        if minutes:
+            stmt = pg_insert(ProductViewMinute).values([
+                {
+                    "id": generate_uuid(), "organization_id": org_id, "product_id": product_id, "minute": minute,
+                    "views": count, "customer_views": identified, "duration_seconds": duration,
+                }
+                # Sorted - concurrent flushers lock rollup rows in the same order
+                for (org_id, product_id, minute), (count, identified, duration) in sorted(minutes.items())
+            ])
+            await db.execute(stmt.on_conflict_do_update(
+                index_elements=["product_id", "minute"],
+                set_={
+                    "views": ProductViewMinute.views + stmt.excluded.views,
+                    "customer_views": ProductViewMinute.customer_views + stmt.excluded.customer_views,
+                    "duration_seconds": ProductViewMinute.duration_seconds + stmt.excluded.duration_seconds,
+                }
+            ))
+
+        await db.commit()
+        written = len(view_rows) + len(search_rows)
+        self.rejected += len(events) - written
+        return written
+
+    async def flush(self) -> int:
+        """Write everything buffered - returns the rows written"""
+        written = 0
+        while self._ring:
+            count = min(len(self._ring), self.flush_events)
+            events = [self._ring.popleft() for _ in range(count)]
+            started = time.perf_counter()
+            try:
+                async with AsyncSessionLocal() as db:
+                    written += await self._flush_batch(db, events)
+            except Exception:
+                # Analytics are best effort - a failed batch is dropped, not retried forever
+                logger.exception(f"Event flush of {len(events)} events failed")
+                self.rejected += len(events)
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+        self.written += written
+        return written
+
+    # ─── Loop ──────────────────────────────────────────────────
+
+    async def run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+        await self.flush()
+
+    async def start(self) -> None:
+        if not self._task:
+            self._stopping = False
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self.run())
+
+    async def shutdown(self) -> None:
+        """Stop and drain the ring"""
+        if self._task:
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+
+
+ingestor = EventIngestor(
+    settings.INGEST_RING_SIZE, settings.INGEST_FLUSH_MS, settings.INGEST_FLUSH_EVENTS, settings.INGEST_USE_COPY
+)
@@ -0,0 +1,372 @@
+"""
+📤 Data Exports
+Orders, products and customers as CSV, XLSX or Parquet - any size
+
+- Read: one server-side cursor (db.stream + yield_per), EXPORT_BATCH_SIZE
+  rows per round trip; only the current batch is ever in memory
+- Write: each batch is encoded and handed to the response as soon as it is
+  read (chunked transfer). XLSX goes through openpyxl's write-only mode and
+  a temp file - the zip directory can only be written at the end
+- Filters: the same filter objects the listing endpoints use, so an export
+  contains exactly what the list shows
+- Background: exports too large for one HTTP response run as an
+  exports.write job that writes EXPORT_DIR/<organization>/<job id>.<format>
+"""
+
+import csv
+import enum
+import io
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, Numeric, and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.database import Customer, Order, Product
+from app.services.customer_lookup import search_conditions
+from app.services.forecasting import reorder_level
+from app.services.jobs import JobContext, jobs
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+_CHUNK = 64 * 1024
+
+
+class ExportError(Exception):
+    """Raised for an unknown format or a missing optional writer"""
+
+
+# ─── Filters (shared with the listing endpoints) ───────────────
+
+@dataclass
+class OrderFilters:
+    status: Optional[str] = None
+    customer_id: Optional[str] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    search: Optional[str] = None  # Order ID
+
+    def conditions(self, org_id: str) -> list:
+        conditions = [Order.organization_id == org_id]
+        if self.status:
+            conditions.append(Order.status == self.status)
+        if self.customer_id:
+            conditions.append(Order.customer_id == self.customer_id)
+        if self.start_date:
+            conditions.append(Order.created_at >= self.start_date)
+        if self.end_date:
+            conditions.append(Order.created_at <= self.end_date)
+        if self.search:
+            conditions.append(Order.id.ilike(f"%{self.search}%"))
+        return conditions
+
+
+@dataclass
+class ProductFilters:
+    search: Optional[str] = None  # Name, SKU, barcode
+    category_id: Optional[str] = None
+    brand_id: Optional[str] = None
+    is_active: Optional[bool] = None
+    low_stock: bool = False
+
+    def conditions(self, org_id: str) -> list:
+        conditions = [Product.organization_id == org_id]
+        if self.search:
+            conditions.append(or_(
+                Product.name.ilike(f"%{self.search}%"),
+                Product.sku.ilike(f"%{self.search}%"),
+                Product.barcode.ilike(f"%{self.search}%")
+            ))
+        if self.category_id:
+            conditions.append(Product.category_id == self.category_id)
+        if self.brand_id:
+            conditions.append(Product.brand_id == self.brand_id)
+        if self.is_active is not None:
+            conditions.append(Product.is_active == self.is_active)
+        if self.low_stock:
+            conditions.append(Product.stock_quantity <= reorder_level())
+        return conditions
+
+
+@dataclass
+class CustomerFilters:
+    search: Optional[str] = None  # Name, email, phone
+    segment: Optional[str] = None
+
+    def conditions(self, org_id: str) -> list:
+        conditions = [Customer.organization_id == org_id]
+        if self.search:
+            conditions.extend(search_conditions(self.search))
+        if self.segment:
+            conditions.append(Customer.segment == self.segment)
+        return conditions
+
+
+# ─── Datasets ──────────────────────────────────────────────────
+
+@dataclass
+class Dataset:
+    name: str
+    filters: type
+    columns: List  # Model columns, exported under their own names
+    order_by: List
+
+    @property
+    def headers(self) -> List[str]:
+        return [c.key for c in self.columns]
+
+
+DATASETS: Dict[str, Dataset] = {
+    "orders": Dataset("orders", OrderFilters, [
+        Order.id, Order.order_number, Order.created_at, Order.status, Order.payment_status,
+        Order.payment_method, Order.channel, Order.branch_id, Order.cashier_id, Order.customer_id,
+        Order.customer_name, Order.customer_email, Order.subtotal, Order.discount_amount,
+        Order.coupon_discount, Order.discount_code, Order.tax_amount, Order.shipping_cost,
+        Order.total_amount,
+    ], [Order.created_at, Order.id]),
+    "products": Dataset("products", ProductFilters, [
+        Product.id, Product.sku, Product.barcode, Product.name, Product.category_id, Product.brand_id,
+        Product.base_price, Product.sale_price, Product.cost_price, Product.vat_rate,
+        Product.stock_quantity, Product.low_stock_threshold, Product.is_active, Product.sales_count,
+        Product.created_at, Product.updated_at,
+    ], [Product.created_at, Product.id]),
+    "customers": Dataset("customers", CustomerFilters, [
+        Customer.id, Customer.first_name, Customer.last_name, Customer.email, Customer.phone,
+        Customer.company_name, Customer.tax_number, Customer.segment, Customer.loyalty_tier,
+        Customer.loyalty_points, Customer.total_orders, Customer.total_spent, Customer.current_balance,
+        Customer.credit_limit, Customer.last_purchase_at, Customer.is_active, Customer.created_at,
+    ], [Customer.created_at, Customer.id]),
+}
+
+
+def _cell(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return value
+
+
+# ─── Writers: rows in, encoded bytes out ───────────────────────
+
+class CsvWriter:
+
+    def __init__(self, dataset: Dataset):
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+        # BOM - Excel otherwise opens UTF-8 as the local code page
+        self.buffer.write("\ufeff")
+        self.writer.writerow(dataset.headers)
+
+    def write(self, rows) -> bytes:
+        self.writer.writerows([_cell(v) if v is not None else "" for v in row] for row in rows)
+        chunk = self.buffer.getvalue().encode("utf-8")
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return chunk
+
+    def close(self) -> bytes:
+        return self.write([])
+
+
+class XlsxWriter:
+
+    def __init__(self, dataset: Dataset):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise ExportError("XLSX export needs openpyxl")
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(dataset.name)
+        self.sheet.append(dataset.headers)
+
+    def write(self, rows) -> bytes:
+        for row in rows:
+            self.sheet.append([_cell(v) for v in row])
+        return b""
+
+    def close(self) -> bytes:
+        return b""
+
+    def save(self, target) -> None:
+        self.workbook.save(target)
+
+
+class _Sink:
+    """Write-only file for pyarrow that hands out what was written so far"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class ParquetWriter:
+    """One row group per batch - written and sent before the next batch is read"""
+
+    def __init__(self, dataset: Dataset):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ExportError("Parquet export needs pyarrow")
+        self.pa = pa
+        self.schema = pa.schema([(c.key, self._arrow_type(pa, c.type)) for c in dataset.columns])
+        self.sink = _Sink()
+        self.writer = pq.ParquetWriter(pa.PythonFile(self.sink, mode="w"), self.schema, compression="zstd")
+
+    @staticmethod
+    def _arrow_type(pa, column_type):
+        if isinstance(column_type, Boolean):
+            return pa.bool_()
+        if isinstance(column_type, Integer):
+            return pa.int64()
+        if isinstance(column_type, Float):
+            return pa.float64()
+        if isinstance(column_type, Numeric):
+            return pa.decimal128(column_type.precision or 38, column_type.scale or 0)
+        if isinstance(column_type, DateTime):
+            return pa.timestamp("us")
+        if isinstance(column_type, Date):
+            return pa.date32()
+        return pa.string()
+
+    def write(self, rows) -> bytes:
+        if rows:
+            columns = list(zip(*[[_cell(v) for v in row] for row in rows]))
+            self.writer.write_table(self.pa.Table.from_arrays(
+                [self.pa.array(values, type=field.type) for values, field in zip(columns, self.schema)],
+                schema=self.schema
+            ))
+        return self.sink.drain()
+
+    def close(self) -> bytes:
+        self.writer.close()
+        return self.sink.drain()
+
+
+_WRITERS: Dict[str, Callable] = {"csv": CsvWriter, "xlsx": XlsxWriter, "parquet": ParquetWriter}
+
+
+def writer_for(dataset: Dataset, fmt: str):
+    if fmt not in _WRITERS:
+        raise ExportError(f"Unknown export format: {fmt}")
+    return _WRITERS[fmt](dataset)
+
+
+# ─── Export ────────────────────────────────────────────────────
+
+class Exporter:
+
+    def __init__(self, batch_size: int, export_dir: str):
+        self.batch_size = batch_size
+        self.export_dir = export_dir
+
+    async def _batches(self, db: AsyncSession, dataset: Dataset, conditions: list) -> AsyncIterator[list]:
+        result = await db.stream(
+            select(*dataset.columns)
+            .where(and_(*conditions))
+            .order_by(*dataset.order_by)
+            .execution_options(yield_per=self.batch_size)
+        )
+        async for partition in result.partitions():
+            yield partition
+
+    def stream(self, dataset: Dataset, conditions: list, fmt: str) -> AsyncIterator[bytes]:
+        """
+        The encoded export, chunk by chunk - for a StreamingResponse
+
+        An unknown format or missing writer raises here, before the response
+        starts. Reads through its own session: the request's one is closed
+        before the body is sent.
+        """
+        return self._encode(writer_for(dataset, fmt), dataset, conditions)
+
+    async def _encode(self, writer, dataset: Dataset, conditions: list) -> AsyncIterator[bytes]:
+        async with AsyncSessionLocal() as db:
+            if isinstance(writer, XlsxWriter):
+                with tempfile.TemporaryFile() as spool:
+                    async for batch in self._batches(db, dataset, conditions):
+                        writer.write(batch)
+                    writer.save(spool)
+                    spool.seek(0)
+                    while chunk := spool.read(_CHUNK):
+                        yield chunk
+                return
+
+            async for batch in self._batches(db, dataset, conditions):
+                chunk = writer.write(batch)
+                if chunk:
+                    yield chunk
+        yield writer.close()
+
+    # ─── Background exports ────────────────────────────────────
+
+    def path_for(self, org_id: str, export_id: str, fmt: str) -> str:
+        return os.path.join(self.export_dir, org_id, f"{export_id}.{FORMATS[fmt][1]}")
+
+    async def write_file(self, path: str, dataset: Dataset, conditions: list, fmt: str,
+                         progress=None) -> int:
+        """
+        Write an export to a file - returns its size
+
+        The file only gets its final name once complete.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = path + ".part"
+        written = 0
+        try:
+            with open(partial, "wb") as out:
+                async for chunk in self.stream(dataset, conditions, fmt):
+                    out.write(chunk)
+                    written += len(chunk)
+                    if progress:
+                        await progress(None, f"{written // 1024} KB written")
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        return os.path.getsize(path)
+
+
+exporter = Exporter(settings.EXPORT_BATCH_SIZE, settings.EXPORT_DIR)
+
+
+@jobs.handler("exports.write", concurrency=2)
+async def _export_job(ctx: JobContext, payload: dict) -> dict:
+    dataset = DATASETS[payload["dataset"]]
+    fmt = payload["format"]
+    filters = TypeAdapter(dataset.filters).validate_python(payload.get("filters") or {})
+    path = exporter.path_for(ctx.organization_id, ctx.job_id, fmt)
+    size = await exporter.write_file(path, dataset, filters.conditions(ctx.organization_id), fmt, ctx.progress)
+    return {"path": path, "format": fmt, "bytes": size}
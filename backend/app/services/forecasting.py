@@ -0,0 +1,212 @@
+"""
+📦 Demand Forecasting
+Reorder points and order quantities from daily sales, every product at once
+
+- Read: per chunk of FORECAST_CHUNK_PRODUCTS products, one grouped query
+  over order_items ⨝ orders gives units sold per product, branch and day
+  for the last FORECAST_HISTORY_DAYS; the rows land in one dense
+  (product × branch) × day NumPy matrix
+- Fit: simple exponential smoothing of every series together - the loop
+  runs over days, each step is one vector operation over all series. The
+  one-step-ahead errors give each series' spread
+- Combine: stock is kept per product, so branch levels are summed and
+  their variances added (branches treated as independent)
+- Reorder point: demand over FORECAST_LEAD_TIME_DAYS plus safety stock
+  z · σ · √lead_time for FORECAST_SERVICE_LEVEL; order_up_to adds
+  FORECAST_REVIEW_DAYS of demand. Written with UPDATE ... FROM (VALUES ...)
+  per chunk
+- Products without sales in the window get NULLs and keep using their
+  static low_stock_threshold (see reorder_level())
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import Date, Float, Integer, String, and_, cast, column, func, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.database import Order, OrderItem, OrderStatus, Organization, Product
+from app.services.jobs import JobContext, jobs
+
+# Orders that never turned into a sale
+_EXCLUDED_STATUSES = (OrderStatus.CANCELLED, OrderStatus.FAILED)
+# Days averaged for the starting level
+_WARMUP_DAYS = 7
+
+
+def reorder_level():
+    """Stock level at which a product counts as low (SQL expression)"""
+    return func.coalesce(Product.reorder_point, Product.low_stock_threshold)
+
+
+def smooth(sales: np.ndarray, alpha: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Simple exponential smoothing of every row → (level, variance of the one-step errors)
+
+    sales: series × days. The loop is over days; each step updates all
+    series at once.
+    """
+    series, days = sales.shape
+    warmup = min(_WARMUP_DAYS, days)
+    level = sales[:, :warmup].mean(axis=1) if days else np.zeros(series)
+    squared = np.zeros(series)
+    for day in range(warmup, days):
+        error = sales[:, day] - level
+        squared += error * error
+        level += alpha * error
+    return level, squared / max(days - warmup, 1)
+
+
+def reorder_points(demand: np.ndarray, variance: np.ndarray, lead_days: int, review_days: int,
+                   service_level: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Reorder point and order-up-to level per product (whole units)"""
+    z = NormalDist().inv_cdf(service_level)
+    safety = z * np.sqrt(variance * lead_days)
+    point = np.ceil(demand * lead_days + safety)
+    return point.astype(np.int64), np.ceil(point + demand * review_days).astype(np.int64)
+
+
+@dataclass
+class ForecastResult:
+    organization_id: str
+    products: int
+    forecasted: int  # Products with sales in the window
+    series: int  # Product × branch series fitted
+
+
+class DemandForecaster:
+
+    def __init__(self, history_days: int, alpha: float, lead_days: int, review_days: int,
+                 service_level: float, chunk_products: int):
+        self.history_days = history_days
+        self.alpha = alpha
+        self.lead_days = lead_days
+        self.review_days = review_days
+        self.service_level = service_level
+        self.chunk_products = chunk_products
+
+    async def _sales(self, db: AsyncSession, org_id: str, first_id: str, last_id: str,
+                     start: date, end: date) -> Tuple[List[Tuple[str, Optional[str]]], np.ndarray]:
+        """Daily units per (product, branch) for products in [first_id, last_id] → (keys, series × days)"""
+        day = cast(OrderItem.created_at, Date)
+        rows = (await db.execute(
+            select(OrderItem.product_id, Order.branch_id, day, func.sum(OrderItem.quantity))
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(and_(
+                Order.organization_id == org_id,
+                Order.status.notin_(_EXCLUDED_STATUSES),
+                OrderItem.product_id >= first_id,
+                OrderItem.product_id <= last_id,
+                OrderItem.created_at >= start,
+                OrderItem.created_at < end,
+                Order.created_at >= start,
+                Order.created_at < end,
+            ))
+            .group_by(OrderItem.product_id, Order.branch_id, day)
+        )).all()
+
+        keys: Dict[Tuple[str, Optional[str]], int] = {}
+        series = np.fromiter(
+            (keys.setdefault((product_id, branch_id), len(keys)) for product_id, branch_id, _, _ in rows),
+            dtype=np.int64, count=len(rows)
+        )
+        offsets = (np.array([r[2] for r in rows], dtype="datetime64[D]") - np.datetime64(start)).astype(np.int64)
+        sales = np.zeros((len(keys), (end - start).days))
+        sales[series, offsets] = np.array([r[3] for r in rows], dtype=np.float64)
+        return list(keys), sales
+
+    async def _chunk(self, db: AsyncSession, org_id: str, product_ids: List[str], start: date, end: date,
+                     now: datetime) -> Tuple[int, int]:
+        keys, sales = await self._sales(db, org_id, product_ids[0], product_ids[-1], start, end)
+        level, variance = smooth(sales, self.alpha)
+        np.maximum(level, 0, out=level)
+
+        # Branch series → products: levels and variances add up
+        slot = {pid: i for i, pid in enumerate(product_ids)}
+        owner = np.array([slot.get(pid, -1) for pid, _ in keys], dtype=np.int64)
+        known = owner >= 0  # Range bounds may take in products outside this chunk (inactive ones)
+        demand = np.bincount(owner[known], weights=level[known], minlength=len(product_ids))
+        spread = np.bincount(owner[known], weights=variance[known], minlength=len(product_ids))
+        sold = np.bincount(owner[known], minlength=len(product_ids)) > 0
+        point, up_to = reorder_points(demand, spread, self.lead_days, self.review_days, self.service_level)
+
+        rows = values(
+            column("id", String),
+            column("demand", Float),
+            column("point", Integer),
+            column("up_to", Integer),
+            name="forecast"
+        ).data([
+            (pid, round(float(d), 3), int(p), int(u)) if has_sales else (pid, None, None, None)
+            for pid, d, p, u, has_sales in zip(product_ids, demand, point, up_to, sold)
+        ])
+        await db.execute(
+            update(Product)
+            .where(Product.id == rows.c.id)
+            .values(
+                forecast_daily_units=rows.c.demand,
+                reorder_point=rows.c.point,
+                order_up_to=rows.c.up_to,
+                forecasted_at=now,
+                updated_at=Product.updated_at,  # Not an edit - keeps ETags and sync cursors stable
+            )
+            .execution_options(synchronize_session=False)
+        )
+        # Short transactions - checkouts update the same product rows
+        await db.commit()
+        return int(sold.sum()), len(keys)
+
+    async def run(self, db: AsyncSession, org_id: str) -> ForecastResult:
+        """Forecast every active stocked product of an organization - commits per chunk"""
+        now = datetime.utcnow()
+        end = now.date()  # Today is incomplete - history ends yesterday
+        start = end - timedelta(days=self.history_days)
+
+        product_ids = (await db.execute(
+            select(Product.id)
+            .where(and_(
+                Product.organization_id == org_id,
+                Product.is_active == True,
+                Product.track_inventory == True,
+            ))
+            .order_by(Product.id)
+        )).scalars().all()
+
+        forecasted = series = 0
+        for i in range(0, len(product_ids), self.chunk_products):
+            chunk_forecasted, chunk_series = await self._chunk(
+                db, org_id, product_ids[i:i + self.chunk_products], start, end, now
+            )
+            forecasted += chunk_forecasted
+            series += chunk_series
+        return ForecastResult(org_id, len(product_ids), forecasted, series)
+
+
+forecaster = DemandForecaster(
+    settings.FORECAST_HISTORY_DAYS,
+    settings.FORECAST_ALPHA,
+    settings.FORECAST_LEAD_TIME_DAYS,
+    settings.FORECAST_REVIEW_DAYS,
+    settings.FORECAST_SERVICE_LEVEL,
+    settings.FORECAST_CHUNK_PRODUCTS,
+)
+
+
+@jobs.handler("forecast.run", concurrency=1)
+async def _forecast_job(ctx: JobContext, payload: dict) -> dict:
+    async with AsyncSessionLocal() as db:
+        org_ids = (
+            [ctx.organization_id] if ctx.organization_id
+            else (await db.execute(select(Organization.id))).scalars().all()
+        )
+        results = []
+        for done, org_id in enumerate(org_ids):
+            await ctx.progress(100 * done / len(org_ids), f"Forecasting {org_id}")
+            result = await forecaster.run(db, org_id)
+            results.append({"organization_id": org_id, "products": result.products, "forecasted": result.forecasted})
+        return {"organizations": results}
@@ -0,0 +1,202 @@
+"""
+🎁 Gift Card Service
+Atomic balance debits and an in-memory code index
+
+- Debit: conditional UPDATE ... WHERE current_balance >= :amount RETURNING,
+  so two lanes can never spend the same balance twice
+- Ledger: every movement is a GiftCardTransaction, written as one
+  multi-row INSERT per checkout
+- Lookup: code → card resolved through a hashed index (SHA-256 of the
+  normalized code, plaintext codes are not kept in memory), filled from
+  idx_giftcard_code_active on first use
+"""
+
+import hashlib
+import secrets
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.global_features import GiftCard, GiftCardTransaction
+
+_INDEX_SIZE = 100_000
+
+
+class GiftCardError(Exception):
+    """Raised when a gift card cannot be found or charged"""
+
+
+@dataclass
+class GiftCardDebit:
+    """One card charged in a checkout"""
+    gift_card_id: str
+    amount: Decimal
+    balance_after: Optional[Decimal] = None
+
+
+def _digest(code: str) -> bytes:
+    return hashlib.sha256(code.strip().upper().encode()).digest()
+
+
+def new_code() -> str:
+    """16 random characters in groups of four (XXXX-XXXX-XXXX-XXXX)"""
+    raw = secrets.token_hex(8).upper()
+    return "-".join(raw[i:i + 4] for i in range(0, 16, 4))
+
+
+class GiftCardService:
+
+    def __init__(self):
+        # sha256(code) → (card id, organization id, currency)
+        self._index: Dict[bytes, Tuple[str, str, str]] = {}
+
+    def forget(self, code: str) -> None:
+        self._index.pop(_digest(code), None)
+
+    async def resolve(self, db: AsyncSession, org_id: str, code: str) -> Tuple[str, str]:
+        """Card id and currency for a code - served from memory after the first lookup"""
+        key = _digest(code)
+        hit = self._index.get(key)
+        if hit is None:
+            row = (await db.execute(
+                select(GiftCard.id, GiftCard.organization_id, GiftCard.currency).where(
+                    and_(GiftCard.code == code.strip().upper(), GiftCard.is_active == True)
+                )
+            )).first()
+            if row is None:
+                raise GiftCardError("Gift card not found")
+            if len(self._index) >= _INDEX_SIZE:
+                self._index.clear()
+            hit = self._index[key] = (row.id, row.organization_id, row.currency)
+
+        card_id, card_org, currency = hit
+        if card_org != org_id:
+            raise GiftCardError("Gift card not found")
+        return card_id, currency
+
+    # ─── Movements ─────────────────────────────────────────────
+
+    async def debit_many(
+        self,
+        db: AsyncSession,
+        debits: Sequence[GiftCardDebit],
+        order_id: Optional[str] = None,
+        notes: Optional[str] = None,
+    ) -> List[GiftCardDebit]:
+        """
+        Charge several cards inside the caller's transaction - does not commit
+
+        Cards are locked in id order so two checkouts sharing cards cannot
+        deadlock. The ledger rows go out as one INSERT.
+        """
+        now = datetime.utcnow()
+        for debit in sorted(debits, key=lambda d: d.gift_card_id):
+            if debit.amount <= 0:
+                raise GiftCardError("Gift card amount must be positive")
+            balance = (await db.execute(
+                update(GiftCard)
+                .where(
+                    and_(
+                        GiftCard.id == debit.gift_card_id,
+                        GiftCard.is_active == True,
+                        GiftCard.current_balance >= debit.amount,
+                        or_(GiftCard.expires_at == None, GiftCard.expires_at > now)
+                    )
+                )
+                .values(current_balance=GiftCard.current_balance - debit.amount)
+                .returning(GiftCard.current_balance)
+                .execution_options(synchronize_session=False)
+            )).scalar()
+            if balance is None:
+                raise GiftCardError("Insufficient gift card balance or card expired")
+            debit.balance_after = balance
+
+        await self._log(db, [
+            {
+                "gift_card_id": d.gift_card_id,
+                "order_id": order_id,
+                "transaction_type": "usage",
+                "amount": -d.amount,
+                "balance_after": d.balance_after,
+                "notes": notes,
+                "created_at": now,
+            }
+            for d in debits
+        ])
+        return list(debits)
+
+    async def credit(
+        self,
+        db: AsyncSession,
+        gift_card_id: str,
+        amount: Decimal,
+        order_id: Optional[str] = None,
+        transaction_type: str = "refund",
+        notes: Optional[str] = None,
+    ) -> Decimal:
+        """Put value back on a card (refund / top-up) - does not commit"""
+        balance = (await db.execute(
+            update(GiftCard)
+            .where(GiftCard.id == gift_card_id)
+            .values(current_balance=GiftCard.current_balance + amount)
+            .returning(GiftCard.current_balance)
+            .execution_options(synchronize_session=False)
+        )).scalar()
+        if balance is None:
+            raise GiftCardError("Gift card not found")
+
+        await self._log(db, [{
+            "gift_card_id": gift_card_id,
+            "order_id": order_id,
+            "transaction_type": transaction_type,
+            "amount": amount,
+            "balance_after": balance,
+            "notes": notes,
+            "created_at": datetime.utcnow(),
+        }])
+        return balance
+
+    async def issue(
+        self,
+        db: AsyncSession,
+        org_id: str,
+        value: Decimal,
+        currency: Optional[str] = None,
+        **details,
+    ) -> GiftCard:
+        """Create and activate a card with its purchase ledger row - does not commit"""
+        now = datetime.utcnow()
+        card = GiftCard(
+            organization_id=org_id,
+            code=new_code(),
+            initial_value=value,
+            current_balance=value,
+            currency=(currency or settings.BASE_CURRENCY).upper(),
+            activated_at=now,
+            **details
+        )
+        db.add(card)
+        await db.flush()
+
+        await self._log(db, [{
+            "gift_card_id": card.id,
+            "order_id": details.get("order_id"),
+            "transaction_type": "purchase",
+            "amount": value,
+            "balance_after": value,
+            "notes": None,
+            "created_at": now,
+        }])
+        return card
+
+    async def _log(self, db: AsyncSession, rows: List[dict]) -> None:
+        if rows:
+            await db.execute(insert(GiftCardTransaction), rows)
+
+
+gift_cards = GiftCardService()
@@ -0,0 +1,212 @@
+"""
+🌐 Translation Bundles
+Per-language, versioned translation cache
+
+All Translation rows of a language are loaded once into a bundle keyed by
+(entity_type, entity_id) → {field: text}. Localizing a page of products is
+then one dict lookup per item instead of one query per field.
+
+- Version: derived from the language's row count + last update, so every
+  worker computes the same value and it doubles as the ETag
+- Refresh: the fingerprint is re-checked at most every I18N_REFRESH_SECONDS;
+  writes through the API invalidate immediately
+- Accept-Language: parsed results are memoized per header value, the
+  default language short-circuits without touching bundles
+"""
+
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.global_features import Language, Translation
+
+_HEADER_CACHE_SIZE = 1024
+
+
+@dataclass
+class Bundle:
+    language: str
+    version: str
+    fingerprint: Tuple = ()
+    texts: Dict[Tuple[str, str], Dict[str, str]] = field(default_factory=dict)
+
+    @property
+    def etag(self) -> str:
+        return f'W/"{self.language}-{self.version}"'
+
+    def get(self, entity_type: str, entity_id: str) -> Optional[Dict[str, str]]:
+        return self.texts.get((entity_type, entity_id))
+
+    def apply(self, items: Sequence, entity_type: str, fields: Iterable[str]) -> List:
+        """
+        Localize a page of response models in one pass
+
+        Items are pydantic models; translated fields are replaced on a copy,
+        untranslated items are returned as is.
+        """
+        fields = tuple(fields)
+        localized = []
+        for item in items:
+            texts = self.texts.get((entity_type, item.id))
+            if texts:
+                update = {f: texts[f] for f in fields if f in texts}
+                if update:
+                    item = item.model_copy(update=update)
+            localized.append(item)
+        return localized
+
+    def to_dict(self, entity_type: Optional[str] = None) -> dict:
+        return {
+            f"{etype}:{eid}": texts
+            for (etype, eid), texts in self.texts.items()
+            if entity_type is None or etype == entity_type
+        }
+
+
+class TranslationService:
+    """Bundles per language plus the Accept-Language fast path"""
+
+    def __init__(self, default_language: str, refresh_seconds: float):
+        self.default_language = default_language
+        self.refresh_seconds = refresh_seconds
+        self._bundles: Dict[str, Bundle] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._languages: Optional[frozenset] = None
+        self._languages_at = 0.0
+        self._negotiated: Dict[Tuple[str, frozenset], str] = {}
+
+    def invalidate(self, language: Optional[str] = None) -> None:
+        if language is None:
+            self._bundles.clear()
+            self._checked_at.clear()
+            self._languages = None
+            self._negotiated.clear()
+        else:
+            self._bundles.pop(language, None)
+            self._checked_at.pop(language, None)
+
+    # ─── Language negotiation ──────────────────────────────────
+
+    async def languages(self, db: AsyncSession) -> frozenset:
+        now = time.monotonic()
+        if self._languages is None or now - self._languages_at >= self.refresh_seconds:
+            codes = (await db.execute(
+                select(Language.code).where(Language.is_active == True)
+            )).scalars().all()
+            self._languages = frozenset(c.lower() for c in codes) | {self.default_language}
+            self._languages_at = now
+        return self._languages
+
+    def negotiate(self, header: Optional[str], supported: frozenset) -> str:
+        """Best supported language for an Accept-Language header"""
+        if not header:
+            return self.default_language
+
+        key = (header, supported)
+        cached = self._negotiated.get(key)
+        if cached:
+            return cached
+
+        candidates = []
+        for position, part in enumerate(header.split(",")):
+            tag, _, params = part.strip().partition(";")
+            tag = tag.strip().lower()
+            if not tag or tag == "*":
+                continue
+            q = 1.0
+            if params.strip().startswith("q="):
+                try:
+                    q = float(params.strip()[2:])
+                except ValueError:
+                    q = 0.0
+            if q > 0:
+                candidates.append((-q, position, tag))
+
+        chosen = self.default_language
+        for _, _, tag in sorted(candidates):
+            if tag in supported:
+                chosen = tag
+                break
+            primary = tag.split("-")[0]
+            if primary in supported:
+                chosen = primary
+                break
+
+        if len(self._negotiated) >= _HEADER_CACHE_SIZE:
+            self._negotiated.clear()
+        self._negotiated[key] = chosen
+        return chosen
+
+    # ─── Bundles ───────────────────────────────────────────────
+
+    async def _fingerprint(self, db: AsyncSession, language: str) -> Tuple:
+        return tuple((await db.execute(
+            select(func.count(Translation.id), func.max(Translation.updated_at))
+            .where(Translation.language_code == language)
+        )).one())
+
+    async def bundle(self, db: AsyncSession, language: str) -> Bundle:
+        bundle = self._bundles.get(language)
+        now = time.monotonic()
+        if bundle and now - self._checked_at.get(language, 0) < self.refresh_seconds:
+            return bundle
+
+        fingerprint = await self._fingerprint(db, language)
+        self._checked_at[language] = now
+        if bundle and bundle.fingerprint == fingerprint:
+            return bundle
+
+        rows = await db.execute(
+            select(
+                Translation.entity_type, Translation.entity_id,
+                Translation.field_name, Translation.translated_text
+            ).where(Translation.language_code == language)
+        )
+        texts: Dict[Tuple[str, str], Dict[str, str]] = {}
+        for entity_type, entity_id, field_name, text in rows:
+            if text is not None:
+                texts.setdefault((entity_type, entity_id), {})[field_name] = text
+
+        version = hashlib.sha1(repr(fingerprint).encode()).hexdigest()[:12]
+        bundle = Bundle(language=language, version=version, fingerprint=fingerprint, texts=texts)
+        self._bundles[language] = bundle
+        return bundle
+
+    async def for_request(self, db: AsyncSession, request: Request) -> Optional[Bundle]:
+        """Bundle for the request's Accept-Language, None for the default language"""
+        header = request.headers.get("accept-language")
+        if not header:
+            return None
+        language = self.negotiate(header, await self.languages(db))
+        if language == self.default_language:
+            return None
+        return await self.bundle(db, language)
+
+
+def page_etag(bundle: Optional[Bundle], rows: Iterable[Tuple]) -> str:
+    """Weak ETag for a localized page: bundle version + the rows' identity/version"""
+    digest = hashlib.sha1(repr(list(rows)).encode()).hexdigest()[:16]
+    version = f"{bundle.language}-{bundle.version}" if bundle else settings.DEFAULT_LANGUAGE
+    return f'W/"{version}-{digest}"'
+
+
+def not_modified(request: Request, response: Response, etag: str, bundle: Optional[Bundle]) -> Optional[Response]:
+    """Set caching headers; return a 304 when the client already has this version"""
+    headers = {
+        "ETag": etag,
+        "Vary": "Accept-Language",
+        "Content-Language": bundle.language if bundle else settings.DEFAULT_LANGUAGE,
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+translations = TranslationService(settings.DEFAULT_LANGUAGE, settings.I18N_REFRESH_SECONDS)
@@ -0,0 +1,7 @@
+"""
+⚙️ Job Handler Registry
+Importing this module registers every background job type with the queue -
+worker processes import it before they start claiming
+"""
+
+from app.services import analytics, exports, forecasting, partitions, product_bulk, recommendations, search_analytics  # noqa: F401 - register their handlers
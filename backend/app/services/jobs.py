@@ -0,0 +1,421 @@
+"""
+⚙️ Background Jobs
+Postgres-backed job queue for back-office work that outlives a request
+
+- Queue: background_jobs rows; enqueue() joins the caller's transaction, so
+  a job exists exactly when the change that asked for it is committed
+- Claim: UPDATE ... WHERE id = (SELECT ... FOR UPDATE SKIP LOCKED LIMIT 1)
+  RETURNING - any number of workers, no job runs twice, nobody waits on a
+  lock another worker holds
+- Workers: scripts/run_worker.py processes, JOB_CONCURRENCY jobs each and
+  an optional limit per job type; one heartbeat UPDATE per worker keeps
+  the leases of all its jobs
+- Failures: retried with exponential backoff (run_after) up to
+  max_attempts; jobs of a dead worker are queued again once their lease
+  runs out
+- Progress, result and error are stored on the row - no Redis
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, case, desc, func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.database import BackgroundJob, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Progress writes closer together than this are skipped (the last one always lands)
+_PROGRESS_INTERVAL = 0.5
+
+
+def _status(status: JobStatus):
+    # Typed literal - inside CASE a bare value would be sent as text
+    return literal(status, BackgroundJob.__table__.c.status.type)
+
+
+class JobError(Exception):
+    """Raised for unknown job types or jobs that can't change state"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler once its job has been cancelled"""
+
+
+@dataclass
+class JobHandler:
+    job_type: str
+    run: Callable[["JobContext", dict], Awaitable[Any]]
+    concurrency: Optional[int] = None  # Per worker, None = JOB_CONCURRENCY
+    max_attempts: int = 3
+
+
+class JobContext:
+    """What a handler gets besides its payload"""
+
+    def __init__(self, job_id: str, organization_id: Optional[str], user_id: Optional[str],
+                 attempt: int, worker_id: str):
+        self.job_id = job_id
+        self.organization_id = organization_id
+        self.user_id = user_id
+        self.attempt = attempt
+        self.worker_id = worker_id
+        self._reported_at = 0.0
+
+    async def progress(self, percent: Optional[float] = None, message: Optional[str] = None,
+                       force: bool = False) -> None:
+        """Store progress - raises JobCancelled when the job was cancelled meanwhile"""
+        now = time.monotonic()
+        if not force and now - self._reported_at < _PROGRESS_INTERVAL:
+            return
+        self._reported_at = now
+
+        values = {"heartbeat_at": datetime.utcnow()}
+        if percent is not None:
+            values["progress"] = max(0.0, min(100.0, percent))
+        if message is not None:
+            values["progress_message"] = message[:500]
+
+        async with AsyncSessionLocal() as db:
+            cancelled = (await db.execute(
+                update(BackgroundJob)
+                .where(and_(BackgroundJob.id == self.job_id, BackgroundJob.locked_by == self.worker_id))
+                .values(**values)
+                .returning(BackgroundJob.cancel_requested)
+                .execution_options(synchronize_session=False)
+            )).scalar()
+            await db.commit()
+        if cancelled:
+            raise JobCancelled()
+
+
+@dataclass
+class ClaimedJob:
+    id: str
+    job_type: str
+    payload: dict
+    organization_id: Optional[str]
+    user_id: Optional[str]
+    attempts: int
+    max_attempts: int
+
+
+class JobQueue:
+
+    def __init__(self, lease_seconds: float, retry_base_seconds: float):
+        self.lease = timedelta(seconds=lease_seconds)
+        self.retry_base_seconds = retry_base_seconds
+        self.handlers: Dict[str, JobHandler] = {}
+
+    def handler(self, job_type: str, concurrency: Optional[int] = None, max_attempts: int = 3):
+        """Register an async handler(ctx, payload) → result (JSON)"""
+        def register(run):
+            self.handlers[job_type] = JobHandler(job_type, run, concurrency, max_attempts)
+            return run
+        return register
+
+    # ─── Producer side (inside the caller's transaction) ───────
+
+    async def enqueue(
+        self,
+        db: AsyncSession,
+        job_type: str,
+        payload: Optional[dict] = None,
+        org_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        priority: int = 0,
+        run_after: Optional[datetime] = None,
+        max_attempts: Optional[int] = None,
+    ) -> BackgroundJob:
+        """Queue a job - does not commit"""
+        handler = self.handlers.get(job_type)
+        if handler is None:
+            raise JobError(f"Unknown job type: {job_type}")
+
+        job = BackgroundJob(
+            organization_id=org_id,
+            user_id=user_id,
+            job_type=job_type,
+            payload=payload or {},
+            priority=priority,
+            status=JobStatus.QUEUED,
+            run_after=run_after or datetime.utcnow(),
+            attempts=0,
+            max_attempts=max_attempts or handler.max_attempts,
+            created_at=datetime.utcnow(),
+        )
+        db.add(job)
+        await db.flush()
+        return job
+
+    async def cancel(self, db: AsyncSession, org_id: str, job_id: str) -> JobStatus:
+        """Queued jobs are cancelled at once, running ones at their next progress report - commits"""
+        now = datetime.utcnow()
+        status = (await db.execute(
+            update(BackgroundJob)
+            .where(
+                and_(
+                    BackgroundJob.id == job_id,
+                    BackgroundJob.organization_id == org_id,
+                    BackgroundJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING])
+                )
+            )
+            .values(
+                cancel_requested=True,
+                status=case(
+                    (BackgroundJob.status == JobStatus.QUEUED, _status(JobStatus.CANCELLED)),
+                    else_=BackgroundJob.status
+                ),
+                finished_at=case((BackgroundJob.status == JobStatus.QUEUED, now), else_=None),
+            )
+            .returning(BackgroundJob.status)
+            .execution_options(synchronize_session=False)
+        )).scalar()
+        if status is None:
+            raise JobError("Job not found or already finished")
+        await db.commit()
+        return status
+
+    async def retry(self, db: AsyncSession, org_id: str, job_id: str) -> None:
+        """Queue a failed or cancelled job again with a fresh attempt budget - commits"""
+        result = await db.execute(
+            update(BackgroundJob)
+            .where(
+                and_(
+                    BackgroundJob.id == job_id,
+                    BackgroundJob.organization_id == org_id,
+                    BackgroundJob.status.in_([JobStatus.FAILED, JobStatus.CANCELLED])
+                )
+            )
+            .values(
+                status=JobStatus.QUEUED, attempts=0, run_after=datetime.utcnow(), cancel_requested=False,
+                error=None, progress=0, progress_message=None, finished_at=None
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if not result.rowcount:
+            raise JobError("Only failed or cancelled jobs can be retried")
+        await db.commit()
+
+    # ─── Worker side ───────────────────────────────────────────
+
+    async def claim(self, db: AsyncSession, worker_id: str, job_types: Iterable[str]) -> Optional[ClaimedJob]:
+        """Take the next due job of one of job_types - commits"""
+        now = datetime.utcnow()
+        next_job = (
+            select(BackgroundJob.id)
+            .where(
+                and_(
+                    BackgroundJob.status == JobStatus.QUEUED,
+                    BackgroundJob.run_after <= now,
+                    BackgroundJob.job_type.in_(list(job_types))
+                )
+            )
+            .order_by(desc(BackgroundJob.priority), BackgroundJob.run_after)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        row = (await db.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == next_job)
+            .values(
+                status=JobStatus.RUNNING,
+                locked_by=worker_id,
+                heartbeat_at=now,
+                attempts=BackgroundJob.attempts + 1,
+                started_at=func.coalesce(BackgroundJob.started_at, now),
+            )
+            .returning(
+                BackgroundJob.id, BackgroundJob.job_type, BackgroundJob.payload, BackgroundJob.organization_id,
+                BackgroundJob.user_id, BackgroundJob.attempts, BackgroundJob.max_attempts,
+            )
+            .execution_options(synchronize_session=False)
+        )).first()
+        await db.commit()
+        return ClaimedJob(*row) if row else None
+
+    def _owned(self, job_id: str, worker_id: str):
+        # A worker that lost its lease must not overwrite the new owner's state
+        return and_(
+            BackgroundJob.id == job_id,
+            BackgroundJob.locked_by == worker_id,
+            BackgroundJob.status == JobStatus.RUNNING
+        )
+
+    async def complete(self, db: AsyncSession, job: ClaimedJob, worker_id: str, result: Any) -> None:
+        await db.execute(
+            update(BackgroundJob)
+            .where(self._owned(job.id, worker_id))
+            .values(
+                status=JobStatus.SUCCEEDED, result=result, progress=100, error=None,
+                locked_by=None, finished_at=datetime.utcnow()
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+    async def fail(self, db: AsyncSession, job: ClaimedJob, worker_id: str, error: str,
+                   cancelled: bool = False) -> None:
+        """Retry with backoff while attempts are left, otherwise FAILED"""
+        now = datetime.utcnow()
+        if cancelled:
+            values = {"status": JobStatus.CANCELLED, "finished_at": now}
+        elif job.attempts < job.max_attempts:
+            delay = self.retry_base_seconds * 2 ** (job.attempts - 1)
+            values = {"status": JobStatus.QUEUED, "run_after": now + timedelta(seconds=delay)}
+        else:
+            values = {"status": JobStatus.FAILED, "finished_at": now}
+        await db.execute(
+            update(BackgroundJob)
+            .where(self._owned(job.id, worker_id))
+            .values(error=error, locked_by=None, **values)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+    async def heartbeat(self, db: AsyncSession, worker_id: str) -> None:
+        """Extend the lease of every job this worker runs - one UPDATE"""
+        await db.execute(
+            update(BackgroundJob)
+            .where(and_(BackgroundJob.locked_by == worker_id, BackgroundJob.status == JobStatus.RUNNING))
+            .values(heartbeat_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+    async def requeue_stale(self, db: AsyncSession) -> int:
+        """Jobs of workers that died mid-run - queued again, or FAILED when out of attempts"""
+        now = datetime.utcnow()
+        out_of_attempts = BackgroundJob.attempts >= BackgroundJob.max_attempts
+        result = await db.execute(
+            update(BackgroundJob)
+            .where(
+                and_(
+                    BackgroundJob.status == JobStatus.RUNNING,
+                    BackgroundJob.heartbeat_at < now - self.lease
+                )
+            )
+            .values(
+                status=case((out_of_attempts, _status(JobStatus.FAILED)), else_=_status(JobStatus.QUEUED)),
+                finished_at=case((out_of_attempts, now), else_=None),
+                error="Worker lost (lease expired)",
+                locked_by=None,
+                run_after=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount
+
+
+class JobWorker:
+    """Claims and runs jobs until stopped - one per worker process (or embedded in the API)"""
+
+    def __init__(self, queue: JobQueue, concurrency: int, poll_seconds: float,
+                 job_types: Optional[List[str]] = None):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.job_types = job_types
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._running: Dict[str, int] = {}
+        self._tasks: set = set()
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def _claimable(self) -> List[str]:
+        types = self.job_types or list(self.queue.handlers)
+        return [
+            t for t in types
+            if t in self.queue.handlers
+            and self._running.get(t, 0) < (self.queue.handlers[t].concurrency or self.concurrency)
+        ]
+
+    async def _execute(self, job: ClaimedJob) -> None:
+        handler = self.queue.handlers[job.job_type]
+        ctx = JobContext(job.id, job.organization_id, job.user_id, job.attempts, self.worker_id)
+        try:
+            result = await handler.run(ctx, job.payload or {})
+            async with AsyncSessionLocal() as db:
+                await self.queue.complete(db, job, self.worker_id, result)
+        except JobCancelled:
+            async with AsyncSessionLocal() as db:
+                await self.queue.fail(db, job, self.worker_id, "Cancelled", cancelled=True)
+        except Exception as e:
+            logger.exception(f"Job {job.id} ({job.job_type}) failed, attempt {job.attempts}")
+            async with AsyncSessionLocal() as db:
+                await self.queue.fail(db, job, self.worker_id, f"{type(e).__name__}: {e}")
+        finally:
+            self._running[job.job_type] -= 1
+
+    async def _fill(self) -> bool:
+        """Claim jobs into free slots - True when something was claimed"""
+        claimed = False
+        while len(self._tasks) < self.concurrency:
+            types = self._claimable()
+            if not types:
+                break
+            async with AsyncSessionLocal() as db:
+                job = await self.queue.claim(db, self.worker_id, types)
+            if job is None:
+                break
+            self._running[job.job_type] = self._running.get(job.job_type, 0) + 1
+            task = asyncio.create_task(self._execute(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            claimed = True
+        return claimed
+
+    async def run(self) -> None:
+        logger.info(f"Job worker {self.worker_id} started ({self.concurrency} slots)")
+        housekeeping_every = self.queue.lease.total_seconds() / 3
+        last_housekeeping = 0.0
+        while not self._stopping.is_set():
+            try:
+                if time.monotonic() - last_housekeeping >= housekeeping_every:
+                    async with AsyncSessionLocal() as db:
+                        await self.queue.heartbeat(db, self.worker_id)
+                        await self.queue.requeue_stale(db)
+                    last_housekeeping = time.monotonic()
+                if await self._fill():
+                    continue
+            except Exception:
+                logger.exception("Job worker loop failed")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+        # Let running jobs finish - their leases would otherwise expire into a retry
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        logger.info(f"Job worker {self.worker_id} stopped")
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    # ─── Embedded in the API process ───────────────────────────
+
+    async def start(self) -> None:
+        if not self._task:
+            self._task = asyncio.create_task(self.run())
+
+    async def shutdown(self) -> None:
+        if self._task:
+            self.stop()
+            await self._task
+            self._task = None
+
+
+jobs = JobQueue(settings.JOB_LEASE_SECONDS, settings.JOB_RETRY_BASE_SECONDS)
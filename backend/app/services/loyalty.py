@@ -0,0 +1,318 @@
+"""
+⭐ Loyalty Engine
+Per-organization earn/burn rules, atomic point movements, set-based tiers
+
+- Program: LoyaltyProgram + LoyaltyTierRule rows of an organization are
+  compiled once into a CompiledProgram; the fingerprint is re-checked at
+  most every LOYALTY_REFRESH_SECONDS, writes through the API invalidate
+- Checkout: points burned and earned by a sale are one conditional
+  UPDATE ... WHERE loyalty_points >= :burn RETURNING - the earn amount is a
+  CASE over the customer's tier, so the tier is never read separately
+- Ledger: LoyaltyTransaction is append-only; refunds write a reverse entry
+- Tiers: the nightly job is one UPDATE per organization over lifetime
+  spend, no per-customer Python
+"""
+
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import and_, case, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.database import Customer, LoyaltyProgram, LoyaltyTierRule, LoyaltyTransaction
+from app.services.customer_stats import tier_expr
+
+
+class LoyaltyError(Exception):
+    """Raised when points cannot be earned or spent"""
+
+
+@dataclass
+class CompiledProgram:
+    organization_id: str
+    fingerprint: Tuple = ()
+    earn_rate: Decimal = Decimal(1)
+    point_value: Decimal = Decimal("0.01")
+    min_redeem_points: int = 0
+    max_redeem_ratio: Decimal = Decimal(1)
+    tiers: Dict[str, Decimal] = field(default_factory=dict)  # tier → min lifetime spend
+    multipliers: Dict[str, Decimal] = field(default_factory=dict)
+
+    @property
+    def default_tier(self) -> str:
+        if not self.tiers:
+            return "bronze"
+        return min(self.tiers.items(), key=lambda t: t[1])[0]
+
+    @property
+    def thresholds(self) -> Dict[str, float]:
+        return {tier: float(spend) for tier, spend in self.tiers.items()}
+
+    def points_for(self, amount: Decimal, tier: Optional[str]) -> int:
+        """Points earned on an amount paid"""
+        if amount <= 0:
+            return 0
+        multiplier = self.multipliers.get(tier or self.default_tier, Decimal(1))
+        return int(amount * self.earn_rate * multiplier)
+
+    def earn_expr(self, amount: Decimal):
+        """points_for() as a SQL expression over Customer.loyalty_tier"""
+        base = self.points_for(amount, None)
+        if not self.multipliers:
+            return literal(base)
+        return case(
+            *[
+                (Customer.loyalty_tier == tier, literal(self.points_for(amount, tier)))
+                for tier in self.multipliers
+            ],
+            else_=literal(base)
+        )
+
+    def points_to_pay(self, amount: Decimal) -> int:
+        """Points needed to pay an amount - rounded up to whole points"""
+        return math.ceil(amount / self.point_value)
+
+
+class LoyaltyEngine:
+    """Compiled programs per organization plus the point movements"""
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._programs: Dict[str, Optional[CompiledProgram]] = {}
+        self._checked_at: Dict[str, float] = {}
+
+    def invalidate(self, org_id: Optional[str] = None) -> None:
+        if org_id is None:
+            self._programs.clear()
+            self._checked_at.clear()
+        else:
+            self._programs.pop(org_id, None)
+            self._checked_at.pop(org_id, None)
+
+    # ─── Compiled programs ─────────────────────────────────────
+
+    async def _fingerprint(self, db: AsyncSession, org_id: str) -> Tuple:
+        program = select(func.max(LoyaltyProgram.updated_at)).where(
+            LoyaltyProgram.organization_id == org_id
+        ).scalar_subquery()
+        return tuple((await db.execute(
+            select(func.count(LoyaltyTierRule.id), func.max(LoyaltyTierRule.updated_at), program)
+            .where(LoyaltyTierRule.organization_id == org_id)
+        )).one())
+
+    async def program(self, db: AsyncSession, org_id: str) -> Optional[CompiledProgram]:
+        """The organization's active program, None when it has none"""
+        now = time.monotonic()
+        if org_id in self._programs and now - self._checked_at.get(org_id, 0) < self.refresh_seconds:
+            return self._programs[org_id]
+
+        fingerprint = await self._fingerprint(db, org_id)
+        self._checked_at[org_id] = now
+        cached = self._programs.get(org_id)
+        if cached and cached.fingerprint == fingerprint:
+            return cached
+
+        row = (await db.execute(
+            select(LoyaltyProgram).where(LoyaltyProgram.organization_id == org_id)
+        )).scalar_one_or_none()
+        compiled = None
+        if row and row.is_active:
+            rules = (await db.execute(
+                select(LoyaltyTierRule).where(LoyaltyTierRule.organization_id == org_id)
+            )).scalars().all()
+            compiled = CompiledProgram(
+                organization_id=org_id,
+                fingerprint=fingerprint,
+                earn_rate=Decimal(row.earn_rate or 0),
+                point_value=Decimal(row.point_value or 0) or Decimal("0.01"),
+                min_redeem_points=row.min_redeem_points or 0,
+                max_redeem_ratio=Decimal(row.max_redeem_ratio if row.max_redeem_ratio is not None else 1),
+                tiers={r.tier: Decimal(r.min_spend or 0) for r in rules},
+                multipliers={r.tier: Decimal(r.earn_multiplier or 1) for r in rules},
+            )
+        self._programs[org_id] = compiled
+        return compiled
+
+    async def tiers(self, db: AsyncSession, org_id: str) -> Optional[Dict[str, float]]:
+        """Tier thresholds for customer_stats, None to use the defaults"""
+        program = await self.program(db, org_id)
+        return program.thresholds if program and program.tiers else None
+
+    # ─── Point movements (inside the caller's transaction) ─────
+
+    async def settle(
+        self,
+        db: AsyncSession,
+        org_id: str,
+        customer_id: str,
+        order_total: Decimal,
+        burn_amount: Decimal = Decimal(0),
+        order_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> Tuple[int, int]:
+        """
+        Burn points for burn_amount and earn on the rest of the order
+
+        One conditional UPDATE for both; returns (burned, earned).
+        """
+        program = await self.program(db, org_id)
+        if program is None:
+            if burn_amount:
+                raise LoyaltyError("Loyalty program is not active")
+            return 0, 0
+
+        burned = program.points_to_pay(burn_amount) if burn_amount else 0
+        if burned:
+            if burned < program.min_redeem_points:
+                raise LoyaltyError(f"At least {program.min_redeem_points} points must be redeemed")
+            if burn_amount > order_total * program.max_redeem_ratio:
+                raise LoyaltyError("Points can't pay that much of this order")
+
+        earn = program.earn_expr(order_total - burn_amount)
+        points = func.coalesce(Customer.loyalty_points, 0)
+        row = (await db.execute(
+            update(Customer)
+            .where(
+                and_(
+                    Customer.id == customer_id,
+                    Customer.organization_id == org_id,
+                    points >= burned
+                )
+            )
+            .values(loyalty_points=points - burned + earn)
+            .returning(Customer.loyalty_points, earn.label("earned"))
+            .execution_options(synchronize_session=False)
+        )).first()
+        if row is None:
+            raise LoyaltyError("Not enough loyalty points")
+
+        balance, earned = row.loyalty_points, row.earned
+        now = datetime.utcnow()
+        entries = []
+        if burned:
+            entries.append(self._entry(org_id, customer_id, order_id, "burn", -burned, balance - earned, user_id, now))
+        if earned:
+            entries.append(self._entry(org_id, customer_id, order_id, "earn", earned, balance, user_id, now))
+        if entries:
+            await db.execute(insert(LoyaltyTransaction), entries)
+        return burned, earned
+
+    async def reverse(
+        self,
+        db: AsyncSession,
+        org_id: str,
+        customer_id: str,
+        order_id: str,
+        user_id: Optional[str] = None,
+        notes: Optional[str] = None,
+    ) -> int:
+        """Undo everything an order earned and burned - returns the point change"""
+        net = (await db.execute(
+            select(func.coalesce(func.sum(LoyaltyTransaction.points), 0)).where(
+                and_(LoyaltyTransaction.customer_id == customer_id, LoyaltyTransaction.order_id == order_id)
+            )
+        )).scalar()
+        if not net:
+            return 0
+
+        balance = (await db.execute(
+            update(Customer)
+            .where(and_(Customer.id == customer_id, Customer.organization_id == org_id))
+            .values(loyalty_points=func.coalesce(Customer.loyalty_points, 0) - net)
+            .returning(Customer.loyalty_points)
+            .execution_options(synchronize_session=False)
+        )).scalar()
+        await db.execute(insert(LoyaltyTransaction).values(
+            **self._entry(org_id, customer_id, order_id, "reverse", -net, balance, user_id, datetime.utcnow(), notes)
+        ))
+        return -net
+
+    async def adjust(
+        self,
+        db: AsyncSession,
+        org_id: str,
+        customer_id: str,
+        points: int,
+        notes: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> int:
+        """Manual correction - the balance can't go below zero"""
+        current = func.coalesce(Customer.loyalty_points, 0)
+        balance = (await db.execute(
+            update(Customer)
+            .where(
+                and_(
+                    Customer.id == customer_id,
+                    Customer.organization_id == org_id,
+                    current + points >= 0
+                )
+            )
+            .values(loyalty_points=current + points)
+            .returning(Customer.loyalty_points)
+            .execution_options(synchronize_session=False)
+        )).scalar()
+        if balance is None:
+            raise LoyaltyError("Customer not found or not enough points")
+
+        await db.execute(insert(LoyaltyTransaction).values(
+            **self._entry(org_id, customer_id, None, "adjust", points, balance, user_id, datetime.utcnow(), notes)
+        ))
+        return balance
+
+    @staticmethod
+    def _entry(org_id, customer_id, order_id, transaction_type, points, balance_after, user_id, now,
+               notes=None) -> dict:
+        return {
+            "organization_id": org_id,
+            "customer_id": customer_id,
+            "order_id": order_id,
+            "transaction_type": transaction_type,
+            "points": points,
+            "balance_after": balance_after,
+            "notes": notes,
+            "user_id": user_id,
+            "created_at": now,
+        }
+
+    # ─── Nightly tier job ──────────────────────────────────────
+
+    async def recompute_tiers(self, db: AsyncSession, org_id: Optional[str] = None) -> int:
+        """
+        Re-tier every customer from lifetime spend - one UPDATE per organization
+
+        Only rows whose tier actually changes are written. Commits per
+        organization.
+        """
+        query = select(LoyaltyProgram.organization_id).where(LoyaltyProgram.is_active == True)
+        if org_id:
+            query = query.where(LoyaltyProgram.organization_id == org_id)
+        org_ids = (await db.execute(query)).scalars().all()
+
+        changed = 0
+        for org in org_ids:
+            program = await self.program(db, org)
+            if program is None or not program.tiers:
+                continue
+            tier = tier_expr(func.coalesce(Customer.lifetime_value, 0), program.thresholds, program.default_tier)
+            result = await db.execute(
+                update(Customer)
+                .where(
+                    and_(
+                        Customer.organization_id == org,
+                        Customer.loyalty_tier.is_distinct_from(tier)
+                    )
+                )
+                .values(loyalty_tier=tier)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            changed += result.rowcount
+        return changed
+
+
+loyalty = LoyaltyEngine(settings.LOYALTY_REFRESH_SECONDS)
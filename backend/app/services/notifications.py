@@ -0,0 +1,350 @@
+"""
+📨 Notifications
+Transactional outbox written by checkout / refunds, drained by an async dispatcher
+
+- Outbox: outbox.add() inserts a notification_outbox row in the caller's
+  transaction - a sale never waits on a provider, and a rolled-back sale
+  never sends
+- Claim: batches of NOTIFY_BATCH_SIZE rows with FOR UPDATE SKIP LOCKED,
+  leased for NOTIFY_LEASE_SECONDS - several dispatchers can run
+- Resolve: one query for the batch's customers, one for its templates;
+  recipient and channel default to the customer's email, else phone
+- Render: compiled templates cached per (template id, updated_at), one
+  batch render per template; templates that fail validation fail their rows
+- Send: concurrently, within each transport's concurrency and rate limits
+- Results: one UPDATE per outcome plus one multi-row NotificationLog
+  insert; failures are retried with exponential backoff up to
+  NOTIFY_MAX_ATTEMPTS
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, String, Text, and_, column, insert, or_, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.database import (
+    Customer, NotificationLog, NotificationOutbox, NotificationTemplate, NotificationType, OutboxStatus
+)
+from app.services.templates import TemplateError, renderer
+from app.services.transports import OutgoingMessage, Transport, TransportError, build_transports
+
+logger = logging.getLogger(__name__)
+
+
+class Outbox:
+    """Producer side - used inside the sale / refund transaction"""
+
+    async def add(
+        self,
+        db: AsyncSession,
+        org_id: str,
+        template_code: str,
+        customer_id: Optional[str] = None,
+        order_id: Optional[str] = None,
+        context: Optional[dict] = None,
+        channel: Optional[NotificationType] = None,
+        recipient: Optional[str] = None,
+    ) -> None:
+        """Queue a notification - does not commit"""
+        db.add(NotificationOutbox(
+            organization_id=org_id,
+            template_code=template_code,
+            type=channel,
+            customer_id=customer_id,
+            order_id=order_id,
+            recipient=recipient,
+            context=context or {},
+            status=OutboxStatus.PENDING,
+            next_attempt_at=datetime.utcnow(),
+        ))
+
+
+class _Delivery:
+    """One claimed outbox row on its way out"""
+
+    def __init__(self, row):
+        self.row = row
+        self.message: Optional[OutgoingMessage] = None
+        self.template_id: Optional[str] = None
+        self.provider: Optional[str] = None
+        self.provider_message_id: Optional[str] = None
+        self.error: Optional[str] = None
+        self.retryable = False
+
+
+class NotificationDispatcher:
+
+    def __init__(self, batch_size: int, max_attempts: int, retry_base_seconds: float,
+                 lease_seconds: float, poll_seconds: float):
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.lease = timedelta(seconds=lease_seconds)
+        self.poll_seconds = poll_seconds
+        self.transports: Optional[Dict[NotificationType, Transport]] = None
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    # ─── Claim & resolve ───────────────────────────────────────
+
+    async def _claim(self, db: AsyncSession) -> list:
+        now = datetime.utcnow()
+        due = (
+            select(NotificationOutbox.id)
+            .where(
+                or_(
+                    and_(
+                        NotificationOutbox.status == OutboxStatus.PENDING,
+                        NotificationOutbox.next_attempt_at <= now
+                    ),
+                    # Leased by a dispatcher that died mid-batch
+                    and_(
+                        NotificationOutbox.status == OutboxStatus.SENDING,
+                        NotificationOutbox.locked_until < now
+                    )
+                )
+            )
+            .order_by(NotificationOutbox.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        rows = (await db.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(due))
+            .values(
+                status=OutboxStatus.SENDING,
+                locked_until=now + self.lease,
+                attempts=NotificationOutbox.attempts + 1
+            )
+            .returning(
+                NotificationOutbox.id, NotificationOutbox.organization_id, NotificationOutbox.template_code,
+                NotificationOutbox.type, NotificationOutbox.customer_id, NotificationOutbox.order_id,
+                NotificationOutbox.recipient, NotificationOutbox.context, NotificationOutbox.attempts,
+            )
+            .execution_options(synchronize_session=False)
+        )).all()
+        await db.commit()
+        return rows
+
+    async def _templates(self, db: AsyncSession, rows) -> Dict[Tuple, NotificationTemplate]:
+        """(organization or None, code, type) → active template"""
+        codes = {r.template_code for r in rows}
+        orgs = {r.organization_id for r in rows}
+        templates = (await db.execute(
+            select(NotificationTemplate).where(
+                and_(
+                    NotificationTemplate.code.in_(codes),
+                    NotificationTemplate.is_active == True,
+                    or_(NotificationTemplate.organization_id.in_(orgs), NotificationTemplate.organization_id == None)
+                )
+            )
+        )).scalars().all()
+        return {(t.organization_id, t.code, t.type): t for t in templates}
+
+    async def _prepare(self, db: AsyncSession, rows) -> List[_Delivery]:
+        customer_ids = {r.customer_id for r in rows if r.customer_id}
+        customers = {}
+        if customer_ids:
+            customers = {
+                c.id: c for c in (await db.execute(
+                    select(
+                        Customer.id, Customer.first_name, Customer.last_name, Customer.email, Customer.phone
+                    ).where(Customer.id.in_(customer_ids))
+                )).all()
+            }
+        templates = await self._templates(db, rows)
+
+        deliveries = []
+        batches: Dict[str, Tuple[NotificationTemplate, List[Tuple[_Delivery, dict]]]] = {}
+        for row in rows:
+            delivery = _Delivery(row)
+            deliveries.append(delivery)
+            customer = customers.get(row.customer_id)
+
+            channel = row.type
+            if channel is None:
+                channel = NotificationType.EMAIL if customer and customer.email else NotificationType.SMS
+            recipient = row.recipient
+            if recipient is None and customer:
+                recipient = customer.email if channel == NotificationType.EMAIL else customer.phone
+            if not recipient:
+                delivery.error = "No recipient"
+                continue
+
+            template = (
+                templates.get((row.organization_id, row.template_code, channel))
+                or templates.get((None, row.template_code, channel))
+            )
+            if template is None:
+                delivery.error = f"No active {channel.value} template '{row.template_code}'"
+                continue
+
+            context = dict(row.context or {})
+            if customer:
+                context.setdefault("first_name", customer.first_name or "")
+                context.setdefault("last_name", customer.last_name or "")
+                context.setdefault("customer_name", f"{customer.first_name or ''} {customer.last_name or ''}".strip())
+
+            delivery.template_id = template.id
+            delivery.message = OutgoingMessage(
+                outbox_id=row.id, type=channel, recipient=recipient, subject=None, body=""
+            )
+            batches.setdefault(template.id, (template, []))[1].append((delivery, context))
+
+        # One batch render per template
+        for template, members in batches.values():
+            try:
+                rendered = renderer.render_batch(template, [context for _, context in members])
+            except TemplateError as e:
+                for delivery, _ in members:
+                    delivery.error = str(e)
+                continue
+            bodies = rendered["sms_body" if template.type == NotificationType.SMS else "text_body"]
+            for i, (delivery, _) in enumerate(members):
+                delivery.message.subject = rendered["subject"][i] or None
+                delivery.message.body = bodies[i]
+                delivery.message.html = rendered["html_body"][i] or None
+        return deliveries
+
+    # ─── Send & record ─────────────────────────────────────────
+
+    async def _send(self, delivery: _Delivery) -> None:
+        transport = self.transports.get(delivery.message.type)
+        if transport is None:
+            delivery.error = f"No transport for {delivery.message.type.value}"
+            return
+        delivery.provider = transport.name
+        try:
+            delivery.provider_message_id = await transport.deliver(delivery.message)
+        except TransportError as e:
+            delivery.error = str(e)
+            delivery.retryable = e.retryable
+        except Exception as e:
+            logger.exception(f"Transport {transport.name} failed")
+            delivery.error = f"{type(e).__name__}: {e}"
+            delivery.retryable = True
+
+    async def _record(self, db: AsyncSession, deliveries: List[_Delivery]) -> None:
+        now = datetime.utcnow()
+        sent = [d for d in deliveries if d.error is None]
+        retry = [d for d in deliveries if d.error and d.retryable and d.row.attempts < self.max_attempts]
+        failed = [d for d in deliveries if d.error and d not in retry]
+
+        if sent:
+            await db.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id.in_([d.row.id for d in sent]))
+                .values(status=OutboxStatus.SENT, sent_at=now, locked_until=None, last_error=None)
+                .execution_options(synchronize_session=False)
+            )
+        if retry:
+            due = values(
+                column("id", String), column("next_at", DateTime), column("error", Text), name="retries"
+            ).data([
+                (d.row.id, now + timedelta(seconds=self.retry_base_seconds * 2 ** (d.row.attempts - 1)), d.error)
+                for d in retry
+            ])
+            await db.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id == due.c.id)
+                .values(
+                    status=OutboxStatus.PENDING, next_attempt_at=due.c.next_at,
+                    last_error=due.c.error, locked_until=None
+                )
+                .execution_options(synchronize_session=False)
+            )
+        if failed:
+            errors = values(column("id", String), column("error", Text), name="failures").data(
+                [(d.row.id, d.error) for d in failed]
+            )
+            await db.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id == errors.c.id)
+                .values(status=OutboxStatus.FAILED, last_error=errors.c.error, locked_until=None)
+                .execution_options(synchronize_session=False)
+            )
+
+        logged = [d for d in sent + failed if d.message]
+        if logged:
+            await db.execute(insert(NotificationLog), [
+                {
+                    "template_id": d.template_id,
+                    "customer_id": d.row.customer_id,
+                    "order_id": d.row.order_id,
+                    "type": d.message.type,
+                    "recipient": d.message.recipient,
+                    "subject": d.message.subject,
+                    "body": d.message.body,
+                    "status": "sent" if d.error is None else "failed",
+                    "provider": d.provider,
+                    "provider_message_id": d.provider_message_id,
+                    "error_message": d.error,
+                    "sent_at": now,
+                }
+                for d in logged
+            ])
+        await db.commit()
+
+    async def dispatch_batch(self) -> int:
+        """Claim, render, send and record one batch - returns the rows handled"""
+        if self.transports is None:
+            self.transports = build_transports()
+
+        async with AsyncSessionLocal() as db:
+            rows = await self._claim(db)
+            if not rows:
+                return 0
+            deliveries = await self._prepare(db, rows)
+
+        await asyncio.gather(*[self._send(d) for d in deliveries if d.message and d.error is None])
+
+        async with AsyncSessionLocal() as db:
+            await self._record(db, deliveries)
+        return len(rows)
+
+    # ─── Loop ──────────────────────────────────────────────────
+
+    async def run(self) -> None:
+        logger.info("Notification dispatcher started")
+        while not self._stopping.is_set():
+            try:
+                if await self.dispatch_batch() >= self.batch_size:
+                    continue  # More waiting - don't sleep
+            except Exception:
+                logger.exception("Notification dispatch failed")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+        for transport in (self.transports or {}).values():
+            await transport.close()
+        logger.info("Notification dispatcher stopped")
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def start(self) -> None:
+        if not self._task:
+            self._task = asyncio.create_task(self.run())
+
+    async def shutdown(self) -> None:
+        if self._task:
+            self.stop()
+            await self._task
+            self._task = None
+
+
+outbox = Outbox()
+dispatcher = NotificationDispatcher(
+    settings.NOTIFY_BATCH_SIZE,
+    settings.NOTIFY_MAX_ATTEMPTS,
+    settings.NOTIFY_RETRY_BASE_SECONDS,
+    settings.NOTIFY_LEASE_SECONDS,
+    settings.NOTIFY_POLL_SECONDS,
+)
@@ -0,0 +1,293 @@
+"""
+🗂️ Table Partitions
+Monthly range partitions for the append-only tables (see monthly_partitions() in the models)
+
+- Declared on the models: order_items, payments, stock_movements,
+  product_views, search_queries and audit_logs are PARTITION BY RANGE on
+  their timestamp, one partition per month plus a DEFAULT catch-all
+- ensure(): creates this month and PARTITION_MONTHS_AHEAD months ahead -
+  run at API startup, by scripts/maintain_partitions.py (cron) and as the
+  partitions.maintain job. Rows that already landed in DEFAULT for a new
+  month are moved into it
+- Pruning: filter the partition column with plain half-open ranges
+  (col >= start AND col < end). child_range() bounds item / payment rows
+  by their order's date range
+- Archive: months older than PARTITION_RETENTION_MONTHS are written to
+  zstd Parquet under PARTITION_ARCHIVE_DIR, checked against the row
+  count, then detached and dropped
+- convert(): turns an existing unpartitioned table into the partitioned
+  one (partitions for every month with data, one INSERT ... SELECT, old
+  table dropped at the end)
+"""
+
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import Column, MetaData, Table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.database import Base
+from app.models import global_features  # noqa: F401 - registers the global tables
+from app.services.exports import Dataset, exporter
+from app.services.jobs import JobContext, jobs
+
+logger = logging.getLogger(__name__)
+
+# Child rows carry their order's timestamp; older rows were stamped up to a moment later
+CHILD_SLACK = timedelta(minutes=5)
+
+_BOUND = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+class PartitionError(Exception):
+    """Raised for tables that are not partitioned or partitions that cannot be archived"""
+    pass
+
+
+def partitioned_tables() -> Dict[str, str]:
+    """Table name → partition column, from the models"""
+    return {
+        table.name: table.info["partition_by"]
+        for table in Base.metadata.sorted_tables
+        if table.info.get("partition_by")
+    }
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+def child_range(column, start: datetime, end: datetime) -> list:
+    """
+    Predicates on an order_items / payments timestamp for orders in [start, end)
+
+    Redundant with the join to orders, but lets the planner prune the
+    child table's partitions.
+    """
+    return [column >= start, column < end + CHILD_SLACK]
+
+
+@dataclass
+class Partition:
+    name: str
+    start: Optional[date]  # None for DEFAULT
+    end: Optional[date]
+
+
+class PartitionManager:
+
+    def __init__(self, months_ahead: int, retention_months: Dict[str, int], archive_dir: str):
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+        self.archive_dir = archive_dir
+
+    def _column(self, table: str) -> str:
+        column = partitioned_tables().get(table)
+        if not column:
+            raise PartitionError(f"{table} is not a partitioned table")
+        return column
+
+    # ─── Inspect ───────────────────────────────────────────────
+
+    async def partitions(self, db: AsyncSession, table: str) -> List[Partition]:
+        rows = (await db.execute(
+            text(
+                "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+                "FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = :table ORDER BY c.relname"
+            ),
+            {"table": table}
+        )).all()
+        result = []
+        for name, bound in rows:
+            match = _BOUND.search(bound or "")
+            if match:
+                start, end = (datetime.fromisoformat(v).date() for v in match.groups())
+                result.append(Partition(name, start, end))
+            else:
+                result.append(Partition(name, None, None))
+        return result
+
+    async def is_partitioned(self, db: AsyncSession, table: str) -> bool:
+        kind = (await db.execute(
+            text("SELECT relkind FROM pg_class WHERE relname = :table AND relkind IN ('r', 'p')"),
+            {"table": table}
+        )).scalar()
+        return kind == "p"
+
+    # ─── Create ────────────────────────────────────────────────
+
+    async def _create(self, db: AsyncSession, table: str, column: str, month: date) -> str:
+        name = partition_name(table, month)
+        start, end = month.isoformat(), add_months(month, 1).isoformat()
+        default = f"{table}_default"
+        stray = (await db.execute(
+            text(f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE "{column}" >= :start AND "{column}" < :end)'),
+            {"start": start, "end": end}
+        )).scalar()
+
+        if not stray:
+            await db.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            ))
+            return name
+
+        # Rows of this month already sit in DEFAULT - move them, then attach
+        logger.warning(f"Moving {table} rows for {month:%Y-%m} out of the default partition")
+        await db.execute(text(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+        await db.execute(
+            text(f'INSERT INTO "{name}" SELECT * FROM "{default}" WHERE "{column}" >= :start AND "{column}" < :end'),
+            {"start": start, "end": end}
+        )
+        await db.execute(
+            text(f'DELETE FROM "{default}" WHERE "{column}" >= :start AND "{column}" < :end'),
+            {"start": start, "end": end}
+        )
+        await db.execute(text(
+            f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" FOR VALUES FROM (\'{start}\') TO (\'{end}\')'
+        ))
+        return name
+
+    async def _ensure(self, db: AsyncSession, tables: Dict[str, str], first: date, last: date) -> List[str]:
+        created = []
+        for table, column in tables.items():
+            if not await self.is_partitioned(db, table):
+                continue  # Not created yet, or still waiting for convert()
+            existing = {p.start for p in await self.partitions(db, table)}
+            month = month_start(first)
+            while month <= last:
+                if month not in existing:
+                    created.append(await self._create(db, table, column, month))
+                month = add_months(month, 1)
+        return created
+
+    async def ensure(self, db: AsyncSession) -> List[str]:
+        """Create this month and PARTITION_MONTHS_AHEAD months ahead where missing - returns the partitions created"""
+        this_month = month_start(datetime.utcnow())
+        created = await self._ensure(
+            db, partitioned_tables(), this_month, add_months(this_month, self.months_ahead)
+        )
+        await db.commit()
+        if created:
+            logger.info(f"Created partitions: {', '.join(created)}")
+        return created
+
+    # ─── Archive ───────────────────────────────────────────────
+
+    def archive_path(self, table: str, month: date) -> str:
+        return os.path.join(self.archive_dir, table, f"{partition_name(table, month)}.parquet")
+
+    async def archive(self, table: str, month: date, progress=None) -> dict:
+        """Write one month to Parquet, verify it, then detach and drop the partition"""
+        column = self._column(table)
+        name = partition_name(table, month)
+        async with AsyncSessionLocal() as db:
+            if month not in {p.start for p in await self.partitions(db, table)}:
+                raise PartitionError(f"No partition {name}")
+            rows = (await db.execute(text(f'SELECT count(*) FROM "{name}"'))).scalar()
+
+        parent = Base.metadata.tables[table]
+        partition = Table(name, MetaData(), *[Column(c.name, c.type) for c in parent.c])
+        dataset = Dataset(name, None, list(partition.c), [partition.c[column], partition.c.id])
+        path = self.archive_path(table, month)
+        size = await exporter.write_file(path, dataset, [partition.c[column] >= month], "parquet", progress)
+
+        import pyarrow.parquet as pq
+        written = pq.ParquetFile(path).metadata.num_rows
+        if written != rows:
+            raise PartitionError(f"{name}: archived {written} rows, partition has {rows} - kept in place")
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+            await db.execute(text(f'DROP TABLE "{name}"'))
+            await db.commit()
+        logger.info(f"Archived {name}: {rows} rows → {path}")
+        return {"table": table, "partition": name, "rows": rows, "path": path, "bytes": size}
+
+    async def archive_expired(self, progress=None) -> List[dict]:
+        """Archive every month older than the table's PARTITION_RETENTION_MONTHS"""
+        archived = []
+        this_month = month_start(datetime.utcnow())
+        for table, months in self.retention_months.items():
+            self._column(table)
+            cutoff = add_months(this_month, -months)
+            async with AsyncSessionLocal() as db:
+                expired = [p for p in await self.partitions(db, table) if p.end and p.end <= cutoff]
+            for partition in expired:
+                archived.append(await self.archive(table, partition.start, progress))
+        return archived
+
+    async def maintain(self, progress=None) -> dict:
+        async with AsyncSessionLocal() as db:
+            created = await self.ensure(db)
+        archived = await self.archive_expired(progress)
+        return {"created": created, "archived": archived}
+
+    # ─── Convert an existing table ─────────────────────────────
+
+    async def convert(self, db: AsyncSession, table: str) -> int:
+        """
+        Rebuild an unpartitioned table as the partitioned one - returns rows copied
+
+        The old table is renamed, its indexes dropped (their names are reused),
+        the new one created from the model, partitions made for every month
+        with data and the rows copied over. Runs in one transaction.
+        """
+        column = self._column(table)
+        if await self.is_partitioned(db, table):
+            return 0
+        legacy = f"{table}_unpartitioned"
+
+        await db.execute(text(f'ALTER TABLE "{table}" RENAME TO "{legacy}"'))
+        await db.execute(text(f'ALTER TABLE "{legacy}" RENAME CONSTRAINT "{table}_pkey" TO "{legacy}_pkey"'))
+        indexes = (await db.execute(
+            text("SELECT indexname FROM pg_indexes WHERE tablename = :t AND indexname <> :pk"),
+            {"t": legacy, "pk": f"{legacy}_pkey"}
+        )).scalars().all()
+        for index in indexes:
+            await db.execute(text(f'DROP INDEX "{index}"'))
+
+        await db.run_sync(lambda session: Base.metadata.tables[table].create(session.connection()))
+
+        bounds = (await db.execute(text(f'SELECT min("{column}"), max("{column}") FROM "{legacy}"'))).first()
+        if bounds[0] is not None:
+            await self._ensure(db, {table: column}, bounds[0], month_start(bounds[1]))
+
+        columns = ", ".join(f'"{c.name}"' for c in Base.metadata.tables[table].c)
+        picked = ", ".join(
+            f"COALESCE(\"{c.name}\", '1970-01-01')" if c.name == column else f'"{c.name}"'
+            for c in Base.metadata.tables[table].c
+        )
+        result = await db.execute(text(f'INSERT INTO "{table}" ({columns}) SELECT {picked} FROM "{legacy}"'))
+        await db.execute(text(f'DROP TABLE "{legacy}"'))
+        await db.commit()
+        return result.rowcount
+
+
+partitions = PartitionManager(
+    settings.PARTITION_MONTHS_AHEAD, settings.PARTITION_RETENTION_MONTHS, settings.PARTITION_ARCHIVE_DIR
+)
+
+
+@jobs.handler("partitions.maintain")
+async def _maintain_job(ctx: JobContext, payload: dict) -> dict:
+    result = await partitions.maintain(ctx.progress)
+    return {"created": result["created"], "archived": [a["partition"] for a in result["archived"]]}
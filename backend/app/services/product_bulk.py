@@ -0,0 +1,106 @@
+"""
+📦 Product Bulk Operations
+Catalog imports and repricing of thousands of products
+
+- Import: one SKU lookup and one multi-row INSERT per chunk instead of a
+  SELECT + INSERT per product
+- Repricing: one UPDATE ... FROM (VALUES ...) per chunk
+- Commits per chunk and reports progress, so the same code runs inline for
+  small batches and as a background job (products.bulk_import /
+  products.bulk_update_prices) for large ones
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import Numeric, String, and_, column, insert, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import AsyncSessionLocal
+from app.models.database import Product
+from app.services.jobs import JobContext, jobs
+
+_CHUNK = 1000
+
+Progress = Optional[Callable[[float, str], Awaitable[None]]]
+
+# JSON payloads carry prices as strings - asyncpg wants Decimal
+_NUMERIC_COLUMNS = [c.key for c in Product.__table__.columns if isinstance(c.type, Numeric)]
+
+
+def _coerce(row: dict) -> dict:
+    for key in _NUMERIC_COLUMNS:
+        if row.get(key) is not None:
+            row[key] = Decimal(str(row[key]))
+    return row
+
+
+async def import_products(db: AsyncSession, org_id: str, products: List[dict], progress: Progress = None) -> dict:
+    """Insert new products, skipping SKUs that already exist - commits per chunk"""
+    success = 0
+    errors = []
+    seen = set()
+    for start in range(0, len(products), _CHUNK):
+        chunk = products[start:start + _CHUNK]
+        skus = [p["sku"] for p in chunk]
+        existing = set((await db.execute(
+            select(Product.sku).where(and_(Product.organization_id == org_id, Product.sku.in_(skus)))
+        )).scalars())
+
+        rows = []
+        for idx, product in enumerate(chunk, start + 1):
+            sku = product["sku"]
+            if sku in existing or sku in seen:
+                errors.append(f"Row {idx}: SKU '{sku}' already exists")
+                continue
+            seen.add(sku)
+            rows.append(_coerce({**product, "organization_id": org_id}))
+
+        if rows:
+            await db.execute(insert(Product), rows)
+        await db.commit()
+        success += len(rows)
+        if progress:
+            await progress(100 * (start + len(chunk)) / len(products), f"{success} imported")
+
+    return {"success": success, "failed": len(errors), "errors": errors}
+
+
+async def update_prices(db: AsyncSession, org_id: str, updates: List[dict], progress: Progress = None) -> int:
+    """[{"product_id", "new_price"}] → base_price; returns the products changed - commits per chunk"""
+    pairs = [
+        (u["product_id"], Decimal(str(u["new_price"])))
+        for u in updates if u.get("product_id") and u.get("new_price") is not None
+    ]
+    updated = 0
+    now = datetime.utcnow()
+    for start in range(0, len(pairs), _CHUNK):
+        prices = values(
+            column("id", String), column("price", Numeric(15, 2)), name="prices"
+        ).data(pairs[start:start + _CHUNK])
+        result = await db.execute(
+            update(Product)
+            .where(and_(Product.id == prices.c.id, Product.organization_id == org_id))
+            .values(base_price=prices.c.price, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        updated += result.rowcount
+        if progress:
+            await progress(100 * min(start + _CHUNK, len(pairs)) / len(pairs), f"{updated} updated")
+    return updated
+
+
+# ─── Background jobs ───────────────────────────────────────────
+
+@jobs.handler("products.bulk_import", concurrency=1)
+async def _import_job(ctx: JobContext, payload: dict) -> dict:
+    async with AsyncSessionLocal() as db:
+        return await import_products(db, ctx.organization_id, payload["products"], ctx.progress)
+
+
+@jobs.handler("products.bulk_update_prices", concurrency=1)
+async def _update_prices_job(ctx: JobContext, payload: dict) -> dict:
+    async with AsyncSessionLocal() as db:
+        return {"updated": await update_prices(db, ctx.organization_id, payload["updates"], ctx.progress)}
@@ -0,0 +1,478 @@
+"""
+🏷️ Promotion Engine
+Compiled campaign & discount code evaluation
+
+Active campaigns of an organization are compiled once into an index
+(product / category / brand → candidate promotions, plus basket-wide
+ones) with a fixed priority rank. Evaluating a basket looks up each
+line's candidates, so the cost follows the line count rather than the
+number of campaigns. The index is rebuilt only when the campaign or
+code fingerprint (row count + last update) changes.
+
+Rules:
+- A line gets at most one campaign discount - highest priority wins
+- Basket-wide campaigns (no product/category/brand filter) apply to the
+  lines left undiscounted; the first one that qualifies wins
+- A discount code stacks on top of campaign discounts
+- Usage limits of campaigns and codes are counted at checkout
+  (services/redemptions.py); used-up ones drop out of evaluation, and so
+  do campaigns the basket's customer has used up their own share of
+"""
+
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.database import Campaign, CampaignType, CampaignUsage, Customer, DiscountCode
+from app.services.basket import Basket, BasketLine
+from app.services.redemptions import redemptions
+
+ZERO = Decimal(0)
+HUNDRED = Decimal(100)
+
+
+def _decimal(value) -> Optional[Decimal]:
+    return Decimal(str(value)) if value is not None else None
+
+
+def _ids(value) -> FrozenSet[str]:
+    return frozenset(value or ())
+
+
+@dataclass
+class CompiledPromo:
+    """A campaign or discount code reduced to what evaluation needs"""
+    id: str
+    name: str
+    type: str
+    priority: int = 0
+    percentage: Optional[Decimal] = None
+    amount: Optional[Decimal] = None
+    max_discount: Optional[Decimal] = None
+    min_purchase: Optional[Decimal] = None
+    products: FrozenSet[str] = frozenset()
+    categories: FrozenSet[str] = frozenset()
+    brands: FrozenSet[str] = frozenset()
+    buy_quantity: int = 0
+    get_quantity: int = 0
+    per_customer: Optional[int] = None  # Uses allowed per customer
+    segments: FrozenSet[str] = frozenset()
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+    code: Optional[str] = None
+    rank: int = 0
+
+    @property
+    def is_basket_wide(self) -> bool:
+        return not (self.products or self.categories or self.brands)
+
+    def active(self, now: datetime) -> bool:
+        if self.starts_at and now < self.starts_at:
+            return False
+        if self.ends_at and now >= self.ends_at:
+            return False
+        return True
+
+    def matches(self, line: BasketLine) -> bool:
+        return (
+            self.is_basket_wide
+            or line.product_id in self.products
+            or (line.category_id is not None and line.category_id in self.categories)
+            or (line.brand_id is not None and line.brand_id in self.brands)
+        )
+
+
+@dataclass
+class PromotionResult:
+    line_discounts: Dict[str, Decimal] = field(default_factory=dict)
+    applied: List[dict] = field(default_factory=list)
+    free_shipping: bool = False
+    code: Optional[str] = None
+    code_error: Optional[str] = None
+
+    @property
+    def total_discount(self) -> Decimal:
+        return sum(self.line_discounts.values(), ZERO)
+
+
+# ═══════════════════════════════════════════════════════════════
+# DISCOUNT RULES
+# ═══════════════════════════════════════════════════════════════
+
+def _spread(total: Decimal, bases: Dict[str, Decimal]) -> Dict[str, Decimal]:
+    """Split an amount across lines in proportion to their base"""
+    base_sum = sum(bases.values(), ZERO)
+    if base_sum <= 0 or total <= 0:
+        return {}
+    return {pid: total * base / base_sum for pid, base in bases.items()}
+
+
+def _buy_x_get_y(promo: CompiledPromo, lines: List[BasketLine]) -> Dict[str, Decimal]:
+    group = promo.buy_quantity + promo.get_quantity
+    if promo.buy_quantity <= 0 or promo.get_quantity <= 0:
+        return {}
+    units = sum(line.quantity for line in lines)
+    free_units = (units // group) * promo.get_quantity
+    share = (HUNDRED if promo.percentage is None else promo.percentage) / HUNDRED
+
+    # The cheapest units are the "get" units
+    discounts = {}
+    for line in sorted(lines, key=lambda l: l.unit_price):
+        if free_units <= 0:
+            break
+        take = min(free_units, line.quantity)
+        discounts[line.product_id] = line.unit_price * take * share
+        free_units -= take
+    return discounts
+
+
+def _bundle(promo: CompiledPromo, lines: List[BasketLine]) -> Dict[str, Decimal]:
+    by_product = {line.product_id: line for line in lines if line.product_id in promo.products}
+    if not promo.products or len(by_product) < len(promo.products):
+        return {}
+    sets = min(line.quantity for line in by_product.values())
+    bases = {pid: line.unit_price * sets for pid, line in by_product.items()}
+
+    if promo.amount is not None:
+        total = promo.amount * sets
+    else:
+        total = sum(bases.values(), ZERO) * (promo.percentage or ZERO) / HUNDRED
+    return _spread(min(total, sum(bases.values(), ZERO)), bases)
+
+
+def _discounts(promo: CompiledPromo, lines: List[BasketLine], bases: Dict[str, Decimal]) -> Dict[str, Decimal]:
+    """Discount per product for one promotion over its eligible lines"""
+    eligible = sum(bases.values(), ZERO)
+    if not lines or eligible <= 0:
+        return {}
+    if promo.min_purchase and eligible < promo.min_purchase:
+        return {}
+
+    if promo.type == CampaignType.BUY_X_GET_Y.value:
+        discounts = _buy_x_get_y(promo, lines)
+    elif promo.type == CampaignType.BUNDLE.value:
+        discounts = _bundle(promo, lines)
+    elif promo.type in (CampaignType.FIXED_DISCOUNT.value, "fixed"):
+        discounts = _spread(min(promo.amount or ZERO, eligible), bases)
+    elif promo.type in (
+        CampaignType.PERCENTAGE_DISCOUNT.value, CampaignType.FLASH_SALE.value, "percentage"
+    ):
+        pct = (promo.percentage or ZERO) / HUNDRED
+        discounts = {pid: base * pct for pid, base in bases.items()}
+    else:
+        return {}
+
+    # Never discount a line below zero, then apply the promotion cap
+    discounts = {pid: min(d, bases[pid]) for pid, d in discounts.items() if d > 0}
+    total = sum(discounts.values(), ZERO)
+    if promo.max_discount is not None and total > promo.max_discount:
+        scale = promo.max_discount / total
+        discounts = {pid: d * scale for pid, d in discounts.items()}
+    return discounts
+
+
+# ═══════════════════════════════════════════════════════════════
+# COMPILED INDEX
+# ═══════════════════════════════════════════════════════════════
+
+class PromotionIndex:
+    """Per-organization lookup structure built from active promotions"""
+
+    def __init__(self, organization_id: str, fingerprint: Tuple, campaigns: List[CompiledPromo], codes: List[CompiledPromo]):
+        self.organization_id = organization_id
+        self.fingerprint = fingerprint
+        self.by_product: Dict[str, List[CompiledPromo]] = defaultdict(list)
+        self.by_category: Dict[str, List[CompiledPromo]] = defaultdict(list)
+        self.by_brand: Dict[str, List[CompiledPromo]] = defaultdict(list)
+        self.basket_wide: List[CompiledPromo] = []
+        self.free_shipping: List[CompiledPromo] = []
+        self.codes: Dict[str, CompiledPromo] = {c.code.upper(): c for c in codes}
+        self.per_customer: Dict[str, int] = {c.id: c.per_customer for c in campaigns if c.per_customer}
+
+        ordered = sorted(campaigns, key=lambda p: (-p.priority, p.id))
+        for rank, promo in enumerate(ordered):
+            promo.rank = rank
+            if promo.type == CampaignType.FREE_SHIPPING.value:
+                self.free_shipping.append(promo)
+            elif promo.is_basket_wide:
+                self.basket_wide.append(promo)
+            else:
+                for pid in promo.products:
+                    self.by_product[pid].append(promo)
+                for cid in promo.categories:
+                    self.by_category[cid].append(promo)
+                for bid in promo.brands:
+                    self.by_brand[bid].append(promo)
+
+    def _candidates(self, line: BasketLine) -> Iterable[CompiledPromo]:
+        yield from self.by_product.get(line.product_id, ())
+        if line.category_id:
+            yield from self.by_category.get(line.category_id, ())
+        if line.brand_id:
+            yield from self.by_brand.get(line.brand_id, ())
+
+    def evaluate(
+        self,
+        lines: Iterable[BasketLine],
+        discount_code: Optional[str] = None,
+        customer_segment: Optional[str] = None,
+        now: Optional[datetime] = None,
+        used_up: FrozenSet[str] = frozenset(),
+    ) -> PromotionResult:
+        """used_up: campaigns the customer may not use again"""
+        now = now or datetime.utcnow()
+        lines = list(lines)
+        result = PromotionResult()
+        discounts = result.line_discounts
+
+        # 1. Collect candidate promotions per line - O(lines × candidates per line)
+        touched: Dict[str, CompiledPromo] = {}
+        matched: Dict[str, List[BasketLine]] = defaultdict(list)
+        for line in lines:
+            seen = set()
+            for promo in self._candidates(line):
+                if promo.id in seen or promo.id in used_up or not self._live(promo, now):
+                    continue
+                seen.add(promo.id)
+                touched[promo.id] = promo
+                matched[promo.id].append(line)
+
+        # 2. Targeted campaigns in priority order, one per line
+        for promo in sorted(touched.values(), key=lambda p: p.rank):
+            free = [line for line in matched[promo.id] if line.product_id not in discounts]
+            applied = _discounts(promo, free, {line.product_id: line.gross for line in free})
+            self._record(result, promo, applied)
+
+        # 3. Basket-wide campaigns on the remaining lines
+        remaining = [line for line in lines if line.product_id not in discounts]
+        for promo in self.basket_wide:
+            if promo.id in used_up or not self._live(promo, now):
+                continue
+            applied = _discounts(promo, remaining, {line.product_id: line.gross for line in remaining})
+            if applied:
+                self._record(result, promo, applied)
+                break
+
+        subtotal = sum((line.gross for line in lines), ZERO)
+        for promo in self.free_shipping:
+            if promo.id not in used_up and self._live(promo, now) and (not promo.min_purchase or subtotal >= promo.min_purchase):
+                result.free_shipping = True
+                result.applied.append({"id": promo.id, "name": promo.name, "type": promo.type, "discount": ZERO})
+                break
+
+        # 4. Discount code stacks on the already discounted amounts
+        if discount_code:
+            self._apply_code(result, lines, discount_code, customer_segment, now)
+
+        return result
+
+    @staticmethod
+    def _live(promo: CompiledPromo, now: datetime) -> bool:
+        # Campaigns used up since the index was compiled drop out without a rebuild
+        return promo.active(now) and not redemptions.is_exhausted(promo.id)
+
+    def _apply_code(self, result, lines, discount_code, customer_segment, now):
+        promo = self.codes.get(discount_code.upper())
+        if promo is None or not promo.active(now):
+            result.code_error = "Invalid or expired discount code"
+            return
+        if redemptions.is_exhausted(promo.id):
+            result.code_error = "Discount code has been fully redeemed"
+            return
+        if promo.segments and customer_segment not in promo.segments:
+            result.code_error = "Discount code is not valid for this customer"
+            return
+
+        eligible = [line for line in lines if promo.matches(line)]
+        bases = {
+            line.product_id: line.gross - result.line_discounts.get(line.product_id, ZERO)
+            for line in eligible
+        }
+        applied = _discounts(promo, eligible, bases)
+        if not applied:
+            result.code_error = "Basket does not qualify for this discount code"
+            return
+
+        for pid, amount in applied.items():
+            result.line_discounts[pid] = result.line_discounts.get(pid, ZERO) + amount
+        result.code = promo.code
+        result.applied.append({
+            "id": promo.id, "name": promo.name, "type": promo.type,
+            "code": promo.code, "discount": sum(applied.values(), ZERO),
+        })
+
+    @staticmethod
+    def _record(result: PromotionResult, promo: CompiledPromo, applied: Dict[str, Decimal]) -> None:
+        if not applied:
+            return
+        result.line_discounts.update(applied)
+        result.applied.append({
+            "id": promo.id, "name": promo.name, "type": promo.type,
+            "discount": sum(applied.values(), ZERO),
+        })
+
+
+# ═══════════════════════════════════════════════════════════════
+# ENGINE (compile + cache)
+# ═══════════════════════════════════════════════════════════════
+
+def _compile_campaign(c: Campaign) -> CompiledPromo:
+    return CompiledPromo(
+        id=c.id,
+        name=c.name,
+        type=c.type.value if hasattr(c.type, "value") else c.type,
+        priority=c.priority or 0,
+        percentage=_decimal(c.discount_percentage),
+        amount=_decimal(c.discount_amount),
+        max_discount=_decimal(c.max_discount),
+        min_purchase=_decimal(c.min_purchase_amount),
+        products=_ids(c.applicable_products),
+        categories=_ids(c.applicable_categories),
+        brands=_ids(c.applicable_brands),
+        buy_quantity=c.buy_quantity or 0,
+        get_quantity=c.get_quantity or 0,
+        per_customer=c.usage_limit_per_customer or None,
+        starts_at=c.starts_at,
+        ends_at=c.ends_at,
+    )
+
+
+def _compile_code(d: DiscountCode) -> CompiledPromo:
+    is_fixed = (d.discount_type or "percentage") == "fixed"
+    return CompiledPromo(
+        id=d.id,
+        name=d.description or d.code,
+        type="fixed" if is_fixed else "percentage",
+        amount=_decimal(d.discount_value) if is_fixed else None,
+        percentage=None if is_fixed else _decimal(d.discount_value),
+        max_discount=_decimal(d.max_discount),
+        min_purchase=_decimal(d.min_purchase_amount),
+        products=_ids(d.applicable_products),
+        segments=_ids(d.applicable_customer_segments),
+        starts_at=d.starts_at,
+        ends_at=d.expires_at,
+        code=d.code,
+    )
+
+
+async def customer_segment(db: AsyncSession, customer_id: Optional[str]) -> Optional[str]:
+    """Segment used to check a code's applicable_customer_segments"""
+    if not customer_id:
+        return None
+    segment = (await db.execute(
+        select(Customer.segment).where(Customer.id == customer_id)
+    )).scalar()
+    return segment.value if hasattr(segment, "value") else segment
+
+
+class PromotionEngine:
+    """Keeps one compiled index per organization"""
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._indexes: Dict[str, PromotionIndex] = {}
+        self._checked_at: Dict[str, float] = {}
+
+    def invalidate(self, organization_id: str) -> None:
+        """Drop the compiled index - call after changing a campaign or code"""
+        self._indexes.pop(organization_id, None)
+        self._checked_at.pop(organization_id, None)
+
+    async def _fingerprint(self, db: AsyncSession, org_id: str) -> Tuple:
+        campaigns = select(func.count(Campaign.id), func.max(Campaign.updated_at)).where(
+            Campaign.organization_id == org_id
+        )
+        codes = select(func.count(DiscountCode.id), func.max(DiscountCode.updated_at)).where(
+            DiscountCode.organization_id == org_id
+        )
+        return tuple((await db.execute(campaigns)).one()) + tuple((await db.execute(codes)).one())
+
+    async def _compile(self, db: AsyncSession, org_id: str, fingerprint: Tuple) -> PromotionIndex:
+        now = datetime.utcnow()
+        campaigns = (await db.execute(
+            select(Campaign).where(
+                and_(
+                    Campaign.organization_id == org_id,
+                    Campaign.is_active == True,
+                    Campaign.ends_at > now,
+                    or_(
+                        Campaign.total_usage_limit == None,
+                        Campaign.current_usage_count < Campaign.total_usage_limit
+                    )
+                )
+            )
+        )).scalars().all()
+        codes = (await db.execute(
+            select(DiscountCode).where(
+                and_(
+                    DiscountCode.organization_id == org_id,
+                    DiscountCode.is_active == True,
+                    or_(DiscountCode.expires_at == None, DiscountCode.expires_at > now)
+                )
+            )
+        )).scalars().all()
+
+        return PromotionIndex(
+            org_id,
+            fingerprint,
+            [_compile_campaign(c) for c in campaigns],
+            [_compile_code(d) for d in codes],
+        )
+
+    async def index_for(self, db: AsyncSession, org_id: str) -> PromotionIndex:
+        index = self._indexes.get(org_id)
+        now = time.monotonic()
+        if index and now - self._checked_at.get(org_id, 0) < self.refresh_seconds:
+            return index
+
+        fingerprint = await self._fingerprint(db, org_id)
+        self._checked_at[org_id] = now
+        if index and index.fingerprint == fingerprint:
+            return index
+
+        index = await self._compile(db, org_id, fingerprint)
+        self._indexes[org_id] = index
+        return index
+
+    async def used_up(self, db: AsyncSession, index: PromotionIndex, customer_id: Optional[str]) -> FrozenSet[str]:
+        """Campaigns with a per-customer limit this customer has reached - one grouped query"""
+        if not customer_id or not index.per_customer:
+            return frozenset()
+        rows = (await db.execute(
+            select(CampaignUsage.campaign_id, func.count(CampaignUsage.id))
+            .where(
+                and_(
+                    CampaignUsage.customer_id == customer_id,
+                    CampaignUsage.campaign_id.in_(list(index.per_customer))
+                )
+            )
+            .group_by(CampaignUsage.campaign_id)
+        )).all()
+        return frozenset(
+            campaign_id for campaign_id, used in rows if used >= index.per_customer[campaign_id]
+        ) | frozenset(
+            campaign_id for campaign_id in index.per_customer if redemptions.is_exhausted(campaign_id, customer_id)
+        )
+
+    async def apply(self, db: AsyncSession, basket: Basket, customer_segment: Optional[str] = None) -> PromotionResult:
+        """Evaluate the basket (for basket.customer_id) and write the line discounts back incrementally"""
+        index = await self.index_for(db, basket.organization_id)
+        result = index.evaluate(
+            basket.lines.values(), basket.discount_code, customer_segment,
+            used_up=await self.used_up(db, index, basket.customer_id)
+        )
+
+        for pid, line in list(basket.lines.items()):
+            basket.set_line_discount(pid, min(result.line_discounts.get(pid, ZERO), line.gross))
+        basket.set_promotions(result.applied, result.free_shipping)
+        return result
+
+
+promotions = PromotionEngine(settings.PROMOTION_REFRESH_SECONDS)
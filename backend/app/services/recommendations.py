@@ -0,0 +1,336 @@
+"""
+🧭 Product Recommendations
+"Bought together" item-to-item similarity from order baskets
+
+- Build: one grouped query streams each order's distinct products
+  (array_agg) straight into a SciPy CSR basket matrix B (orders ×
+  products); co-occurrence is C = Bᵀ·B and its diagonal is how many
+  orders contain each product
+- Similarity: cosine, C[i, j] / √(orders_i · orders_j); pairs bought
+  together fewer than RECOMMEND_MIN_SUPPORT times are dropped. The top
+  RECOMMEND_TOP_K of every product are picked in one lexsort over the
+  nonzeros - no Python loop per product
+- Incremental: C is saved with each build; the next one reads only the
+  orders since its watermark and adds their Bᵀ·B. Top-K is recomputed
+  from the merged C, since new orders change the counts every score is
+  normalized by
+- Storage: one directory per build under RECOMMEND_DIR holding sorted
+  product ids (fixed-width bytes), neighbors (int32) and scores (float32)
+  as .npy. The CURRENT file names the live build and is replaced
+  atomically. Serving memory-maps the arrays - a lookup is one binary
+  search, the OS page cache shares them between API processes
+- Orders with more than RECOMMEND_MAX_BASKET products (wholesale, stock
+  transfers) are skipped - they would relate everything to everything
+"""
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import time
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import and_, distinct, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.database import Order, OrderItem, OrderStatus
+from app.services.jobs import JobContext, jobs
+
+logger = logging.getLogger(__name__)
+
+# Orders that never turned into a sale
+_EXCLUDED_STATUSES = (OrderStatus.CANCELLED, OrderStatus.FAILED)
+# Orders committed this close to a build may not be visible to it yet
+_SETTLE = timedelta(minutes=5)
+_KEEP_BUILDS = 2  # The live build and the one before (readers may still map it)
+_FETCH_SIZE = 50_000
+
+
+@dataclass
+class Baskets:
+    """Orders as CSR rows over products, in first-seen product order"""
+    product_ids: List[str]
+    indptr: np.ndarray
+    indices: np.ndarray
+    skipped: int = 0
+
+    @property
+    def orders(self) -> int:
+        return len(self.indptr) - 1
+
+    def matrix(self) -> sparse.csr_matrix:
+        data = np.ones(len(self.indices), dtype=np.int32)
+        return sparse.csr_matrix((data, self.indices, self.indptr), shape=(self.orders, len(self.product_ids)))
+
+
+class BasketBuilder:
+    """Collects product id lists into Baskets - ids numbered as first seen"""
+
+    def __init__(self, max_basket: int):
+        self.max_basket = max_basket
+        self.index: Dict[str, int] = {}
+        self.indptr = array("q", [0])
+        self.indices = array("i")
+        self.skipped = 0
+
+    def add(self, products: List[str]) -> None:
+        if len(products) > self.max_basket:
+            self.skipped += 1
+            return
+        index = self.index
+        self.indices.extend([index.setdefault(p, len(index)) for p in products])
+        self.indptr.append(len(self.indices))
+
+    def finish(self) -> Baskets:
+        return Baskets(
+            list(self.index),
+            np.frombuffer(self.indptr, dtype=np.int64),
+            np.frombuffer(self.indices, dtype=np.int32),
+            self.skipped,
+        )
+
+
+def cooccurrence(baskets: Baskets) -> sparse.csr_matrix:
+    """Bᵀ·B - products × products, orders containing both"""
+    b = baskets.matrix()
+    return (b.T @ b).tocsr()
+
+
+def reindex(matrix: sparse.csr_matrix, positions: np.ndarray, size: int) -> sparse.csr_matrix:
+    """Move row / column i of a square matrix to positions[i] in a size × size one"""
+    coo = matrix.tocoo()
+    return sparse.csr_matrix((coo.data, (positions[coo.row], positions[coo.col])), shape=(size, size))
+
+
+def similarity(counts: sparse.csr_matrix, min_support: int) -> sparse.csr_matrix:
+    """Cosine similarity from co-occurrence counts, diagonal and rare pairs dropped"""
+    orders = counts.diagonal().astype(np.float64)
+    coo = counts.tocoo()
+    keep = (coo.row != coo.col) & (coo.data >= min_support)
+    rows, cols = coo.row[keep], coo.col[keep]
+    scores = coo.data[keep] / np.sqrt(orders[rows] * orders[cols])
+    return sparse.csr_matrix((scores.astype(np.float32), (rows, cols)), shape=counts.shape)
+
+
+def top_k(matrix: sparse.csr_matrix, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Best k columns of every row → (neighbors, scores), n × k, padded with -1 / 0"""
+    n = matrix.shape[0]
+    lengths = np.diff(matrix.indptr)
+    rows = np.repeat(np.arange(n, dtype=np.int64), lengths)
+    # Rows stay grouped (primary key), best score first within each
+    order = np.lexsort((-matrix.data, rows))
+    rank = np.arange(len(order)) - matrix.indptr[rows]
+    keep = rank < k
+
+    neighbors = np.full((n, k), -1, dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+    picked = order[keep]
+    neighbors[rows[keep], rank[keep]] = matrix.indices[picked]
+    scores[rows[keep], rank[keep]] = matrix.data[picked]
+    return neighbors, scores
+
+
+@dataclass
+class _Served:
+    name: str
+    products: np.ndarray  # Sorted ids, memory-mapped
+    neighbors: np.ndarray
+    scores: np.ndarray
+
+
+class Recommender:
+
+    def __init__(self, directory: str, top_k: int, min_support: int, max_basket: int, reload_seconds: int):
+        self.directory = directory
+        self.top_k = top_k
+        self.min_support = min_support
+        self.max_basket = max_basket
+        self.reload_seconds = reload_seconds
+        self._served: Optional[_Served] = None
+        self._checked_at = 0.0
+
+    # ─── Files ─────────────────────────────────────────────────
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.directory, *parts)
+
+    def current(self) -> Optional[str]:
+        """Name of the live build"""
+        try:
+            with open(self._path("CURRENT")) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def meta(self, name: Optional[str] = None) -> Optional[dict]:
+        name = name or self.current()
+        if not name:
+            return None
+        with open(self._path(name, "meta.json")) as f:
+            return json.load(f)
+
+    def _publish(self, name: str) -> None:
+        pointer = self._path("CURRENT")
+        with open(pointer + ".tmp", "w") as f:
+            f.write(name)
+        os.replace(pointer + ".tmp", pointer)
+
+        builds = sorted(d for d in os.listdir(self.directory) if d.startswith("build-"))
+        for old in builds[:-_KEEP_BUILDS]:
+            shutil.rmtree(self._path(old), ignore_errors=True)
+
+    # ─── Build ─────────────────────────────────────────────────
+
+    async def _baskets(self, db: AsyncSession, since: Optional[datetime], until: datetime) -> Baskets:
+        window = [OrderItem.created_at < until, Order.created_at < until]
+        if since:
+            window += [OrderItem.created_at >= since, Order.created_at >= since]
+
+        result = await db.stream(
+            select(func.array_agg(distinct(OrderItem.product_id)))
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(and_(
+                OrderItem.product_id != None,
+                Order.status.notin_(_EXCLUDED_STATUSES),
+                *window,
+            ))
+            .group_by(OrderItem.order_id)
+            .execution_options(yield_per=_FETCH_SIZE)
+        )
+
+        builder = BasketBuilder(self.max_basket)
+        async for rows in result.partitions():
+            for (products,) in rows:
+                builder.add(products)
+        return builder.finish()
+
+    def _merge(self, baskets: Baskets, previous: Optional[str]) -> Tuple[np.ndarray, sparse.csr_matrix]:
+        """Co-occurrence of the new baskets added to the previous build's - ids sorted, matrix in that order"""
+        new_ids = np.array(baskets.product_ids, dtype=bytes) if baskets.product_ids else np.empty(0, dtype="S1")
+        new_counts = cooccurrence(baskets)
+        if previous is None:
+            ids = np.unique(new_ids)
+            return ids, reindex(new_counts, np.searchsorted(ids, new_ids), len(ids))
+
+        old_ids = np.load(self._path(previous, "products.npy"))
+        old_counts = sparse.load_npz(self._path(previous, "cooccurrence.npz")).tocsr()
+        ids = np.union1d(old_ids, new_ids)
+        counts = (
+            reindex(old_counts, np.searchsorted(ids, old_ids), len(ids))
+            + reindex(new_counts, np.searchsorted(ids, new_ids), len(ids))
+        )
+        return ids, counts.tocsr()
+
+    def _compute(self, baskets: Baskets, previous: Optional[str], name: str, meta: dict) -> dict:
+        """CPU part of a build - runs in a thread so the worker keeps heartbeating"""
+        started = time.perf_counter()
+        ids, counts = self._merge(baskets, previous)
+        neighbors, scores = top_k(similarity(counts, self.min_support), self.top_k)
+
+        path = self._path(name)
+        os.makedirs(path)
+        np.save(os.path.join(path, "products.npy"), ids)
+        np.save(os.path.join(path, "neighbors.npy"), neighbors)
+        np.save(os.path.join(path, "scores.npy"), scores)
+        sparse.save_npz(os.path.join(path, "cooccurrence.npz"), counts, compressed=False)
+
+        meta.update({
+            "products": int(len(ids)),
+            "pairs": int(counts.nnz - np.count_nonzero(counts.diagonal())),
+            "compute_seconds": round(time.perf_counter() - started, 1),
+        })
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        return meta
+
+    async def build(self, full: bool = False, progress=None) -> dict:
+        """
+        New build from the orders since the live one (all orders when full
+        or there is none yet), published when complete - returns its meta
+        """
+        previous = None if full else self.current()
+        since = None
+        if previous:
+            since = datetime.fromisoformat(self.meta(previous)["watermark"])
+        until = datetime.utcnow() - _SETTLE
+
+        started = time.perf_counter()
+        if progress:
+            await progress(None, "Reading baskets", force=True)
+        async with AsyncSessionLocal() as db:
+            baskets = await self._baskets(db, since, until)
+        read_seconds = time.perf_counter() - started
+
+        if progress:
+            await progress(None, f"Computing similarities from {baskets.orders} orders", force=True)
+        name = f"build-{datetime.utcnow():%Y%m%dT%H%M%S}"
+        os.makedirs(self.directory, exist_ok=True)
+        meta = await asyncio.to_thread(self._compute, baskets, previous, name, {
+            "name": name,
+            "base": previous,
+            "since": since.isoformat() if since else None,
+            "watermark": until.isoformat(),
+            "orders": baskets.orders,
+            "skipped_orders": baskets.skipped,
+            "read_seconds": round(read_seconds, 1),
+        })
+        self._publish(name)
+        logger.info(f"Recommendations {name}: {meta}")
+        return meta
+
+    # ─── Serve ─────────────────────────────────────────────────
+
+    def _load(self) -> Optional[_Served]:
+        now = time.monotonic()
+        if self._served is not None and now - self._checked_at < self.reload_seconds:
+            return self._served
+        self._checked_at = now
+
+        name = self.current()
+        if name is None:
+            self._served = None
+        elif self._served is None or self._served.name != name:
+            self._served = _Served(name, *(
+                np.load(self._path(name, f"{part}.npy"), mmap_mode="r")
+                for part in ("products", "neighbors", "scores")
+            ))
+        return self._served
+
+    def similar(self, product_id: str, limit: int) -> List[Tuple[str, float]]:
+        """Products most often bought with this one, best first - [] when unknown or not built yet"""
+        served = self._load()
+        if served is None:
+            return []
+        key = product_id.encode()
+        row = int(np.searchsorted(served.products, key))
+        if row >= len(served.products) or served.products[row] != key:
+            return []
+
+        neighbors = served.neighbors[row, :limit]
+        found = neighbors >= 0
+        return list(zip(
+            [p.decode() for p in served.products[neighbors[found]].tolist()],
+            served.scores[row, :limit][found].tolist(),
+        ))
+
+
+recommender = Recommender(
+    settings.RECOMMEND_DIR,
+    settings.RECOMMEND_TOP_K,
+    settings.RECOMMEND_MIN_SUPPORT,
+    settings.RECOMMEND_MAX_BASKET,
+    settings.RECOMMEND_RELOAD_SECONDS,
+)
+
+
+@jobs.handler("recommendations.build", concurrency=1)
+async def _build_job(ctx: JobContext, payload: dict) -> dict:
+    return await recommender.build(bool(payload.get("full")), ctx.progress)
@@ -0,0 +1,190 @@
+"""
+🎟️ Discount Code & Campaign Redemption
+Usage limits that hold under flash-coupon load
+
+- Total limit: one conditional UPDATE ... RETURNING on the code or
+  campaign row (no read-check-increment race, the row lock serializes
+  the counter)
+- Per-customer limit: transaction-scoped advisory lock on (promotion,
+  customer) before counting that customer's CodeUsage / CampaignUsage rows
+- The usage row is written in the caller's transaction, so a failed
+  checkout rolls the counter back with it
+- Exhausted codes and campaigns land in an in-memory negative cache and
+  are rejected without touching the database
+
+Redeem as late as possible in the checkout transaction - the promotion
+rows stay locked until commit. A cached rejection lives for
+DISCOUNT_NEGATIVE_CACHE_SECONDS, which also bounds how long a rolled-back
+last use keeps the code blocked on this worker.
+"""
+
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Hashable, Optional
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.database import Campaign, CampaignUsage, CodeUsage, DiscountCode
+
+
+class RedemptionError(Exception):
+    """Raised when a discount code or campaign can no longer be used"""
+
+
+class CodeRedemptions:
+    """Atomic redemption with a per-process negative cache"""
+
+    def __init__(self, negative_ttl_seconds: float):
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._exhausted: Dict[Hashable, float] = {}
+
+    # ─── Negative cache ────────────────────────────────────────
+
+    def is_exhausted(self, code_id: str, customer_id: Optional[str] = None) -> bool:
+        """True when the code or campaign (or this customer's share of it) is known used up"""
+        now = time.monotonic()
+        for key in ((code_id, None), (code_id, customer_id)):
+            until = self._exhausted.get(key)
+            if until is not None:
+                if until > now:
+                    return True
+                del self._exhausted[key]
+        return False
+
+    def _mark_exhausted(self, code_id: str, customer_id: Optional[str] = None) -> None:
+        self._exhausted[(code_id, customer_id)] = time.monotonic() + self.negative_ttl_seconds
+
+    def forget(self, code_id: str) -> None:
+        """Drop cached rejections after the code's or campaign's limits were edited"""
+        for key in [k for k in self._exhausted if k[0] == code_id]:
+            del self._exhausted[key]
+
+    # ─── Redeem ───────────────────────────────────────────────
+
+    async def redeem(
+        self,
+        db: AsyncSession,
+        code_id: str,
+        customer_id: Optional[str],
+        order_id: Optional[str],
+        discount_amount: Decimal,
+    ) -> CodeUsage:
+        """Count one use of the code and record it - does not commit"""
+        if self.is_exhausted(code_id, customer_id):
+            raise RedemptionError("Discount code has been fully redeemed")
+
+        await self._check_customer(
+            db, DiscountCode, CodeUsage.code_id, code_id, customer_id,
+            "Discount code usage limit reached for this customer"
+        )
+        now = datetime.utcnow()
+        await self._count(
+            db, DiscountCode, code_id,
+            [
+                or_(DiscountCode.starts_at == None, DiscountCode.starts_at <= now),
+                or_(DiscountCode.expires_at == None, DiscountCode.expires_at > now),
+            ],
+            "Discount code is expired or fully redeemed"
+        )
+
+        usage = CodeUsage(
+            code_id=code_id,
+            order_id=order_id,
+            customer_id=customer_id,
+            discount_amount=discount_amount,
+            used_at=now
+        )
+        db.add(usage)
+        return usage
+
+    async def redeem_campaign(
+        self,
+        db: AsyncSession,
+        campaign_id: str,
+        customer_id: Optional[str],
+        order_id: Optional[str],
+        discount_amount: Decimal,
+    ) -> CampaignUsage:
+        """Count one use of an applied campaign and record it - does not commit"""
+        if self.is_exhausted(campaign_id, customer_id):
+            raise RedemptionError("Campaign has reached its usage limit")
+
+        await self._check_customer(
+            db, Campaign, CampaignUsage.campaign_id, campaign_id, customer_id,
+            "Campaign usage limit reached for this customer"
+        )
+        now = datetime.utcnow()
+        await self._count(
+            db, Campaign, campaign_id,
+            [Campaign.starts_at <= now, Campaign.ends_at > now],
+            "Campaign has ended or reached its usage limit"
+        )
+
+        usage = CampaignUsage(
+            campaign_id=campaign_id,
+            order_id=order_id,
+            customer_id=customer_id,
+            discount_amount=discount_amount,
+            used_at=now
+        )
+        db.add(usage)
+        return usage
+
+    async def _check_customer(self, db: AsyncSession, model, usage_column, promo_id: str,
+                              customer_id: Optional[str], message: str) -> None:
+        if not customer_id:
+            return
+        per_customer = (await db.execute(
+            select(model.usage_limit_per_customer).where(model.id == promo_id)
+        )).scalar()
+        if not per_customer:
+            return
+        # Serializes only this customer's concurrent redemptions of this promotion
+        await db.execute(
+            select(func.pg_advisory_xact_lock(func.hashtext(f"{promo_id}:{customer_id}")))
+        )
+        usage = usage_column.class_
+        used = (await db.execute(
+            select(func.count(usage.id)).where(
+                and_(usage_column == promo_id, usage.customer_id == customer_id)
+            )
+        )).scalar()
+        if used >= per_customer:
+            self._mark_exhausted(promo_id, customer_id)
+            raise RedemptionError(message)
+
+    async def _count(self, db: AsyncSession, model, promo_id: str, window: list, message: str) -> None:
+        counted = (await db.execute(
+            update(model)
+            .where(
+                and_(
+                    model.id == promo_id,
+                    model.is_active == True,
+                    *window,
+                    or_(
+                        model.total_usage_limit == None,
+                        func.coalesce(model.current_usage_count, 0) < model.total_usage_limit
+                    )
+                )
+            )
+            # Keep updated_at - usage must not change the promotion fingerprint
+            .values(
+                current_usage_count=func.coalesce(model.current_usage_count, 0) + 1,
+                updated_at=model.updated_at
+            )
+            .returning(model.current_usage_count, model.total_usage_limit)
+            .execution_options(synchronize_session=False)
+        )).first()
+
+        if counted is None:
+            self._mark_exhausted(promo_id)
+            raise RedemptionError(message)
+        if counted.total_usage_limit is not None and counted.current_usage_count >= counted.total_usage_limit:
+            # This was the last use - later attempts are rejected in memory
+            self._mark_exhausted(promo_id)
+
+
+redemptions = CodeRedemptions(settings.DISCOUNT_NEGATIVE_CACHE_SECONDS)
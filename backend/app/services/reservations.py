@@ -0,0 +1,449 @@
+"""
+🔒 Stock Reservation Service
+Short-lived stock holds for in-progress baskets
+
+- Hold: conditional stock decrement (no check-then-write race between lanes)
+- Expiry: hashed timer wheel, O(1) schedule/cancel, no polling sweeps
+- Recovery: TTL index on stock_reservations.expires_at releases holds
+  left behind by a crashed worker
+- Checkout: converts a hold into a sale from the stored snapshot
+- Tenancy: basket ids are only unique within an organization - every
+  statement and timer key carries the organization id
+"""
+
+import asyncio
+import logging
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, case, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.database import Product, StockReservation
+
+logger = logging.getLogger(__name__)
+
+
+class ReservationError(Exception):
+    """Raised when a hold cannot be placed or changed"""
+
+
+@dataclass
+class HeldLine:
+    """Reserved quantity of one product with its price/tax snapshot"""
+    product_id: str
+    product_name: str
+    sku: Optional[str]
+    unit_price: Decimal
+    vat_rate: float
+    quantity: int
+    track_inventory: bool = True
+    category_id: Optional[str] = None
+    brand_id: Optional[str] = None
+    expires_at: Optional[datetime] = None
+
+
+# ═══════════════════════════════════════════════════════════════
+# TIMER WHEEL
+# ═══════════════════════════════════════════════════════════════
+
+class TimerWheel:
+    """
+    Hashed timing wheel
+
+    Each slot holds the keys due when the cursor reaches it; keys further
+    out than one revolution carry a remaining-rounds counter. Scheduling
+    and cancelling are O(1), and each tick only touches a single slot.
+    """
+
+    def __init__(self, tick_seconds: float = 1.0, slots: int = 3600):
+        self.tick_seconds = tick_seconds
+        self._slots: List[Dict[Hashable, int]] = [{} for _ in range(slots)]
+        self._slot_of: Dict[Hashable, int] = {}
+        self._cursor = 0
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slot_of
+
+    def schedule(self, key: Hashable, delay_seconds: float) -> None:
+        """(Re)schedule key to fire after delay_seconds"""
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay_seconds / self.tick_seconds))
+        size = len(self._slots)
+        slot = (self._cursor + ticks) % size
+        self._slots[slot][key] = (ticks - 1) // size
+        self._slot_of[key] = slot
+
+    def cancel(self, key: Hashable) -> bool:
+        slot = self._slot_of.pop(key, None)
+        if slot is None:
+            return False
+        del self._slots[slot][key]
+        return True
+
+    def advance(self) -> List[Hashable]:
+        """Move one tick forward and return the keys that fired"""
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        bucket = self._slots[self._cursor]
+        fired = []
+        for key, rounds in list(bucket.items()):
+            if rounds == 0:
+                del bucket[key]
+                del self._slot_of[key]
+                fired.append(key)
+            else:
+                bucket[key] = rounds - 1
+        return fired
+
+
+# ═══════════════════════════════════════════════════════════════
+# RESERVATION MANAGER
+# ═══════════════════════════════════════════════════════════════
+
+_restore_stock = (
+    update(Product.__table__)
+    .where(Product.__table__.c.id == bindparam("pid"))
+    .values(stock_quantity=Product.__table__.c.stock_quantity + bindparam("qty"))
+)
+
+
+def _basket(org_id: str, basket_id: str):
+    """Rows of one organization's basket"""
+    return and_(StockReservation.organization_id == org_id, StockReservation.basket_id == basket_id)
+
+
+class ReservationManager:
+    """Places, extends, releases and expires basket stock holds"""
+
+    def __init__(self, ttl_minutes: int, tick_seconds: float):
+        self.ttl = timedelta(minutes=ttl_minutes)
+        self.wheel = TimerWheel(tick_seconds=tick_seconds)
+        self._task: Optional[asyncio.Task] = None
+        self._expiry_listeners: List[Callable[[str, str], Awaitable[None]]] = []
+
+    def on_expire(self, listener: Callable[[str, str], Awaitable[None]]) -> None:
+        """Register a coroutine called with (organization id, basket id) after its holds expire"""
+        self._expiry_listeners.append(listener)
+
+    # ─── Hold / release ────────────────────────────────────────
+
+    async def hold(
+        self,
+        db: AsyncSession,
+        org_id: str,
+        basket_id: str,
+        product_id: str,
+        quantity: int,
+    ) -> HeldLine:
+        """
+        Change the held quantity of a product by `quantity` (negative releases)
+
+        Commits and returns the line as now held (quantity 0 once fully
+        given back). Every hold refreshes the deadline of the whole basket.
+        """
+        if quantity == 0:
+            raise ReservationError("Quantity must not be zero")
+
+        deadline = datetime.utcnow() + self.ttl
+
+        if quantity > 0:
+            line = await self._take(db, org_id, basket_id, product_id, quantity, deadline)
+        else:
+            line = await self._give_back(db, org_id, basket_id, product_id, -quantity)
+        line.expires_at = deadline
+
+        await db.execute(
+            update(StockReservation)
+            .where(_basket(org_id, basket_id))
+            .values(expires_at=deadline)
+        )
+        await db.commit()
+
+        self.wheel.schedule((org_id, basket_id), self.ttl.total_seconds())
+        return line
+
+    async def _take(self, db, org_id, basket_id, product_id, quantity, deadline):
+        # Single conditional decrement - the stock check and the write are one statement
+        result = await db.execute(
+            update(Product)
+            .where(
+                and_(
+                    Product.id == product_id,
+                    Product.organization_id == org_id,
+                    Product.is_active == True,
+                    (Product.track_inventory == False)
+                    | (Product.allow_backorder == True)
+                    | (Product.stock_quantity >= quantity),
+                )
+            )
+            .values(
+                stock_quantity=case(
+                    (Product.track_inventory == True, Product.stock_quantity - quantity),
+                    else_=Product.stock_quantity,
+                )
+            )
+            .returning(
+                Product.name, Product.sku, Product.base_price, Product.sale_price,
+                Product.vat_rate, Product.track_inventory,
+                Product.category_id, Product.brand_id,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        snapshot = result.first()
+        if snapshot is None:
+            await db.rollback()
+            raise ReservationError(f"Insufficient stock for product {product_id}")
+
+        insert_stmt = pg_insert(StockReservation).values(
+            organization_id=org_id,
+            basket_id=basket_id,
+            product_id=product_id,
+            quantity=quantity,
+            product_name=snapshot.name,
+            sku=snapshot.sku,
+            category_id=snapshot.category_id,
+            brand_id=snapshot.brand_id,
+            unit_price=snapshot.sale_price or snapshot.base_price,
+            vat_rate=snapshot.vat_rate,
+            track_inventory=snapshot.track_inventory,
+            expires_at=deadline,
+            created_at=datetime.utcnow(),
+        )
+        held = await db.execute(
+            insert_stmt.on_conflict_do_update(
+                index_elements=[
+                    StockReservation.organization_id, StockReservation.basket_id, StockReservation.product_id
+                ],
+                set_={"quantity": StockReservation.quantity + insert_stmt.excluded.quantity},
+            ).returning(StockReservation.quantity)
+        )
+        return HeldLine(
+            product_id=product_id,
+            product_name=snapshot.name,
+            sku=snapshot.sku,
+            unit_price=snapshot.sale_price or snapshot.base_price,
+            vat_rate=snapshot.vat_rate,
+            quantity=held.scalar_one(),
+            track_inventory=snapshot.track_inventory,
+            category_id=snapshot.category_id,
+            brand_id=snapshot.brand_id,
+        )
+
+    async def _give_back(self, db, org_id, basket_id, product_id, quantity):
+        result = await db.execute(
+            update(StockReservation)
+            .where(
+                and_(
+                    _basket(org_id, basket_id),
+                    StockReservation.product_id == product_id,
+                    StockReservation.quantity >= quantity,
+                )
+            )
+            .values(quantity=StockReservation.quantity - quantity)
+            .returning(
+                StockReservation.product_name, StockReservation.sku,
+                StockReservation.unit_price, StockReservation.vat_rate,
+                StockReservation.quantity, StockReservation.track_inventory,
+                StockReservation.category_id, StockReservation.brand_id,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        row = result.first()
+        if row is None:
+            await db.rollback()
+            raise ReservationError(f"Product {product_id} is not held for {quantity} units")
+
+        if row.track_inventory:
+            await db.execute(_restore_stock, [{"pid": product_id, "qty": quantity}])
+        if row.quantity == 0:
+            await db.execute(
+                delete(StockReservation).where(
+                    and_(
+                        _basket(org_id, basket_id),
+                        StockReservation.product_id == product_id,
+                    )
+                )
+            )
+        return HeldLine(
+            product_id=product_id,
+            product_name=row.product_name,
+            sku=row.sku,
+            unit_price=row.unit_price,
+            vat_rate=row.vat_rate,
+            quantity=row.quantity,
+            track_inventory=row.track_inventory,
+            category_id=row.category_id,
+            brand_id=row.brand_id,
+        )
+
+    async def release(self, db: AsyncSession, org_id: str, basket_id: str) -> int:
+        """Drop every hold of a basket and return the stock. Commits."""
+        released = await self._delete_and_restore(db, _basket(org_id, basket_id))
+        await db.commit()
+        self.wheel.cancel((org_id, basket_id))
+        return released
+
+    async def lines(self, db: AsyncSession, org_id: str, basket_id: str) -> List[StockReservation]:
+        result = await db.execute(
+            select(StockReservation)
+            .where(_basket(org_id, basket_id))
+            .order_by(StockReservation.created_at)
+        )
+        return result.scalars().all()
+
+    async def consume(self, db: AsyncSession, basket_id: str, org_id: str) -> List[HeldLine]:
+        """
+        Convert a basket's holds into sale lines
+
+        Stock was already taken when the hold was placed, so the caller
+        only persists the order. Does not commit - the rows disappear in
+        the caller's checkout transaction. The wheel timer is left alone;
+        if the checkout rolls back the holds still expire normally.
+        """
+        result = await db.execute(
+            delete(StockReservation)
+            .where(
+                and_(
+                    _basket(org_id, basket_id),
+                    StockReservation.expires_at > datetime.utcnow(),
+                )
+            )
+            .returning(
+                StockReservation.product_id, StockReservation.product_name,
+                StockReservation.sku, StockReservation.unit_price,
+                StockReservation.vat_rate, StockReservation.quantity,
+                StockReservation.track_inventory,
+                StockReservation.category_id, StockReservation.brand_id,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return [
+            HeldLine(
+                product_id=r.product_id,
+                product_name=r.product_name,
+                sku=r.sku,
+                unit_price=r.unit_price,
+                vat_rate=r.vat_rate,
+                quantity=r.quantity,
+                track_inventory=r.track_inventory,
+                category_id=r.category_id,
+                brand_id=r.brand_id,
+            )
+            for r in result.all()
+        ]
+
+    async def _delete_and_restore(self, db: AsyncSession, condition) -> int:
+        # DELETE ... RETURNING makes release idempotent across workers:
+        # only the statement that actually removed a row gives its stock back
+        result = await db.execute(
+            delete(StockReservation)
+            .where(condition)
+            .returning(
+                StockReservation.product_id,
+                StockReservation.quantity,
+                StockReservation.track_inventory,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        params = [
+            {"pid": r.product_id, "qty": r.quantity}
+            for r in result.all()
+            if r.track_inventory and r.quantity > 0
+        ]
+        if params:
+            await db.execute(_restore_stock, params)
+        return len(params)
+
+    # ─── Expiry ────────────────────────────────────────────────
+
+    async def expire(self, key: Tuple[str, str]) -> None:
+        org_id, basket_id = key
+        async with AsyncSessionLocal() as db:
+            now = datetime.utcnow()
+            await self._delete_and_restore(
+                db,
+                and_(
+                    _basket(org_id, basket_id),
+                    StockReservation.expires_at <= now,
+                ),
+            )
+            # Another worker may have extended the basket meanwhile
+            next_deadline = (
+                await db.execute(
+                    select(func.min(StockReservation.expires_at))
+                    .where(_basket(org_id, basket_id))
+                )
+            ).scalar()
+            await db.commit()
+
+        if next_deadline:
+            self.wheel.schedule(key, (next_deadline - now).total_seconds())
+            return
+
+        for listener in self._expiry_listeners:
+            await listener(org_id, basket_id)
+
+    async def recover(self) -> None:
+        """Release holds that expired while no worker was running, re-arm the rest"""
+        async with AsyncSessionLocal() as db:
+            now = datetime.utcnow()
+            released = await self._delete_and_restore(db, StockReservation.expires_at <= now)
+            pending = (
+                await db.execute(
+                    select(
+                        StockReservation.organization_id, StockReservation.basket_id,
+                        func.min(StockReservation.expires_at),
+                    )
+                    .group_by(StockReservation.organization_id, StockReservation.basket_id)
+                )
+            ).all()
+            await db.commit()
+
+        for org_id, basket_id, deadline in pending:
+            self.wheel.schedule((org_id, basket_id), (deadline - now).total_seconds())
+        logger.info(f"Reservations recovered: {released} released, {len(pending)} baskets re-armed")
+
+    async def _run(self) -> None:
+        tick = self.wheel.tick_seconds
+        next_tick = time.monotonic() + tick
+        while True:
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+            # Catch up on ticks missed while the loop was busy
+            while next_tick <= time.monotonic():
+                next_tick += tick
+                for key in self.wheel.advance():
+                    try:
+                        await self.expire(key)
+                    except Exception:
+                        logger.exception(f"Failed to expire reservation {key[1]}")
+                        self.wheel.schedule(key, tick * 10)
+
+    async def start(self) -> None:
+        if self._task:
+            return
+        try:
+            await self.recover()
+        except Exception:
+            logger.exception("Reservation recovery failed")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+reservations = ReservationManager(
+    ttl_minutes=settings.RESERVATION_TTL_MINUTES,
+    tick_seconds=settings.RESERVATION_TICK_SECONDS,
+)
@@ -0,0 +1,261 @@
+"""
+🔎 Search Analytics
+What shoppers search for, what they click, and a ranking boost from it
+
+- Logging: product search hands one SearchEvent to the event ingestor
+  (services/events.py) - an in-memory append, the response never waits
+  on the database. A search_queries row is either a search
+  (clicked_product_id NULL) or a click on a result of one (storefront
+  click events) - clicks are never counted as searches
+- Rollup: rollup() rebuilds whole hour buckets with one
+  INSERT ... SELECT ... GROUP BY ... ON CONFLICT DO UPDATE per rollup table
+  (queries, result positions, query → clicked product). Every run re-reads
+  the last SEARCH_ROLLUP_LOOKBACK_HOURS so late events are counted -
+  rebuilding a bucket is idempotent. Runs as the search.rollup job and
+  from scripts/rollup_search.py
+- Reports: top queries, zero-result queries and CTR by position sum the
+  hourly rollups over any range, never the raw events
+- Boost: clicks of the last SEARCH_BOOST_DAYS, top SEARCH_BOOST_PER_QUERY
+  products per query, held in memory as (organization, query) → tuple of
+  product ids and swapped in whole every SEARCH_BOOST_REFRESH_SECONDS
+"""
+
+import asyncio
+import logging
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import String, and_, desc, func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.global_features import (
+    SearchClickRollup, SearchPositionRollup, SearchQuery, SearchQueryRollup
+)
+from app.services.events import SearchEvent, ingestor, normalize_query
+from app.services.jobs import JobContext, jobs
+
+logger = logging.getLogger(__name__)
+
+
+def hour_start(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _ctr(clicks: int, shown: int) -> float:
+    return round(clicks / shown, 4) if shown else 0.0
+
+
+class SearchAnalytics:
+
+    def __init__(self, lookback_hours: int, positions: int, boost_days: int, boost_per_query: int,
+                 boost_min_clicks: int, boost_refresh_seconds: int):
+        self.lookback_hours = lookback_hours
+        self.positions = positions
+        self.boost_days = boost_days
+        self.boost_per_query = boost_per_query
+        self.boost_min_clicks = boost_min_clicks
+        self.boost_refresh_seconds = boost_refresh_seconds
+        self._boosts: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+        self.boosts_loaded_at: Optional[datetime] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    # ─── Logging ───────────────────────────────────────────────
+
+    def log(self, org_id: str, query: str, results_count: int, customer_id: Optional[str] = None) -> None:
+        """Queue one search for the ingestor - never blocks, shed when the buffer is full"""
+        query = normalize_query(query)
+        if query:
+            ingestor.offer([SearchEvent(
+                organization_id=org_id,
+                query=query[:500],
+                created_at=datetime.utcnow(),
+                results_count=results_count,
+                customer_id=customer_id,
+            )])
+
+    # ─── Rollup ────────────────────────────────────────────────
+
+    async def rollup(self, db: AsyncSession, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None) -> dict:
+        """Rebuild the hour buckets in [start, end) - defaults to the lookback window"""
+        end = hour_start(end) if end else hour_start(datetime.utcnow()) + timedelta(hours=1)
+        start = hour_start(start or end - timedelta(hours=self.lookback_hours))
+
+        s = SearchQuery
+        bucket = func.date_trunc("hour", s.created_at).label("bucket")
+        window = [s.created_at >= start, s.created_at < end, s.organization_id != None]
+        new_id = func.gen_random_uuid().cast(String)
+        is_search = s.clicked_product_id == None
+        is_click = s.clicked_product_id != None
+
+        queries = select(
+            new_id, s.organization_id, bucket, s.query,
+            func.count().filter(is_search),
+            func.count().filter(and_(is_search, s.results_count == 0)),
+            func.count().filter(is_click),
+        ).where(and_(*window)).group_by(s.organization_id, bucket, s.query)
+
+        # Searches × tracked positions: shown if the search had that many results;
+        # clicks × positions: clicked at that position
+        position = func.generate_series(1, self.positions).column_valued("position")
+        positions = select(
+            new_id, s.organization_id, bucket, position,
+            func.count().filter(and_(is_search, s.results_count >= position)),
+            func.count().filter(and_(is_click, s.click_position == position)),
+        ).where(and_(
+            *window,
+            or_(and_(is_search, s.results_count > 0), and_(is_click, s.click_position != None)),
+        )).group_by(s.organization_id, bucket, position)
+
+        clicks = select(
+            new_id, s.organization_id, bucket, s.query, s.clicked_product_id, func.count(),
+        ).where(and_(*window, is_click)).group_by(
+            s.organization_id, bucket, s.query, s.clicked_product_id
+        )
+
+        counts = {}
+        for model, select_stmt, keys, values in (
+            (SearchQueryRollup, queries, ["organization_id", "bucket", "query"],
+             ["searches", "zero_results", "clicks"]),
+            (SearchPositionRollup, positions, ["organization_id", "bucket", "position"],
+             ["impressions", "clicks"]),
+            (SearchClickRollup, clicks, ["organization_id", "bucket", "query", "product_id"],
+             ["clicks"]),
+        ):
+            stmt = pg_insert(model).from_select(["id", *keys, *values], select_stmt)
+            result = await db.execute(stmt.on_conflict_do_update(
+                index_elements=keys,
+                set_={v: stmt.excluded[v] for v in values}
+            ))
+            counts[model.__tablename__] = result.rowcount
+
+        await db.commit()
+        logger.info(f"Search rollup {start:%Y-%m-%d %H:00} → {end:%Y-%m-%d %H:00}: {counts}")
+        return {"start": start.isoformat(), "end": end.isoformat(), "rows": counts}
+
+    # ─── Reports ───────────────────────────────────────────────
+
+    async def top_queries(self, db: AsyncSession, org_id: str, start: datetime, end: datetime,
+                          limit: int, zero_results_only: bool = False) -> List[dict]:
+        r = SearchQueryRollup
+        searches = func.sum(r.searches)
+        zero_results = func.sum(r.zero_results)
+        stmt = (
+            select(r.query, searches.label("searches"), zero_results.label("zero_results"),
+                   func.sum(r.clicks).label("clicks"))
+            .where(and_(r.organization_id == org_id, r.bucket >= start, r.bucket < end))
+            .group_by(r.query)
+        )
+        if zero_results_only:
+            stmt = stmt.having(zero_results > 0).order_by(desc(zero_results), r.query)
+        else:
+            stmt = stmt.order_by(desc(searches), r.query)
+
+        rows = (await db.execute(stmt.limit(limit))).all()
+        return [
+            {
+                "query": row.query, "searches": row.searches, "zero_results": row.zero_results,
+                "clicks": row.clicks, "ctr": _ctr(row.clicks, row.searches),
+            }
+            for row in rows
+        ]
+
+    async def ctr_by_position(self, db: AsyncSession, org_id: str, start: datetime, end: datetime) -> List[dict]:
+        r = SearchPositionRollup
+        rows = (await db.execute(
+            select(r.position, func.sum(r.impressions).label("impressions"), func.sum(r.clicks).label("clicks"))
+            .where(and_(r.organization_id == org_id, r.bucket >= start, r.bucket < end))
+            .group_by(r.position)
+            .order_by(r.position)
+        )).all()
+        return [
+            {"position": row.position, "impressions": row.impressions, "clicks": row.clicks,
+             "ctr": _ctr(row.clicks, row.impressions)}
+            for row in rows
+        ]
+
+    # ─── Ranking boost ─────────────────────────────────────────
+
+    def boosted(self, org_id: str, query: str) -> Tuple[str, ...]:
+        """Most clicked products for this query, best first"""
+        return self._boosts.get((org_id, normalize_query(query)), ())
+
+    async def load_boosts(self, db: AsyncSession) -> int:
+        """Rebuild the in-memory boost table - returns the number of queries boosted"""
+        r = SearchClickRollup
+        clicks = func.sum(r.clicks)
+        ranked = (
+            select(
+                r.organization_id, r.query, r.product_id,
+                func.row_number().over(
+                    partition_by=(r.organization_id, r.query), order_by=(desc(clicks), r.product_id)
+                ).label("rank"),
+            )
+            .where(r.bucket >= hour_start(datetime.utcnow()) - timedelta(days=self.boost_days))
+            .group_by(r.organization_id, r.query, r.product_id)
+            .having(clicks >= self.boost_min_clicks)
+            .subquery()
+        )
+        rows = await db.stream(
+            select(ranked.c.organization_id, ranked.c.query, ranked.c.product_id)
+            .where(ranked.c.rank <= self.boost_per_query)
+            .order_by(ranked.c.organization_id, ranked.c.query, ranked.c.rank)
+        )
+
+        table: Dict[Tuple[str, str], list] = {}
+        async for org_id, query, product_id in rows:
+            table.setdefault((sys.intern(org_id), query), []).append(sys.intern(product_id))
+        self._boosts = {key: tuple(products) for key, products in table.items()}
+        self.boosts_loaded_at = datetime.utcnow()
+        return len(self._boosts)
+
+    # ─── Loop ──────────────────────────────────────────────────
+
+    async def run(self) -> None:
+        while not self._stopping:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.load_boosts(db)
+            except Exception:
+                # Keep ranking with the last table
+                logger.exception("Loading search boosts failed")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.boost_refresh_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self) -> None:
+        if not self._task:
+            self._stopping = False
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self.run())
+
+    async def shutdown(self) -> None:
+        if self._task:
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+
+
+search_analytics = SearchAnalytics(
+    settings.SEARCH_ROLLUP_LOOKBACK_HOURS,
+    settings.SEARCH_ROLLUP_POSITIONS,
+    settings.SEARCH_BOOST_DAYS,
+    settings.SEARCH_BOOST_PER_QUERY,
+    settings.SEARCH_BOOST_MIN_CLICKS,
+    settings.SEARCH_BOOST_REFRESH_SECONDS,
+)
+
+
+@jobs.handler("search.rollup", concurrency=1)
+async def _rollup_job(ctx: JobContext, payload: dict) -> dict:
+    start = payload.get("start")
+    async with AsyncSessionLocal() as db:
+        return await search_analytics.rollup(db, datetime.fromisoformat(start) if start else None)
@@ -0,0 +1,225 @@
+"""
+🎯 RFM Segmentation
+Recency / frequency / monetary scores and Customer.segment for a whole organization
+
+- Read: one grouped query over orders (last order, order count, spend per
+  customer), streamed in RFM_CHUNK_SIZE batches; each batch becomes NumPy
+  arrays right away and the batches are concatenated once
+- Score: quintile cut points with np.quantile, scores with np.searchsorted,
+  segments with np.select - no per-customer Python
+- Write: UPDATE customers ... FROM (VALUES ...) in RFM_WRITE_BATCH chunks,
+  committed one by one so checkout never waits long on a customer row lock
+- Incremental: a run stores its cut points and watermark; the next run only
+  re-scores customers changed after the watermark (Customer.updated_at,
+  which every sale and refund bumps through customer_stats), against the
+  stored cut points. Scoring itself keeps updated_at. Customers going
+  quiet are caught by one set-based INACTIVE sweep instead of re-scoring
+  everybody
+- BLACKLIST is never overwritten
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import Float, Integer, String, and_, cast, column, desc, func, literal, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.database import Customer, CustomerSegment, CustomerSegmentationRun, Order
+from app.services.customer_stats import COUNTED_STATUSES
+
+_QUINTILES = [0.2, 0.4, 0.6, 0.8]
+# Orders committed just after a run started still get picked up - re-scoring is idempotent
+_WATERMARK_OVERLAP = timedelta(minutes=5)
+# np.select picks an index into this - enum members would be coerced to strings
+_SEGMENTS = np.array(
+    [CustomerSegment.REGULAR, CustomerSegment.INACTIVE, CustomerSegment.VIP, CustomerSegment.NEW],
+    dtype=object
+)
+
+
+@dataclass
+class RFMScores:
+    customer_ids: np.ndarray  # str, object dtype
+    recency: np.ndarray  # 1-5, 5 = bought most recently
+    frequency: np.ndarray
+    monetary: np.ndarray
+    segments: np.ndarray  # CustomerSegment per customer
+
+
+def _cuts(values: np.ndarray) -> List[float]:
+    return np.quantile(values, _QUINTILES).tolist() if len(values) else [0.0] * 4
+
+
+def score(days: np.ndarray, orders: np.ndarray, spend: np.ndarray,
+          recency_cuts, frequency_cuts, monetary_cuts) -> tuple:
+    """Scores 1-5 for each dimension plus the segment, all vectorized"""
+    recency = 5 - np.searchsorted(recency_cuts, days, side="left")
+    frequency = 1 + np.searchsorted(frequency_cuts, orders, side="left")
+    monetary = 1 + np.searchsorted(monetary_cuts, spend, side="left")
+
+    codes = np.select(
+        [
+            days >= settings.RFM_INACTIVE_DAYS,
+            (recency >= 4) & (frequency >= 4) & (monetary >= 4),
+            orders <= 1,
+        ],
+        [1, 2, 3],
+        default=0
+    )
+    return recency, frequency, monetary, _SEGMENTS[codes]
+
+
+class SegmentationJob:
+
+    def __init__(self, chunk_size: int, write_batch: int):
+        self.chunk_size = chunk_size
+        self.write_batch = write_batch
+
+    async def last_run(self, db: AsyncSession, org_id: str) -> Optional[CustomerSegmentationRun]:
+        return (await db.execute(
+            select(CustomerSegmentationRun)
+            .where(
+                and_(
+                    CustomerSegmentationRun.organization_id == org_id,
+                    CustomerSegmentationRun.finished_at != None
+                )
+            )
+            .order_by(desc(CustomerSegmentationRun.finished_at))
+            .limit(1)
+        )).scalar_one_or_none()
+
+    async def _load(self, db: AsyncSession, org_id: str, since: Optional[datetime], now: datetime):
+        """Per-customer (last order, count, spend), streamed chunk by chunk"""
+        conditions = [
+            Order.organization_id == org_id,
+            Order.customer_id != None,
+            Order.status.in_(COUNTED_STATUSES),
+            Order.created_at <= now,
+        ]
+        if since is not None:
+            # Changed customers - new orders, refunds and status changes all move their stats row
+            changed = select(Customer.id).where(
+                and_(Customer.organization_id == org_id, Customer.updated_at > since)
+            )
+            conditions.append(Order.customer_id.in_(changed))
+
+        result = await db.stream(
+            select(
+                Order.customer_id,
+                cast(func.extract("epoch", literal(now) - func.max(Order.created_at)) / 86400, Float),
+                func.count(Order.id),
+                cast(func.coalesce(func.sum(Order.total_amount), 0), Float),
+            )
+            .where(and_(*conditions))
+            .group_by(Order.customer_id)
+            .execution_options(yield_per=self.chunk_size)
+        )
+
+        dtypes = (object, np.float64, np.int64, np.float64)
+        parts: List[list] = [[] for _ in dtypes]
+        async for chunk in result.partitions():
+            for part, cells, dtype in zip(parts, zip(*chunk), dtypes):
+                part.append(np.array(cells, dtype=dtype))
+        ids, days, orders, spend = (
+            np.concatenate(part) if part else np.empty(0, dtype=dtype)
+            for part, dtype in zip(parts, dtypes)
+        )
+        return ids, days, orders, spend
+
+    async def _write(self, db: AsyncSession, scores: RFMScores, now: datetime) -> None:
+        segment_type = Customer.__table__.c.segment.type
+        for start in range(0, len(scores.customer_ids), self.write_batch):
+            end = start + self.write_batch
+            rows = values(
+                column("id", String),
+                column("segment", segment_type),
+                column("r", Integer),
+                column("f", Integer),
+                column("m", Integer),
+                name="rfm"
+            ).data(list(zip(
+                scores.customer_ids[start:end],
+                scores.segments[start:end].tolist(),
+                scores.recency[start:end].tolist(),
+                scores.frequency[start:end].tolist(),
+                scores.monetary[start:end].tolist(),
+            )))
+            await db.execute(
+                update(Customer)
+                .where(
+                    and_(
+                        Customer.id == rows.c.id,
+                        Customer.segment.is_distinct_from(CustomerSegment.BLACKLIST)
+                    )
+                )
+                .values(
+                    segment=rows.c.segment,
+                    rfm_recency=rows.c.r,
+                    rfm_frequency=rows.c.f,
+                    rfm_monetary=rows.c.m,
+                    rfm_scored_at=now,
+                    updated_at=Customer.updated_at,  # Not a change - the next run would re-score it
+                )
+                .execution_options(synchronize_session=False)
+            )
+            # Short transactions - checkouts update the same customer rows
+            await db.commit()
+
+    async def _sweep_inactive(self, db: AsyncSession, org_id: str, now: datetime) -> int:
+        result = await db.execute(
+            update(Customer)
+            .where(
+                and_(
+                    Customer.organization_id == org_id,
+                    Customer.last_purchase_at < now - timedelta(days=settings.RFM_INACTIVE_DAYS),
+                    Customer.segment.notin_([CustomerSegment.INACTIVE, CustomerSegment.BLACKLIST])
+                )
+            )
+            .values(
+                segment=CustomerSegment.INACTIVE, rfm_recency=1, rfm_scored_at=now, updated_at=Customer.updated_at
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    async def run(self, db: AsyncSession, org_id: str, full: bool = False) -> CustomerSegmentationRun:
+        """
+        Segment an organization's customers - commits
+
+        The first run (or full=True) scores everybody and stores new cut
+        points; later runs are incremental.
+        """
+        now = datetime.utcnow()
+        previous = None if full else await self.last_run(db, org_id)
+        incremental = previous is not None and previous.recency_cuts is not None
+
+        run = CustomerSegmentationRun(organization_id=org_id, is_full=not incremental, watermark=now, started_at=now)
+        since = previous.watermark - _WATERMARK_OVERLAP if incremental else None
+        ids, days, orders, spend = await self._load(db, org_id, since, now)
+
+        if incremental:
+            run.recency_cuts = previous.recency_cuts
+            run.frequency_cuts = previous.frequency_cuts
+            run.monetary_cuts = previous.monetary_cuts
+        else:
+            run.recency_cuts = _cuts(days)
+            run.frequency_cuts = _cuts(orders)
+            run.monetary_cuts = _cuts(spend)
+
+        recency, frequency, monetary, segments = score(
+            days, orders, spend, run.recency_cuts, run.frequency_cuts, run.monetary_cuts
+        )
+        await self._write(db, RFMScores(ids, recency, frequency, monetary, segments), now)
+        await self._sweep_inactive(db, org_id, now)
+
+        run.customers_scored = len(ids)
+        run.finished_at = datetime.utcnow()
+        db.add(run)
+        await db.commit()
+        return run
+
+
+segmentation = SegmentationJob(settings.RFM_CHUNK_SIZE, settings.RFM_WRITE_BATCH)
@@ -0,0 +1,184 @@
+"""
+📝 Template Rendering
+NotificationTemplate bodies compiled once per template version
+
+- {customer_name}-style placeholders are parsed once into literal / field
+  parts; rendering a message is a join over those parts, not a re-parse
+- Compile-time validation: malformed braces, attribute / index lookups and
+  variables missing from available_variables raise TemplateError before a
+  single message goes out
+- Rendering: each text becomes a printf string, so a message is one C-level
+  % over its values; render_batch() gathers each variable as a column over
+  all recipients first - one pass per variable instead of one per message
+- Cache key: (template id, updated_at) - an edited template compiles
+  again, superseded versions fall out of the LRU
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from string import Formatter
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from app.core.config import settings
+from app.models.database import NotificationTemplate
+
+_FIELDS = ("subject", "html_body", "text_body", "sms_body")
+
+# Filled in by the dispatcher for every message with a customer
+CUSTOMER_VARIABLES = ("first_name", "last_name", "customer_name")
+
+
+class TemplateError(Exception):
+    """Raised when a template does not compile"""
+    pass
+
+
+def _format(value, conversion: Optional[str], spec: str) -> str:
+    if value is None:
+        return ""
+    if conversion == "r":
+        value = repr(value)
+    elif conversion == "a":
+        value = ascii(value)
+    if not spec:
+        return str(value)
+    try:
+        return format(value, spec)
+    except (TypeError, ValueError):
+        # Context values are usually strings - "{total:.2f}" with "10.5"
+        return str(value)
+
+
+class CompiledText:
+    """One template text parsed into (literal, variable, conversion, spec) parts"""
+
+    def __init__(self, source: Optional[str]):
+        self.source = source or ""
+        try:
+            parsed = list(Formatter().parse(self.source))
+        except ValueError as e:
+            raise TemplateError(f"Malformed template: {e}")
+
+        self.parts: List[Tuple[str, Optional[str], Optional[str], str]] = []
+        for literal, field, conversion, spec in parsed:
+            if field is not None:
+                if not field.isidentifier():
+                    raise TemplateError(f"Invalid variable '{{{field}}}' - use plain names")
+                if spec and "{" in spec:
+                    raise TemplateError(f"Nested variable in '{{{field}:{spec}}}'")
+            self.parts.append((literal, field, conversion, spec or ""))
+        self.variables: Set[str] = {field for _, field, _, _ in self.parts if field is not None}
+
+        # Printf form of the text - "%s" per variable, rendered by one C-level % per message
+        self.fields = [(field, conversion, spec) for _, field, conversion, spec in self.parts if field is not None]
+        self.printf = "".join(
+            literal.replace("%", "%%") + ("%s" if field is not None else "")
+            for literal, field, _, _ in self.parts
+        )
+
+    def _column(self, field: str, conversion: Optional[str], spec: str, contexts: Sequence[Mapping]) -> List[str]:
+        values = [context.get(field) for context in contexts]
+        if conversion is None and not spec:
+            return ["" if v is None else v if type(v) is str else str(v) for v in values]
+        return [_format(v, conversion, spec) for v in values]
+
+    def render(self, context: Mapping) -> str:
+        """Missing variables render empty"""
+        if not self.fields:
+            return self.source
+        values = []
+        for field, conversion, spec in self.fields:
+            value = context.get(field)
+            if type(value) is str and conversion is None and not spec:
+                values.append(value)
+            else:
+                values.append(_format(value, conversion, spec))
+        return self.printf % tuple(values)
+
+    def render_batch(self, contexts: Sequence[Mapping]) -> List[str]:
+        """render() for many recipients - values gathered column by column"""
+        if not self.fields:
+            return [self.source] * len(contexts)
+        columns = [self._column(field, conversion, spec, contexts) for field, conversion, spec in self.fields]
+        printf = self.printf
+        return [printf % row for row in zip(*columns)]
+
+
+def declared_variables(available_variables) -> Optional[Set[str]]:
+    """available_variables as names - accepts ["{x}", ...], ["x", ...] or {"x": ...}; None = undeclared"""
+    if not available_variables:
+        return None
+    if isinstance(available_variables, str):
+        available_variables = available_variables.replace(",", " ").split()
+    return {str(name).strip().strip("{}").strip() for name in available_variables}
+
+
+@dataclass
+class CompiledTemplate:
+    id: str
+    version: Optional[datetime]
+    texts: Dict[str, CompiledText]
+
+    @property
+    def variables(self) -> Set[str]:
+        return set().union(*(text.variables for text in self.texts.values()))
+
+    def render(self, context: Mapping) -> Dict[str, str]:
+        """subject / html_body / text_body / sms_body for one recipient"""
+        return {field: text.render(context) for field, text in self.texts.items()}
+
+    def render_batch(self, contexts: Sequence[Mapping], fields: Iterable[str] = _FIELDS) -> Dict[str, List[str]]:
+        """field → rendered texts, in the order of contexts"""
+        return {field: self.texts[field].render_batch(contexts) for field in fields}
+
+
+def compile_template(template: NotificationTemplate) -> CompiledTemplate:
+    """Parse and validate every text of a template"""
+    texts = {}
+    for field in _FIELDS:
+        try:
+            texts[field] = CompiledText(getattr(template, field))
+        except TemplateError as e:
+            raise TemplateError(f"{field}: {e}")
+
+    compiled = CompiledTemplate(template.id, template.updated_at, texts)
+    declared = declared_variables(template.available_variables)
+    if declared is not None:
+        unknown = compiled.variables - declared - set(CUSTOMER_VARIABLES)
+        if unknown:
+            raise TemplateError(
+                f"Template '{template.code}' uses undeclared variables: "
+                + ", ".join(f"{{{name}}}" for name in sorted(unknown))
+            )
+    return compiled
+
+
+class TemplateRenderer:
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._compiled: "OrderedDict[Tuple[str, Optional[datetime]], CompiledTemplate]" = OrderedDict()
+
+    def compiled(self, template: NotificationTemplate) -> CompiledTemplate:
+        """Cached compile - raises TemplateError for invalid templates"""
+        key = (template.id, template.updated_at)
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            self._compiled.move_to_end(key)
+            return compiled
+
+        compiled = compile_template(template)
+        self._compiled[key] = compiled
+        if len(self._compiled) > self.max_entries:
+            self._compiled.popitem(last=False)
+        return compiled
+
+    def render(self, template: NotificationTemplate, context: Mapping) -> Dict[str, str]:
+        return self.compiled(template).render(context)
+
+    def render_batch(self, template: NotificationTemplate, contexts: Sequence[Mapping]) -> Dict[str, List[str]]:
+        return self.compiled(template).render_batch(contexts)
+
+
+renderer = TemplateRenderer(settings.TEMPLATE_CACHE_SIZE)
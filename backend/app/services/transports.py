@@ -0,0 +1,200 @@
+"""
+📮 Notification Transports
+Pluggable senders for the notification dispatcher
+
+- FileTransport: one JSON line per message - local development and tests
+- SmtpTransport: any SMTP server (stdlib smtplib, run in a thread)
+- SendGridTransport / TwilioTransport: HTTP APIs with the configured keys
+- Each transport gets its own concurrency limit and token-bucket rate
+  limit (NOTIFY_CONCURRENCY / NOTIFY_RATE_PER_SECOND), so a slow SMS
+  provider never holds up email
+"""
+
+import asyncio
+import json
+import os
+import smtplib
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from email.message import EmailMessage
+from typing import Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.models.database import NotificationType
+
+
+class TransportError(Exception):
+    """Raised when a message could not be handed over - retryable unless told otherwise"""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+@dataclass
+class OutgoingMessage:
+    outbox_id: str
+    type: NotificationType
+    recipient: str
+    subject: Optional[str]
+    body: str
+    html: Optional[str] = None
+
+
+class RateLimiter:
+    """Token bucket - at most `rate` acquisitions per second, bursts up to `rate`"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Transport:
+    name = "transport"
+
+    def __init__(self):
+        self.slots = asyncio.Semaphore(settings.NOTIFY_CONCURRENCY.get(self.name, 1))
+        self.limiter = RateLimiter(settings.NOTIFY_RATE_PER_SECOND.get(self.name, 10.0))
+
+    async def deliver(self, message: OutgoingMessage) -> Optional[str]:
+        """send() within this provider's concurrency and rate limits"""
+        async with self.slots:
+            await self.limiter.acquire()
+            return await self.send(message)
+
+    async def send(self, message: OutgoingMessage) -> Optional[str]:
+        """Hand the message over - returns the provider's message id"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class FileTransport(Transport):
+    name = "file"
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    async def send(self, message: OutgoingMessage) -> Optional[str]:
+        line = json.dumps({**asdict(message), "sent_at": datetime.utcnow().isoformat()}, default=str)
+        with open(os.path.join(self.directory, f"{message.type.value}.jsonl"), "a", encoding="utf-8") as out:
+            out.write(line + "\n")
+        return message.outbox_id
+
+
+class SmtpTransport(Transport):
+    name = "smtp"
+
+    def _send_sync(self, message: OutgoingMessage) -> None:
+        email = EmailMessage()
+        email["From"] = settings.EMAIL_FROM
+        email["To"] = message.recipient
+        email["Subject"] = message.subject or ""
+        email.set_content(message.body)
+        if message.html:
+            email.add_alternative(message.html, subtype="html")
+
+        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=30) as smtp:
+            if settings.SMTP_STARTTLS:
+                smtp.starttls()
+            if settings.SMTP_USERNAME:
+                smtp.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+            smtp.send_message(email)
+
+    async def send(self, message: OutgoingMessage) -> Optional[str]:
+        try:
+            await asyncio.to_thread(self._send_sync, message)
+        except smtplib.SMTPRecipientsRefused as e:
+            raise TransportError(str(e), retryable=False)
+        except (smtplib.SMTPException, OSError) as e:
+            raise TransportError(str(e))
+        return None
+
+
+class _HttpTransport(Transport):
+
+    def __init__(self):
+        super().__init__()
+        self.client = httpx.AsyncClient(timeout=30)
+
+    def _check(self, response: httpx.Response) -> None:
+        if response.status_code == 429 or response.status_code >= 500:
+            raise TransportError(f"{self.name} {response.status_code}")
+        if response.status_code >= 400:
+            raise TransportError(f"{self.name} {response.status_code}: {response.text[:300]}", retryable=False)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class SendGridTransport(_HttpTransport):
+    name = "sendgrid"
+
+    async def send(self, message: OutgoingMessage) -> Optional[str]:
+        content = [{"type": "text/plain", "value": message.body}]
+        if message.html:
+            content.append({"type": "text/html", "value": message.html})
+        try:
+            response = await self.client.post(
+                "https://api.sendgrid.com/v3/mail/send",
+                headers={"Authorization": f"Bearer {settings.SENDGRID_API_KEY}"},
+                json={
+                    "personalizations": [{"to": [{"email": message.recipient}]}],
+                    "from": {"email": settings.EMAIL_FROM},
+                    "subject": message.subject or "",
+                    "content": content,
+                }
+            )
+        except httpx.HTTPError as e:
+            raise TransportError(str(e))
+        self._check(response)
+        return response.headers.get("X-Message-Id")
+
+
+class TwilioTransport(_HttpTransport):
+    name = "twilio"
+
+    async def send(self, message: OutgoingMessage) -> Optional[str]:
+        try:
+            response = await self.client.post(
+                f"https://api.twilio.com/2010-04-01/Accounts/{settings.TWILIO_ACCOUNT_SID}/Messages.json",
+                auth=(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN),
+                data={"To": message.recipient, "From": settings.TWILIO_FROM_NUMBER, "Body": message.body}
+            )
+        except httpx.HTTPError as e:
+            raise TransportError(str(e))
+        self._check(response)
+        return response.json().get("sid")
+
+
+def build_transports() -> Dict[NotificationType, Transport]:
+    """One transport per channel, as configured"""
+    email = {
+        "file": lambda: FileTransport(settings.NOTIFICATION_FILE_DIR),
+        "smtp": SmtpTransport,
+        "sendgrid": SendGridTransport,
+    }[settings.EMAIL_TRANSPORT]
+    sms = {
+        "file": lambda: FileTransport(settings.NOTIFICATION_FILE_DIR),
+        "twilio": TwilioTransport,
+    }[settings.SMS_TRANSPORT]
+    return {NotificationType.EMAIL: email(), NotificationType.SMS: sms()}
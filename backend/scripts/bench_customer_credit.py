@@ -0,0 +1,106 @@
+"""
+Customer Credit Contention Benchmark
+Many lanes selling on account to the same wholesale customer - checks the limit holds
+
+    python scripts/bench_customer_credit.py                          # 5k charges of 1.00 against a 1000.00 limit
+    python scripts/bench_customer_credit.py --charges 20000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from decimal import Decimal
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, func, select
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.database import Customer, CustomerLedgerEntry, Organization
+from app.services.customer_credit import CreditError, CustomerCreditService
+
+
+async def run(charges: int, amount: Decimal, limit: Decimal, concurrency: int):
+    service = CustomerCreditService(settings.STATEMENT_BATCH_SIZE)
+
+    async with AsyncSessionLocal() as db:
+        org_id = (await db.execute(select(Organization.id).limit(1))).scalar()
+        if not org_id:
+            print("  No organization found - run scripts/seed_data.py first")
+            return
+        customer = Customer(
+            organization_id=org_id,
+            first_name="Bench",
+            last_name="Wholesale",
+            credit_limit=limit,
+            current_balance=0
+        )
+        db.add(customer)
+        await db.flush()
+        customer_id = customer.id
+        await db.commit()
+
+    print(f"\n💳 {charges} charges of {amount} against a {limit} limit, concurrency {concurrency}")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    stats = {"ok": 0, "rejected": 0}
+
+    async def charge():
+        async with semaphore, AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            try:
+                await service.charge(db, org_id, customer_id, amount)
+                await db.commit()
+                stats["ok"] += 1
+            except CreditError:
+                await db.rollback()
+                stats["rejected"] += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(charge() for _ in range(charges)))
+    elapsed = time.perf_counter() - start
+
+    async with AsyncSessionLocal() as db:
+        final = (await db.execute(
+            select(Customer.current_balance).where(Customer.id == customer_id)
+        )).scalar()
+        entries, charged = (await db.execute(
+            select(func.count(CustomerLedgerEntry.id), func.coalesce(func.sum(CustomerLedgerEntry.amount), 0))
+            .where(CustomerLedgerEntry.customer_id == customer_id)
+        )).one()
+
+        await db.execute(delete(CustomerLedgerEntry).where(CustomerLedgerEntry.customer_id == customer_id))
+        await db.execute(delete(Customer).where(Customer.id == customer_id))
+        await db.commit()
+
+    latencies.sort()
+    print(f"  {charges / elapsed:>10,.0f} charges/s over {elapsed:.2f}s")
+    print(f"  latency p50 {statistics.median(latencies) * 1000:.1f}ms  "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f}ms")
+    print(f"  accepted {stats['ok']}, rejected {stats['rejected']}, final balance {final}")
+
+    assert final <= limit, "balance went over the credit limit"
+    assert entries == stats["ok"], "ledger and accepted charges disagree"
+    assert final == charged, "balance and ledger disagree"
+    assert stats["ok"] == min(charges, int(limit / amount)), "accepted charges don't match the limit"
+    print("  ✅ limit never exceeded")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--charges", type=int, default=5_000)
+    parser.add_argument("--amount", type=Decimal, default=Decimal("1.00"))
+    parser.add_argument("--limit", type=Decimal, default=Decimal("1000.00"))
+    parser.add_argument("--concurrency", type=int, default=settings.DATABASE_POOL_SIZE)
+    args = parser.parse_args()
+
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(run(args.charges, args.amount, args.limit, args.concurrency))
@@ -0,0 +1,75 @@
+"""
+Customer Lookup Benchmark
+Builds the in-memory prefix index over synthetic customers and times
+type-ahead queries - no database needed
+
+    python scripts/bench_customer_lookup.py                      # 1M customers
+    python scripts/bench_customer_lookup.py --customers 200000 --queries 5000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.customer_lookup import PrefixIndex, normalize_phone
+
+FIRST = ["ahmet", "mehmet", "ayşe", "fatma", "ali", "zeynep", "mustafa", "elif", "emre", "can",
+         "deniz", "selin", "burak", "ece", "murat", "esra", "hakan", "derya", "kerem", "gizem"]
+
+
+def customers(n: int):
+    now = datetime.utcnow()
+    for i in range(n):
+        first = random.choice(FIRST)
+        last = "".join(random.choices(string.ascii_lowercase, k=random.randint(4, 9)))
+        phone = f"05{random.randint(300000000, 599999999)}"
+        yield (
+            f"c{i}", first.title(), last.title(), f"{first}.{last}{i}@example.com",
+            phone, normalize_phone(phone), random.random() * 50_000, True, now,
+        )
+
+
+def run(n: int, queries: int, limit: int):
+    rows = list(customers(n))
+    start = time.perf_counter()
+    index = PrefixIndex.build(rows)
+    print(f"  Built {len(index.keys):,} keys for {n:,} customers in {time.perf_counter() - start:.1f}s")
+
+    for cid, first, last, email, phone, e164, spent, active, at in random.sample(rows, min(2000, n)):
+        index.upsert((cid, first, last, email, phone, e164, spent + 100, active, datetime.utcnow()))
+
+    samples = random.sample(rows, queries)
+    kinds = {
+        "name prefix": lambda r: r[1][:random.randint(2, 4)],
+        "full name": lambda r: f"{r[1]} {r[2][:2]}",
+        "email": lambda r: r[3][:6],
+        "last 4 digits": lambda r: r[4][-4:],
+        "phone, typed": lambda r: f"0{r[4][1:4]} {r[4][4:7]} {r[4][7:]}",
+    }
+    for kind, make in kinds.items():
+        timings = []
+        for row in samples:
+            query = make(row)
+            t = time.perf_counter()
+            index.suggest(query, limit)
+            timings.append((time.perf_counter() - t) * 1000)
+        timings.sort()
+        print(f"  {kind:<14} p50 {statistics.median(timings):6.2f} ms   "
+              f"p99 {timings[int(len(timings) * 0.99) - 1]:6.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--customers", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+    run(args.customers, args.queries, args.limit)
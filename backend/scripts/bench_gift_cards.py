@@ -0,0 +1,103 @@
+"""
+Gift Card Contention Benchmark
+Many lanes redeeming the same card at once - checks for double spends
+
+    python scripts/bench_gift_cards.py                          # 5k debits of 1.00 on a 1000.00 card
+    python scripts/bench_gift_cards.py --debits 20000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from decimal import Decimal
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, func, select
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.database import Organization
+from app.models.global_features import GiftCard, GiftCardTransaction
+from app.services.gift_cards import GiftCardDebit, GiftCardError, GiftCardService
+
+
+async def run(debits: int, amount: Decimal, balance: Decimal, concurrency: int):
+    service = GiftCardService()
+
+    async with AsyncSessionLocal() as db:
+        org_id = (await db.execute(select(Organization.id).limit(1))).scalar()
+        if not org_id:
+            print("  No organization found - run scripts/seed_data.py first")
+            return
+        card = await service.issue(db, org_id, balance)
+        card_id, code = card.id, card.code
+        await db.commit()
+
+    print(f"\n🎁 {debits} debits of {amount} on one card ({balance}), concurrency {concurrency}")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    stats = {"ok": 0, "rejected": 0}
+
+    async def redeem():
+        async with semaphore, AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            try:
+                card_id_, _ = await service.resolve(db, org_id, code)
+                await service.debit_many(db, [GiftCardDebit(card_id_, amount)])
+                await db.commit()
+                stats["ok"] += 1
+            except GiftCardError:
+                await db.rollback()
+                stats["rejected"] += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(redeem() for _ in range(debits)))
+    elapsed = time.perf_counter() - start
+
+    async with AsyncSessionLocal() as db:
+        final = (await db.execute(
+            select(GiftCard.current_balance).where(GiftCard.id == card_id)
+        )).scalar()
+        usages, spent = (await db.execute(
+            select(func.count(GiftCardTransaction.id), func.coalesce(func.sum(-GiftCardTransaction.amount), 0))
+            .where(
+                GiftCardTransaction.gift_card_id == card_id,
+                GiftCardTransaction.transaction_type == "usage"
+            )
+        )).one()
+
+        await db.execute(delete(GiftCardTransaction).where(GiftCardTransaction.gift_card_id == card_id))
+        await db.execute(delete(GiftCard).where(GiftCard.id == card_id))
+        await db.commit()
+
+    latencies.sort()
+    print(f"  {debits / elapsed:>10,.0f} debits/s over {elapsed:.2f}s")
+    print(f"  latency p50 {statistics.median(latencies) * 1000:.1f}ms  "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f}ms")
+    print(f"  accepted {stats['ok']}, rejected {stats['rejected']}, final balance {final}")
+
+    assert final >= 0, "balance went negative"
+    assert usages == stats["ok"], "ledger and accepted debits disagree"
+    assert final == balance - spent, "balance and ledger disagree"
+    assert stats["ok"] == min(debits, int(balance / amount)), "accepted debits don't match the balance"
+    print("  ✅ no double spends")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--debits", type=int, default=5_000)
+    parser.add_argument("--amount", type=Decimal, default=Decimal("1.00"))
+    parser.add_argument("--balance", type=Decimal, default=Decimal("1000.00"))
+    parser.add_argument("--concurrency", type=int, default=settings.DATABASE_POOL_SIZE)
+    args = parser.parse_args()
+
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(run(args.debits, args.amount, args.balance, args.concurrency))
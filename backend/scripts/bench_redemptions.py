@@ -0,0 +1,129 @@
+"""
+Discount Code Redemption Load Test
+Flash-coupon redemptions against one code - checks for oversells
+
+    python scripts/bench_redemptions.py                         # 20k attempts at 5k/s, limit 1000
+    python scripts/bench_redemptions.py --limit 500 --customers # spread over real customers
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from decimal import Decimal
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, func, select
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.database import CodeUsage, Customer, DiscountCode, Organization
+from app.services.redemptions import CodeRedemptions, RedemptionError
+
+
+async def run(attempts: int, rate: int, limit: int, concurrency: int, with_customers: bool):
+    async with AsyncSessionLocal() as db:
+        org_id = (await db.execute(select(Organization.id).limit(1))).scalar()
+        if not org_id:
+            print("  No organization found - run scripts/seed_data.py first")
+            return
+        customers = [None]
+        if with_customers:
+            customers = (await db.execute(
+                select(Customer.id).where(Customer.organization_id == org_id).limit(1000)
+            )).scalars().all() or [None]
+
+        code_str = f"BENCH-{uuid.uuid4().hex[:8].upper()}"
+        code = DiscountCode(
+            organization_id=org_id,
+            code=code_str,
+            discount_type="percentage",
+            discount_value=Decimal(10),
+            usage_limit_per_customer=1 if with_customers else None,
+            total_usage_limit=limit,
+        )
+        db.add(code)
+        await db.flush()
+        code_id = code.id
+        await db.commit()
+
+    print(f"\n🎟️  {attempts} redemptions of {code_str} at {rate}/s, limit {limit}, concurrency {concurrency}")
+
+    manager = CodeRedemptions(negative_ttl_seconds=60)
+    semaphore = asyncio.Semaphore(concurrency)
+    stats = {"redeemed": 0, "rejected_db": 0, "rejected_cache": 0}
+
+    async def redeem(customer_id):
+        if manager.is_exhausted(code_id, customer_id):
+            stats["rejected_cache"] += 1
+            return
+        async with semaphore, AsyncSessionLocal() as db:
+            try:
+                await manager.redeem(db, code_id, customer_id, None, Decimal("1.00"))
+                await db.commit()
+                stats["redeemed"] += 1
+            except RedemptionError:
+                await db.rollback()
+                stats["rejected_db"] += 1
+
+    # Fire at a fixed arrival rate rather than as fast as possible
+    tasks = []
+    start = time.perf_counter()
+    for i in range(attempts):
+        due = start + i / rate
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(redeem(random.choice(customers))))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    async with AsyncSessionLocal() as db:
+        counter = (await db.execute(
+            select(DiscountCode.current_usage_count).where(DiscountCode.id == code_id)
+        )).scalar()
+        usages = (await db.execute(
+            select(func.count(CodeUsage.id)).where(CodeUsage.code_id == code_id)
+        )).scalar()
+        per_customer_max = (await db.execute(
+            select(func.count(CodeUsage.id))
+            .where(CodeUsage.code_id == code_id)
+            .group_by(CodeUsage.customer_id)
+            .order_by(func.count(CodeUsage.id).desc())
+            .limit(1)
+        )).scalar() or 0
+
+        await db.execute(delete(CodeUsage).where(CodeUsage.code_id == code_id))
+        await db.execute(delete(DiscountCode).where(DiscountCode.id == code_id))
+        await db.commit()
+
+    print(f"  {attempts / elapsed:>10,.0f} attempts/s over {elapsed:.2f}s")
+    print(f"  redeemed {stats['redeemed']}, rejected by DB {stats['rejected_db']}, "
+          f"rejected from cache {stats['rejected_cache']}")
+    print(f"  counter {counter}, CodeUsage rows {usages}")
+
+    oversold = max(counter, usages) - limit
+    assert counter == usages == stats["redeemed"], "counter and usage log disagree"
+    assert oversold <= 0, f"oversold by {oversold}"
+    if with_customers and customers != [None]:
+        assert per_customer_max <= 1, "per-customer limit exceeded"
+    print("  ✅ zero oversells")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--attempts", type=int, default=20_000)
+    parser.add_argument("--rate", type=int, default=5_000, help="Redemption attempts per second")
+    parser.add_argument("--limit", type=int, default=1_000, help="total_usage_limit of the code")
+    parser.add_argument("--concurrency", type=int, default=settings.DATABASE_POOL_SIZE)
+    parser.add_argument("--customers", action="store_true", help="Redeem as existing customers (limit 1 each)")
+    args = parser.parse_args()
+
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(run(args.attempts, args.rate, args.limit, args.concurrency, args.customers))
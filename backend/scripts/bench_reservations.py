@@ -0,0 +1,119 @@
+"""
+Stock Reservation Benchmark
+Hold/release throughput at 10k concurrent baskets
+
+    python scripts/bench_reservations.py            # timer wheel only (no DB)
+    python scripts/bench_reservations.py --db       # full hold/release against DATABASE_URL
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.database import Product
+from app.services.reservations import ReservationManager, ReservationError, TimerWheel
+
+
+def report(label: str, count: int, elapsed: float):
+    print(f"  {label:<28} {count:>8} ops in {elapsed:7.3f}s  →  {count / elapsed:>12,.0f} ops/s")
+
+
+def bench_wheel(baskets: int):
+    """Schedule, refresh, cancel and expire baskets on the wheel"""
+    print(f"\n⏱️  Timer wheel - {baskets} baskets")
+    wheel = TimerWheel(tick_seconds=1.0)
+    ttl = settings.RESERVATION_TTL_MINUTES * 60
+
+    start = time.perf_counter()
+    for i in range(baskets):
+        wheel.schedule(f"basket-{i}", ttl)
+    report("schedule", baskets, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(baskets):
+        wheel.schedule(f"basket-{i}", ttl + random.randint(0, 60))
+    report("refresh (hold on scan)", baskets, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(0, baskets, 2):
+        wheel.cancel(f"basket-{i}")
+    report("cancel (checkout)", baskets // 2, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    ticks = ttl + 61
+    fired = 0
+    for _ in range(ticks):
+        fired += len(wheel.advance())
+    report(f"expire ({ticks} ticks)", fired, time.perf_counter() - start)
+    assert len(wheel) == 0
+
+
+async def bench_db(baskets: int, lines: int, concurrency: int):
+    """Hold then release `lines` products in each basket against the real database"""
+    print(f"\n🗄️  Database - {baskets} baskets × {lines} lines, concurrency {concurrency}")
+    manager = ReservationManager(ttl_minutes=settings.RESERVATION_TTL_MINUTES, tick_seconds=1.0)
+
+    async with AsyncSessionLocal() as db:
+        rows = (
+            await db.execute(
+                select(Product.id, Product.organization_id)
+                .where(Product.is_active == True)
+                .limit(500)
+            )
+        ).all()
+    if not rows:
+        print("  No products found - run scripts/seed_data.py first")
+        return
+
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def hold_basket(basket_id):
+        nonlocal failures
+        async with semaphore, AsyncSessionLocal() as db:
+            for product_id, org_id in random.sample(rows, min(lines, len(rows))):
+                try:
+                    await manager.hold(db, org_id, basket_id, product_id, 1)
+                except ReservationError:
+                    failures += 1
+
+    async def release_basket(basket_id):
+        async with semaphore, AsyncSessionLocal() as db:
+            await manager.release(db, basket_id)
+
+    basket_ids = [f"bench-{i}" for i in range(baskets)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(hold_basket(b) for b in basket_ids))
+    report("hold", baskets * lines, time.perf_counter() - start)
+    if failures:
+        print(f"  ⚠️  {failures} holds rejected (out of stock)")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(release_basket(b) for b in basket_ids))
+    report("release", baskets, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--baskets", type=int, default=10_000)
+    parser.add_argument("--lines", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=settings.DATABASE_POOL_SIZE)
+    parser.add_argument("--db", action="store_true", help="Benchmark hold/release against the database")
+    args = parser.parse_args()
+
+    bench_wheel(args.baskets)
+    if args.db:
+        if sys.platform == "win32":
+            asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+        asyncio.run(bench_db(args.baskets, args.lines, args.concurrency))
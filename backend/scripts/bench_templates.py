@@ -0,0 +1,116 @@
+"""
+Template Rendering Benchmark
+Renders a marketing template for synthetic recipients three ways - str.format
+per message (re-parsed every time), the compiled render per message and the
+compiled batch render - no database needed
+
+    python scripts/bench_templates.py                          # 500k recipients
+    python scripts/bench_templates.py --recipients 100000 --batch 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.templates import TemplateRenderer
+
+FIRST = ["Ahmet", "Mehmet", "Ayşe", "Fatma", "Ali", "Zeynep", "Mustafa", "Elif", "Emre", "Can"]
+
+TEMPLATE = SimpleNamespace(
+    id="bench", code="spring_sale", updated_at=datetime.utcnow(),
+    subject="{first_name}, {discount}% off everything until {ends_on}",
+    html_body=(
+        "<html><body><h1>Hello {customer_name}!</h1>"
+        "<p>Your {tier} card has {points} points. Use code <b>{code}</b> for {discount}% off "
+        "at {store_name} until {ends_on}.</p><p><a href=\"{unsubscribe_url}\">Unsubscribe</a></p>"
+        "</body></html>"
+    ),
+    text_body=(
+        "Hello {customer_name}!\n\nYour {tier} card has {points} points. Use code {code} for "
+        "{discount}% off at {store_name} until {ends_on}.\n\nUnsubscribe: {unsubscribe_url}"
+    ),
+    sms_body="{first_name}: %{discount} indirim, kod {code}. {store_name}",
+    available_variables=[
+        "{tier}", "{points}", "{code}", "{discount}", "{store_name}", "{ends_on}", "{unsubscribe_url}"
+    ],
+)
+
+FIELDS = ("subject", "html_body", "text_body", "sms_body")
+
+
+def recipients(n: int):
+    for i in range(n):
+        first = random.choice(FIRST)
+        yield {
+            "first_name": first,
+            "last_name": f"Yılmaz{i % 97}",
+            "customer_name": f"{first} Yılmaz{i % 97}",
+            "tier": random.choice(["Bronze", "Silver", "Gold"]),
+            "points": random.randint(0, 20_000),
+            "code": f"SPR{i:07d}",
+            "discount": 20,
+            "store_name": "Kadıköy",
+            "ends_on": "30.04",
+            "unsubscribe_url": f"https://example.com/u/{i:x}",
+        }
+
+
+def naive(contexts):
+    out = defaultdict(list)
+    for context in contexts:
+        for field in FIELDS:
+            out[field].append(getattr(TEMPLATE, field).format_map(defaultdict(str, context)))
+    return out
+
+
+def per_message(renderer, contexts):
+    out = defaultdict(list)
+    for context in contexts:
+        for field, text in renderer.render(TEMPLATE, context).items():
+            out[field].append(text)
+    return out
+
+
+def batched(renderer, contexts, batch: int):
+    out = defaultdict(list)
+    for i in range(0, len(contexts), batch):
+        for field, texts in renderer.render_batch(TEMPLATE, contexts[i:i + batch]).items():
+            out[field].extend(texts)
+    return out
+
+
+def run(n: int, batch: int):
+    contexts = list(recipients(n))
+    renderer = TemplateRenderer(100)
+
+    results = {}
+    for name, render in (
+        ("str.format", lambda: naive(contexts)),
+        ("compiled", lambda: per_message(renderer, contexts)),
+        (f"batch {batch}", lambda: batched(renderer, contexts, batch)),
+    ):
+        start = time.perf_counter()
+        results[name] = render()
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<12} {elapsed:6.2f}s   {n / elapsed:>10,.0f} messages/s")
+
+    reference = results["str.format"]
+    for name, result in results.items():
+        assert all(result[f] == reference[f] for f in FIELDS), f"{name} renders differently"
+    print("  ✅ All renderers agree")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recipients", type=int, default=500_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    args = parser.parse_args()
+    run(args.recipients, args.batch)
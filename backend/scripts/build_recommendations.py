@@ -0,0 +1,37 @@
+"""
+Recommendation Build
+Adds the orders since the last build to the co-occurrence matrix and
+publishes new top-K similar products - run from cron, e.g. nightly
+
+    python scripts/build_recommendations.py
+    python scripts/build_recommendations.py --full    # From all orders
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.recommendations import recommender
+
+
+async def run(full):
+    meta = await recommender.build(full)
+    print(f"✅ {meta['name']}: {meta['orders']} orders read in {meta['read_seconds']}s "
+          f"({meta['skipped_orders']} oversized skipped), {meta['products']} products, "
+          f"computed in {meta['compute_seconds']}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--full", action="store_true", help="Rebuild from every order instead of the new ones")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(run(args.full))
@@ -6,7 +6,10 @@ Creates all 70+ tables with indexes
 import asyncio
 from sqlalchemy.ext.asyncio import create_async_engine
 from app.models.database import Base
+from app.models import global_features  # noqa: F401 - registers the global tables
 from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.services.partitions import partitions
 
 async def create_all_tables():
     """Create all database tables"""
@@ -24,6 +27,10 @@ async def create_all_tables():
     
     await engine.dispose()
     
+    # Monthly partitions for the partitioned tables
+    async with AsyncSessionLocal() as db:
+        await partitions.ensure(db)
+    
     print("✅ All database tables created successfully!")
     print(f"📊 Total tables: {len(Base.metadata.tables)}")
     print("\nCreated tables:")
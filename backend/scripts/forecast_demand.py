@@ -0,0 +1,43 @@
+"""
+Demand Forecast Job
+Fits daily sales per product and branch, writes reorder points and
+order-up-to levels - run nightly from cron
+
+    python scripts/forecast_demand.py                   # every organization
+    python scripts/forecast_demand.py --org <organization_id>
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+
+from app.db.session import AsyncSessionLocal
+from app.models.database import Organization
+from app.services.forecasting import forecaster
+
+
+async def run(org_id):
+    async with AsyncSessionLocal() as db:
+        org_ids = [org_id] if org_id else (await db.execute(select(Organization.id))).scalars().all()
+        for org in org_ids:
+            start = time.perf_counter()
+            result = await forecaster.run(db, org)
+            print(f"✅ {org}: {result.forecasted}/{result.products} products forecast "
+                  f"({result.series} product × branch series) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--org", default=None)
+    args = parser.parse_args()
+
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(run(args.org))
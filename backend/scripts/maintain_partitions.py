@@ -0,0 +1,64 @@
+"""
+Partition Maintenance
+Creates the coming months' partitions and archives months past retention
+to Parquet - run daily from cron
+
+    python scripts/maintain_partitions.py                     # Create ahead + archive expired
+    python scripts/maintain_partitions.py --list
+    python scripts/maintain_partitions.py --archive audit_logs 2024-01
+    python scripts/maintain_partitions.py --convert           # Existing databases: partition the tables once
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.session import AsyncSessionLocal
+from app.services.partitions import month_start, partitioned_tables, partitions
+
+
+async def run(args):
+    if args.list:
+        async with AsyncSessionLocal() as db:
+            for table, column in partitioned_tables().items():
+                print(f"{table} (by {column})")
+                for p in await partitions.partitions(db, table):
+                    print(f"  {p.name:<32} {p.start or 'DEFAULT'} → {p.end or ''}")
+        return
+
+    if args.convert:
+        for table in partitioned_tables():
+            async with AsyncSessionLocal() as db:
+                copied = await partitions.convert(db, table)
+            print(f"✅ {table}: {copied} rows copied into the partitioned table" if copied else f"  {table}: already partitioned")
+        return
+
+    if args.archive:
+        table, month = args.archive
+        result = await partitions.archive(table, month_start(datetime.strptime(month, "%Y-%m")))
+        print(f"✅ {result['partition']}: {result['rows']} rows → {result['path']}")
+        return
+
+    result = await partitions.maintain()
+    print(f"✅ {len(result['created'])} partitions created, {len(result['archived'])} archived")
+    for archived in result["archived"]:
+        print(f"  {archived['partition']}: {archived['rows']} rows → {archived['path']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--list", action="store_true")
+    parser.add_argument("--convert", action="store_true", help="Rebuild unpartitioned tables as partitioned")
+    parser.add_argument("--archive", nargs=2, metavar=("TABLE", "YYYY-MM"))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(run(args))
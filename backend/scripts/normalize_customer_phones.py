@@ -0,0 +1,104 @@
+"""
+Customer Phone Backfill
+Fills Customer.phone_e164 for rows written before phone normalization -
+run once after deploying, or after changing DEFAULT_PHONE_COUNTRY_CODE.
+Also stamps updated_at on rows that have none (created_at, else now), so
+the till lookup index can refresh by delta, and bumps it on every row
+whose phone changes so other workers pick the new number up
+
+    python scripts/normalize_customer_phones.py
+    python scripts/normalize_customer_phones.py --org <organization_id> --batch 20000 --all
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+
+from sqlalchemy import String, and_, column, func, select, update, values
+
+from app.db.session import AsyncSessionLocal
+from app.models.database import Customer
+from app.services.customer_lookup import customer_lookup, normalize_phone
+
+
+async def stamp_updated_at(db, org_id, batch_size) -> int:
+    """updated_at = COALESCE(updated_at, created_at, now) for rows without one, in id batches"""
+    stamped = 0
+    after = ""
+    while True:
+        conditions = [Customer.id > after, Customer.updated_at == None]
+        if org_id:
+            conditions.append(Customer.organization_id == org_id)
+        ids = (await db.execute(
+            select(Customer.id).where(and_(*conditions)).order_by(Customer.id).limit(batch_size)
+        )).scalars().all()
+        if not ids:
+            return stamped
+        result = await db.execute(
+            update(Customer)
+            .where(Customer.id.in_(ids))
+            .values(updated_at=func.coalesce(Customer.updated_at, Customer.created_at, datetime.utcnow()))
+            .execution_options(synchronize_session=False)
+        )
+        stamped += result.rowcount
+        await db.commit()
+        after = ids[-1]
+
+
+async def run(org_id, batch_size, everything):
+    start = time.perf_counter()
+    updated = 0
+    after = ""
+    async with AsyncSessionLocal() as db:
+        stamped = await stamp_updated_at(db, org_id, batch_size)
+        while True:
+            conditions = [Customer.id > after, Customer.phone != None]
+            if org_id:
+                conditions.append(Customer.organization_id == org_id)
+            if not everything:
+                conditions.append(Customer.phone_e164 == None)
+            batch = (await db.execute(
+                select(Customer.id, Customer.phone)
+                .where(and_(*conditions))
+                .order_by(Customer.id)
+                .limit(batch_size)
+            )).all()
+            if not batch:
+                break
+
+            rows = [(cid, normalize_phone(phone)) for cid, phone in batch]
+            rows = [row for row in rows if row[1]]
+            if rows:
+                data = values(column("id", String), column("phone_e164", String), name="phones").data(rows)
+                result = await db.execute(
+                    update(Customer)
+                    .where(and_(Customer.id == data.c.id, Customer.phone_e164.is_distinct_from(data.c.phone_e164)))
+                    .values(phone_e164=data.c.phone_e164, updated_at=datetime.utcnow())
+                    .execution_options(synchronize_session=False)
+                )
+                updated += result.rowcount
+            await db.commit()
+            after = batch[-1][0]
+
+    customer_lookup.invalidate()
+    print(f"✅ {updated} phones normalized, {stamped} rows stamped with updated_at "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--org", default=None)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--all", action="store_true", help="Re-normalize phones that already have a value")
+    args = parser.parse_args()
+
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(run(args.org, args.batch, args.all))
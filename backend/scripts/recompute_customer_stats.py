@@ -0,0 +1,48 @@
+"""
+Customer Stats Backfill
+Rebuilds total_orders / total_spent / lifetime_value / last_purchase_at,
+loyalty tier and segment from orders - run once after deploying, or to repair
+
+    python scripts/recompute_customer_stats.py
+    python scripts/recompute_customer_stats.py --org <organization_id> --batch 50000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+
+from app.db.session import AsyncSessionLocal
+from app.models.database import Organization
+from app.services import customer_stats
+from app.services.loyalty import loyalty
+
+
+async def run(org_id, batch_size):
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        org_ids = [org_id] if org_id else (await db.execute(select(Organization.id))).scalars().all()
+        updated = 0
+        for org in org_ids:
+            updated += await customer_stats.recompute(db, org, batch_size, tiers=await loyalty.tiers(db, org))
+        # Programs with their own default tier
+        retiered = await loyalty.recompute_tiers(db, org_id)
+    print(f"✅ {updated} customers with orders recomputed, {retiered} re-tiered "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--org", default=None)
+    parser.add_argument("--batch", type=int, default=10_000)
+    args = parser.parse_args()
+
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(run(args.org, args.batch))
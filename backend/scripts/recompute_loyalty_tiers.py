@@ -0,0 +1,37 @@
+"""
+Nightly Loyalty Tier Job
+Re-tiers every customer of every organization with an active loyalty
+program from lifetime spend - one set-based UPDATE per organization
+
+    python scripts/recompute_loyalty_tiers.py
+    python scripts/recompute_loyalty_tiers.py --org <organization_id>
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.session import AsyncSessionLocal
+from app.services.loyalty import loyalty
+
+
+async def run(org_id):
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        changed = await loyalty.recompute_tiers(db, org_id)
+    print(f"✅ {changed} customers changed tier in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--org", default=None)
+    args = parser.parse_args()
+
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(run(args.org))
@@ -0,0 +1,41 @@
+"""
+Sales Rollup
+Rebuilds the hourly sales rollups the analytics API reads - run from cron
+every few minutes, or with --since to backfill
+
+    python scripts/rollup_sales.py
+    python scripts/rollup_sales.py --since 2024-01-01
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.session import AsyncSessionLocal
+from app.services.analytics import analytics
+
+
+async def run(since):
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        result = await analytics.rollup(db, since)
+    print(f"✅ {result['start']} → {result['end']} rolled up ({result['hours']} hours, "
+          f"{result['emptied']} emptied) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="Rebuild from this date")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(run(args.since))
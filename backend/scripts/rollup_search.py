@@ -0,0 +1,43 @@
+"""
+Search Rollup
+Rebuilds the hourly search rollups and reports the boost table size -
+run from cron every few minutes, or with --since to backfill
+
+    python scripts/rollup_search.py
+    python scripts/rollup_search.py --since 2024-01-01
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.session import AsyncSessionLocal
+from app.services.search_analytics import search_analytics
+
+
+async def run(since):
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        result = await search_analytics.rollup(db, since)
+        boosted = await search_analytics.load_boosts(db)
+    rows = ", ".join(f"{table}: {count}" for table, count in result["rows"].items())
+    print(f"✅ {result['start']} → {result['end']} rolled up ({rows}) in {time.perf_counter() - start:.1f}s, "
+          f"{boosted} queries boosted")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="Rebuild from this date")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(run(args.since))
@@ -0,0 +1,44 @@
+"""
+Notification Dispatcher
+Drains notification_outbox - renders and sends what checkout and refunds
+queued. Several processes may run side by side.
+
+    python scripts/run_dispatcher.py
+    python scripts/run_dispatcher.py --once      # One batch, then exit
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.notifications import dispatcher
+
+
+async def run(once):
+    if once:
+        handled = await dispatcher.dispatch_batch()
+        print(f"✅ {handled} notifications handled")
+        return
+
+    loop = asyncio.get_running_loop()
+    if sys.platform != "win32":
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, dispatcher.stop)
+    await dispatcher.run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--once", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(run(args.once))
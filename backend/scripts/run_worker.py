@@ -0,0 +1,43 @@
+"""
+Background Job Worker
+Claims jobs from the background_jobs table and runs them - start as many
+processes as needed, on any host that reaches the database
+
+    python scripts/run_worker.py
+    python scripts/run_worker.py --concurrency 8 --types exports.write,products.bulk_import
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services import job_handlers  # noqa: F401 - registers the job types
+from app.services.jobs import JobWorker, jobs
+
+
+async def run(concurrency, job_types):
+    worker = JobWorker(jobs, concurrency, settings.JOB_POLL_SECONDS, job_types)
+    loop = asyncio.get_running_loop()
+    if sys.platform != "win32":
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, worker.stop)
+    await worker.run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=settings.JOB_CONCURRENCY)
+    parser.add_argument("--types", default=None, help="Comma-separated job types (default: all)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(run(args.concurrency, args.types.split(",") if args.types else None))
@@ -0,0 +1,45 @@
+"""
+RFM Segmentation Job
+Scores recency / frequency / monetary and sets Customer.segment
+
+    python scripts/segment_customers.py                 # every organization, incremental
+    python scripts/segment_customers.py --full          # re-score everybody, new cut points
+    python scripts/segment_customers.py --org <organization_id>
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+
+from app.db.session import AsyncSessionLocal
+from app.models.database import Organization
+from app.services.segmentation import segmentation
+
+
+async def run(org_id, full):
+    async with AsyncSessionLocal() as db:
+        org_ids = [org_id] if org_id else (await db.execute(select(Organization.id))).scalars().all()
+        for org in org_ids:
+            start = time.perf_counter()
+            result = await segmentation.run(db, org, full=full)
+            kind = "full" if result.is_full else "incremental"
+            print(f"✅ {org}: {result.customers_scored} customers scored ({kind}) "
+                  f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--org", default=None)
+    parser.add_argument("--full", action="store_true")
+    args = parser.parse_args()
+
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(run(args.org, args.full))
@@ -0,0 +1,119 @@
+"""
+🧪 CAMPAIGN PER-CUSTOMER LIMIT
+Same customer checks out twice under usage_limit_per_customer = 1: the
+first sale gets the campaign, the second is priced without it instead of
+failing at redemption. Runs without a database (pytest tests/test_campaign_limits.py)
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.dialects import postgresql
+
+from app.models.database import Campaign, CampaignType, CampaignUsage
+from app.services.basket import BasketLine, build_basket
+from app.services.promotions import PromotionEngine, PromotionIndex, _compile_campaign
+from app.services.redemptions import CodeRedemptions
+
+ORG = "org-1"
+CUSTOMER = "customer-1"
+
+
+class Result:
+    def __init__(self, rows=(), value=None):
+        self.rows = list(rows)
+        self.value = value
+
+    def all(self):
+        return self.rows
+
+    def scalar(self):
+        return self.value
+
+    def first(self):
+        return self.value
+
+
+class UsageDB:
+    """Answers the campaign usage statements from an in-memory CampaignUsage list"""
+
+    def __init__(self, campaign: Campaign):
+        self.campaign = campaign
+        self.usages = []
+
+    def _used(self, campaign_id, customer_id):
+        return sum(1 for u in self.usages if u.campaign_id == campaign_id and u.customer_id == customer_id)
+
+    async def execute(self, stmt):
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        if sql.startswith("SELECT campaign_usage.campaign_id"):
+            used = self._used(self.campaign.id, CUSTOMER)
+            return Result([(self.campaign.id, used)] if used else [])
+        if "usage_limit_per_customer" in sql:
+            return Result(value=self.campaign.usage_limit_per_customer)
+        if "pg_advisory_xact_lock" in sql:
+            return Result()
+        if sql.startswith("SELECT count(campaign_usage.id)"):
+            return Result(value=self._used(self.campaign.id, CUSTOMER))
+        if sql.startswith("UPDATE campaigns"):
+            self.campaign.current_usage_count += 1
+            return Result(value=SimpleNamespace(
+                current_usage_count=self.campaign.current_usage_count, total_usage_limit=None
+            ))
+        raise AssertionError(f"Unexpected statement: {sql}")
+
+    def add(self, obj):
+        assert isinstance(obj, CampaignUsage)
+        self.usages.append(obj)
+
+
+def _engine(campaign: Campaign) -> PromotionEngine:
+    engine = PromotionEngine(refresh_seconds=3600)
+    engine._indexes[ORG] = PromotionIndex(ORG, (), [_compile_campaign(campaign)], [])
+    engine._checked_at[ORG] = float("inf")
+    return engine
+
+
+def _basket():
+    basket = build_basket([BasketLine(
+        product_id="p1", product_name="Coffee", sku=None,
+        unit_price=Decimal("10.00"), vat_rate=Decimal(18), quantity=1,
+    )], ORG)
+    basket.customer_id = CUSTOMER
+    return basket
+
+
+async def _checkout(engine: PromotionEngine, redemptions: CodeRedemptions, db: UsageDB) -> Decimal:
+    """Price the basket, then redeem what was applied - as persist_sale does"""
+    basket = _basket()
+    result = await engine.apply(db, basket)
+    for promo in basket.promotions:
+        await redemptions.redeem_campaign(db, promo["id"], CUSTOMER, None, promo["discount"])
+    return result.total_discount
+
+
+def test_customer_checks_out_twice_under_per_customer_limit():
+    now = datetime.utcnow()
+    campaign = Campaign(
+        id="c1", organization_id=ORG, name="Welcome", type=CampaignType.PERCENTAGE_DISCOUNT,
+        discount_percentage=10, applicable_products=["p1"], usage_limit_per_customer=1,
+        current_usage_count=0, starts_at=now - timedelta(days=1), ends_at=now + timedelta(days=1),
+        is_active=True, priority=0,
+    )
+    db = UsageDB(campaign)
+    engine = _engine(campaign)
+    redemptions = CodeRedemptions(negative_ttl_seconds=60)
+
+    first = asyncio.run(_checkout(engine, redemptions, db))
+    second = asyncio.run(_checkout(engine, redemptions, db))
+
+    assert first == Decimal("1.00")
+    assert second == 0  # Priced without the campaign - no redemption error
+    assert len(db.usages) == 1
+    assert campaign.current_usage_count == 1